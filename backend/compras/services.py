@@ -62,28 +62,28 @@ class ServicioCompras:
         
         # Registrar movimientos de inventario solo para productos almacenables
         ServicioInventario = get_inventario_service()
-        movimientos_registrados = []
-        for detalle in compra.detalles.all():
-            if detalle.tipo_linea == 'ALMACENABLE':
-                try:
-                    movimiento = ServicioInventario.registrar_movimiento(
-                        producto=detalle.producto,
-                        almacen=almacen,
-                        tipo_movimiento='ENTRADA_COMPRA',
-                        cantidad=detalle.cantidad,
-                        costo_unitario=detalle.costo_unitario,
-                        usuario=usuario,
-                        empresa=compra.empresa,
-                        referencia=f"COMP-{compra.numero_factura_proveedor}",
-                        notas=f"Compra #{compra.numero_factura_proveedor} - Proveedor: {compra.proveedor.nombre}"
-                    )
-                    # Actualizar el movimiento con referencia al documento origen
-                    movimiento.tipo_documento_origen = 'COMPRA'
-                    movimiento.documento_origen_id = compra.id
-                    movimiento.save()
-                    movimientos_registrados.append(movimiento)
-                except Exception as e:
-                    raise ValidationError(f"Error al registrar movimiento para producto {detalle.producto.nombre}: {str(e)}")
+        try:
+            movimientos_registrados = ServicioInventario.registrar_movimientos_lote(
+                [
+                    {
+                        'producto': detalle.producto,
+                        'almacen': almacen,
+                        'tipo_movimiento': 'ENTRADA_COMPRA',
+                        'cantidad': detalle.cantidad,
+                        'costo_unitario': detalle.costo_unitario,
+                        'tipo_documento_origen': 'COMPRA',
+                        'documento_origen_id': compra.id,
+                    }
+                    for detalle in compra.detalles.select_related('producto')
+                    if detalle.tipo_linea == 'ALMACENABLE'
+                ],
+                usuario=usuario,
+                empresa=compra.empresa,
+                referencia=f"COMP-{compra.numero_factura_proveedor}",
+                notas=f"Compra #{compra.numero_factura_proveedor} - Proveedor: {compra.proveedor.nombre}"
+            )
+        except Exception as e:
+            raise ValidationError(f"Error al registrar movimientos de inventario: {str(e)}")
         
         # Cambiar estado de la compra
         compra.estado = 'CXP'
@@ -119,21 +119,25 @@ class ServicioCompras:
         
         # Revertir movimientos (crear movimientos de salida)
         ServicioInventario = get_inventario_service()
-        for movimiento_original in movimientos:
-            try:
-                ServicioInventario.registrar_movimiento(
-                    producto=movimiento_original.producto,
-                    almacen=movimiento_original.almacen,
-                    tipo_movimiento='SALIDA_AJUSTE',
-                    cantidad=movimiento_original.cantidad,
-                    costo_unitario=movimiento_original.costo_unitario,
-                    usuario=usuario,
-                    empresa=compra.empresa,
-                    referencia=f"ANUL-{compra.numero_factura_proveedor}",
-                    notas=f"Anulación de compra #{compra.numero_factura_proveedor}"
-                )
-            except Exception as e:
-                raise ValidationError(f"Error al revertir movimiento para producto {movimiento_original.producto.nombre}: {str(e)}")
+        try:
+            ServicioInventario.registrar_movimientos_lote(
+                [
+                    {
+                        'producto': movimiento_original.producto,
+                        'almacen': movimiento_original.almacen,
+                        'tipo_movimiento': 'SALIDA_AJUSTE',
+                        'cantidad': movimiento_original.cantidad,
+                        'costo_unitario': movimiento_original.costo_unitario,
+                    }
+                    for movimiento_original in movimientos.select_related('producto', 'almacen')
+                ],
+                usuario=usuario,
+                empresa=compra.empresa,
+                referencia=f"ANUL-{compra.numero_factura_proveedor}",
+                notas=f"Anulación de compra #{compra.numero_factura_proveedor}"
+            )
+        except Exception as e:
+            raise ValidationError(f"Error al revertir movimientos de inventario: {str(e)}")
         
         # Cambiar estado de la compra
         compra.estado = 'ANULADA'
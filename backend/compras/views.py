@@ -46,6 +46,7 @@ from .serializers import (
 )
 from .services import ServicioCompras
 from usuarios.permissions import ActionBasedPermission
+from core.fechas import filtro_rango, limites_mes
 from core.mixins import IdempotencyMixin, EmpresaFilterMixin, EmpresaAuditMixin
 
 logger = logging.getLogger(__name__)
@@ -987,11 +988,16 @@ class RetencionCompraViewSet(EmpresaFilterMixin, IdempotencyMixin, viewsets.Mode
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if not 1 <= mes <= 12:
+            return Response(
+                {'error': 'mes debe estar entre 1 y 12'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         empresa = request.user.empresa
         retenciones = RetencionCompra.objects.filter(
             empresa=empresa,
-            fecha_aplicacion__year=anio,
-            fecha_aplicacion__month=mes
+            **filtro_rango('fecha_aplicacion', *limites_mes(anio, mes))
         )
 
         isr_total = retenciones.filter(
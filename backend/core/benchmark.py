@@ -0,0 +1,198 @@
+"""
+Medición de rendimiento para endpoints y servicios del Sistema de Facturación.
+
+Cada caso se ejecuta dentro de una transacción que se revierte, de modo
+que los servicios que escriben (movimientos, cobros, carga de catálogo)
+pueden medirse repetidamente sin alterar los datos. Por caso se reporta:
+- Latencia p50/p95/media/máxima (ms)
+- Cantidad de consultas SQL de una ejecución
+- Memoria pico asignada en Python durante una ejecución (KB)
+
+Los resultados se guardan como JSON y pueden compararse contra una corrida
+de referencia para detectar regresiones.
+
+Uso:
+    caso = CasoBenchmark('dgii_607', lambda ctx: DGIIService.generar_607(empresa, 2025, 1))
+    resultado = MedidorRendimiento.medir(caso, repeticiones=20)
+    regresiones = MedidorRendimiento.comparar(actual, referencia, umbral=0.2)
+"""
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Diferencia mínima de latencia (ms) para considerar una regresión; evita
+# falsos positivos en casos de pocos milisegundos dominados por ruido.
+MARGEN_MINIMO_MS = 1.0
+
+
+class CasoBenchmark:
+    """
+    Caso a medir.
+
+    Args:
+        nombre: Identificador estable (clave en el JSON de resultados)
+        funcion: Callable(contexto) que ejecuta la operación medida
+        preparar: Callable() opcional ejecutado antes de cada repetición,
+            fuera de la medición; su retorno se pasa como contexto
+    """
+
+    def __init__(self, nombre, funcion, preparar=None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.preparar = preparar
+
+    def __repr__(self):
+        return f"CasoBenchmark({self.nombre!r})"
+
+
+def percentil(valores, p):
+    """
+    Percentil por interpolación lineal (mismo criterio que numpy por defecto).
+
+    Args:
+        valores: Lista no vacía de números
+        p: Percentil entre 0 y 100
+    """
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = math.floor(posicion)
+    superior = math.ceil(posicion)
+    if inferior == superior:
+        return ordenados[inferior]
+    fraccion = posicion - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
+
+
+class MedidorRendimiento:
+    """Ejecuta casos de benchmark y compara corridas"""
+
+    @staticmethod
+    def _ejecutar(caso, instrumentar=False):
+        """
+        Ejecuta el caso una vez dentro de una transacción revertida.
+
+        Returns:
+            tuple: (ms, consultas o None, memoria pico en bytes o None)
+        """
+        with transaction.atomic():
+            contexto = caso.preparar() if caso.preparar else None
+            consultas = memoria = None
+            if instrumentar:
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    caso.funcion(contexto)
+                    ms = (time.perf_counter() - inicio) * 1000
+                memoria = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                consultas = len(capturadas)
+            else:
+                inicio = time.perf_counter()
+                caso.funcion(contexto)
+                ms = (time.perf_counter() - inicio) * 1000
+            transaction.set_rollback(True)
+        return ms, consultas, memoria
+
+    @staticmethod
+    def medir(caso, repeticiones=20, calentamiento=1):
+        """
+        Mide un caso.
+
+        Las repeticiones cronometradas corren sin instrumentación; consultas
+        y memoria se toman en una ejecución adicional (tracemalloc y la
+        captura de SQL alteran los tiempos).
+
+        Returns:
+            dict: p50_ms, p95_ms, media_ms, max_ms, consultas,
+                memoria_pico_kb, repeticiones
+        """
+        for _ in range(calentamiento):
+            MedidorRendimiento._ejecutar(caso)
+
+        tiempos = [MedidorRendimiento._ejecutar(caso)[0] for _ in range(repeticiones)]
+        _, consultas, memoria = MedidorRendimiento._ejecutar(caso, instrumentar=True)
+
+        return {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'media_ms': round(statistics.mean(tiempos), 3),
+            'max_ms': round(max(tiempos), 3),
+            'consultas': consultas,
+            'memoria_pico_kb': round(memoria / 1024, 1),
+            'repeticiones': repeticiones,
+        }
+
+    @staticmethod
+    def ejecutar(casos, repeticiones=20, calentamiento=1, al_medir=None):
+        """
+        Mide una lista de casos.
+
+        Args:
+            casos: Lista de CasoBenchmark
+            al_medir: Callable(nombre, resultado) opcional para reportar avance
+
+        Returns:
+            dict: Corrida serializable a JSON ({'fecha', 'motor', 'casos'})
+        """
+        resultados = {}
+        for caso in casos:
+            resultados[caso.nombre] = MedidorRendimiento.medir(caso, repeticiones, calentamiento)
+            if al_medir:
+                al_medir(caso.nombre, resultados[caso.nombre])
+        return {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'casos': resultados,
+        }
+
+    @staticmethod
+    def comparar(actual, referencia, umbral=0.2):
+        """
+        Compara una corrida contra la de referencia.
+
+        Es regresión:
+        - p95 o memoria pico mayor que la referencia en más de `umbral`
+          (proporción, 0.2 = 20%); la latencia además debe crecer al menos
+          MARGEN_MINIMO_MS
+        - Cualquier consulta SQL adicional
+
+        Los casos que no están en ambas corridas se ignoran.
+
+        Returns:
+            list: [{'caso', 'metrica', 'referencia', 'actual'}]
+        """
+        regresiones = []
+        for nombre, previo in referencia.get('casos', {}).items():
+            nuevo = actual.get('casos', {}).get(nombre)
+            if nuevo is None:
+                continue
+
+            limite_p95 = max(previo['p95_ms'] * (1 + umbral), previo['p95_ms'] + MARGEN_MINIMO_MS)
+            if nuevo['p95_ms'] > limite_p95:
+                regresiones.append({'caso': nombre, 'metrica': 'p95_ms',
+                                    'referencia': previo['p95_ms'], 'actual': nuevo['p95_ms']})
+
+            if nuevo['consultas'] > previo['consultas']:
+                regresiones.append({'caso': nombre, 'metrica': 'consultas',
+                                    'referencia': previo['consultas'], 'actual': nuevo['consultas']})
+
+            if nuevo['memoria_pico_kb'] > previo['memoria_pico_kb'] * (1 + umbral):
+                regresiones.append({'caso': nombre, 'metrica': 'memoria_pico_kb',
+                                    'referencia': previo['memoria_pico_kb'], 'actual': nuevo['memoria_pico_kb']})
+        return regresiones
+
+    @staticmethod
+    def guardar(corrida, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(corrida, archivo, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def cargar(ruta):
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
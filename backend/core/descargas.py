@@ -0,0 +1,153 @@
+"""
+Descarga de archivos con soporte de peticiones parciales (HTTP Range).
+
+Permite reanudar descargas grandes interrumpidas y que los clientes lean
+solo una porción del archivo. Se atiende un único rango por petición
+(bytes=inicio-fin, bytes=inicio- o bytes=-sufijo); si la cabecera pide
+varios rangos, otra unidad o no se puede interpretar, se responde el
+archivo completo, como permite RFC 9110.
+
+Incluye también Eco, el pseudo-archivo con el que csv.writer genera
+líneas para respuestas en streaming (StreamingHttpResponse).
+
+Uso:
+    return respuesta_archivo(request, artefacto.archivo, artefacto.tamano,
+                             'reporte.txt.gz', 'application/gzip',
+                             etag=artefacto.hash_archivo)
+
+    writer = csv.writer(Eco())
+    return StreamingHttpResponse(writer.writerow(fila) for fila in filas)
+"""
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+TAMANO_BLOQUE_DESCARGA = 64 * 1024
+
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class Eco:
+    """Pseudo-archivo para csv.writer: writerow() retorna la línea en lugar de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+class RangoNoSatisfacible(Exception):
+    """El rango pedido empieza después del final del archivo."""
+
+
+class ArchivoNoDisponible(Exception):
+    """El archivo ya no está en el storage."""
+
+
+def rango_solicitado(cabecera, tamano):
+    """
+    Interpreta la cabecera Range.
+
+    Args:
+        cabecera: Valor de Range (o None)
+        tamano: Tamaño del archivo en bytes
+
+    Returns:
+        tuple (inicio, fin) inclusivos, o None para enviar el archivo completo
+
+    Raises:
+        RangoNoSatisfacible: Si el rango no tiene bytes dentro del archivo
+    """
+    coincidencia = _RANGO.match((cabecera or '').strip())
+    if not coincidencia:
+        return None
+
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0 or tamano == 0:
+            raise RangoNoSatisfacible()
+        return max(tamano - sufijo, 0), tamano - 1
+
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        # Rango mal formado: se ignora
+        return None
+    if inicio >= tamano:
+        raise RangoNoSatisfacible()
+    fin = int(fin) if fin else tamano - 1
+    return inicio, min(fin, tamano - 1)
+
+
+def _leer_rango(archivo, inicio, fin):
+    """Genera los bytes [inicio, fin] por bloques y cierra el archivo al terminar."""
+    try:
+        archivo.seek(inicio)
+        restantes = fin - inicio + 1
+        while restantes > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE_DESCARGA, restantes))
+            if not bloque:
+                break
+            restantes -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def respuesta_archivo(request, archivo, tamano, nombre, content_type, etag=None):
+    """
+    Respuesta de descarga de un archivo de storage (FieldFile o File).
+
+    Responde 200 con el archivo completo, 206 con el rango pedido o 416 si
+    el rango no es satisfacible. Con If-Range distinto del ETag actual se
+    ignora Range (el archivo cambió desde la descarga parcial anterior).
+
+    Args:
+        request: HttpRequest
+        archivo: Archivo sin abrir
+        tamano: Tamaño en bytes
+        nombre: Nombre sugerido para Content-Disposition
+        content_type: Tipo MIME
+        etag: Identificador de los bytes servidos (sin comillas), opcional
+
+    Raises:
+        ArchivoNoDisponible: Si el archivo no se puede abrir (quien llama
+            decide si responde 404 o 410)
+    """
+    etag = f'"{etag}"' if etag else None
+    cabecera_rango = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        cabecera_rango = None
+
+    try:
+        rango = rango_solicitado(cabecera_rango, tamano)
+    except RangoNoSatisfacible:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamano}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    try:
+        archivo.open('rb')
+    except (FileNotFoundError, OSError) as e:
+        raise ArchivoNoDisponible(str(e)) from e
+    if rango is None:
+        response = FileResponse(archivo, content_type=content_type)
+        response['Content-Length'] = str(tamano)
+    else:
+        inicio, fin = rango
+        response = StreamingHttpResponse(
+            _leer_rango(archivo, inicio, fin), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+        response['Content-Length'] = str(fin - inicio + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, nombre)
+    if etag:
+        response['ETag'] = etag
+    return response
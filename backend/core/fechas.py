@@ -0,0 +1,114 @@
+"""
+Rangos de fechas para consultas del Sistema de Facturación.
+
+Convierte días, meses y períodos locales (settings.TIME_ZONE,
+America/Santo_Domingo) en rangos semiabiertos [inicio, fin) que se
+comparan directamente contra la columna.
+
+Evita los lookups `__date`, `__year`, `__month`, que envuelven la columna
+en una función (CAST/EXTRACT) e impiden usar los índices (empresa, fecha).
+
+Uso:
+    Factura.objects.filter(empresa=empresa, **filtro_rango('fecha', *rango_mes(2025, 1)))
+    Factura.objects.filter(empresa=empresa, **filtro_rango('fecha', *rango_dias(desde, hasta)))
+    Compra.objects.filter(empresa=empresa, **filtro_rango('fecha_compra', *limites_mes(2025, 1)))
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def inicio_del_dia(fecha, zona=None):
+    """
+    Primer instante de un día local.
+
+    Args:
+        fecha: date del día
+        zona: Zona horaria (default: settings.TIME_ZONE)
+
+    Returns:
+        datetime: Aware, 00:00 del día en la zona indicada
+    """
+    return timezone.make_aware(datetime.combine(fecha, time.min), zona or timezone.get_default_timezone())
+
+
+def rango_dias(fecha_desde, fecha_hasta, zona=None):
+    """
+    Rango semiabierto que cubre los días locales indicados (inclusive).
+
+    Cualquiera de los extremos puede omitirse; el límite correspondiente
+    queda en None, como espera filtro_rango().
+
+    Args:
+        fecha_desde: Primer día (date o None = sin límite)
+        fecha_hasta: Último día (date o None = sin límite), incluido en el rango
+
+    Returns:
+        tuple: (inicio, fin) aware, con fin exclusivo
+    """
+    inicio = inicio_del_dia(fecha_desde, zona) if fecha_desde else None
+    fin = inicio_del_dia(fecha_hasta + timedelta(days=1), zona) if fecha_hasta else None
+    return inicio, fin
+
+
+def rango_dia(fecha, zona=None):
+    """
+    Rango semiabierto de un día local.
+
+    Returns:
+        tuple: (inicio, fin) aware, con fin exclusivo
+    """
+    return rango_dias(fecha, fecha, zona)
+
+
+def limites_mes(anio, mes):
+    """
+    Primer día del mes y primer día del mes siguiente (para DateField).
+
+    Args:
+        anio: Año
+        mes: Mes (1-12)
+
+    Returns:
+        tuple: (date inicio, date fin) con fin exclusivo
+
+    Raises:
+        ValueError: Si el mes no está entre 1 y 12
+    """
+    inicio = date(anio, mes, 1)
+    fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def rango_mes(anio, mes, zona=None):
+    """
+    Rango semiabierto de un mes local (para DateTimeField).
+
+    Returns:
+        tuple: (inicio, fin) aware, con fin exclusivo
+
+    Raises:
+        ValueError: Si el mes no está entre 1 y 12
+    """
+    inicio, fin = limites_mes(anio, mes)
+    return inicio_del_dia(inicio, zona), inicio_del_dia(fin, zona)
+
+
+def filtro_rango(campo, inicio=None, fin=None):
+    """
+    Construye los lookups de un rango semiabierto para filter().
+
+    Args:
+        campo: Nombre del campo (admite relaciones, ej. 'factura__fecha')
+        inicio: Límite inferior inclusivo (None = sin límite)
+        fin: Límite superior exclusivo (None = sin límite)
+
+    Returns:
+        dict: {'<campo>__gte': inicio, '<campo>__lt': fin}
+    """
+    filtros = {}
+    if inicio is not None:
+        filtros[f'{campo}__gte'] = inicio
+    if fin is not None:
+        filtros[f'{campo}__lt'] = fin
+    return filtros
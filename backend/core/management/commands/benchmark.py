@@ -0,0 +1,346 @@
+"""
+Comando de gestión para medir el rendimiento de los endpoints y servicios
+críticos contra una empresa con datos (ver generar_datos_sinteticos).
+
+Cubre los widgets del dashboard (individuales, en lote y con evaluación
+secuencial frente a concurrente, ver EjecutorWidgets), el kardex, los
+reportes DGII 606/607, la entrega de NCF por bloques, la carga de catálogo,
+ServicioInventario.registrar_movimiento, CobroClienteService.aplicar_cobro
+y los listados principales. Reporta p50/p95, consultas SQL y memoria pico
+por caso (ver core.benchmark).
+
+Cada repetición se revierte, así que puede ejecutarse contra cualquier
+base de datos sin modificarla. Con --referencia compara contra una corrida
+anterior y termina con error si alguna métrica empeora más que --umbral.
+
+Uso:
+    python manage.py benchmark --empresa 1
+    python manage.py benchmark --empresa 1 --salida base.json
+    python manage.py benchmark --empresa 1 --referencia base.json --umbral 15
+    python manage.py benchmark --empresa 1 --casos dashboard kardex
+    python manage.py benchmark --empresa 1 --casos secuencial concurrente
+
+En SQLite el modo concurrente cae a secuencial; usar PostgreSQL para
+comparar ambos modos de forma representativa.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from core.benchmark import CasoBenchmark, MedidorRendimiento
+from cuentas_cobrar.constants import ESTADOS_CXC_COBRABLES, METODO_PAGO_EFECTIVO
+from cuentas_cobrar.models import CobroCliente, CuentaPorCobrar
+from cuentas_cobrar.services import CobroClienteService
+from dashboard.cache import DashboardCache
+from dashboard.constants import WIDGETS_DASHBOARD
+from dashboard.services import DashboardService, EjecutorWidgets
+from dgii.constants import TAMANO_BLOQUE_NCF
+from dgii.models import SecuenciaNCF, TipoComprobante
+from dgii.services import AsignadorNCF, GeneradorReportesDGII
+from empresas.models import Empresa
+from inventario.models import InventarioProducto, MovimientoInventario
+from inventario.services import ServicioInventario
+from productos.models import Producto
+from ventas.models import Factura
+
+LISTADOS = {
+    'facturas': '/api/v1/ventas/facturas/',
+    'clientes': '/api/v1/clientes/',
+    'productos': '/api/v1/productos/',
+    'existencias': '/api/v1/inventario/existencias/',
+    'movimientos_inventario': '/api/v1/inventario/movimientos/',
+    'cuentas_por_cobrar': '/api/v1/cxc/cuentas/',
+    'compras': '/api/v1/compras/facturas/',
+    'movimientos_caja': '/api/v1/caja/movimientos/',
+}
+
+# NCF entregados por repetición en los casos dgii.asignar_ncf
+NCF_POR_REPETICION = 200
+
+# Widgets medidos sin caché en modo secuencial y concurrente
+WIDGETS_MODO_EJECUCION = {
+    'resumen': DashboardService.obtener_resumen,
+    'indicadores_financieros': DashboardService.obtener_indicadores_financieros,
+}
+
+
+class Command(BaseCommand):
+    help = 'Mide p50/p95, consultas y memoria de los endpoints y servicios críticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            required=True,
+            help='ID de la empresa a medir',
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=20,
+            help='Ejecuciones cronometradas por caso (default: 20)',
+        )
+        parser.add_argument(
+            '--casos',
+            nargs='*',
+            default=None,
+            help='Solo casos cuyo nombre contenga alguno de estos textos',
+        )
+        parser.add_argument(
+            '--filas-catalogo',
+            type=int,
+            default=200,
+            help='Filas del archivo usado en upload_catalog (default: 200)',
+        )
+        parser.add_argument(
+            '--salida',
+            help='Ruta del JSON donde guardar los resultados',
+        )
+        parser.add_argument(
+            '--referencia',
+            help='JSON de una corrida anterior para detectar regresiones',
+        )
+        parser.add_argument(
+            '--umbral',
+            type=float,
+            default=20.0,
+            help='Empeoramiento tolerado en %% para p95 y memoria (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            empresa = Empresa.objects.get(pk=options['empresa'])
+        except Empresa.DoesNotExist:
+            raise CommandError(f"Empresa {options['empresa']} no existe")
+
+        usuario = get_user_model().objects.filter(empresa=empresa, is_active=True).order_by('id').first()
+        if usuario is None:
+            raise CommandError(f'La empresa {empresa.id} no tiene usuarios activos')
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que cero')
+
+        casos = self._casos(empresa, usuario, options['filas_catalogo'])
+        if options['casos']:
+            casos = [c for c in casos if any(texto in c.nombre for texto in options['casos'])]
+            if not casos:
+                raise CommandError('Ningún caso coincide con --casos')
+        if connection.vendor == 'sqlite' and any(c.nombre.endswith('.concurrente') for c in casos):
+            self.stdout.write(self.style.WARNING('SQLite: el modo concurrente se ejecuta secuencialmente'))
+
+        def al_medir(nombre, r):
+            self.stdout.write(
+                f"{nombre:<40} p50={r['p50_ms']:9.2f} ms  p95={r['p95_ms']:9.2f} ms  "
+                f"consultas={r['consultas']:4d}  memoria={r['memoria_pico_kb']:9.1f} KB"
+            )
+
+        corrida = MedidorRendimiento.ejecutar(casos, options['repeticiones'], al_medir=al_medir)
+        corrida['empresa'] = empresa.id
+
+        if options['salida']:
+            MedidorRendimiento.guardar(corrida, options['salida'])
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if options['referencia']:
+            try:
+                referencia = MedidorRendimiento.cargar(options['referencia'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer la referencia: {e}")
+
+            regresiones = MedidorRendimiento.comparar(corrida, referencia, options['umbral'] / 100)
+            for r in regresiones:
+                self.stdout.write(self.style.ERROR(
+                    f"Regresión en {r['caso']}: {r['metrica']} {r['referencia']} -> {r['actual']}"
+                ))
+            if regresiones:
+                raise CommandError(f'{len(regresiones)} regresiones sobre el umbral de {options["umbral"]}%')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la referencia'))
+
+    # ------------------------------------------------------------------
+    # Casos
+    # ------------------------------------------------------------------
+
+    def _casos(self, empresa, usuario, filas_catalogo):
+        # Solo en memoria (no se guarda): los permisos no deben condicionar la medición
+        usuario.is_staff = usuario.is_superuser = True
+        cliente = APIClient(HTTP_HOST='localhost')
+        cliente.force_authenticate(user=usuario)
+        clave_limite = UserRateThrottle.cache_format % {'scope': 'user', 'ident': usuario.pk}
+
+        def sin_limite():
+            cache.delete(clave_limite)
+
+        def sin_cache_dashboard():
+            sin_limite()
+            DashboardCache.invalidar(empresa.id)
+
+        def consultar(url, **parametros):
+            def funcion(contexto):
+                respuesta = cliente.get(url, parametros)
+                if respuesta.status_code >= 400:
+                    raise CommandError(f'{url}: HTTP {respuesta.status_code}')
+            return funcion
+
+        casos = []
+
+        for widget in WIDGETS_DASHBOARD:
+            casos.append(CasoBenchmark(
+                f'dashboard.{widget}',
+                consultar(f'/api/v1/dashboard/{widget}/'),
+                preparar=sin_cache_dashboard,
+            ))
+
+        def consultar_lote(contexto):
+            respuesta = cliente.post(
+                '/api/v1/dashboard/lote/',
+                {'widgets': [{'widget': widget} for widget in WIDGETS_DASHBOARD]},
+                format='json',
+            )
+            if respuesta.status_code >= 400:
+                raise CommandError(f'dashboard/lote: HTTP {respuesta.status_code}')
+
+        casos.append(CasoBenchmark('dashboard.lote', consultar_lote, preparar=sin_cache_dashboard))
+
+        for widget, calcular in WIDGETS_MODO_EJECUCION.items():
+            for concurrente in (False, True):
+                casos.append(self._caso_modo_ejecucion(empresa, widget, calcular, concurrente))
+
+        for nombre, url in LISTADOS.items():
+            casos.append(CasoBenchmark(f'listado.{nombre}', consultar(url), preparar=sin_limite))
+
+        # Kardex del producto con más movimientos
+        mayor = MovimientoInventario.objects.filter(empresa=empresa).values(
+            'producto_id', 'almacen_id'
+        ).annotate(n=Count('id')).order_by('-n').first()
+        if mayor:
+            casos.append(CasoBenchmark(
+                'inventario.kardex',
+                consultar(
+                    '/api/v1/inventario/movimientos/kardex/',
+                    producto_id=mayor['producto_id'], almacen_id=mayor['almacen_id'],
+                ),
+                preparar=sin_limite,
+            ))
+
+        # Reportes DGII del último mes con ventas
+        ultima = Factura.objects.filter(empresa=empresa).order_by('-fecha').values_list('fecha', flat=True).first()
+        periodo = timezone.localtime(ultima) if ultima else timezone.localtime()
+        casos.append(CasoBenchmark(
+            'dgii.generar_606',
+            lambda contexto: GeneradorReportesDGII.generar_606(empresa, periodo.year, periodo.month),
+        ))
+        casos.append(CasoBenchmark(
+            'dgii.generar_607',
+            lambda contexto: GeneradorReportesDGII.generar_607(empresa, periodo.year, periodo.month),
+        ))
+
+        # Rendimiento de NCF: bloque de 1 equivale a bloquear la secuencia por cada NCF
+        for tamano in (1, TAMANO_BLOQUE_NCF):
+            casos.append(self._caso_asignar_ncf(empresa, tamano))
+
+        casos.append(self._caso_upload_catalog(empresa, cliente, sin_limite, filas_catalogo))
+
+        inventario = InventarioProducto.objects.filter(empresa=empresa).select_related(
+            'producto', 'almacen'
+        ).order_by('id').first()
+        if inventario:
+            casos.append(CasoBenchmark(
+                'inventario.registrar_movimiento',
+                lambda contexto: ServicioInventario.registrar_movimiento(
+                    producto=inventario.producto,
+                    almacen=inventario.almacen,
+                    tipo_movimiento='ENTRADA_AJUSTE',
+                    cantidad=Decimal('1'),
+                    costo_unitario=inventario.costo_promedio,
+                    usuario=usuario,
+                    empresa=empresa,
+                    referencia='BENCHMARK',
+                ),
+            ))
+
+        cuenta = CuentaPorCobrar.objects.filter(
+            empresa=empresa, estado__in=ESTADOS_CXC_COBRABLES, monto_pendiente__gt=0
+        ).select_related('cliente').order_by('id').first()
+        if cuenta:
+            def preparar_cobro():
+                return CobroCliente.objects.create(
+                    empresa=empresa,
+                    cliente=cuenta.cliente,
+                    numero_recibo=f'BENCH-{timezone.now():%Y%m%d%H%M%S%f}',
+                    fecha_cobro=timezone.localdate(),
+                    monto=cuenta.monto_pendiente,
+                    metodo_pago=METODO_PAGO_EFECTIVO,
+                    usuario_creacion=usuario,
+                )
+
+            casos.append(CasoBenchmark(
+                'cxc.aplicar_cobro',
+                lambda cobro: CobroClienteService.aplicar_cobro(
+                    cobro,
+                    [{'cuenta_por_cobrar_id': cuenta.id, 'monto_aplicado': cuenta.monto_pendiente}],
+                    usuario=usuario,
+                ),
+                preparar=preparar_cobro,
+            ))
+
+        return casos
+
+    def _caso_modo_ejecucion(self, empresa, widget, calcular, concurrente):
+        """Calcula el widget (sin caché) con el modo de EjecutorWidgets forzado"""
+        def funcion(contexto):
+            with EjecutorWidgets.forzar_modo(concurrente):
+                calcular(empresa)
+
+        modo = 'concurrente' if concurrente else 'secuencial'
+        return CasoBenchmark(f'dashboard.{widget}.{modo}', funcion)
+
+    def _caso_asignar_ncf(self, empresa, tamano):
+        """Entrega NCF_POR_REPETICION números de una secuencia temporal"""
+        def preparar():
+            tipo, _ = TipoComprobante.objects.get_or_create(
+                empresa=empresa, codigo='02', defaults={'nombre': 'Factura de Consumo', 'prefijo': 'B'}
+            )
+            return SecuenciaNCF.objects.create(
+                empresa=empresa,
+                tipo_comprobante=tipo,
+                descripcion='Benchmark',
+                secuencia_inicial=90000000,
+                secuencia_final=99999999,
+                secuencia_actual=90000000,
+                fecha_vencimiento=timezone.localdate() + timedelta(days=30),
+            ).pk
+
+        def funcion(secuencia_id):
+            for _ in range(NCF_POR_REPETICION):
+                AsignadorNCF.siguiente_ncf(secuencia_id, titular='benchmark', tamano=tamano)
+
+        return CasoBenchmark(f'dgii.asignar_ncf.bloque_{tamano}', funcion, preparar=preparar)
+
+    def _caso_upload_catalog(self, empresa, cliente, sin_limite, filas):
+        """Mitad de filas actualiza productos existentes y mitad crea nuevos"""
+        existentes = list(
+            Producto.objects.filter(empresa=empresa).order_by('id').values_list('codigo_sku', flat=True)[:filas // 2]
+        )
+        nuevos = [f'BENCH-{i:06d}' for i in range(filas - len(existentes))]
+        lineas = ['codigo_sku,nombre,precio_venta_base,impuesto_itbis']
+        lineas += [f'{sku},Producto {sku},{100 + i}.50,18' for i, sku in enumerate(existentes + nuevos)]
+        contenido = '\n'.join(lineas).encode('utf-8')
+
+        def preparar():
+            sin_limite()
+            return SimpleUploadedFile('catalogo.csv', contenido, content_type='text/csv')
+
+        def funcion(archivo):
+            respuesta = cliente.post('/api/v1/productos/upload-catalog/', {'file': archivo}, format='multipart')
+            if respuesta.status_code >= 400:
+                raise CommandError(f'upload-catalog: HTTP {respuesta.status_code}')
+
+        return CasoBenchmark('productos.upload_catalog', funcion, preparar=preparar)
@@ -0,0 +1,590 @@
+"""
+Comando de gestión para generar un conjunto de datos sintético y
+reproducible (pruebas de carga y benchmarks).
+
+Crea varias empresas con clientes, productos, facturas y sus líneas,
+movimientos de inventario, cuentas por cobrar (ventas a crédito) y
+movimientos de caja (ventas de contado). Se respetan las reglas de los
+modelos:
+- Los saldos corridos de inventario nunca quedan negativos: antes de una
+  salida sin existencia suficiente se registra una entrada de compra.
+- Totales, ITBIS y monto pendiente cuadran con las líneas de la factura.
+- Las ventas a crédito no exceden el límite del cliente.
+- Una muestra de cada lote pasa por full_clean() antes de insertarse.
+
+Las filas se insertan con bulk_create por lotes y cada empresa se genera
+en su propio hilo (en SQLite se generan secuencialmente). La misma
+--semilla produce siempre los mismos datos.
+
+bulk_create no dispara signals: al terminar se reconstruyen los
+resúmenes y el feed de actividad del dashboard de cada empresa (omitir
+con --sin-resumenes) y se
+marcan como pendientes los saldos de inventario por fecha de corte
+posteriores a los movimientos insertados con fecha pasada.
+
+Uso:
+    python manage.py generar_datos_sinteticos
+    python manage.py generar_datos_sinteticos --empresas 5 --facturas 200000
+    python manage.py generar_datos_sinteticos --empresas 4 --facturas 250000 --hilos 4 --semilla 7
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from caja.models import Caja, MovimientoCaja, SesionCaja
+from clientes.constants import TIPO_IDENTIFICACION_CEDULA, TIPO_IDENTIFICACION_RNC
+from clientes.models import Cliente
+from core.fechas import inicio_del_dia
+from cuentas_cobrar.constants import ESTADO_CXC_PENDIENTE, ESTADO_CXC_VENCIDA
+from cuentas_cobrar.models import CuentaPorCobrar
+from dashboard.cache import DashboardCache
+from dashboard.services import ActividadService, RankingVentasService, VentaDiariaService
+from empresas.models import Empresa
+from inventario.models import Almacen, InventarioProducto, MovimientoInventario, SaldoInventario
+from inventario.services import ServicioSaldosInventario
+from productos.models import Producto
+from ventas.constants import (
+    ESTADO_FACTURA_CANCELADA,
+    ESTADO_FACTURA_PAGADA,
+    ESTADO_FACTURA_PENDIENTE_PAGO,
+    TIPO_VENTA_CONTADO,
+    TIPO_VENTA_CREDITO,
+)
+from ventas.models import DetalleFactura, Factura
+
+CENTAVO = Decimal('0.01')
+CERO = Decimal('0')
+PRECIO_MAXIMO_CENTAVOS = 500000
+CANTIDAD_MAXIMA = 10
+DIAS_CREDITO = 30
+
+# Proporción de facturas canceladas y a crédito (el resto, contado pagado)
+PROPORCION_CANCELADAS = 0.03
+PROPORCION_CREDITO = 0.25
+
+# Campos auto_now_add que deben conservar la fecha histórica generada
+CAMPOS_FECHA_HISTORICA = (
+    (Factura, 'fecha'),
+    (Factura, 'fecha_creacion'),
+    (MovimientoInventario, 'fecha'),
+    (SesionCaja, 'fecha_apertura'),
+    (SesionCaja, 'fecha_creacion'),
+    (MovimientoCaja, 'fecha'),
+    (MovimientoCaja, 'fecha_creacion'),
+)
+
+_bloqueo_fechas = threading.Lock()
+_usos_fechas = 0
+
+
+@contextmanager
+def fechas_historicas():
+    """
+    Desactiva auto_now_add en los campos de fecha de los documentos para
+    que bulk_create conserve las fechas pasadas asignadas.
+
+    Reentrante entre hilos: se restaura al salir el último usuario.
+    """
+    global _usos_fechas
+    campos = [modelo._meta.get_field(nombre) for modelo, nombre in CAMPOS_FECHA_HISTORICA]
+    with _bloqueo_fechas:
+        _usos_fechas += 1
+        for campo in campos:
+            campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        with _bloqueo_fechas:
+            _usos_fechas -= 1
+            if not _usos_fechas:
+                for campo in campos:
+                    campo.auto_now_add = True
+
+
+class GeneradorEmpresa:
+    """Genera los datos de una empresa sintética con su propia semilla"""
+
+    def __init__(self, indice, opciones, notificar=None):
+        self.indice = indice
+        self.semilla = opciones['semilla']
+        self.rng = random.Random(f"{self.semilla}-{indice}")
+        self.total_facturas = opciones['facturas']
+        self.max_lineas = opciones['lineas']
+        self.n_clientes = opciones['clientes']
+        self.n_productos = opciones['productos']
+        self.dias = opciones['dias']
+        self.lote = opciones['lote']
+        self.notificar = notificar or (lambda mensaje: None)
+        self.conteo = {}
+
+        # Cubre la factura más cara posible: ninguna venta a crédito lo excede
+        self.limite_credito = Decimal(PRECIO_MAXIMO_CENTAVOS * CANTIDAD_MAXIMA * self.max_lineas) / 100 * Decimal('1.18')
+        self.rnc = f"9{self.semilla % 10000:04d}{indice:04d}"
+        self.existencias = {}
+        self.secuencias_ncf = {'B01': 0, 'B02': 0}
+        self.sesiones = {}
+        self.total_sesion = {}
+        # Fecha del primer movimiento de inventario por producto
+        self.primer_movimiento = {}
+
+    def ejecutar(self):
+        """
+        Genera todos los datos de la empresa.
+
+        Returns:
+            dict: Empresa creada, filas insertadas por modelo y segundos
+        """
+        inicio = time.perf_counter()
+        with fechas_historicas():
+            with transaction.atomic():
+                self._crear_maestros()
+            for desde in range(0, self.total_facturas, self.lote):
+                hasta = min(desde + self.lote, self.total_facturas)
+                with transaction.atomic():
+                    self._crear_lote(desde, hasta)
+                self.notificar(f'{self.empresa.nombre}: {hasta}/{self.total_facturas} facturas')
+            with transaction.atomic():
+                self._cerrar()
+        return {
+            'empresa': self.empresa,
+            'filas': self.conteo,
+            'segundos': time.perf_counter() - inicio,
+        }
+
+    def ejecutar_en_hilo(self):
+        """ejecutar() con la conexión propia del hilo abierta y cerrada"""
+        close_old_connections()
+        try:
+            return self.ejecutar()
+        finally:
+            close_old_connections()
+
+    # ------------------------------------------------------------------
+    # Datos maestros
+    # ------------------------------------------------------------------
+
+    def _crear_maestros(self):
+        if Empresa.objects.filter(rnc=self.rnc).exists():
+            raise CommandError(
+                f'Ya existe una empresa con RNC {self.rnc}; use otra --semilla'
+            )
+
+        self.empresa = Empresa.objects.create(
+            nombre=f'Empresa Sintética {self.semilla}-{self.indice}',
+            rnc=self.rnc,
+        )
+        self.usuario = get_user_model().objects.create_user(
+            username=f'sintetico_{self.rnc}',
+            empresa=self.empresa,
+        )
+        self.almacen = Almacen.objects.create(
+            empresa=self.empresa,
+            nombre='Almacén Principal',
+            usuario_creacion=self.usuario,
+        )
+        self.caja = Caja.objects.create(
+            empresa=self.empresa,
+            nombre='Caja Principal',
+            usuario_creacion=self.usuario,
+        )
+
+        clientes = []
+        for i in range(1, self.n_clientes + 1):
+            es_rnc = i % 4 == 0
+            clientes.append(Cliente(
+                empresa=self.empresa,
+                nombre=f'Cliente {i:06d}',
+                tipo_identificacion=TIPO_IDENTIFICACION_RNC if es_rnc else TIPO_IDENTIFICACION_CEDULA,
+                numero_identificacion=f'1{i:08d}' if es_rnc else f'4{i:010d}',
+                limite_credito=self.limite_credito,
+                usuario_creacion=self.usuario,
+            ))
+        self.clientes = self._insertar(Cliente, clientes)
+
+        productos = []
+        self.costos = {}
+        for i in range(1, self.n_productos + 1):
+            precio = Decimal(self.rng.randint(5000, PRECIO_MAXIMO_CENTAVOS)) / 100
+            exento = self.rng.random() < 0.1
+            producto = Producto(
+                empresa=self.empresa,
+                codigo_sku=f'SIN-{i:06d}',
+                nombre=f'Producto {i:06d}',
+                precio_venta_base=precio,
+                impuesto_itbis=CERO if exento else Decimal('18.00'),
+                es_exento=exento,
+                usuario_creacion=self.usuario,
+            )
+            productos.append(producto)
+        self.productos = self._insertar(Producto, productos)
+        for producto in self.productos:
+            factor = Decimal(self.rng.randint(55, 80)) / 100
+            self.costos[producto.id] = (producto.precio_venta_base * factor).quantize(CENTAVO)
+            self.existencias[producto.id] = CERO
+
+        self.inventarios = self._insertar(InventarioProducto, [
+            InventarioProducto(
+                empresa=self.empresa,
+                producto=producto,
+                almacen=self.almacen,
+                cantidad_disponible=CERO,
+                costo_promedio=self.costos[producto.id],
+            )
+            for producto in self.productos
+        ])
+
+        self.hoy = timezone.localdate()
+        self.inicio_periodo = inicio_del_dia(self.hoy - timedelta(days=self.dias))
+        # Facturas repartidas uniformemente hasta el final de ayer
+        self.segundos_por_factura = self.dias * 86400 / max(self.total_facturas, 1)
+
+    # ------------------------------------------------------------------
+    # Documentos
+    # ------------------------------------------------------------------
+
+    def _crear_lote(self, desde, hasta):
+        rng = self.rng
+        facturas = []
+        lineas = []
+
+        for i in range(desde, hasta):
+            # Fechas crecientes sin necesidad de ordenar: un hueco fijo con ruido
+            fecha = self.inicio_periodo + timedelta(
+                seconds=int((i + rng.random()) * self.segundos_por_factura)
+            )
+            cliente = rng.choice(self.clientes)
+            azar = rng.random()
+            if azar < PROPORCION_CANCELADAS:
+                estado, tipo_venta = ESTADO_FACTURA_CANCELADA, TIPO_VENTA_CONTADO
+            elif azar < PROPORCION_CANCELADAS + PROPORCION_CREDITO:
+                estado, tipo_venta = ESTADO_FACTURA_PENDIENTE_PAGO, TIPO_VENTA_CREDITO
+            else:
+                estado, tipo_venta = ESTADO_FACTURA_PAGADA, TIPO_VENTA_CONTADO
+
+            detalle = []
+            subtotal = itbis = CERO
+            for producto in rng.sample(self.productos, rng.randint(1, self.max_lineas)):
+                cantidad = Decimal(rng.randint(1, CANTIDAD_MAXIMA))
+                base = cantidad * producto.precio_venta_base
+                itbis_linea = (base * producto.impuesto_itbis / 100).quantize(CENTAVO, ROUND_HALF_UP)
+                subtotal += base
+                itbis += itbis_linea
+                detalle.append((producto, cantidad, itbis_linea))
+            total = subtotal + itbis
+
+            prefijo = 'B01' if cliente.tipo_identificacion == TIPO_IDENTIFICACION_RNC else 'B02'
+            self.secuencias_ncf[prefijo] += 1
+
+            facturas.append(Factura(
+                empresa=self.empresa,
+                cliente=cliente,
+                fecha=fecha,
+                fecha_creacion=fecha,
+                numero_factura=f'S{self.rnc}-{i + 1:08d}',
+                ncf=f'{prefijo}{self.secuencias_ncf[prefijo]:08d}',
+                estado=estado,
+                tipo_venta=tipo_venta,
+                subtotal=subtotal,
+                itbis=itbis,
+                total=total,
+                monto_pendiente=total if tipo_venta == TIPO_VENTA_CREDITO else CERO,
+                usuario=self.usuario,
+            ))
+            lineas.append(detalle)
+
+        facturas = self._insertar(Factura, facturas)
+
+        detalles, movimientos, cuentas, movimientos_caja = [], [], [], []
+        for factura, detalle in zip(facturas, lineas):
+            for producto, cantidad, itbis_linea in detalle:
+                detalles.append(DetalleFactura(
+                    factura=factura,
+                    producto=producto,
+                    cantidad=cantidad,
+                    precio_unitario=producto.precio_venta_base,
+                    itbis=itbis_linea,
+                ))
+                if factura.estado != ESTADO_FACTURA_CANCELADA:
+                    movimientos.extend(self._movimientos_venta(factura, producto, cantidad))
+
+            if factura.tipo_venta == TIPO_VENTA_CREDITO:
+                cuentas.append(self._cuenta_por_cobrar(factura))
+            elif factura.estado == ESTADO_FACTURA_PAGADA:
+                movimientos_caja.append(self._movimiento_caja(factura))
+
+        self._insertar(DetalleFactura, detalles)
+        self._insertar(MovimientoInventario, movimientos)
+        for movimiento in movimientos:
+            anterior = self.primer_movimiento.get(movimiento.producto_id)
+            if anterior is None or movimiento.fecha < anterior:
+                self.primer_movimiento[movimiento.producto_id] = movimiento.fecha
+        self._insertar(CuentaPorCobrar, cuentas)
+        self._insertar(MovimientoCaja, movimientos_caja)
+
+    def _movimientos_venta(self, factura, producto, cantidad):
+        """Salida por venta, precedida de una entrada si no alcanza la existencia"""
+        comunes = {
+            'empresa': self.empresa,
+            'producto': producto,
+            'almacen': self.almacen,
+            'costo_unitario': self.costos[producto.id],
+            'usuario': self.usuario,
+            'usuario_creacion': self.usuario,
+        }
+        movimientos = []
+        if self.existencias[producto.id] < cantidad:
+            reposicion = cantidad + self.rng.randint(50, 200)
+            self.existencias[producto.id] += reposicion
+            movimientos.append(MovimientoInventario(
+                tipo_movimiento='ENTRADA_COMPRA',
+                cantidad=reposicion,
+                fecha=factura.fecha - timedelta(seconds=1),
+                referencia=f'REP-{factura.numero_factura}',
+                tipo_documento_origen='COMPRA',
+                **comunes,
+            ))
+        self.existencias[producto.id] -= cantidad
+        movimientos.append(MovimientoInventario(
+            tipo_movimiento='SALIDA_VENTA',
+            cantidad=cantidad,
+            fecha=factura.fecha,
+            referencia=factura.numero_factura,
+            tipo_documento_origen='FACTURA',
+            documento_origen_id=factura.id,
+            **comunes,
+        ))
+        return movimientos
+
+    def _cuenta_por_cobrar(self, factura):
+        fecha_documento = timezone.localdate(factura.fecha)
+        fecha_vencimiento = fecha_documento + timedelta(days=DIAS_CREDITO)
+        return CuentaPorCobrar(
+            empresa=self.empresa,
+            cliente=factura.cliente,
+            factura=factura,
+            numero_documento=factura.numero_factura,
+            fecha_documento=fecha_documento,
+            fecha_vencimiento=fecha_vencimiento,
+            monto_original=factura.total,
+            monto_cobrado=CERO,
+            estado=ESTADO_CXC_VENCIDA if fecha_vencimiento < self.hoy else ESTADO_CXC_PENDIENTE,
+            usuario_creacion=self.usuario,
+        )
+
+    def _movimiento_caja(self, factura):
+        sesion = self._sesion_del_dia(timezone.localdate(factura.fecha))
+        self.total_sesion[sesion.id] += factura.total
+        return MovimientoCaja(
+            empresa=self.empresa,
+            sesion=sesion,
+            tipo_movimiento='VENTA',
+            monto=factura.total,
+            descripcion=f'Cobro factura {factura.numero_factura}',
+            fecha=factura.fecha,
+            fecha_creacion=factura.fecha,
+            referencia=factura.numero_factura,
+            usuario=self.usuario,
+            usuario_creacion=self.usuario,
+        )
+
+    def _sesion_del_dia(self, dia):
+        """Una sesión de caja por día; queda abierta hasta _cerrar()"""
+        sesion = self.sesiones.get(dia)
+        if sesion is None:
+            apertura = inicio_del_dia(dia)
+            sesion = self._insertar(SesionCaja, [SesionCaja(
+                empresa=self.empresa,
+                caja=self.caja,
+                usuario=self.usuario,
+                fecha_apertura=apertura,
+                fecha_creacion=apertura,
+                monto_apertura=CERO,
+                estado='ABIERTA',
+                usuario_creacion=self.usuario,
+            )])[0]
+            self.sesiones[dia] = sesion
+            self.total_sesion[sesion.id] = CERO
+        return sesion
+
+    # ------------------------------------------------------------------
+    # Cierre
+    # ------------------------------------------------------------------
+
+    def _cerrar(self):
+        """
+        Guarda las existencias finales, cierra las sesiones de caja y marca
+        los cortes de saldos posteriores a los movimientos generados
+        """
+        for inventario in self.inventarios:
+            inventario.cantidad_disponible = self.existencias[inventario.producto_id]
+        InventarioProducto.objects.bulk_update(
+            self.inventarios, ['cantidad_disponible'], batch_size=self.lote
+        )
+
+        # Los movimientos llevan fechas pasadas: los cortes ya generados
+        # después de ellas no los incluyen
+        if self.primer_movimiento and SaldoInventario.objects.filter(
+            fecha_corte__gt=min(self.primer_movimiento.values())
+        ).exists():
+            for producto_id, desde in self.primer_movimiento.items():
+                ServicioSaldosInventario.marcar_pendientes(
+                    producto_id, self.almacen.id, desde, empresa_id=self.empresa.id
+                )
+
+        sesiones = []
+        for dia, sesion in self.sesiones.items():
+            total = self.total_sesion[sesion.id]
+            sesion.estado = 'CERRADA'
+            sesion.fecha_cierre = inicio_del_dia(dia + timedelta(days=1)) - timedelta(seconds=1)
+            sesion.monto_cierre_sistema = total
+            sesion.monto_cierre_usuario = total
+            sesion.diferencia = CERO
+            sesiones.append(sesion)
+        SesionCaja.objects.bulk_update(
+            sesiones,
+            ['estado', 'fecha_cierre', 'monto_cierre_sistema', 'monto_cierre_usuario', 'diferencia'],
+            batch_size=self.lote,
+        )
+
+    def _insertar(self, modelo, objetos):
+        """Valida una muestra del lote con full_clean() e inserta con bulk_create"""
+        if not objetos:
+            return objetos
+        muestra = objetos[0]
+        if modelo is MovimientoInventario:
+            # Las salidas validan contra la existencia guardada, que se
+            # actualiza al final; la primera entrada representa al lote.
+            muestra = next((m for m in objetos if m.tipo_movimiento == 'ENTRADA_COMPRA'), None)
+        if muestra is not None:
+            muestra.full_clean(validate_unique=False, validate_constraints=False)
+
+        creados = modelo.objects.bulk_create(objetos, batch_size=self.lote)
+        self.conteo[modelo.__name__] = self.conteo.get(modelo.__name__, 0) + len(creados)
+        return creados
+
+
+class Command(BaseCommand):
+    help = 'Genera un conjunto de datos sintético y reproducible para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresas',
+            type=int,
+            default=3,
+            help='Cantidad de empresas a generar (default: 3)',
+        )
+        parser.add_argument(
+            '--facturas',
+            type=int,
+            default=10000,
+            help='Facturas por empresa (default: 10000)',
+        )
+        parser.add_argument(
+            '--lineas',
+            type=int,
+            default=4,
+            help='Máximo de líneas por factura (default: 4)',
+        )
+        parser.add_argument(
+            '--clientes',
+            type=int,
+            default=500,
+            help='Clientes por empresa (default: 500)',
+        )
+        parser.add_argument(
+            '--productos',
+            type=int,
+            default=200,
+            help='Productos por empresa (default: 200)',
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=365,
+            help='Días de historia hasta ayer (default: 365)',
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=42,
+            help='Semilla del generador; también forma el RNC de las empresas (default: 42)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Facturas por lote/transacción (default: 1000)',
+        )
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=None,
+            help='Empresas generadas en paralelo (default: una por empresa)',
+        )
+        parser.add_argument(
+            '--sin-resumenes',
+            action='store_true',
+            help='No reconstruir los resúmenes ni el feed de actividad del dashboard al terminar',
+        )
+
+    def handle(self, *args, **options):
+        for opcion in ('empresas', 'facturas', 'lineas', 'clientes', 'productos', 'dias', 'lote'):
+            if options[opcion] < 1:
+                raise CommandError(f'--{opcion} debe ser mayor que cero')
+        if options['lineas'] > options['productos']:
+            raise CommandError('--lineas no puede exceder --productos')
+
+        hilos = options['hilos'] or options['empresas']
+        if connection.vendor == 'sqlite' and hilos > 1:
+            self.stdout.write(self.style.WARNING(
+                'SQLite: las empresas se generan secuencialmente'
+            ))
+            hilos = 1
+
+        bloqueo = threading.Lock()
+
+        def notificar(mensaje):
+            with bloqueo:
+                self.stdout.write(mensaje)
+
+        generadores = [
+            GeneradorEmpresa(indice, options, notificar)
+            for indice in range(1, options['empresas'] + 1)
+        ]
+
+        inicio = time.perf_counter()
+        if hilos > 1:
+            with ThreadPoolExecutor(max_workers=hilos) as pool:
+                resultados = list(pool.map(GeneradorEmpresa.ejecutar_en_hilo, generadores))
+        else:
+            resultados = [generador.ejecutar() for generador in generadores]
+
+        total_filas = 0
+        for resultado in resultados:
+            empresa = resultado['empresa']
+            if not options['sin_resumenes']:
+                VentaDiariaService.reconstruir(empresa=empresa)
+                RankingVentasService.reconstruir(empresa=empresa)
+                ActividadService.reconstruir(empresa=empresa)
+                DashboardCache.invalidar(empresa.id)
+
+            filas = sum(resultado['filas'].values())
+            total_filas += filas
+            detalle = ', '.join(f'{modelo}={cantidad}' for modelo, cantidad in resultado['filas'].items())
+            self.stdout.write(
+                f'{empresa.nombre} (id={empresa.id}, RNC {empresa.rnc}): '
+                f'{filas} filas en {resultado["segundos"]:.1f} s [{detalle}]'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_filas} filas generadas en {time.perf_counter() - inicio:.1f} s'
+        ))
@@ -181,6 +181,11 @@ try:
 except ImportError:
     pass
 
+# Archivos generados (artefactos de reportes DGII). No se publican: se
+# descargan a través de la API, que valida empresa y permisos.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
@@ -334,6 +339,39 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Sistema Facturacion <noreply@facturacion.local>')
 
+# =============================================================================
+# Cache Configuration
+# =============================================================================
+# LocMemCache es por proceso: con varios workers (gunicorn) configurar REDIS_URL
+# para que la invalidación del caché del dashboard se comparta entre procesos.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Dashboard: TTL (segundos) de los widgets cacheados por empresa.
+# Es un respaldo; los cambios en documentos invalidan el caché vía signals.
+# 0 deshabilita el caché del dashboard.
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 60))
+
+# Dashboard: evaluar en paralelo las sub-consultas independientes de un widget
+# (pool de hilos acotado, una conexión por hilo). En SQLite siempre es secuencial.
+DASHBOARD_EJECUCION_CONCURRENTE = os.getenv('DASHBOARD_EJECUCION_CONCURRENTE', 'False') == 'True'
+DASHBOARD_MAX_WORKERS = int(os.getenv('DASHBOARD_MAX_WORKERS', 4))
+
+# Inventario: período de los saldos por fecha de corte (SaldoInventario) que
+# genera la tarea generar_saldos_inventario: mensual, semanal o diaria.
+INVENTARIO_PERIODICIDAD_SALDOS = os.getenv('INVENTARIO_PERIODICIDAD_SALDOS', 'mensual')
+
 # =============================================================================
 # Django 6.0 - Background Tasks Configuration
 # =============================================================================
@@ -6,8 +6,11 @@ sistema de notificaciones por email implementados con Django Tasks.
 """
 from django.test import TestCase, override_settings
 from django.core import mail
+from django.db import connection
+from django.utils import timezone
 from decimal import Decimal
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock
 
 from empresas.models import Empresa
@@ -225,9 +228,18 @@ class DGIIReportTaskTest(TestCase):
     """Tests para las tareas de reportes DGII"""
 
     def setUp(self):
+        import shutil
+        import tempfile
         from proveedores.models import Proveedor
         from compras.models import Compra
 
+        # Los archivos de las tareas van a un MEDIA_ROOT temporal
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
         self.empresa = Empresa.objects.create(
             nombre='Empresa Test',
             rnc='123456789'
@@ -265,8 +277,9 @@ class DGIIReportTaskTest(TestCase):
         )
 
         self.assertEqual(result['status'], 'completed')
-        self.assertIn('registros', result)
-        self.assertEqual(len(result['registros']), 1)
+        self.assertEqual(result['cantidad_registros'], 1)
+        self.assertNotIn('registros', result)
+        self.assertEqual(set(result['artefactos']), {'txt', 'json'})
 
     def test_generar_reporte_606_sin_datos(self):
         """Test: Generar reporte 606 sin datos"""
@@ -279,7 +292,7 @@ class DGIIReportTaskTest(TestCase):
         )
 
         self.assertEqual(result['status'], 'completed')
-        self.assertEqual(len(result['registros']), 0)
+        self.assertEqual(result['cantidad_registros'], 0)
 
 
 class GeneratedFieldTest(TestCase):
@@ -502,3 +515,345 @@ class PaginationTest(TestCase):
         self.assertEqual(response.data['page'], 3)
         self.assertFalse(response.data['has_next'])
         self.assertTrue(response.data['has_previous'])
+
+
+class RangosFechasTest(TestCase):
+    """Tests para los rangos de fechas semiabiertos de core.fechas"""
+
+    def setUp(self):
+        from clientes.models import Cliente
+        from usuarios.models import User
+
+        self.empresa = Empresa.objects.create(nombre='Empresa Fechas', rnc='623456789')
+        self.user = User.objects.create_user(
+            username='fechas', password='testpass123', empresa=self.empresa
+        )
+        self.cliente = Cliente.objects.create(
+            empresa=self.empresa,
+            nombre='Cliente Fechas',
+            tipo_identificacion='RNC',
+            numero_identificacion='987654500'
+        )
+
+    def _crear_factura(self, numero, fecha_local):
+        """Crea una factura y fija su fecha a una hora local concreta"""
+        from ventas.models import Factura
+
+        factura = Factura.objects.create(
+            empresa=self.empresa,
+            cliente=self.cliente,
+            numero_factura=numero,
+            total=Decimal('100.00'),
+            usuario=self.user
+        )
+        Factura.objects.filter(pk=factura.pk).update(fecha=timezone.make_aware(fecha_local))
+        return factura
+
+    def test_rango_mes_en_hora_local(self):
+        """Test: El mes va de 00:00 local del día 1 a 00:00 local del mes siguiente"""
+        from core.fechas import rango_mes
+
+        inicio, fin = rango_mes(2025, 12)
+
+        self.assertEqual(inicio.isoformat(), '2025-12-01T00:00:00-04:00')
+        self.assertEqual(fin.isoformat(), '2026-01-01T00:00:00-04:00')
+
+    def test_limites_mes_para_datefield(self):
+        """Test: limites_mes devuelve fechas con fin exclusivo"""
+        from core.fechas import limites_mes
+
+        self.assertEqual(limites_mes(2024, 2), (date(2024, 2, 1), date(2024, 3, 1)))
+        with self.assertRaises(ValueError):
+            limites_mes(2024, 13)
+
+    def test_rango_dias_incluye_ultimo_dia(self):
+        """Test: rango_dias cubre completo el último día indicado"""
+        from core.fechas import rango_dias
+
+        inicio, fin = rango_dias(date(2025, 3, 1), date(2025, 3, 31))
+
+        self.assertEqual(fin - inicio, timedelta(days=31))
+
+    def test_rango_dias_con_extremos_abiertos(self):
+        """Test: rango_dias deja en None el extremo omitido"""
+        from core.fechas import inicio_del_dia, rango_dias
+
+        self.assertEqual(rango_dias(None, date(2025, 3, 31)), (None, inicio_del_dia(date(2025, 4, 1))))
+        self.assertEqual(rango_dias(date(2025, 3, 1), None), (inicio_del_dia(date(2025, 3, 1)), None))
+
+    def test_filtro_rango_omite_limites_vacios(self):
+        """Test: filtro_rango solo genera los lookups indicados"""
+        from core.fechas import filtro_rango
+
+        self.assertEqual(filtro_rango('fecha', 1, None), {'fecha__gte': 1})
+        self.assertEqual(filtro_rango('fecha', None, 2), {'fecha__lt': 2})
+
+    def test_bordes_del_mes_en_hora_local(self):
+        """Test: Las facturas se asignan al mes local, no al mes UTC"""
+        from core.fechas import filtro_rango, rango_mes
+        from ventas.models import Factura
+
+        # 31 ene 23:30 local es 1 feb 03:30 UTC
+        self._crear_factura('FAC-FECHA-1', datetime(2025, 1, 31, 23, 30))
+        self._crear_factura('FAC-FECHA-2', datetime(2025, 2, 1, 0, 0))
+        self._crear_factura('FAC-FECHA-3', datetime(2025, 1, 1, 0, 0))
+
+        enero = Factura.objects.filter(empresa=self.empresa, **filtro_rango('fecha', *rango_mes(2025, 1)))
+
+        self.assertEqual(
+            sorted(enero.values_list('numero_factura', flat=True)),
+            ['FAC-FECHA-1', 'FAC-FECHA-3']
+        )
+
+    def test_consulta_compara_la_columna_sin_funciones(self):
+        """Test: El filtro compara la columna fecha directamente"""
+        from core.fechas import filtro_rango, rango_mes
+        from ventas.models import Factura
+
+        sql = str(Factura.objects.filter(
+            empresa=self.empresa, **filtro_rango('fecha', *rango_mes(2025, 1))
+        ).query)
+
+        self.assertIn('"ventas_factura"."fecha" >=', sql)
+        self.assertIn('"ventas_factura"."fecha" <', sql)
+        self.assertNotIn('EXTRACT', sql.upper())
+        self.assertNotIn('django_datetime', sql)
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN de índices solo en PostgreSQL')
+    def test_explain_usa_indice_empresa_fecha(self):
+        """Test: PostgreSQL usa el índice (empresa, fecha) con el rango mensual"""
+        from core.fechas import filtro_rango, rango_mes
+        from ventas.models import Factura
+
+        indice = next(i.name for i in Factura._meta.indexes if i.fields == ['empresa', 'fecha'])
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('ANALYZE ventas_factura')
+
+        plan = Factura.objects.filter(
+            empresa=self.empresa, **filtro_rango('fecha', *rango_mes(2025, 1))
+        ).explain()
+
+        self.assertIn(indice, plan)
+        self.assertIn('fecha >=', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN de índices solo en PostgreSQL')
+    def test_explain_606_usa_indice_empresa_fecha_compra(self):
+        """Test: PostgreSQL usa el índice (empresa, fecha_compra) para el 606"""
+        from compras.models import Compra
+        from core.fechas import filtro_rango, limites_mes
+
+        indice = next(i.name for i in Compra._meta.indexes if i.fields == ['empresa', 'fecha_compra'])
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('ANALYZE compras_compra')
+
+        plan = Compra.objects.filter(
+            empresa=self.empresa, **filtro_rango('fecha_compra', *limites_mes(2025, 1))
+        ).explain()
+
+        self.assertIn(indice, plan)
+        self.assertIn('fecha_compra >=', plan)
+
+
+class GenerarDatosSinteticosTest(TestCase):
+    """Tests para el comando generar_datos_sinteticos"""
+
+    def generar(self, semilla=7):
+        from django.core.management import call_command
+        from io import StringIO
+        call_command(
+            'generar_datos_sinteticos',
+            empresas=2, facturas=60, clientes=5, productos=4, lineas=3,
+            dias=10, lote=25, semilla=semilla, stdout=StringIO(),
+        )
+        return Empresa.objects.filter(rnc__startswith=f'9{semilla:04d}').order_by('rnc')
+
+    def test_genera_documentos_consistentes(self):
+        """Test: Totales, existencias, CxC y caja cuadran con las facturas"""
+        from django.db.models import Sum
+        from caja.models import MovimientoCaja, SesionCaja
+        from cuentas_cobrar.models import CuentaPorCobrar
+        from dashboard.models import Actividad, VentaDiaria
+        from inventario.models import InventarioProducto, MovimientoInventario
+        from ventas.models import DetalleFactura, Factura
+
+        empresas = self.generar()
+        self.assertEqual(empresas.count(), 2)
+        empresa = empresas[0]
+
+        facturas = Factura.objects.filter(empresa=empresa)
+        self.assertEqual(facturas.count(), 60)
+        self.assertFalse(facturas.filter(fecha__gte=timezone.now()).exists())
+        for factura in facturas.prefetch_related('detalles'):
+            self.assertEqual(factura.total, sum(d.importe for d in factura.detalles.all()))
+
+        # Saldo corrido por producto nunca negativo y coincide con el inventario
+        for inventario in InventarioProducto.objects.filter(empresa=empresa):
+            saldo = Decimal('0')
+            for tipo, cantidad in MovimientoInventario.objects.filter(
+                producto=inventario.producto, almacen=inventario.almacen
+            ).order_by('fecha', 'id').values_list('tipo_movimiento', 'cantidad'):
+                saldo += cantidad if tipo.startswith('ENTRADA') else -cantidad
+                self.assertGreaterEqual(saldo, 0)
+            self.assertEqual(saldo, inventario.cantidad_disponible)
+
+        self.assertEqual(
+            CuentaPorCobrar.objects.filter(empresa=empresa).count(),
+            facturas.filter(tipo_venta='CREDITO').count(),
+        )
+        self.assertEqual(
+            MovimientoCaja.objects.filter(empresa=empresa).aggregate(s=Sum('monto'))['s'],
+            facturas.filter(tipo_venta='CONTADO', estado='PAGADA').aggregate(s=Sum('total'))['s'],
+        )
+        self.assertFalse(SesionCaja.objects.filter(empresa=empresa, estado='ABIERTA').exists())
+        self.assertFalse(
+            DetalleFactura.objects.filter(factura__empresa=empresa, cantidad__lte=0).exists()
+        )
+        self.assertEqual(
+            VentaDiaria.objects.filter(empresa=empresa).aggregate(s=Sum('cantidad'))['s'],
+            60,
+        )
+        self.assertEqual(
+            Actividad.objects.filter(empresa=empresa, modelo='ventas.Factura').count(),
+            60,
+        )
+
+    def test_misma_semilla_mismos_datos(self):
+        """Test: La misma semilla reproduce exactamente los datos"""
+        from django.db import transaction
+        from ventas.models import Factura
+
+        def huella():
+            with transaction.atomic():
+                empresas = self.generar()
+                datos = [
+                    list(Factura.objects.filter(empresa=empresa).order_by('numero_factura').values_list(
+                        'numero_factura', 'fecha', 'cliente__nombre', 'estado', 'total'
+                    ))
+                    for empresa in empresas
+                ]
+                transaction.set_rollback(True)
+            return datos
+
+        primera = huella()
+        self.assertEqual(len(primera[0]), 60)
+        self.assertEqual(primera, huella())
+
+    def test_marca_cortes_de_saldos_posteriores(self):
+        """Test: Los movimientos con fecha pasada dejan pendientes los cortes ya generados"""
+        from core.fechas import inicio_del_dia
+        from inventario.models import InventarioProducto, SaldoInventario
+
+        inventario = InventarioProducto.objects.filter(empresa=self.generar(semilla=7).first()).first()
+        corte = inicio_del_dia(timezone.localdate() - timedelta(days=2))
+        SaldoInventario.objects.create(
+            empresa=inventario.empresa, producto=inventario.producto, almacen=inventario.almacen,
+            fecha_corte=corte, cantidad=inventario.cantidad_disponible,
+        )
+
+        empresas = self.generar(semilla=8)
+
+        pendientes = SaldoInventario.objects.filter(empresa__in=empresas, fecha_corte=corte, pendiente=True)
+        self.assertEqual(pendientes.count(), InventarioProducto.objects.filter(empresa__in=empresas).count())
+
+    def test_rnc_existente(self):
+        """Test: Repetir la semilla no duplica empresas"""
+        from django.core.management.base import CommandError
+
+        self.generar()
+        with self.assertRaises(CommandError):
+            self.generar()
+
+
+class BenchmarkTest(TestCase):
+    """Tests para core.benchmark y el comando benchmark"""
+
+    def test_percentil_interpolado(self):
+        """Test: Percentil con interpolación lineal"""
+        from core.benchmark import percentil
+
+        valores = [10, 1, 4, 3, 2, 5, 6, 7, 9, 8]
+        self.assertEqual(percentil(valores, 50), 5.5)
+        self.assertAlmostEqual(percentil(valores, 95), 9.55)
+        self.assertEqual(percentil([3], 95), 3)
+
+    def test_comparar_detecta_regresiones(self):
+        """Test: Latencia y memoria sobre el umbral y consultas extra son regresión"""
+        from core.benchmark import MedidorRendimiento
+
+        base = {'p95_ms': 100.0, 'consultas': 5, 'memoria_pico_kb': 1000.0}
+        referencia = {'casos': {'a': base, 'b': base, 'c': {**base, 'p95_ms': 0.5}}}
+        actual = {'casos': {
+            'a': {'p95_ms': 119.0, 'consultas': 5, 'memoria_pico_kb': 1100.0},
+            'b': {'p95_ms': 130.0, 'consultas': 6, 'memoria_pico_kb': 1300.0},
+            # Por debajo del margen mínimo absoluto aunque triplica el tiempo
+            'c': {'p95_ms': 1.4, 'consultas': 5, 'memoria_pico_kb': 1000.0},
+            'nuevo': base,
+        }}
+
+        regresiones = MedidorRendimiento.comparar(actual, referencia, umbral=0.2)
+
+        self.assertEqual(
+            sorted((r['caso'], r['metrica']) for r in regresiones),
+            [('b', 'consultas'), ('b', 'memoria_pico_kb'), ('b', 'p95_ms')],
+        )
+
+    def test_mide_y_revierte_escrituras(self):
+        """Test: Cada repetición se revierte y se reportan consultas"""
+        from core.benchmark import CasoBenchmark, MedidorRendimiento
+
+        caso = CasoBenchmark(
+            'crear_empresa',
+            lambda contexto: Empresa.objects.create(nombre='Temporal', rnc='987654321'),
+        )
+        resultado = MedidorRendimiento.medir(caso, repeticiones=3)
+
+        self.assertFalse(Empresa.objects.filter(rnc='987654321').exists())
+        self.assertGreaterEqual(resultado['consultas'], 1)
+        self.assertLessEqual(resultado['p50_ms'], resultado['p95_ms'])
+        self.assertEqual(resultado['repeticiones'], 3)
+
+    def test_comando_sobre_datos_sinteticos(self):
+        """Test: El comando mide todos los casos y falla ante una regresión"""
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from ventas.models import Factura
+
+        call_command(
+            'generar_datos_sinteticos', empresas=1, facturas=40, clientes=5,
+            productos=4, lineas=2, dias=5, semilla=3, stdout=StringIO(),
+        )
+        empresa = Empresa.objects.get(rnc__startswith='90003')
+        facturas = Factura.objects.count()
+
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, 'base.json')
+            call_command(
+                'benchmark', empresa=empresa.id, repeticiones=2, filas_catalogo=10,
+                salida=salida, stdout=StringIO(),
+            )
+            with open(salida) as archivo:
+                corrida = json.load(archivo)
+
+            self.assertEqual(corrida['empresa'], empresa.id)
+            for caso in ('dashboard.resumen', 'dashboard.resumen.secuencial', 'dashboard.resumen.concurrente',
+                         'listado.facturas', 'inventario.kardex',
+                         'dgii.generar_607', 'dgii.asignar_ncf.bloque_1', 'productos.upload_catalog',
+                         'inventario.registrar_movimiento', 'cxc.aplicar_cobro'):
+                self.assertIn(caso, corrida['casos'])
+            self.assertEqual(Factura.objects.count(), facturas)
+
+            # Una referencia con menos consultas hace fallar la comparación
+            corrida['casos']['dgii.generar_607']['consultas'] = 0
+            with open(salida, 'w') as archivo:
+                json.dump(corrida, archivo)
+            with self.assertRaises(CommandError):
+                call_command(
+                    'benchmark', empresa=empresa.id, repeticiones=1, casos=['dgii.generar_607'],
+                    referencia=salida, stdout=StringIO(),
+                )
@@ -50,7 +50,7 @@ from despachos.views import DespachoViewSet, DetalleDespachoViewSet
 from caja.views import CajaViewSet, SesionCajaViewSet, MovimientoCajaViewSet
 from cuentas_pagar.views import CuentaPorPagarViewSet, PagoProveedorViewSet, DetallePagoProveedorViewSet
 from cuentas_cobrar.views import CuentaPorCobrarViewSet, CobroClienteViewSet, DetalleCobroClienteViewSet
-from dgii.views import TipoComprobanteViewSet, SecuenciaNCFViewSet, ReportesDGIIViewSet
+from dgii.views import TipoComprobanteViewSet, SecuenciaNCFViewSet, ReportesDGIIViewSet, PadronRNCViewSet
 from activos.views import TipoActivoViewSet, ActivoFijoViewSet, DepreciacionViewSet
 from dashboard.views import DashboardViewSet
 from core.views import ConfiguracionEmpresaViewSet
@@ -124,6 +124,7 @@ router.register(r'cxc/cobros-detalle', DetalleCobroClienteViewSet)
 router.register(r'dgii/tipos-comprobante', TipoComprobanteViewSet)
 router.register(r'dgii/secuencias', SecuenciaNCFViewSet)
 router.register(r'dgii/reportes', ReportesDGIIViewSet, basename='dgii-reportes')
+router.register(r'dgii/padron', PadronRNCViewSet, basename='dgii-padron')
 
 # Activos Fijos
 router.register(r'activos/tipos', TipoActivoViewSet)
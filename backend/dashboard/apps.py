@@ -5,3 +5,7 @@ class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
     verbose_name = 'Dashboard'
+
+    def ready(self):
+        """Importar signals al iniciar la aplicación."""
+        from . import signals  # noqa: F401
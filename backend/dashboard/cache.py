@@ -0,0 +1,283 @@
+"""
+Caché por empresa para los widgets del Dashboard.
+
+Cada widget se guarda bajo una clave compuesta por la empresa, una versión
+por empresa, el nombre del widget y sus parámetros. Las señales del módulo
+(ver signals.py) incrementan la versión de la empresa cuando cambian los
+documentos de origen, de modo que todas sus entradas quedan obsoletas sin
+necesidad de borrar claves por patrón.
+
+El TTL (settings.DASHBOARD_CACHE_TIMEOUT) funciona como respaldo para los
+cambios que no disparan señales, como QuerySet.update().
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.config import get_config_value
+
+from .constants import CACHE_PREFIJO_DASHBOARD, WIDGETS_DASHBOARD
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardCache:
+    """Caché de widgets del Dashboard con invalidación por empresa"""
+
+    @staticmethod
+    def get_timeout():
+        """
+        Obtiene el TTL de las entradas del dashboard.
+
+        Returns:
+            int: Segundos de vida. 0 deshabilita el caché.
+        """
+        return getattr(
+            settings,
+            'DASHBOARD_CACHE_TIMEOUT',
+            get_config_value('reportes', 'ACTUALIZAR_DASHBOARD_SEGUNDOS', 60)
+        )
+
+    @staticmethod
+    def _clave_version(empresa_id):
+        return f'{CACHE_PREFIJO_DASHBOARD}:version:{empresa_id}'
+
+    @staticmethod
+    def _clave_estadistica(widget, metrica):
+        return f'{CACHE_PREFIJO_DASHBOARD}:stats:{widget}:{metrica}'
+
+    @staticmethod
+    def obtener_version(empresa_id):
+        """
+        Obtiene la versión vigente del caché de una empresa.
+
+        La versión inicial se basa en el reloj para que, si la clave se pierde
+        (expulsión o reinicio), no se reutilicen entradas de una versión previa.
+        """
+        clave = DashboardCache._clave_version(empresa_id)
+        version = cache.get(clave)
+        if version is None:
+            cache.add(clave, time.time_ns(), None)
+            version = cache.get(clave)
+        return version
+
+    @staticmethod
+    def invalidar(empresa_id):
+        """
+        Invalida todos los widgets cacheados de una empresa.
+
+        Args:
+            empresa_id: ID de la empresa
+        """
+        if empresa_id is None:
+            return
+
+        clave = DashboardCache._clave_version(empresa_id)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, time.time_ns(), None)
+        logger.debug(f"Caché de dashboard invalidado para empresa {empresa_id}")
+
+    @staticmethod
+    def construir_clave(empresa_id, widget, params=None):
+        """
+        Construye la clave de caché de un widget.
+
+        La fecha actual forma parte de los parámetros porque los widgets
+        calculan sus rangos relativos a "hoy".
+
+        Args:
+            empresa_id: ID de la empresa
+            widget: Nombre del widget
+            params: Parámetros del widget (dict)
+
+        Returns:
+            str: Clave de caché
+        """
+        version = DashboardCache.obtener_version(empresa_id)
+        return DashboardCache._clave_widget(empresa_id, version, widget, params)
+
+    @staticmethod
+    def _clave_widget(empresa_id, version, widget, params=None, hoy=None):
+        datos = dict(params or {})
+        datos['_fecha'] = (hoy or timezone.localdate()).isoformat()
+        firma = hashlib.md5(
+            json.dumps(datos, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        return f'{CACHE_PREFIJO_DASHBOARD}:{empresa_id}:{version}:{widget}:{firma}'
+
+    @staticmethod
+    def obtener(empresa, widget, calcular, **params):
+        """
+        Retorna el widget desde caché o lo calcula y lo guarda.
+
+        Args:
+            empresa: Instancia de Empresa
+            widget: Nombre del widget
+            calcular: Callable sin argumentos que calcula el widget
+            **params: Parámetros que distinguen la entrada (dias, limite, ...)
+
+        Returns:
+            dict: Resultado del widget
+        """
+        timeout = DashboardCache.get_timeout()
+        if not timeout or timeout <= 0:
+            return calcular()
+
+        clave = DashboardCache.construir_clave(empresa.id, widget, params)
+        resultado = cache.get(clave)
+        if resultado is not None:
+            DashboardCache._incrementar(DashboardCache._clave_estadistica(widget, 'hits'))
+            return resultado
+
+        inicio = time.perf_counter()
+        resultado = calcular()
+        duracion_us = int((time.perf_counter() - inicio) * 1_000_000)
+
+        cache.set(clave, resultado, timeout)
+        DashboardCache._registrar_recalculo(widget, duracion_us)
+        logger.debug(
+            f"Widget {widget} recalculado para empresa {empresa.id} "
+            f"en {duracion_us / 1000:.2f} ms"
+        )
+        return resultado
+
+    @staticmethod
+    def obtener_varios(empresa, solicitudes, hoy=None):
+        """
+        Versión por lotes de obtener(): una sola lectura de la versión de la
+        empresa y un get_many/set_many para todos los widgets.
+
+        Un widget que falla al calcularse no afecta a los demás: su
+        excepción se retorna en lugar del resultado y no se cachea.
+
+        Args:
+            empresa: Instancia de Empresa
+            solicitudes: dict {clave: (widget, params, calcular)}
+            hoy: Fecha de referencia de los widgets (forma parte de la clave)
+
+        Returns:
+            dict: {clave: resultado o excepción}
+        """
+        timeout = DashboardCache.get_timeout()
+        usar_cache = timeout and timeout > 0
+
+        claves_cache = {}
+        encontrados = {}
+        if usar_cache:
+            version = DashboardCache.obtener_version(empresa.id)
+            claves_cache = {
+                clave: DashboardCache._clave_widget(empresa.id, version, widget, params, hoy)
+                for clave, (widget, params, _) in solicitudes.items()
+            }
+            encontrados = cache.get_many(set(claves_cache.values()))
+
+        resultados = {}
+        nuevos = {}
+        for clave, (widget, params, calcular) in solicitudes.items():
+            clave_cache = claves_cache.get(clave)
+            if clave_cache in encontrados:
+                DashboardCache._incrementar(DashboardCache._clave_estadistica(widget, 'hits'))
+                resultados[clave] = encontrados[clave_cache]
+                continue
+            if clave_cache in nuevos:
+                # Mismo widget y parámetros pedido dos veces en el lote
+                resultados[clave] = nuevos[clave_cache]
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                resultado = calcular()
+            except Exception as e:
+                resultados[clave] = e
+                continue
+            resultados[clave] = resultado
+
+            if usar_cache:
+                duracion_us = int((time.perf_counter() - inicio) * 1_000_000)
+                nuevos[clave_cache] = resultado
+                DashboardCache._registrar_recalculo(widget, duracion_us)
+
+        if nuevos:
+            cache.set_many(nuevos, timeout)
+        return resultados
+
+    @staticmethod
+    def _incrementar(clave, delta=1):
+        """Incrementa un contador sin expiración (crea la clave si no existe)"""
+        if cache.add(clave, delta, None):
+            return
+        try:
+            cache.incr(clave, delta)
+        except ValueError:
+            cache.set(clave, delta, None)
+
+    @staticmethod
+    def _registrar_recalculo(widget, duracion_us):
+        DashboardCache._incrementar(DashboardCache._clave_estadistica(widget, 'misses'))
+        DashboardCache._incrementar(
+            DashboardCache._clave_estadistica(widget, 'tiempo_total_us'), duracion_us
+        )
+        cache.set(DashboardCache._clave_estadistica(widget, 'tiempo_ultimo_us'), duracion_us, None)
+
+    @staticmethod
+    def obtener_estadisticas():
+        """
+        Obtiene la tasa de aciertos y el tiempo de recálculo por widget.
+
+        Returns:
+            dict: Estadísticas por widget y totales
+        """
+        metricas = ['hits', 'misses', 'tiempo_total_us', 'tiempo_ultimo_us']
+        claves = [
+            DashboardCache._clave_estadistica(widget, metrica)
+            for widget in WIDGETS_DASHBOARD
+            for metrica in metricas
+        ]
+        valores = cache.get_many(claves)
+
+        widgets = {}
+        total_hits = 0
+        total_misses = 0
+        for widget in WIDGETS_DASHBOARD:
+            hits = valores.get(DashboardCache._clave_estadistica(widget, 'hits'), 0)
+            misses = valores.get(DashboardCache._clave_estadistica(widget, 'misses'), 0)
+            tiempo_total = valores.get(DashboardCache._clave_estadistica(widget, 'tiempo_total_us'), 0)
+            tiempo_ultimo = valores.get(DashboardCache._clave_estadistica(widget, 'tiempo_ultimo_us'))
+            total_hits += hits
+            total_misses += misses
+            widgets[widget] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': DashboardCache._tasa(hits, misses),
+                'recalculo_promedio_ms': round(tiempo_total / misses / 1000, 2) if misses else None,
+                'recalculo_ultimo_ms': round(tiempo_ultimo / 1000, 2) if tiempo_ultimo is not None else None,
+            }
+
+        return {
+            'timeout_segundos': DashboardCache.get_timeout(),
+            'hits': total_hits,
+            'misses': total_misses,
+            'hit_rate': DashboardCache._tasa(total_hits, total_misses),
+            'widgets': widgets,
+        }
+
+    @staticmethod
+    def reiniciar_estadisticas():
+        """Reinicia los contadores de aciertos y recálculos"""
+        cache.delete_many([
+            DashboardCache._clave_estadistica(widget, metrica)
+            for widget in WIDGETS_DASHBOARD
+            for metrica in ['hits', 'misses', 'tiempo_total_us', 'tiempo_ultimo_us']
+        ])
+
+    @staticmethod
+    def _tasa(hits, misses):
+        total = hits + misses
+        return round(hits / total, 4) if total else None
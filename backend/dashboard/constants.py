@@ -15,12 +15,14 @@ LIMITE_MAXIMO_PRODUCTOS = 100
 LIMITE_MAXIMO_CLIENTES = 100
 LIMITE_MAXIMO_ACTIVIDADES = 100
 MESES_MAXIMO_DASHBOARD = 36
+WIDGETS_MAXIMO_LOTE = 20
 
 # =============================================================================
 # VALORES POR DEFECTO
 # =============================================================================
 
 DIAS_DEFAULT_VENTAS = 30
+DIAS_DEFAULT_CLIENTES = 90
 MESES_DEFAULT_VENTAS = 12
 LIMITE_DEFAULT_PRODUCTOS = 10
 LIMITE_DEFAULT_CLIENTES = 10
@@ -40,6 +42,9 @@ ESTADOS_FACTURA_PAGADAS = ['PAGADA', 'PAGADA_PARCIAL']
 
 ESTADOS_CXC_ACTIVOS = ['PENDIENTE', 'PARCIAL', 'VENCIDA']
 
+# Estados considerados en los rangos "por vencer" (CxC y CxP)
+ESTADOS_CUENTA_POR_VENCER = ['PENDIENTE', 'PARCIAL']
+
 # =============================================================================
 # ESTADOS DE CUENTAS POR PAGAR
 # =============================================================================
@@ -58,6 +63,17 @@ ESTADOS_COMPRA_VALIDOS = ['REGISTRADA', 'CXP', 'PAGADA']
 
 TIPOS_MOVIMIENTO_RELEVANTES = ['ENTRADA_COMPRA', 'SALIDA_VENTA', 'AJUSTE', 'TRANSFERENCIA']
 
+# =============================================================================
+# FEED DE ACTIVIDAD
+# =============================================================================
+
+ACTIVIDAD_FACTURA = 'FACTURA'
+ACTIVIDAD_COMPRA = 'COMPRA'
+PREFIJO_ACTIVIDAD_INVENTARIO = 'INVENTARIO_'
+
+# Documentos leídos e insertados por lote al reconstruir el feed
+TAMANO_LOTE_ACTIVIDAD = 1000
+
 # =============================================================================
 # RANGOS DE VENCIMIENTO
 # =============================================================================
@@ -65,6 +81,26 @@ TIPOS_MOVIMIENTO_RELEVANTES = ['ENTRADA_COMPRA', 'SALIDA_VENTA', 'AJUSTE', 'TRAN
 RANGOS_VENCIMIENTO = [7, 15, 30]
 RANGOS_ANTIGUEDAD = [(1, 30), (31, 60), (61, 90), (91, None)]
 
+# =============================================================================
+# CACHÉ DE WIDGETS
+# =============================================================================
+
+CACHE_PREFIJO_DASHBOARD = 'dashboard'
+
+# Widgets cacheables (nombre = acción del DashboardViewSet)
+WIDGETS_DASHBOARD = [
+    'resumen',
+    'ventas_periodo',
+    'ventas_por_mes',
+    'top_productos',
+    'productos_stock_bajo',
+    'top_clientes',
+    'cuentas_por_cobrar',
+    'cuentas_por_pagar',
+    'actividad_reciente',
+    'indicadores_financieros',
+]
+
 # =============================================================================
 # MENSAJES DE ERROR
 # =============================================================================
@@ -82,6 +118,13 @@ ERROR_CUENTAS_COBRAR = 'Error al obtener cuentas por cobrar'
 ERROR_CUENTAS_PAGAR = 'Error al obtener cuentas por pagar'
 ERROR_ACTIVIDAD_RECIENTE = 'Error al obtener actividad reciente'
 ERROR_INDICADORES = 'Error al obtener indicadores financieros'
+ERROR_ESTADISTICAS_CACHE = 'Error al obtener estadísticas de caché'
+ERROR_CURSOR_INVALIDO = 'Cursor de paginación inválido'
+ERROR_LOTE_INVALIDO = 'widgets debe ser una lista de entre 1 y {max} elementos'
+ERROR_WIDGET_INVALIDO = 'Cada elemento debe ser un objeto con "widget" y "params" opcional'
+ERROR_WIDGET_DESCONOCIDO = 'Widget desconocido: {widget}'
+ERROR_CLAVE_DUPLICADA = 'Clave de widget duplicada: {clave}'
+ERROR_LOTE_DASHBOARD = 'Error al obtener los widgets del dashboard'
 
 # =============================================================================
 # VALORES DECIMALES POR DEFECTO
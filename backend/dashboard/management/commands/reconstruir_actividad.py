@@ -0,0 +1,52 @@
+"""
+Comando de gestión para reconstruir el feed de actividad (Actividad)
+desde facturas, compras y movimientos de inventario.
+Útil para reparar el feed tras cargas masivas que no disparan signals.
+Cada documento queda con una entrada de su estado actual.
+
+Uso:
+    python manage.py reconstruir_actividad
+    python manage.py reconstruir_actividad --empresa 1
+    python manage.py reconstruir_actividad --desde 2025-01-01 --hasta 2025-01-31
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.services import ActividadService
+from empresas.models import Empresa
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el feed de actividad desde los documentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            help='ID de la empresa a reconstruir (default: todas)',
+        )
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            help='Primer día a reconstruir (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--hasta',
+            type=date.fromisoformat,
+            help='Último día a reconstruir (YYYY-MM-DD)',
+        )
+
+    def handle(self, *args, **options):
+        empresa = None
+        if options['empresa']:
+            try:
+                empresa = Empresa.objects.get(pk=options['empresa'])
+            except Empresa.DoesNotExist:
+                raise CommandError(f"Empresa {options['empresa']} no existe")
+
+        self.stdout.write('Reconstruyendo feed de actividad...')
+        actividades = ActividadService.reconstruir(
+            empresa=empresa, fecha_desde=options['desde'], fecha_hasta=options['hasta']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Feed reconstruido: {actividades} actividades'))
@@ -0,0 +1,60 @@
+"""
+Comando de gestión para reconstruir los resúmenes diarios de ventas
+(VentaDiaria, VentaProductoDiaria y VentaClienteDiaria).
+Útil para el backfill inicial o para reparar el resumen tras cargas masivas
+que no disparan signals.
+
+Uso:
+    python manage.py reconstruir_ventas_diarias
+    python manage.py reconstruir_ventas_diarias --empresa 1
+    python manage.py reconstruir_ventas_diarias --desde 2025-01-01 --hasta 2025-01-31
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.services import RankingVentasService, VentaDiariaService
+from empresas.models import Empresa
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes diarios de ventas desde las facturas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            help='ID de la empresa a reconstruir (default: todas)',
+        )
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            help='Primer día a reconstruir (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--hasta',
+            type=date.fromisoformat,
+            help='Último día a reconstruir (YYYY-MM-DD)',
+        )
+
+    def handle(self, *args, **options):
+        empresa = None
+        if options['empresa']:
+            try:
+                empresa = Empresa.objects.get(pk=options['empresa'])
+            except Empresa.DoesNotExist:
+                raise CommandError(f"Empresa {options['empresa']} no existe")
+
+        filtros = {
+            'empresa': empresa,
+            'fecha_desde': options['desde'],
+            'fecha_hasta': options['hasta'],
+        }
+
+        self.stdout.write('Reconstruyendo resumen diario de ventas...')
+        filas = VentaDiariaService.reconstruir(**filtros)
+        self.stdout.write(self.style.SUCCESS(f'Resumen reconstruido: {filas} filas'))
+
+        self.stdout.write('Reconstruyendo resúmenes por producto y cliente...')
+        filas = RankingVentasService.reconstruir(**filtros)
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes reconstruidos: {filas} filas'))
@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-16 13:10
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresas', '0003_add_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('estado', models.CharField(choices=[('PENDIENTE_PAGO', 'Pendiente de Pago'), ('PAGADA_PARCIAL', 'Pagada Parcialmente'), ('PAGADA', 'Pagada'), ('CANCELADA', 'Cancelada')], max_length=20, verbose_name='Estado')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad de Facturas')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Total')),
+                ('itbis', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='ITBIS')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Venta Diaria',
+                'verbose_name_plural': 'Ventas Diarias',
+                'ordering': ['empresa', 'fecha', 'estado'],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'fecha', 'estado'), name='unique_venta_diaria_empresa_fecha_estado')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated manually: carga inicial del resumen diario de ventas
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_ventas_diarias(apps, schema_editor):
+    """Poblar VentaDiaria con las facturas existentes"""
+    Factura = apps.get_model('ventas', 'Factura')
+    VentaDiaria = apps.get_model('dashboard', 'VentaDiaria')
+
+    filas = Factura.objects.filter(empresa__isnull=False).annotate(
+        dia=TruncDate('fecha')
+    ).values('empresa_id', 'dia', 'estado').annotate(
+        suma_total=Coalesce(Sum('total'), Decimal('0.00')),
+        suma_itbis=Coalesce(Sum('itbis'), Decimal('0.00')),
+        conteo=Count('id')
+    ).order_by()
+
+    VentaDiaria.objects.bulk_create(
+        [
+            VentaDiaria(
+                empresa_id=f['empresa_id'],
+                fecha=f['dia'],
+                estado=f['estado'],
+                cantidad=f['conteo'],
+                total=f['suma_total'],
+                itbis=f['suma_itbis'],
+            )
+            for f in filas
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('ventas', '0005_add_permissions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ventas_diarias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.1.2 on 2026-10-16 13:24
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_backfill_ventadiaria'),
+        ('empresas', '0003_add_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Actividad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(verbose_name='Fecha')),
+                ('tipo', models.CharField(max_length=50, verbose_name='Tipo')),
+                ('descripcion', models.CharField(max_length=255, verbose_name='Descripción')),
+                ('monto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Monto')),
+                ('estado', models.CharField(blank=True, max_length=20, null=True, verbose_name='Estado')),
+                ('usuario', models.CharField(blank=True, max_length=150, null=True, verbose_name='Usuario')),
+                ('modelo', models.CharField(max_length=50, verbose_name='Modelo de Origen')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID de Origen')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actividades', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Actividad',
+                'verbose_name_plural': 'Actividades',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['empresa', '-fecha', '-id'], name='actividad_empresa_fecha_idx')],
+            },
+        ),
+    ]
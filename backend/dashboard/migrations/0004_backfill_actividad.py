@@ -0,0 +1,90 @@
+# Generated manually: carga inicial del feed de actividad
+
+from decimal import Decimal
+from itertools import islice
+
+from django.db import migrations
+
+TIPOS_MOVIMIENTO_RELEVANTES = ['ENTRADA_COMPRA', 'SALIDA_VENTA', 'AJUSTE', 'TRANSFERENCIA']
+
+
+def _nombre(usuario):
+    if usuario is None:
+        return None
+    return f'{usuario.first_name} {usuario.last_name}'.strip()
+
+
+def backfill_actividad(apps, schema_editor):
+    """Poblar Actividad con facturas, compras y movimientos existentes"""
+    Factura = apps.get_model('ventas', 'Factura')
+    Compra = apps.get_model('compras', 'Compra')
+    MovimientoInventario = apps.get_model('inventario', 'MovimientoInventario')
+    Actividad = apps.get_model('dashboard', 'Actividad')
+
+    def facturas():
+        for f in Factura.objects.filter(empresa__isnull=False).select_related(
+            'cliente', 'usuario'
+        ).iterator(chunk_size=1000):
+            yield Actividad(
+                empresa_id=f.empresa_id,
+                fecha=f.fecha,
+                tipo='FACTURA',
+                descripcion=f'Factura #{f.numero_factura or f.id} - {f.cliente.nombre}'[:255],
+                monto=f.total or Decimal('0.00'),
+                estado=f.estado,
+                usuario=_nombre(f.usuario),
+                modelo='ventas.Factura',
+                objeto_id=f.id,
+            )
+
+    def compras():
+        for c in Compra.objects.filter(empresa__isnull=False).select_related(
+            'proveedor', 'usuario_creacion'
+        ).iterator(chunk_size=1000):
+            yield Actividad(
+                empresa_id=c.empresa_id,
+                fecha=c.fecha_registro,
+                tipo='COMPRA',
+                descripcion=f'Compra #{c.numero_factura_proveedor or c.id} - {c.proveedor.nombre}'[:255],
+                monto=c.total or Decimal('0.00'),
+                estado=c.estado,
+                usuario=_nombre(c.usuario_creacion),
+                modelo='compras.Compra',
+                objeto_id=c.id,
+            )
+
+    def movimientos():
+        for m in MovimientoInventario.objects.filter(
+            empresa__isnull=False,
+            tipo_movimiento__in=TIPOS_MOVIMIENTO_RELEVANTES
+        ).select_related('producto', 'usuario_creacion').iterator(chunk_size=1000):
+            yield Actividad(
+                empresa_id=m.empresa_id,
+                fecha=m.fecha,
+                tipo=f'INVENTARIO_{m.tipo_movimiento}',
+                descripcion=f'{m.get_tipo_movimiento_display()} - {m.producto.nombre}'[:255],
+                monto=m.cantidad,
+                estado=None,
+                usuario=_nombre(m.usuario_creacion),
+                modelo='inventario.MovimientoInventario',
+                objeto_id=m.id,
+            )
+
+    for origen in (facturas, compras, movimientos):
+        filas = origen()
+        while lote := list(islice(filas, 1000)):
+            Actividad.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_actividad'),
+        ('ventas', '0005_add_permissions'),
+        ('compras', '0008_rename_indexes'),
+        ('inventario', '0007_add_permissions_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_actividad, migrations.RunPython.noop),
+    ]
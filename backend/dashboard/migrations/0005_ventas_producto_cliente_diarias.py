@@ -0,0 +1,54 @@
+# Generated by Django 6.1.2 on 2026-10-16 13:40
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_alter_cliente_empresa'),
+        ('dashboard', '0004_backfill_actividad'),
+        ('empresas', '0003_add_permissions'),
+        ('productos', '0006_add_empresa_multitenancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaClienteDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('estado', models.CharField(choices=[('PENDIENTE_PAGO', 'Pendiente de Pago'), ('PAGADA_PARCIAL', 'Pagada Parcialmente'), ('PAGADA', 'Pagada'), ('CANCELADA', 'Cancelada')], max_length=20, verbose_name='Estado')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad de Facturas')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Total')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='clientes.cliente', verbose_name='Cliente')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_cliente_diarias', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Venta Diaria por Cliente',
+                'verbose_name_plural': 'Ventas Diarias por Cliente',
+                'ordering': ['empresa', 'fecha', 'estado', 'cliente'],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'fecha', 'estado', 'cliente'), name='unique_venta_cliente_diaria')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaProductoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('estado', models.CharField(choices=[('PENDIENTE_PAGO', 'Pendiente de Pago'), ('PAGADA_PARCIAL', 'Pagada Parcialmente'), ('PAGADA', 'Pagada'), ('CANCELADA', 'Cancelada')], max_length=20, verbose_name='Estado')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Cantidad Vendida')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Total')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_producto_diarias', to='empresas.empresa', verbose_name='Empresa')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='productos.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Venta Diaria por Producto',
+                'verbose_name_plural': 'Ventas Diarias por Producto',
+                'ordering': ['empresa', 'fecha', 'estado', 'producto'],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'fecha', 'estado', 'producto'), name='unique_venta_producto_diaria')],
+            },
+        ),
+    ]
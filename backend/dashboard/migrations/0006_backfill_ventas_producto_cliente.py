@@ -0,0 +1,71 @@
+# Generated manually: carga inicial de los resúmenes por producto y cliente
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_ventas_producto_cliente(apps, schema_editor):
+    """Poblar VentaProductoDiaria y VentaClienteDiaria con las facturas existentes"""
+    Factura = apps.get_model('ventas', 'Factura')
+    DetalleFactura = apps.get_model('ventas', 'DetalleFactura')
+    VentaProductoDiaria = apps.get_model('dashboard', 'VentaProductoDiaria')
+    VentaClienteDiaria = apps.get_model('dashboard', 'VentaClienteDiaria')
+
+    filas_producto = DetalleFactura.objects.filter(factura__empresa__isnull=False).annotate(
+        dia=TruncDate('factura__fecha')
+    ).values('factura__empresa_id', 'dia', 'factura__estado', 'producto_id').annotate(
+        suma_cantidad=Coalesce(Sum('cantidad'), Decimal('0.00')),
+        suma_importe=Coalesce(Sum('importe'), Decimal('0.00'))
+    ).order_by()
+
+    VentaProductoDiaria.objects.bulk_create(
+        [
+            VentaProductoDiaria(
+                empresa_id=f['factura__empresa_id'],
+                fecha=f['dia'],
+                estado=f['factura__estado'],
+                producto_id=f['producto_id'],
+                cantidad=f['suma_cantidad'],
+                total=f['suma_importe'],
+            )
+            for f in filas_producto
+        ],
+        batch_size=1000
+    )
+
+    filas_cliente = Factura.objects.filter(empresa__isnull=False).annotate(
+        dia=TruncDate('fecha')
+    ).values('empresa_id', 'dia', 'estado', 'cliente_id').annotate(
+        suma_total=Coalesce(Sum('total'), Decimal('0.00')),
+        conteo=Count('id')
+    ).order_by()
+
+    VentaClienteDiaria.objects.bulk_create(
+        [
+            VentaClienteDiaria(
+                empresa_id=f['empresa_id'],
+                fecha=f['dia'],
+                estado=f['estado'],
+                cliente_id=f['cliente_id'],
+                cantidad=f['conteo'],
+                total=f['suma_total'],
+            )
+            for f in filas_cliente
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_ventas_producto_cliente_diarias'),
+        ('ventas', '0005_add_permissions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ventas_producto_cliente, migrations.RunPython.noop),
+    ]
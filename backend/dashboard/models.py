@@ -0,0 +1,174 @@
+"""
+Modelos para el módulo Dashboard
+
+Tablas de resumen (rollups) mantenidas incrementalmente mediante signals,
+para que los widgets y reportes lean pocas filas agregadas en lugar de
+recorrer todo el histórico de documentos.
+"""
+from django.db import models
+
+from ventas.constants import ESTADO_FACTURA_CHOICES
+
+from .constants import DECIMAL_CERO
+
+
+class VentaDiaria(models.Model):
+    """
+    Resumen de facturación por empresa, día y estado.
+
+    Se mantiene desde los signals de Factura (ver signals.py) y puede
+    reconstruirse con el comando `reconstruir_ventas_diarias`.
+    La fecha es el día local (TIME_ZONE) de Factura.fecha.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias',
+        verbose_name='Empresa'
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_FACTURA_CHOICES,
+        verbose_name='Estado'
+    )
+    cantidad = models.IntegerField(default=0, verbose_name='Cantidad de Facturas')
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=DECIMAL_CERO, verbose_name='Total')
+    itbis = models.DecimalField(max_digits=16, decimal_places=2, default=DECIMAL_CERO, verbose_name='ITBIS')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')
+
+    class Meta:
+        verbose_name = 'Venta Diaria'
+        verbose_name_plural = 'Ventas Diarias'
+        ordering = ['empresa', 'fecha', 'estado']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'fecha', 'estado'],
+                name='unique_venta_diaria_empresa_fecha_estado'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.empresa_id} {self.fecha} {self.estado}: {self.total} ({self.cantidad})"
+
+
+class Actividad(models.Model):
+    """
+    Feed de actividad por empresa (solo inserción).
+
+    Se alimenta desde los signals de Factura, Compra y MovimientoInventario
+    al crearse el documento o cambiar su estado. Los datos de presentación
+    (descripción, usuario) se guardan desnormalizados para que leer una
+    página del feed sea una sola consulta por el índice (empresa, fecha, id).
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='actividades',
+        verbose_name='Empresa'
+    )
+    fecha = models.DateTimeField(verbose_name='Fecha')
+    tipo = models.CharField(max_length=50, verbose_name='Tipo')
+    descripcion = models.CharField(max_length=255, verbose_name='Descripción')
+    monto = models.DecimalField(max_digits=16, decimal_places=2, default=DECIMAL_CERO, verbose_name='Monto')
+    estado = models.CharField(max_length=20, null=True, blank=True, verbose_name='Estado')
+    usuario = models.CharField(max_length=150, null=True, blank=True, verbose_name='Usuario')
+    modelo = models.CharField(max_length=50, verbose_name='Modelo de Origen')
+    objeto_id = models.BigIntegerField(verbose_name='ID de Origen')
+
+    class Meta:
+        verbose_name = 'Actividad'
+        verbose_name_plural = 'Actividades'
+        ordering = ['-fecha', '-id']
+        indexes = [
+            models.Index(fields=['empresa', '-fecha', '-id'], name='actividad_empresa_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.empresa_id} {self.fecha:%Y-%m-%d %H:%M} {self.tipo}: {self.descripcion}"
+
+
+class VentaProductoDiaria(models.Model):
+    """
+    Resumen de unidades e importe vendidos por empresa, día, estado y producto.
+
+    Se mantiene desde los signals de Factura y DetalleFactura (ver signals.py);
+    alimenta el ranking de productos más vendidos.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='ventas_producto_diarias',
+        verbose_name='Empresa'
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_FACTURA_CHOICES,
+        verbose_name='Estado'
+    )
+    producto = models.ForeignKey(
+        'productos.Producto',
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias',
+        verbose_name='Producto'
+    )
+    cantidad = models.DecimalField(max_digits=16, decimal_places=2, default=DECIMAL_CERO, verbose_name='Cantidad Vendida')
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=DECIMAL_CERO, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Venta Diaria por Producto'
+        verbose_name_plural = 'Ventas Diarias por Producto'
+        ordering = ['empresa', 'fecha', 'estado', 'producto']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'fecha', 'estado', 'producto'],
+                name='unique_venta_producto_diaria'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.empresa_id} {self.fecha} {self.estado} {self.producto_id}: {self.cantidad}"
+
+
+class VentaClienteDiaria(models.Model):
+    """
+    Resumen de facturación por empresa, día, estado y cliente.
+
+    Se mantiene desde los signals de Factura (ver signals.py); alimenta el
+    ranking de clientes con mayor volumen de compras.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='ventas_cliente_diarias',
+        verbose_name='Empresa'
+    )
+    fecha = models.DateField(verbose_name='Fecha')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_FACTURA_CHOICES,
+        verbose_name='Estado'
+    )
+    cliente = models.ForeignKey(
+        'clientes.Cliente',
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias',
+        verbose_name='Cliente'
+    )
+    cantidad = models.IntegerField(default=0, verbose_name='Cantidad de Facturas')
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=DECIMAL_CERO, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Venta Diaria por Cliente'
+        verbose_name_plural = 'Ventas Diarias por Cliente'
+        ordering = ['empresa', 'fecha', 'estado', 'cliente']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'fecha', 'estado', 'cliente'],
+                name='unique_venta_cliente_diaria'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.empresa_id} {self.fecha} {self.estado} {self.cliente_id}: {self.total} ({self.cantidad})"
@@ -4,19 +4,34 @@ Servicios de negocio para el módulo Dashboard
 Separa la lógica de negocio de las vistas para cumplir con los principios
 SRP (Single Responsibility Principle) y SoC (Separation of Concerns).
 """
+import base64
+import binascii
+import heapq
+import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
+from itertools import islice
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, close_old_connections, connection, transaction
 from django.db.models import Sum, Count, Q, F
 from django.db.models.functions import Coalesce, TruncDate, TruncMonth
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+
+from core.fechas import filtro_rango, rango_dias
 
 from .constants import (
     ESTADOS_FACTURA_VALIDOS, ESTADOS_FACTURA_PAGADAS,
-    ESTADOS_CXC_ACTIVOS, ESTADOS_CXP_ACTIVOS,
+    ESTADOS_CXC_ACTIVOS, ESTADOS_CXP_ACTIVOS, ESTADOS_CUENTA_POR_VENCER,
     ESTADOS_COMPRA_VALIDOS, TIPOS_MOVIMIENTO_RELEVANTES,
     RANGOS_VENCIMIENTO, RANGOS_ANTIGUEDAD,
-    DECIMAL_CERO
+    ACTIVIDAD_FACTURA, ACTIVIDAD_COMPRA, PREFIJO_ACTIVIDAD_INVENTARIO, TAMANO_LOTE_ACTIVIDAD,
+    ERROR_CURSOR_INVALIDO, DECIMAL_CERO
 )
 
 logger = logging.getLogger(__name__)
@@ -26,12 +41,13 @@ class DashboardService:
     """Servicio para métricas del Dashboard"""
 
     @staticmethod
-    def obtener_resumen(empresa):
+    def obtener_resumen(empresa, hoy=None):
         """
         Obtiene resumen completo del dashboard.
 
         Args:
             empresa: Instancia de Empresa
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Resumen con todas las métricas
@@ -41,18 +57,29 @@ class DashboardService:
 
         logger.info(f"Generando resumen dashboard para empresa {empresa.id}")
 
-        hoy = timezone.now().date()
+        hoy = hoy or timezone.localdate()
         ayer = hoy - timedelta(days=1)
         inicio_mes = hoy.replace(day=1)
 
-        ventas_hoy = DashboardService._calcular_ventas_dia(empresa, hoy)
-        ventas_ayer = DashboardService._calcular_ventas_dia(empresa, ayer)
-        ventas_mes = DashboardService._calcular_ventas_mes(empresa, inicio_mes)
-        cxc_vencidas = DashboardService._calcular_cxc_vencidas(empresa, hoy)
-        cxp_vencidas = DashboardService._calcular_cxp_vencidas(empresa, hoy)
-        alertas = DashboardService._obtener_alertas_inventario(empresa)
-        stock_bajo = DashboardService._contar_stock_bajo(empresa)
-        caja_actual = DashboardService._obtener_caja_actual(empresa)
+        # Lecturas independientes: se evalúan en paralelo si está habilitado
+        r = EjecutorWidgets.ejecutar({
+            'ventas_hoy': lambda: DashboardService._calcular_ventas_dia(empresa, hoy),
+            'ventas_ayer': lambda: DashboardService._calcular_ventas_dia(empresa, ayer),
+            'ventas_mes': lambda: DashboardService._calcular_ventas_mes(empresa, inicio_mes),
+            'cxc_vencidas': lambda: DashboardService._calcular_cxc_vencidas(empresa, hoy),
+            'cxp_vencidas': lambda: DashboardService._calcular_cxp_vencidas(empresa, hoy),
+            'alertas': lambda: DashboardService._obtener_alertas_inventario(empresa),
+            'stock_bajo': lambda: DashboardService._contar_stock_bajo(empresa),
+            'caja_actual': lambda: DashboardService._obtener_caja_actual(empresa),
+        })
+        ventas_hoy = r['ventas_hoy']
+        ventas_ayer = r['ventas_ayer']
+        ventas_mes = r['ventas_mes']
+        cxc_vencidas = r['cxc_vencidas']
+        cxp_vencidas = r['cxp_vencidas']
+        alertas = r['alertas']
+        stock_bajo = r['stock_bajo']
+        caja_actual = r['caja_actual']
         cambio_porcentual = DashboardService._calcular_cambio_porcentual(
             ventas_hoy['total'], ventas_ayer['total']
         )
@@ -90,33 +117,40 @@ class DashboardService:
 
     @staticmethod
     def _calcular_ventas_dia(empresa, fecha):
-        """Calcula ventas de un día específico"""
-        from ventas.models import Factura
+        """Calcula ventas de un día específico (desde VentaDiaria)"""
+        from .models import VentaDiaria
 
-        return Factura.objects.filter(
+        resultado = VentaDiaria.objects.filter(
             empresa=empresa,
-            fecha__date=fecha,
+            fecha=fecha,
             estado__in=ESTADOS_FACTURA_VALIDOS
         ).aggregate(
-            total=Coalesce(Sum('total'), DECIMAL_CERO),
-            cantidad=Count('id'),
-            pagadas=Count('id', filter=Q(estado='PAGADA')),
-            pendientes=Count('id', filter=Q(estado='PENDIENTE_PAGO'))
+            suma_total=Coalesce(Sum('total'), DECIMAL_CERO),
+            suma_cantidad=Coalesce(Sum('cantidad'), 0),
+            pagadas=Coalesce(Sum('cantidad', filter=Q(estado='PAGADA')), 0),
+            pendientes=Coalesce(Sum('cantidad', filter=Q(estado='PENDIENTE_PAGO')), 0)
         )
+        return {
+            'total': resultado['suma_total'],
+            'cantidad': resultado['suma_cantidad'],
+            'pagadas': resultado['pagadas'],
+            'pendientes': resultado['pendientes']
+        }
 
     @staticmethod
     def _calcular_ventas_mes(empresa, inicio_mes):
-        """Calcula ventas desde el inicio del mes"""
-        from ventas.models import Factura
+        """Calcula ventas desde el inicio del mes (desde VentaDiaria)"""
+        from .models import VentaDiaria
 
-        return Factura.objects.filter(
+        resultado = VentaDiaria.objects.filter(
             empresa=empresa,
-            fecha__date__gte=inicio_mes,
+            fecha__gte=inicio_mes,
             estado__in=ESTADOS_FACTURA_VALIDOS
         ).aggregate(
-            total=Coalesce(Sum('total'), DECIMAL_CERO),
-            cantidad=Count('id')
+            suma_total=Coalesce(Sum('total'), DECIMAL_CERO),
+            suma_cantidad=Coalesce(Sum('cantidad'), 0)
         )
+        return {'total': resultado['suma_total'], 'cantidad': resultado['suma_cantidad']}
 
     @staticmethod
     def _calcular_cxc_vencidas(empresa, hoy):
@@ -183,6 +217,7 @@ class DashboardService:
         from caja.models import SesionCaja
 
         sesion = SesionCaja.objects.filter(
+            empresa=empresa,
             caja__activa=True,
             estado='ABIERTA'
         ).select_related('caja', 'usuario').first()
@@ -207,32 +242,33 @@ class DashboardService:
         return ((total_hoy - total_ayer) / total_ayer * 100).quantize(Decimal('0.01'))
 
     @staticmethod
-    def obtener_ventas_periodo(empresa, dias):
+    def obtener_ventas_periodo(empresa, dias, hoy=None):
         """
         Obtiene ventas agrupadas por día.
 
         Args:
             empresa: Instancia de Empresa
             dias: Número de días hacia atrás
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Datos de ventas por día
         """
-        from ventas.models import Factura
+        from .models import VentaDiaria
 
         logger.debug(f"Obteniendo ventas de {dias} días para empresa {empresa.id}")
 
-        fecha_inicio = timezone.now().date() - timedelta(days=dias)
+        fecha_inicio = (hoy or timezone.localdate()) - timedelta(days=dias)
 
-        ventas = Factura.objects.filter(
+        # Una fila de VentaDiaria por día y estado: ~dias * estados filas
+        ventas = VentaDiaria.objects.filter(
             empresa=empresa,
-            fecha__date__gte=fecha_inicio,
-            estado__in=ESTADOS_FACTURA_VALIDOS
-        ).annotate(
-            dia=TruncDate('fecha')
-        ).values('dia').annotate(
-            total=Coalesce(Sum('total'), DECIMAL_CERO),
-            cantidad=Count('id')
+            fecha__gte=fecha_inicio,
+            estado__in=ESTADOS_FACTURA_VALIDOS,
+            cantidad__gt=0
+        ).values(dia=F('fecha')).annotate(
+            suma_total=Coalesce(Sum('total'), DECIMAL_CERO),
+            suma_cantidad=Sum('cantidad')
         ).order_by('dia')
 
         return {
@@ -241,40 +277,42 @@ class DashboardService:
             'datos': [
                 {
                     'fecha': v['dia'].isoformat(),
-                    'total': str(v['total']),
-                    'cantidad': v['cantidad']
+                    'total': str(v['suma_total']),
+                    'cantidad': v['suma_cantidad']
                 }
                 for v in ventas
             ]
         }
 
     @staticmethod
-    def obtener_ventas_por_mes(empresa, meses):
+    def obtener_ventas_por_mes(empresa, meses, hoy=None):
         """
         Obtiene ventas agrupadas por mes.
 
         Args:
             empresa: Instancia de Empresa
             meses: Número de meses hacia atrás
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Datos de ventas por mes
         """
-        from ventas.models import Factura
+        from .models import VentaDiaria
 
         logger.debug(f"Obteniendo ventas de {meses} meses para empresa {empresa.id}")
 
-        fecha_inicio = (timezone.now().date().replace(day=1) - timedelta(days=meses * 30)).replace(day=1)
+        fecha_inicio = ((hoy or timezone.localdate()).replace(day=1) - timedelta(days=meses * 30)).replace(day=1)
 
-        ventas = Factura.objects.filter(
+        ventas = VentaDiaria.objects.filter(
             empresa=empresa,
-            fecha__date__gte=fecha_inicio,
-            estado__in=ESTADOS_FACTURA_VALIDOS
+            fecha__gte=fecha_inicio,
+            estado__in=ESTADOS_FACTURA_VALIDOS,
+            cantidad__gt=0
         ).annotate(
             mes=TruncMonth('fecha')
         ).values('mes').annotate(
-            total=Coalesce(Sum('total'), DECIMAL_CERO),
-            cantidad=Count('id')
+            suma_total=Coalesce(Sum('total'), DECIMAL_CERO),
+            suma_cantidad=Sum('cantidad')
         ).order_by('mes')
 
         return {
@@ -282,15 +320,15 @@ class DashboardService:
             'datos': [
                 {
                     'mes': v['mes'].strftime('%Y-%m'),
-                    'total': str(v['total']),
-                    'cantidad': v['cantidad']
+                    'total': str(v['suma_total']),
+                    'cantidad': v['suma_cantidad']
                 }
                 for v in ventas
             ]
         }
 
     @staticmethod
-    def obtener_top_productos(empresa, limite, dias):
+    def obtener_top_productos(empresa, limite, dias, hoy=None):
         """
         Obtiene los productos más vendidos.
 
@@ -298,41 +336,18 @@ class DashboardService:
             empresa: Instancia de Empresa
             limite: Cantidad de productos
             dias: Período en días
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Top productos vendidos
         """
-        from ventas.models import DetalleFactura
-
         logger.debug(f"Obteniendo top {limite} productos de {dias} días")
 
-        fecha_inicio = timezone.now().date() - timedelta(days=dias)
-
-        productos = DetalleFactura.objects.filter(
-            factura__empresa=empresa,
-            factura__fecha__date__gte=fecha_inicio,
-            factura__estado__in=ESTADOS_FACTURA_PAGADAS
-        ).values(
-            'producto__id',
-            'producto__codigo_sku',
-            'producto__nombre'
-        ).annotate(
-            cantidad_vendida=Sum('cantidad'),
-            total_vendido=Sum('importe')
-        ).order_by('-cantidad_vendida')[:limite]
+        fecha_inicio = (hoy or timezone.localdate()) - timedelta(days=dias)
 
         return {
             'periodo_dias': dias,
-            'productos': [
-                {
-                    'id': p['producto__id'],
-                    'codigo_sku': p['producto__codigo_sku'],
-                    'nombre': p['producto__nombre'],
-                    'cantidad_vendida': str(p['cantidad_vendida']),
-                    'total_vendido': str(p['total_vendido'])
-                }
-                for p in productos
-            ]
+            'productos': RankingVentasService.top_productos(empresa, limite, fecha_inicio)
         }
 
     @staticmethod
@@ -378,7 +393,7 @@ class DashboardService:
         }
 
     @staticmethod
-    def obtener_top_clientes(empresa, limite, dias):
+    def obtener_top_clientes(empresa, limite, dias, hoy=None):
         """
         Obtiene los clientes con mayor volumen de compras.
 
@@ -386,325 +401,1081 @@ class DashboardService:
             empresa: Instancia de Empresa
             limite: Cantidad de clientes
             dias: Período en días
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Top clientes
         """
-        from ventas.models import Factura
-
         logger.debug(f"Obteniendo top {limite} clientes de {dias} días")
 
-        fecha_inicio = timezone.now().date() - timedelta(days=dias)
-
-        clientes = Factura.objects.filter(
-            empresa=empresa,
-            fecha__date__gte=fecha_inicio,
-            estado__in=ESTADOS_FACTURA_PAGADAS
-        ).values(
-            'cliente__id',
-            'cliente__nombre'
-        ).annotate(
-            total_compras=Sum('total'),
-            cantidad_facturas=Count('id')
-        ).order_by('-total_compras')[:limite]
+        fecha_inicio = (hoy or timezone.localdate()) - timedelta(days=dias)
 
         return {
             'periodo_dias': dias,
-            'clientes': [
-                {
-                    'id': c['cliente__id'],
-                    'nombre': c['cliente__nombre'],
-                    'total_compras': str(c['total_compras']),
-                    'cantidad_facturas': c['cantidad_facturas']
-                }
-                for c in clientes
-            ]
+            'clientes': RankingVentasService.top_clientes(empresa, limite, fecha_inicio)
         }
 
     @staticmethod
-    def obtener_detalle_cxc(empresa):
+    def obtener_detalle_cxc(empresa, hoy=None):
         """
         Obtiene resumen detallado de cuentas por cobrar.
 
         Args:
             empresa: Instancia de Empresa
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Detalle de CxC
         """
         from cuentas_cobrar.models import CuentaPorCobrar
 
-        hoy = timezone.now().date()
-
-        # Por estado
-        resumen = CuentaPorCobrar.objects.filter(
-            empresa=empresa
-        ).values('estado').annotate(
-            total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO),
-            cantidad=Count('id')
+        return AntiguedadSaldosService.calcular(
+            CuentaPorCobrar, empresa, ESTADOS_CXC_ACTIVOS, incluir_antiguedad=True, hoy=hoy
         )
 
-        # Por vencer
-        por_vencer = {}
-        for dias in RANGOS_VENCIMIENTO:
-            fecha_limite = hoy + timedelta(days=dias)
-            resultado = CuentaPorCobrar.objects.filter(
-                empresa=empresa,
-                estado__in=['PENDIENTE', 'PARCIAL'],
-                fecha_vencimiento__lte=fecha_limite,
-                fecha_vencimiento__gt=hoy
-            ).aggregate(
-                total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO),
-                cantidad=Count('id')
-            )
-            por_vencer[f'dias_{dias}'] = {
-                'total': str(resultado['total']),
-                'cantidad': resultado['cantidad']
-            }
-
-        # Vencidas por antigüedad
-        vencidas = {}
-        for inicio, fin in RANGOS_ANTIGUEDAD:
-            filtros = {
-                'empresa': empresa,
-                'estado__in': ESTADOS_CXC_ACTIVOS,
-                'fecha_vencimiento__lt': hoy - timedelta(days=inicio - 1)
-            }
-            if fin:
-                filtros['fecha_vencimiento__gte'] = hoy - timedelta(days=fin)
-
-            resultado = CuentaPorCobrar.objects.filter(**filtros).aggregate(
-                total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO),
-                cantidad=Count('id')
-            )
-            key = f'{inicio}_a_{fin}_dias' if fin else f'mas_de_{inicio}_dias'
-            vencidas[key] = {
-                'total': str(resultado['total']),
-                'cantidad': resultado['cantidad']
-            }
-
-        return {
-            'resumen_por_estado': {
-                r['estado']: {'total': str(r['total']), 'cantidad': r['cantidad']}
-                for r in resumen
-            },
-            'por_vencer': por_vencer,
-            'vencidas_por_antiguedad': vencidas
-        }
-
     @staticmethod
-    def obtener_detalle_cxp(empresa):
+    def obtener_detalle_cxp(empresa, hoy=None):
         """
         Obtiene resumen detallado de cuentas por pagar.
 
         Args:
             empresa: Instancia de Empresa
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Detalle de CxP
         """
         from cuentas_pagar.models import CuentaPorPagar
 
-        hoy = timezone.now().date()
-
-        # Por estado
-        resumen = CuentaPorPagar.objects.filter(
-            empresa=empresa
-        ).values('estado').annotate(
-            total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO),
-            cantidad=Count('id')
+        return AntiguedadSaldosService.calcular(
+            CuentaPorPagar, empresa, ESTADOS_CXP_ACTIVOS, incluir_antiguedad=False, hoy=hoy
         )
 
-        # Por vencer
-        por_vencer = {}
-        for dias in RANGOS_VENCIMIENTO:
-            fecha_limite = hoy + timedelta(days=dias)
-            resultado = CuentaPorPagar.objects.filter(
-                empresa=empresa,
-                estado__in=['PENDIENTE', 'PARCIAL'],
-                fecha_vencimiento__lte=fecha_limite,
-                fecha_vencimiento__gt=hoy
-            ).aggregate(
-                total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO),
-                cantidad=Count('id')
-            )
-            por_vencer[f'dias_{dias}'] = {
-                'total': str(resultado['total']),
-                'cantidad': resultado['cantidad']
-            }
-
-        return {
-            'resumen_por_estado': {
-                r['estado']: {'total': str(r['total']), 'cantidad': r['cantidad']}
-                for r in resumen
-            },
-            'por_vencer': por_vencer
-        }
-
     @staticmethod
-    def obtener_actividad_reciente(empresa, limite):
+    def obtener_actividad_reciente(empresa, limite, cursor=None):
         """
-        Obtiene las últimas actividades del sistema.
+        Obtiene una página del feed de actividad del sistema.
 
         Args:
             empresa: Instancia de Empresa
             limite: Cantidad de actividades
+            cursor: Cursor devuelto por la página anterior (opcional)
 
         Returns:
-            dict: Actividades recientes
-        """
-        from ventas.models import Factura
-        from compras.models import Compra
-        from inventario.models import MovimientoInventario
+            dict: Actividades y cursor de la página siguiente
 
+        Raises:
+            ValidationError: Si el cursor no es válido
+        """
         logger.debug(f"Obteniendo actividad reciente (limite: {limite})")
-
-        actividades = []
-        limite_por_tipo = limite // 3
-
-        # Facturas
-        facturas = Factura.objects.filter(
-            empresa=empresa
-        ).select_related('cliente', 'usuario').order_by('-fecha')[:limite_por_tipo]
-
-        for f in facturas:
-            actividades.append({
-                'tipo': 'FACTURA',
-                'fecha': f.fecha,
-                'descripcion': f'Factura #{f.numero_factura or f.id} - {f.cliente.nombre}',
-                'monto': str(f.total),
-                'estado': f.estado,
-                'usuario': f.usuario.get_full_name() if f.usuario else None
-            })
-
-        # Compras
-        compras = Compra.objects.filter(
-            empresa=empresa
-        ).select_related('proveedor', 'usuario_creacion').order_by('-fecha_registro')[:limite_por_tipo]
-
-        for c in compras:
-            actividades.append({
-                'tipo': 'COMPRA',
-                'fecha': c.fecha_registro,
-                'descripcion': f'Compra #{c.numero_factura_proveedor or c.id} - {c.proveedor.nombre}',
-                'monto': str(c.total),
-                'estado': c.estado,
-                'usuario': c.usuario_creacion.get_full_name() if c.usuario_creacion else None
-            })
-
-        # Movimientos de inventario
-        movimientos = MovimientoInventario.objects.filter(
-            empresa=empresa,
-            tipo_movimiento__in=TIPOS_MOVIMIENTO_RELEVANTES
-        ).select_related('producto', 'usuario_creacion').order_by('-fecha')[:limite_por_tipo]
-
-        for m in movimientos:
-            actividades.append({
-                'tipo': f'INVENTARIO_{m.tipo_movimiento}',
-                'fecha': m.fecha,
-                'descripcion': f'{m.get_tipo_movimiento_display()} - {m.producto.nombre}',
-                'monto': str(m.cantidad),
-                'estado': None,
-                'usuario': m.usuario_creacion.get_full_name() if m.usuario_creacion else None
-            })
-
-        # Ordenar y limitar
-        actividades.sort(key=lambda x: x['fecha'], reverse=True)
-        actividades = actividades[:limite]
-
-        # Convertir fechas
-        for a in actividades:
-            a['fecha'] = a['fecha'].isoformat()
-
-        return {
-            'total': len(actividades),
-            'actividades': actividades
-        }
+        return ActividadService.listar(empresa, limite, cursor)
 
     @staticmethod
-    def obtener_indicadores_financieros(empresa):
+    def obtener_indicadores_financieros(empresa, hoy=None):
         """
         Obtiene indicadores financieros clave.
 
         Args:
             empresa: Instancia de Empresa
+            hoy: Fecha de referencia (default: fecha local actual)
 
         Returns:
             dict: Indicadores financieros
         """
-        from ventas.models import Factura
-        from compras.models import Compra
-        from cuentas_cobrar.models import CuentaPorCobrar
-        from cuentas_pagar.models import CuentaPorPagar
-        from inventario.models import InventarioProducto
-
-        hoy = timezone.now().date()
+        hoy = hoy or timezone.localdate()
         inicio_mes = hoy.replace(day=1)
         inicio_anio = hoy.replace(month=1, day=1)
 
-        # Ventas del mes
-        ventas_mes = Factura.objects.filter(
-            empresa=empresa,
-            fecha__date__gte=inicio_mes,
-            estado__in=ESTADOS_FACTURA_PAGADAS
-        ).aggregate(total=Coalesce(Sum('total'), DECIMAL_CERO))['total']
+        # Lecturas independientes: se evalúan en paralelo si está habilitado
+        r = EjecutorWidgets.ejecutar({
+            'ventas': lambda: DashboardService._calcular_ventas_mes_anio(empresa, inicio_mes, inicio_anio),
+            'compras_mes': lambda: DashboardService._calcular_compras_mes(empresa, inicio_mes),
+            'total_cxc': lambda: DashboardService._calcular_total_cxc(empresa),
+            'total_cxp': lambda: DashboardService._calcular_total_cxp(empresa),
+            'valor_inventario': lambda: DashboardService._calcular_valor_inventario(empresa),
+        })
+        ventas_mes = r['ventas']['mes']
+        ventas_anio = r['ventas']['anio']
+        compras_mes = r['compras_mes']
+        total_cxc = r['total_cxc']
+        total_cxp = r['total_cxp']
+        valor_inventario = r['valor_inventario']
+
+        # Margen bruto estimado
+        margen_bruto = ventas_mes - compras_mes if ventas_mes and compras_mes else DECIMAL_CERO
+
+        return {
+            'periodo': {
+                'mes': inicio_mes.strftime('%Y-%m'),
+                'anio': str(inicio_anio.year)
+            },
+            'ventas': {
+                'mes': str(ventas_mes),
+                'anio': str(ventas_anio)
+            },
+            'compras': {
+                'mes': str(compras_mes)
+            },
+            'cuentas': {
+                'por_cobrar': str(total_cxc),
+                'por_pagar': str(total_cxp),
+                'diferencia': str(total_cxc - total_cxp)
+            },
+            'inventario': {
+                'valor_total': str(valor_inventario)
+            },
+            'margen_bruto_mes': str(margen_bruto)
+        }
+
+    @staticmethod
+    def _calcular_ventas_mes_anio(empresa, inicio_mes, inicio_anio):
+        """Ventas pagadas del mes y del año en una sola lectura del resumen diario"""
+        from .models import VentaDiaria
 
-        # Ventas del año
-        ventas_anio = Factura.objects.filter(
+        return VentaDiaria.objects.filter(
             empresa=empresa,
-            fecha__date__gte=inicio_anio,
+            fecha__gte=inicio_anio,
             estado__in=ESTADOS_FACTURA_PAGADAS
-        ).aggregate(total=Coalesce(Sum('total'), DECIMAL_CERO))['total']
+        ).aggregate(
+            mes=Coalesce(Sum('total', filter=Q(fecha__gte=inicio_mes)), DECIMAL_CERO),
+            anio=Coalesce(Sum('total'), DECIMAL_CERO)
+        )
+
+    @staticmethod
+    def _calcular_compras_mes(empresa, inicio_mes):
+        """Total de compras desde el inicio del mes"""
+        from compras.models import Compra
 
-        # Compras del mes
-        compras_mes = Compra.objects.filter(
+        return Compra.objects.filter(
             empresa=empresa,
             fecha_compra__gte=inicio_mes,
             estado__in=ESTADOS_COMPRA_VALIDOS
         ).aggregate(total=Coalesce(Sum('total'), DECIMAL_CERO))['total']
 
-        # Total CxC
-        total_cxc = CuentaPorCobrar.objects.filter(
+    @staticmethod
+    def _calcular_total_cxc(empresa):
+        """Saldo pendiente total de cuentas por cobrar activas"""
+        from cuentas_cobrar.models import CuentaPorCobrar
+
+        return CuentaPorCobrar.objects.filter(
             empresa=empresa,
             estado__in=ESTADOS_CXC_ACTIVOS
         ).aggregate(total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO))['total']
 
-        # Total CxP
-        total_cxp = CuentaPorPagar.objects.filter(
+    @staticmethod
+    def _calcular_total_cxp(empresa):
+        """Saldo pendiente total de cuentas por pagar activas"""
+        from cuentas_pagar.models import CuentaPorPagar
+
+        return CuentaPorPagar.objects.filter(
             empresa=empresa,
             estado__in=ESTADOS_CXP_ACTIVOS
         ).aggregate(total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO))['total']
 
-        # Valor del inventario
-        valor_inventario = InventarioProducto.objects.filter(
+    @staticmethod
+    def _calcular_valor_inventario(empresa):
+        """Valor total del inventario de productos activos"""
+        from inventario.models import InventarioProducto
+
+        return InventarioProducto.objects.filter(
             empresa=empresa,
             producto__activo=True
         ).aggregate(
             total=Coalesce(Sum('valor_inventario'), DECIMAL_CERO)
         )['total']
 
-        # Margen bruto estimado
-        margen_bruto = ventas_mes - compras_mes if ventas_mes and compras_mes else DECIMAL_CERO
 
+class EjecutorWidgets:
+    """
+    Evalúa en paralelo las sub-consultas independientes de un widget.
+
+    Usa un pool de hilos acotado (settings.DASHBOARD_MAX_WORKERS); cada hilo
+    tiene su propia conexión a la base de datos, gestionada igual que en una
+    petición (close_old_connections respeta CONN_MAX_AGE).
+
+    Se ejecuta de forma secuencial cuando:
+    - settings.DASHBOARD_EJECUCION_CONCURRENTE está deshabilitado
+    - La base de datos es SQLite (escrituras serializadas, sin beneficio)
+    - Hay una transacción abierta (los hilos no verían sus cambios)
+
+    El modo forzado (forzar_modo) vive en una ContextVar: solo afecta al
+    hilo o contexto que lo fija, no a peticiones concurrentes.
+    """
+
+    _pool = None
+    _pool_lock = threading.Lock()
+    _modo_forzado = ContextVar('dashboard_modo_forzado', default=None)
+
+    @staticmethod
+    def max_workers():
+        return getattr(settings, 'DASHBOARD_MAX_WORKERS', 4)
+
+    @staticmethod
+    def usar_concurrencia():
+        """
+        Indica si las tareas pueden evaluarse en paralelo.
+
+        Returns:
+            bool: True si se usará el pool de hilos
+        """
+        modo_forzado = EjecutorWidgets._modo_forzado.get()
+        if modo_forzado is not None:
+            return modo_forzado and connection.vendor != 'sqlite'
+        if not getattr(settings, 'DASHBOARD_EJECUCION_CONCURRENTE', False):
+            return False
+        if EjecutorWidgets.max_workers() < 2:
+            return False
+        if connection.vendor == 'sqlite':
+            return False
+        return not connection.in_atomic_block
+
+    @classmethod
+    @contextmanager
+    def forzar_modo(cls, concurrente):
+        """
+        Fuerza el modo de ejecución (benchmarks). SQLite sigue siendo secuencial.
+
+        Args:
+            concurrente: True para paralelo, False para secuencial
+        """
+        token = cls._modo_forzado.set(concurrente)
+        try:
+            yield
+        finally:
+            cls._modo_forzado.reset(token)
+
+    @classmethod
+    def _obtener_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(
+                    max_workers=cls.max_workers(),
+                    thread_name_prefix='dashboard'
+                )
+            return cls._pool
+
+    @staticmethod
+    def _ejecutar_en_hilo(funcion):
+        """Ejecuta una tarea en un hilo del pool con su propia conexión"""
+        close_old_connections()
+        try:
+            return funcion()
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def ejecutar(tareas, concurrente=None):
+        """
+        Ejecuta un conjunto de tareas independientes.
+
+        Args:
+            tareas: dict {nombre: callable sin argumentos}
+            concurrente: Forzar modo (None = decidir con usar_concurrencia())
+
+        Returns:
+            dict: {nombre: resultado}
+
+        Raises:
+            Exception: La primera excepción lanzada por una tarea
+        """
+        if concurrente is None:
+            concurrente = EjecutorWidgets.usar_concurrencia()
+
+        if not concurrente or len(tareas) < 2:
+            return {nombre: funcion() for nombre, funcion in tareas.items()}
+
+        pool = EjecutorWidgets._obtener_pool()
+        futuros = {
+            nombre: pool.submit(EjecutorWidgets._ejecutar_en_hilo, funcion)
+            for nombre, funcion in tareas.items()
+        }
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+
+class AntiguedadSaldosService:
+    """
+    Motor de antigüedad de saldos compartido por CxC y CxP.
+
+    Calcula en un único aggregate() el resumen por estado, los rangos
+    "por vencer" (RANGOS_VENCIMIENTO) y las vencidas por antigüedad
+    (RANGOS_ANTIGUEDAD), usando agregaciones condicionales (filter=Q(...)).
+    """
+
+    @staticmethod
+    def _agregados(prefijo, filtro):
         return {
-            'periodo': {
-                'mes': inicio_mes.strftime('%Y-%m'),
-                'anio': str(inicio_anio.year)
-            },
-            'ventas': {
-                'mes': str(ventas_mes),
-                'anio': str(ventas_anio)
-            },
-            'compras': {
-                'mes': str(compras_mes)
-            },
-            'cuentas': {
-                'por_cobrar': str(total_cxc),
-                'por_pagar': str(total_cxp),
-                'diferencia': str(total_cxc - total_cxp)
+            f'{prefijo}__total': Coalesce(Sum('monto_pendiente', filter=filtro), DECIMAL_CERO),
+            f'{prefijo}__cantidad': Count('id', filter=filtro),
+        }
+
+    @staticmethod
+    def calcular(modelo, empresa, estados_activos, incluir_antiguedad=True, hoy=None):
+        """
+        Calcula el detalle de antigüedad de una cartera.
+
+        Args:
+            modelo: CuentaPorCobrar o CuentaPorPagar
+            empresa: Instancia de Empresa
+            estados_activos: Estados considerados para vencidas por antigüedad
+            incluir_antiguedad: Si se incluyen los rangos de vencidas
+            hoy: Fecha de referencia (default: hoy)
+
+        Returns:
+            dict: {'resumen_por_estado', 'por_vencer'[, 'vencidas_por_antiguedad']}
+        """
+        hoy = hoy or timezone.localdate()
+        estados = [valor for valor, _ in modelo._meta.get_field('estado').choices]
+
+        agregados = {}
+        for estado in estados:
+            agregados.update(AntiguedadSaldosService._agregados(
+                f'estado_{estado}', Q(estado=estado)
+            ))
+
+        for dias in RANGOS_VENCIMIENTO:
+            agregados.update(AntiguedadSaldosService._agregados(
+                f'dias_{dias}',
+                Q(
+                    estado__in=ESTADOS_CUENTA_POR_VENCER,
+                    fecha_vencimiento__lte=hoy + timedelta(days=dias),
+                    fecha_vencimiento__gt=hoy
+                )
+            ))
+
+        claves_antiguedad = []
+        if incluir_antiguedad:
+            for inicio, fin in RANGOS_ANTIGUEDAD:
+                filtro = Q(
+                    estado__in=estados_activos,
+                    fecha_vencimiento__lt=hoy - timedelta(days=inicio - 1)
+                )
+                if fin:
+                    filtro &= Q(fecha_vencimiento__gte=hoy - timedelta(days=fin))
+                key = f'{inicio}_a_{fin}_dias' if fin else f'mas_de_{inicio}_dias'
+                claves_antiguedad.append(key)
+                agregados.update(AntiguedadSaldosService._agregados(f'antiguedad_{key}', filtro))
+
+        resultado = modelo.objects.filter(empresa=empresa).aggregate(**agregados)
+
+        def bucket(prefijo):
+            return {
+                'total': str(resultado[f'{prefijo}__total']),
+                'cantidad': resultado[f'{prefijo}__cantidad']
+            }
+
+        detalle = {
+            'resumen_por_estado': {
+                estado: bucket(f'estado_{estado}')
+                for estado in estados
+                if resultado[f'estado_{estado}__cantidad']
             },
-            'inventario': {
-                'valor_total': str(valor_inventario)
+            'por_vencer': {
+                f'dias_{dias}': bucket(f'dias_{dias}')
+                for dias in RANGOS_VENCIMIENTO
             },
-            'margen_bruto_mes': str(margen_bruto)
+        }
+        if incluir_antiguedad:
+            detalle['vencidas_por_antiguedad'] = {
+                key: bucket(f'antiguedad_{key}') for key in claves_antiguedad
+            }
+        return detalle
+
+
+def _sumar_en_resumen(modelo, filtros, deltas, **extra):
+    """
+    Suma deltas a la fila de resumen identificada por filtros (F(), atómico).
+
+    Crea la fila si no existe; si otro proceso la crea entre el UPDATE y el
+    INSERT, reintenta el UPDATE.
+
+    Args:
+        modelo: Modelo de resumen
+        filtros: dict con la clave única de la fila
+        deltas: dict {campo: incremento}
+        **extra: Valores fijos a asignar en el UPDATE
+    """
+    if not any(deltas.values()):
+        return
+
+    actualizacion = {campo: F(campo) + valor for campo, valor in deltas.items()}
+    actualizacion.update(extra)
+    if modelo.objects.filter(**filtros).update(**actualizacion):
+        return
+
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**filtros, **deltas)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el UPDATE y el INSERT
+        modelo.objects.filter(**filtros).update(**actualizacion)
+
+
+class VentaDiariaService:
+    """Mantenimiento incremental del resumen diario de ventas (VentaDiaria)"""
+
+    CAMPOS_FACTURA = ('empresa_id', 'cliente_id', 'fecha', 'estado', 'total', 'itbis')
+
+    @staticmethod
+    def snapshot_factura(factura):
+        """
+        Extrae de una factura los valores que alimentan el resumen.
+
+        Args:
+            factura: Instancia de Factura o dict con CAMPOS_FACTURA
+
+        Returns:
+            dict | None: Valores relevantes o None si no aplica
+        """
+        if factura is None:
+            return None
+        if not isinstance(factura, dict):
+            factura = {campo: getattr(factura, campo) for campo in VentaDiariaService.CAMPOS_FACTURA}
+        if factura['empresa_id'] is None or factura['fecha'] is None:
+            return None
+        return {
+            'empresa_id': factura['empresa_id'],
+            'cliente_id': factura['cliente_id'],
+            'fecha': timezone.localdate(factura['fecha']),
+            'estado': factura['estado'],
+            'total': factura['total'] or DECIMAL_CERO,
+            'itbis': factura['itbis'] or DECIMAL_CERO,
+        }
+
+    @staticmethod
+    def registrar_cambio(anterior, actual):
+        """
+        Aplica al resumen la diferencia entre dos estados de una factura.
+
+        Args:
+            anterior: Snapshot previo (None si la factura es nueva)
+            actual: Snapshot nuevo (None si la factura fue eliminada)
+        """
+        clave = lambda s: (s['empresa_id'], s['fecha'], s['estado'])  # noqa: E731
+
+        if anterior and actual and clave(anterior) == clave(actual):
+            VentaDiariaService._aplicar(
+                *clave(actual),
+                cantidad=0,
+                total=actual['total'] - anterior['total'],
+                itbis=actual['itbis'] - anterior['itbis']
+            )
+            return
+
+        if anterior:
+            VentaDiariaService._aplicar(
+                *clave(anterior), cantidad=-1, total=-anterior['total'], itbis=-anterior['itbis']
+            )
+        if actual:
+            VentaDiariaService._aplicar(
+                *clave(actual), cantidad=1, total=actual['total'], itbis=actual['itbis']
+            )
+
+    @staticmethod
+    def _aplicar(empresa_id, fecha, estado, cantidad, total, itbis):
+        """Suma los deltas a la fila (empresa, fecha, estado) de forma atómica"""
+        from .models import VentaDiaria
+
+        _sumar_en_resumen(
+            VentaDiaria,
+            {'empresa_id': empresa_id, 'fecha': fecha, 'estado': estado},
+            {'cantidad': cantidad, 'total': total, 'itbis': itbis},
+            fecha_actualizacion=timezone.now()
+        )
+
+    @staticmethod
+    def reconstruir(empresa=None, fecha_desde=None, fecha_hasta=None):
+        """
+        Recalcula el resumen desde Factura (backfill o reparación).
+
+        Args:
+            empresa: Empresa a reconstruir (None = todas)
+            fecha_desde: Primer día a reconstruir (inclusive, opcional)
+            fecha_hasta: Último día a reconstruir (inclusive, opcional)
+
+        Returns:
+            int: Filas de resumen generadas
+        """
+        from ventas.models import Factura
+        from .models import VentaDiaria
+
+        facturas = Factura.objects.filter(empresa__isnull=False)
+        resumen = VentaDiaria.objects.all()
+        if empresa is not None:
+            facturas = facturas.filter(empresa=empresa)
+            resumen = resumen.filter(empresa=empresa)
+        facturas = facturas.filter(**filtro_rango('fecha', *rango_dias(fecha_desde, fecha_hasta)))
+        if fecha_desde:
+            resumen = resumen.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            resumen = resumen.filter(fecha__lte=fecha_hasta)
+
+        filas = facturas.annotate(
+            dia=TruncDate('fecha')
+        ).values('empresa_id', 'dia', 'estado').annotate(
+            suma_total=Coalesce(Sum('total'), DECIMAL_CERO),
+            suma_itbis=Coalesce(Sum('itbis'), DECIMAL_CERO),
+            conteo=Count('id')
+        ).order_by()
+
+        with transaction.atomic():
+            resumen.delete()
+            creadas = VentaDiaria.objects.bulk_create(
+                (
+                    VentaDiaria(
+                        empresa_id=f['empresa_id'],
+                        fecha=f['dia'],
+                        estado=f['estado'],
+                        cantidad=f['conteo'],
+                        total=f['suma_total'],
+                        itbis=f['suma_itbis'],
+                    )
+                    for f in filas.iterator()
+                ),
+                batch_size=1000
+            )
+
+        logger.info(f"Resumen de ventas diarias reconstruido: {len(creadas)} filas")
+        return len(creadas)
+
+
+class RankingVentasService:
+    """
+    Resúmenes diarios por producto y por cliente (VentaProductoDiaria,
+    VentaClienteDiaria) y los rankings que se sirven desde ellos.
+
+    Las filas llevan el estado de la factura, igual que VentaDiaria, para
+    que un cambio de estado sea mover cantidades entre filas.
+    """
+
+    CAMPOS_DETALLE = ('factura_id', 'producto_id', 'cantidad', 'importe')
+
+    @staticmethod
+    def _clave(snapshot):
+        return (snapshot['empresa_id'], snapshot['fecha'], snapshot['estado'])
+
+    @staticmethod
+    def snapshot_detalle(detalle):
+        """
+        Extrae de una línea de factura los valores que alimentan el resumen.
+
+        Args:
+            detalle: Instancia de DetalleFactura o dict con CAMPOS_DETALLE
+
+        Returns:
+            dict | None: Valores relevantes
+        """
+        if detalle is None:
+            return None
+        if not isinstance(detalle, dict):
+            detalle = {campo: getattr(detalle, campo) for campo in RankingVentasService.CAMPOS_DETALLE}
+        return {
+            'factura_id': detalle['factura_id'],
+            'producto_id': detalle['producto_id'],
+            'cantidad': detalle['cantidad'] or DECIMAL_CERO,
+            'importe': detalle['importe'] or DECIMAL_CERO,
+        }
+
+    @staticmethod
+    def _aplicar_producto(clave, producto_id, cantidad, total):
+        from .models import VentaProductoDiaria
+
+        empresa_id, fecha, estado = clave
+        _sumar_en_resumen(
+            VentaProductoDiaria,
+            {'empresa_id': empresa_id, 'fecha': fecha, 'estado': estado, 'producto_id': producto_id},
+            {'cantidad': cantidad, 'total': total}
+        )
+
+    @staticmethod
+    def _aplicar_cliente(snapshot, cantidad, total):
+        from .models import VentaClienteDiaria
+
+        empresa_id, fecha, estado = RankingVentasService._clave(snapshot)
+        _sumar_en_resumen(
+            VentaClienteDiaria,
+            {'empresa_id': empresa_id, 'fecha': fecha, 'estado': estado, 'cliente_id': snapshot['cliente_id']},
+            {'cantidad': cantidad, 'total': total}
+        )
+
+    @staticmethod
+    def registrar_cambio_factura(factura_id, anterior, actual):
+        """
+        Aplica a los resúmenes el cambio de una factura.
+
+        Las líneas de una factura eliminada se descuentan desde los signals
+        de DetalleFactura (el borrado en cascada los dispara antes).
+
+        Args:
+            factura_id: ID de la factura
+            anterior: Snapshot previo (VentaDiariaService.snapshot_factura)
+            actual: Snapshot nuevo
+        """
+        from ventas.models import DetalleFactura
+
+        clave = RankingVentasService._clave
+        misma_clave = anterior and actual and clave(anterior) == clave(actual)
+
+        if misma_clave and anterior['cliente_id'] == actual['cliente_id']:
+            RankingVentasService._aplicar_cliente(actual, 0, actual['total'] - anterior['total'])
+        else:
+            if anterior:
+                RankingVentasService._aplicar_cliente(anterior, -1, -anterior['total'])
+            if actual:
+                RankingVentasService._aplicar_cliente(actual, 1, actual['total'])
+
+        # Factura nueva (aún sin líneas), eliminada, o sin cambio de clave
+        if not anterior or not actual or misma_clave:
+            return
+
+        lineas = DetalleFactura.objects.filter(factura_id=factura_id).values('producto_id').annotate(
+            suma_cantidad=Coalesce(Sum('cantidad'), DECIMAL_CERO),
+            suma_importe=Coalesce(Sum('importe'), DECIMAL_CERO)
+        ).order_by()
+        for linea in lineas:
+            RankingVentasService._aplicar_producto(
+                clave(anterior), linea['producto_id'], -linea['suma_cantidad'], -linea['suma_importe']
+            )
+            RankingVentasService._aplicar_producto(
+                clave(actual), linea['producto_id'], linea['suma_cantidad'], linea['suma_importe']
+            )
+
+    @staticmethod
+    def registrar_cambio_detalle(facturas, anterior, actual):
+        """
+        Aplica al resumen por producto el cambio de una línea de factura.
+
+        Args:
+            facturas: dict {factura_id: snapshot de la factura}
+            anterior: Snapshot previo de la línea (None si es nueva)
+            actual: Snapshot nuevo de la línea (None si fue eliminada)
+        """
+        if anterior and facturas.get(anterior['factura_id']):
+            RankingVentasService._aplicar_producto(
+                RankingVentasService._clave(facturas[anterior['factura_id']]),
+                anterior['producto_id'], -anterior['cantidad'], -anterior['importe']
+            )
+        if actual and facturas.get(actual['factura_id']):
+            RankingVentasService._aplicar_producto(
+                RankingVentasService._clave(facturas[actual['factura_id']]),
+                actual['producto_id'], actual['cantidad'], actual['importe']
+            )
+
+    @staticmethod
+    def top_productos(empresa, limite, fecha_desde):
+        """
+        Ranking de productos por unidades vendidas desde una fecha.
+
+        Suma las particiones diarias del período por producto y selecciona
+        los `limite` mayores con un heap (sin ordenar todo el resultado).
+
+        Args:
+            empresa: Instancia de Empresa
+            limite: Cantidad de productos
+            fecha_desde: Primer día (local) del período
+
+        Returns:
+            list: [{'id', 'codigo_sku', 'nombre', 'cantidad_vendida', 'total_vendido'}]
+        """
+        from productos.models import Producto
+        from .models import VentaProductoDiaria
+
+        sumas = VentaProductoDiaria.objects.filter(
+            empresa=empresa,
+            fecha__gte=fecha_desde,
+            estado__in=ESTADOS_FACTURA_PAGADAS
+        ).values('producto_id').annotate(
+            cantidad_vendida=Sum('cantidad'),
+            total_vendido=Sum('total')
+        ).filter(cantidad_vendida__gt=0).order_by()
+
+        top = heapq.nlargest(limite, sumas, key=lambda s: (s['cantidad_vendida'], -s['producto_id']))
+        productos = {
+            p['id']: p
+            for p in Producto.objects.filter(pk__in=[s['producto_id'] for s in top]).values('id', 'codigo_sku', 'nombre')
+        }
+
+        return [
+            {
+                'id': s['producto_id'],
+                'codigo_sku': productos[s['producto_id']]['codigo_sku'],
+                'nombre': productos[s['producto_id']]['nombre'],
+                'cantidad_vendida': str(s['cantidad_vendida']),
+                'total_vendido': str(s['total_vendido'])
+            }
+            for s in top
+        ]
+
+    @staticmethod
+    def top_clientes(empresa, limite, fecha_desde):
+        """
+        Ranking de clientes por monto facturado desde una fecha.
+
+        Args:
+            empresa: Instancia de Empresa
+            limite: Cantidad de clientes
+            fecha_desde: Primer día (local) del período
+
+        Returns:
+            list: [{'id', 'nombre', 'total_compras', 'cantidad_facturas'}]
+        """
+        from clientes.models import Cliente
+        from .models import VentaClienteDiaria
+
+        sumas = VentaClienteDiaria.objects.filter(
+            empresa=empresa,
+            fecha__gte=fecha_desde,
+            estado__in=ESTADOS_FACTURA_PAGADAS
+        ).values('cliente_id').annotate(
+            total_compras=Sum('total'),
+            cantidad_facturas=Sum('cantidad')
+        ).filter(cantidad_facturas__gt=0).order_by()
+
+        top = heapq.nlargest(limite, sumas, key=lambda s: (s['total_compras'], -s['cliente_id']))
+        nombres = dict(
+            Cliente.objects.filter(pk__in=[s['cliente_id'] for s in top]).values_list('id', 'nombre')
+        )
+
+        return [
+            {
+                'id': s['cliente_id'],
+                'nombre': nombres[s['cliente_id']],
+                'total_compras': str(s['total_compras']),
+                'cantidad_facturas': s['cantidad_facturas']
+            }
+            for s in top
+        ]
+
+    @staticmethod
+    def reconstruir(empresa=None, fecha_desde=None, fecha_hasta=None):
+        """
+        Recalcula ambos resúmenes desde Factura y DetalleFactura.
+
+        Args:
+            empresa: Empresa a reconstruir (None = todas)
+            fecha_desde: Primer día a reconstruir (inclusive, opcional)
+            fecha_hasta: Último día a reconstruir (inclusive, opcional)
+
+        Returns:
+            int: Filas de resumen generadas
+        """
+        from ventas.models import DetalleFactura, Factura
+        from .models import VentaClienteDiaria, VentaProductoDiaria
+
+        facturas = Factura.objects.filter(empresa__isnull=False)
+        detalles = DetalleFactura.objects.filter(factura__empresa__isnull=False)
+        por_producto = VentaProductoDiaria.objects.all()
+        por_cliente = VentaClienteDiaria.objects.all()
+        if empresa is not None:
+            facturas = facturas.filter(empresa=empresa)
+            detalles = detalles.filter(factura__empresa=empresa)
+            por_producto = por_producto.filter(empresa=empresa)
+            por_cliente = por_cliente.filter(empresa=empresa)
+        inicio, fin = rango_dias(fecha_desde, fecha_hasta)
+        facturas = facturas.filter(**filtro_rango('fecha', inicio, fin))
+        detalles = detalles.filter(**filtro_rango('factura__fecha', inicio, fin))
+        if fecha_desde:
+            por_producto = por_producto.filter(fecha__gte=fecha_desde)
+            por_cliente = por_cliente.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            por_producto = por_producto.filter(fecha__lte=fecha_hasta)
+            por_cliente = por_cliente.filter(fecha__lte=fecha_hasta)
+
+        filas_producto = detalles.annotate(
+            dia=TruncDate('factura__fecha')
+        ).values('factura__empresa_id', 'dia', 'factura__estado', 'producto_id').annotate(
+            suma_cantidad=Coalesce(Sum('cantidad'), DECIMAL_CERO),
+            suma_importe=Coalesce(Sum('importe'), DECIMAL_CERO)
+        ).order_by()
+        filas_cliente = facturas.annotate(
+            dia=TruncDate('fecha')
+        ).values('empresa_id', 'dia', 'estado', 'cliente_id').annotate(
+            suma_total=Coalesce(Sum('total'), DECIMAL_CERO),
+            conteo=Count('id')
+        ).order_by()
+
+        with transaction.atomic():
+            por_producto.delete()
+            por_cliente.delete()
+            creadas = VentaProductoDiaria.objects.bulk_create(
+                (
+                    VentaProductoDiaria(
+                        empresa_id=f['factura__empresa_id'],
+                        fecha=f['dia'],
+                        estado=f['factura__estado'],
+                        producto_id=f['producto_id'],
+                        cantidad=f['suma_cantidad'],
+                        total=f['suma_importe'],
+                    )
+                    for f in filas_producto.iterator()
+                ),
+                batch_size=1000
+            )
+            creadas += VentaClienteDiaria.objects.bulk_create(
+                (
+                    VentaClienteDiaria(
+                        empresa_id=f['empresa_id'],
+                        fecha=f['dia'],
+                        estado=f['estado'],
+                        cliente_id=f['cliente_id'],
+                        cantidad=f['conteo'],
+                        total=f['suma_total'],
+                    )
+                    for f in filas_cliente.iterator()
+                ),
+                batch_size=1000
+            )
+
+        logger.info(f"Resúmenes por producto y cliente reconstruidos: {len(creadas)} filas")
+        return len(creadas)
+
+
+class ActividadService:
+    """
+    Feed de actividad por empresa con paginación por cursor (keyset).
+
+    Cada página es un rango del índice (empresa, -fecha, -id) a partir de
+    la última fila vista, por lo que su costo no depende de qué tan atrás
+    en el histórico se encuentre.
+    """
+
+    @staticmethod
+    def _nombre_usuario(usuario):
+        if usuario is None:
+            return None
+        return usuario.get_full_name()
+
+    @staticmethod
+    def desde_factura(factura, fecha=None):
+        """
+        Construye la actividad de una factura.
+
+        Args:
+            factura: Instancia de Factura
+            fecha: Fecha del evento (default: fecha de la factura)
+
+        Returns:
+            Actividad | None: Sin guardar; None si la factura no tiene empresa
+        """
+        from .models import Actividad
+
+        if factura.empresa_id is None:
+            return None
+        return Actividad(
+            empresa_id=factura.empresa_id,
+            fecha=fecha or factura.fecha,
+            tipo=ACTIVIDAD_FACTURA,
+            descripcion=f'Factura #{factura.numero_factura or factura.id} - {factura.cliente.nombre}'[:255],
+            monto=factura.total or DECIMAL_CERO,
+            estado=factura.estado,
+            usuario=ActividadService._nombre_usuario(factura.usuario),
+            modelo='ventas.Factura',
+            objeto_id=factura.id,
+        )
+
+    @staticmethod
+    def desde_compra(compra, fecha=None):
+        """
+        Construye la actividad de una compra.
+
+        Args:
+            compra: Instancia de Compra
+            fecha: Fecha del evento (default: fecha de registro)
+
+        Returns:
+            Actividad | None: Sin guardar; None si la compra no tiene empresa
+        """
+        from .models import Actividad
+
+        if compra.empresa_id is None:
+            return None
+        return Actividad(
+            empresa_id=compra.empresa_id,
+            fecha=fecha or compra.fecha_registro,
+            tipo=ACTIVIDAD_COMPRA,
+            descripcion=f'Compra #{compra.numero_factura_proveedor or compra.id} - {compra.proveedor.nombre}'[:255],
+            monto=compra.total or DECIMAL_CERO,
+            estado=compra.estado,
+            usuario=ActividadService._nombre_usuario(compra.usuario_creacion),
+            modelo='compras.Compra',
+            objeto_id=compra.id,
+        )
+
+    @staticmethod
+    def desde_movimiento(movimiento):
+        """
+        Construye la actividad de un movimiento de inventario.
+
+        Args:
+            movimiento: Instancia de MovimientoInventario
+
+        Returns:
+            Actividad | None: Sin guardar; None si el tipo no es relevante
+        """
+        from .models import Actividad
+
+        if movimiento.empresa_id is None or movimiento.tipo_movimiento not in TIPOS_MOVIMIENTO_RELEVANTES:
+            return None
+        return Actividad(
+            empresa_id=movimiento.empresa_id,
+            fecha=movimiento.fecha,
+            tipo=f'{PREFIJO_ACTIVIDAD_INVENTARIO}{movimiento.tipo_movimiento}',
+            descripcion=f'{movimiento.get_tipo_movimiento_display()} - {movimiento.producto.nombre}'[:255],
+            monto=movimiento.cantidad,
+            estado=None,
+            usuario=ActividadService._nombre_usuario(movimiento.usuario_creacion),
+            modelo='inventario.MovimientoInventario',
+            objeto_id=movimiento.id,
+        )
+
+    @staticmethod
+    def registrar(actividad):
+        """Guarda una actividad construida por los métodos desde_*"""
+        if actividad is not None:
+            actividad.save()
+
+    @staticmethod
+    def registrar_varias(actividades):
+        """
+        Guarda con un solo bulk_create las actividades construidas por los métodos desde_*
+
+        Returns:
+            list: Actividades guardadas
+        """
+        from .models import Actividad
+
+        return Actividad.objects.bulk_create([actividad for actividad in actividades if actividad is not None])
+
+    @staticmethod
+    def reconstruir(empresa=None, fecha_desde=None, fecha_hasta=None):
+        """
+        Recalcula el feed desde Factura, Compra y MovimientoInventario
+        (backfill o reparación tras cargas masivas que no disparan signals).
+
+        Cada documento deja una sola entrada con su estado actual: los
+        eventos de cambio de estado del rango se pierden.
+
+        Args:
+            empresa: Empresa a reconstruir (None = todas)
+            fecha_desde: Primer día a reconstruir (inclusive, opcional)
+            fecha_hasta: Último día a reconstruir (inclusive, opcional)
+
+        Returns:
+            int: Actividades generadas
+        """
+        from compras.models import Compra
+        from inventario.models import MovimientoInventario
+        from ventas.models import Factura
+        from .models import Actividad
+
+        inicio, fin = rango_dias(fecha_desde, fecha_hasta)
+
+        origenes = (
+            (Factura.objects.select_related('cliente', 'usuario'), 'fecha', ActividadService.desde_factura),
+            (
+                Compra.objects.select_related('proveedor', 'usuario_creacion'),
+                'fecha_registro', ActividadService.desde_compra,
+            ),
+            (
+                MovimientoInventario.objects.filter(
+                    tipo_movimiento__in=TIPOS_MOVIMIENTO_RELEVANTES
+                ).select_related('producto', 'usuario_creacion'),
+                'fecha', ActividadService.desde_movimiento,
+            ),
+        )
+        actividades = Actividad.objects.filter(**filtro_rango('fecha', inicio, fin))
+        if empresa is not None:
+            actividades = actividades.filter(empresa=empresa)
+
+        creadas = 0
+        with transaction.atomic():
+            actividades.delete()
+            for documentos, campo_fecha, construir in origenes:
+                documentos = documentos.filter(empresa__isnull=False, **filtro_rango(campo_fecha, inicio, fin))
+                if empresa is not None:
+                    documentos = documentos.filter(empresa=empresa)
+                filas = (construir(documento) for documento in documentos.iterator(chunk_size=TAMANO_LOTE_ACTIVIDAD))
+                while lote := list(islice(filas, TAMANO_LOTE_ACTIVIDAD)):
+                    creadas += len(ActividadService.registrar_varias(lote))
+
+        logger.info(f"Feed de actividad reconstruido: {creadas} actividades")
+        return creadas
+
+    @staticmethod
+    def codificar_cursor(fecha, pk):
+        """
+        Codifica la posición (fecha, id) de la última fila de una página.
+
+        Returns:
+            str: Cursor opaco seguro para URL
+        """
+        crudo = json.dumps([fecha.isoformat(), pk]).encode()
+        return base64.urlsafe_b64encode(crudo).decode()
+
+    @staticmethod
+    def decodificar_cursor(cursor):
+        """
+        Decodifica un cursor generado por codificar_cursor.
+
+        Returns:
+            tuple: (fecha, id)
+
+        Raises:
+            ValidationError: Si el cursor no es válido
+        """
+        try:
+            fecha, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(fecha), int(pk)
+        except (binascii.Error, ValueError, TypeError):
+            raise ValidationError(ERROR_CURSOR_INVALIDO)
+
+    @staticmethod
+    def listar(empresa, limite, cursor=None):
+        """
+        Obtiene una página del feed ordenada de más reciente a más antigua.
+
+        Args:
+            empresa: Instancia de Empresa
+            limite: Tamaño de página
+            cursor: Cursor de la página anterior (None = primera página)
+
+        Returns:
+            dict: {'total', 'actividades', 'siguiente_cursor'}
+
+        Raises:
+            ValidationError: Si el cursor no es válido
+        """
+        from .models import Actividad
+
+        actividades = Actividad.objects.filter(empresa=empresa)
+        if cursor:
+            fecha, pk = ActividadService.decodificar_cursor(cursor)
+            actividades = actividades.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=pk))
+
+        filas = list(
+            actividades.order_by('-fecha', '-id').values(
+                'id', 'tipo', 'fecha', 'descripcion', 'monto', 'estado', 'usuario'
+            )[:limite + 1]
+        )
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+
+        siguiente_cursor = None
+        if hay_mas:
+            ultima = filas[-1]
+            siguiente_cursor = ActividadService.codificar_cursor(ultima['fecha'], ultima['id'])
+
+        return {
+            'total': len(filas),
+            'actividades': [
+                {
+                    'tipo': f['tipo'],
+                    'fecha': f['fecha'].isoformat(),
+                    'descripcion': f['descripcion'],
+                    'monto': str(f['monto']),
+                    'estado': f['estado'],
+                    'usuario': f['usuario'],
+                }
+                for f in filas
+            ],
+            'siguiente_cursor': siguiente_cursor,
         }
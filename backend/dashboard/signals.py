@@ -0,0 +1,285 @@
+"""
+Signals para el módulo Dashboard
+
+- Invalida el caché de widgets de una empresa cuando cambian los documentos
+  que alimentan las métricas del dashboard.
+- Mantiene incrementalmente el resumen diario de ventas (VentaDiaria) y
+  los resúmenes por producto y cliente (VentaProductoDiaria, VentaClienteDiaria).
+- Registra en el feed de actividad (Actividad) la creación y los cambios
+  de estado de facturas y compras, y los movimientos de inventario.
+
+Los signals se registran en apps.py mediante el método ready().
+"""
+import logging
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from caja.models import SesionCaja
+from compras.models import Compra
+from cuentas_cobrar.models import CuentaPorCobrar
+from cuentas_pagar.models import CuentaPorPagar
+from empresas.models import Empresa
+from inventario.models import AlertaInventario, InventarioProducto, MovimientoInventario
+from inventario.signals import alertas_sincronizadas, movimientos_registrados
+from ventas.models import Factura, DetalleFactura
+
+from .cache import DashboardCache
+from .services import ActividadService, RankingVentasService, VentaDiariaService
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidar(empresa_id):
+    """
+    Invalida el caché ahora y nuevamente al confirmar la transacción.
+
+    La segunda invalidación descarta lo que otro proceso haya recalculado
+    mientras la transacción aún no era visible.
+    """
+    if empresa_id is None:
+        return
+    DashboardCache.invalidar(empresa_id)
+    transaction.on_commit(lambda: DashboardCache.invalidar(empresa_id))
+
+
+@receiver([post_save, post_delete], sender=Factura)
+@receiver([post_save, post_delete], sender=CuentaPorCobrar)
+@receiver([post_save, post_delete], sender=CuentaPorPagar)
+@receiver([post_save, post_delete], sender=Compra)
+@receiver([post_save, post_delete], sender=AlertaInventario)
+@receiver([post_save, post_delete], sender=InventarioProducto)
+@receiver([post_save, post_delete], sender=MovimientoInventario)
+@receiver([post_save, post_delete], sender=SesionCaja)
+def invalidar_cache_dashboard(sender, instance, **kwargs):
+    """
+    Invalida el caché del dashboard de la empresa del documento.
+
+    Args:
+        sender: Modelo que envía la señal
+        instance: Instancia modificada o eliminada
+    """
+    _invalidar(getattr(instance, 'empresa_id', None))
+
+
+@receiver(alertas_sincronizadas, sender=AlertaInventario)
+def invalidar_cache_dashboard_alertas(sender, empresa_ids, **kwargs):
+    """
+    Invalida el caché de las empresas cuyas alertas se crearon o resolvieron
+    en bloque (ServicioAlertasInventario.generar_todas_las_alertas).
+    """
+    for empresa_id in empresa_ids:
+        _invalidar(empresa_id)
+
+
+@receiver(post_save, sender=Empresa)
+def invalidar_cache_dashboard_empresa(sender, instance, created, **kwargs):
+    """
+    Inicia una versión nueva de caché al crear una empresa.
+
+    Evita servir entradas residuales si el ID de la empresa se reutiliza.
+    """
+    if created:
+        DashboardCache.invalidar(instance.pk)
+
+
+# ============================================================
+# RESUMEN DIARIO DE VENTAS
+# ============================================================
+
+@receiver(pre_save, sender=Factura)
+def factura_capturar_resumen_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Signal pre-save para Factura.
+    - Guarda los valores previos que alimentan VentaDiaria
+    """
+    instance._venta_diaria_anterior = None
+    instance._venta_diaria_omitir = False
+    if raw or not instance.pk:
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & {'empresa', 'cliente', 'fecha', 'estado', 'total', 'itbis'}:
+        instance._venta_diaria_omitir = True
+        return
+
+    anterior = Factura.objects.filter(pk=instance.pk).values(*VentaDiariaService.CAMPOS_FACTURA).first()
+    instance._venta_diaria_anterior = VentaDiariaService.snapshot_factura(anterior)
+
+
+@receiver(post_save, sender=Factura)
+def factura_actualizar_resumen(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal post-save para Factura.
+    - Aplica a VentaDiaria y a los resúmenes por producto y cliente
+      la diferencia con el estado anterior
+    """
+    if raw or getattr(instance, '_venta_diaria_omitir', False):
+        return
+
+    anterior = None if created else getattr(instance, '_venta_diaria_anterior', None)
+    actual = VentaDiariaService.snapshot_factura(instance)
+    VentaDiariaService.registrar_cambio(anterior, actual)
+    RankingVentasService.registrar_cambio_factura(instance.pk, anterior, actual)
+
+
+@receiver(post_delete, sender=Factura)
+def factura_descontar_resumen(sender, instance, **kwargs):
+    """
+    Signal post-delete para Factura.
+    - Descuenta la factura de VentaDiaria y del resumen por cliente
+    """
+    anterior = VentaDiariaService.snapshot_factura(instance)
+    VentaDiariaService.registrar_cambio(anterior, None)
+    RankingVentasService.registrar_cambio_factura(instance.pk, anterior, None)
+
+
+def _facturas_de_detalle(*detalles):
+    """
+    Obtiene el snapshot de las facturas de las líneas indicadas.
+
+    Returns:
+        dict: {factura_id: snapshot} (una sola consulta)
+    """
+    ids = {d['factura_id'] for d in detalles if d}
+    return {
+        f['id']: VentaDiariaService.snapshot_factura(f)
+        for f in Factura.objects.filter(pk__in=ids).values('id', *VentaDiariaService.CAMPOS_FACTURA)
+    }
+
+
+@receiver(pre_save, sender=DetalleFactura)
+def detalle_factura_capturar_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Signal pre-save para DetalleFactura.
+    - Guarda la línea previa para aplicar la diferencia al resumen por producto
+    """
+    instance._venta_producto_anterior = None
+    if raw or not instance.pk:
+        return
+
+    anterior = DetalleFactura.objects.filter(pk=instance.pk).values(*RankingVentasService.CAMPOS_DETALLE).first()
+    instance._venta_producto_anterior = RankingVentasService.snapshot_detalle(anterior)
+
+
+@receiver(post_save, sender=DetalleFactura)
+def detalle_factura_actualizar_resumen(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal post-save para DetalleFactura.
+    - Invalida el caché del dashboard de la empresa de la factura
+    - Aplica la línea al resumen por producto
+
+    DetalleFactura no tiene empresa propia; se toma la de su factura.
+    """
+    if raw:
+        return
+
+    anterior = None if created else getattr(instance, '_venta_producto_anterior', None)
+    actual = RankingVentasService.snapshot_detalle(instance)
+    facturas = _facturas_de_detalle(anterior, actual)
+
+    for factura in facturas.values():
+        if factura:
+            _invalidar(factura['empresa_id'])
+    RankingVentasService.registrar_cambio_detalle(facturas, anterior, actual)
+
+
+@receiver(post_delete, sender=DetalleFactura)
+def detalle_factura_descontar_resumen(sender, instance, **kwargs):
+    """
+    Signal post-delete para DetalleFactura.
+    - Invalida el caché del dashboard y descuenta la línea del resumen
+
+    En el borrado en cascada de una factura las líneas se eliminan antes
+    que la factura, por lo que todavía puede consultarse su estado.
+    """
+    anterior = RankingVentasService.snapshot_detalle(instance)
+    facturas = _facturas_de_detalle(anterior)
+
+    for factura in facturas.values():
+        if factura:
+            _invalidar(factura['empresa_id'])
+    RankingVentasService.registrar_cambio_detalle(facturas, anterior, None)
+
+
+# ============================================================
+# FEED DE ACTIVIDAD
+# ============================================================
+
+@receiver(post_save, sender=Factura)
+def factura_registrar_actividad(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal post-save para Factura.
+    - Registra la creación o el cambio de estado en el feed de actividad
+
+    El estado anterior se toma del snapshot capturado para VentaDiaria.
+    """
+    if raw:
+        return
+    if created:
+        ActividadService.registrar(ActividadService.desde_factura(instance))
+        return
+
+    anterior = getattr(instance, '_venta_diaria_anterior', None)
+    if anterior and anterior['estado'] != instance.estado:
+        ActividadService.registrar(ActividadService.desde_factura(instance, fecha=timezone.now()))
+
+
+@receiver(pre_save, sender=Compra)
+def compra_capturar_estado_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Signal pre-save para Compra.
+    - Guarda el estado previo para detectar cambios de estado
+    """
+    instance._actividad_estado_anterior = None
+    if raw or not instance.pk:
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'estado' not in update_fields:
+        return
+
+    instance._actividad_estado_anterior = Compra.objects.filter(
+        pk=instance.pk
+    ).values_list('estado', flat=True).first()
+
+
+@receiver(post_save, sender=Compra)
+def compra_registrar_actividad(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal post-save para Compra.
+    - Registra la creación o el cambio de estado en el feed de actividad
+    """
+    if raw:
+        return
+    if created:
+        ActividadService.registrar(ActividadService.desde_compra(instance))
+        return
+
+    anterior = getattr(instance, '_actividad_estado_anterior', None)
+    if anterior is not None and anterior != instance.estado:
+        ActividadService.registrar(ActividadService.desde_compra(instance, fecha=timezone.now()))
+
+
+@receiver(post_save, sender=MovimientoInventario)
+def movimiento_registrar_actividad(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal post-save para MovimientoInventario.
+    - Registra los movimientos relevantes en el feed de actividad
+    """
+    if raw or not created:
+        return
+    ActividadService.registrar(ActividadService.desde_movimiento(instance))
+
+
+@receiver(movimientos_registrados, sender=MovimientoInventario)
+def movimientos_lote_registrar_actividad(sender, movimientos, **kwargs):
+    """
+    Signal de movimientos creados en lote (registrar_movimientos_lote).
+    - Invalida el caché de las empresas de los movimientos
+    - Registra los movimientos relevantes en el feed de actividad
+    """
+    for empresa_id in {movimiento.empresa_id for movimiento in movimientos}:
+        _invalidar(empresa_id)
+    ActividadService.registrar_varias(ActividadService.desde_movimiento(m) for m in movimientos)
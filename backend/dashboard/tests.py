@@ -280,6 +280,83 @@ class DashboardAPITest(APITestCase):
         self.assertIn('cuentas', response.data)
         self.assertIn('inventario', response.data)
 
+    def test_lote_widgets(self):
+        """Test: Endpoint lote retorna los mismos datos que los endpoints individuales"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/v1/dashboard/lote/', {'widgets': [
+            {'widget': 'resumen'},
+            {'widget': 'ventas_periodo', 'params': {'dias': 7}},
+            {'widget': 'top_productos', 'params': {'limite': 5}},
+            {'widget': 'top_clientes', 'params': {'dias': 30}, 'clave': 'clientes_mes'},
+            {'widget': 'cuentas_por_cobrar'},
+            {'widget': 'indicadores_financieros'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        widgets = response.data['widgets']
+        self.assertEqual(
+            list(widgets),
+            ['resumen', 'ventas_periodo', 'top_productos', 'clientes_mes',
+             'cuentas_por_cobrar', 'indicadores_financieros']
+        )
+        self.assertEqual(widgets['resumen'], self.client.get('/api/v1/dashboard/resumen/').data)
+        self.assertEqual(
+            widgets['ventas_periodo'],
+            self.client.get('/api/v1/dashboard/ventas_periodo/?dias=7').data
+        )
+        self.assertEqual(widgets['clientes_mes']['periodo_dias'], 30)
+        self.assertEqual(widgets['resumen']['cuentas_por_cobrar']['vencidas_cantidad'], 1)
+
+    def test_lote_error_por_widget(self):
+        """Test: Un widget inválido retorna error sin afectar a los demás"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/v1/dashboard/lote/', {'widgets': [
+            {'widget': 'ventas_periodo', 'params': {'dias': 9999}},
+            {'widget': 'inexistente'},
+            {'widget': 'cuentas_por_pagar'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        widgets = response.data['widgets']
+        self.assertIn('error', widgets['ventas_periodo'])
+        self.assertIn('error', widgets['inexistente'])
+        self.assertIn('resumen_por_estado', widgets['cuentas_por_pagar'])
+
+    def test_lote_valida_igual_que_endpoints(self):
+        """Test: El lote y los endpoints individuales comparten la validación de parámetros"""
+        self.client.force_authenticate(user=self.user)
+        casos = (
+            ('ventas_periodo', {'dias': 9999}),
+            ('ventas_por_mes', {'meses': 99}),
+            ('top_productos', {'limite': 101}),
+            ('productos_stock_bajo', {'limite': 101}),
+            ('top_clientes', {'dias': 400}),
+            ('actividad_reciente', {'limite': 9999}),
+        )
+        response = self.client.post('/api/v1/dashboard/lote/', {'widgets': [
+            {'widget': widget, 'params': params} for widget, params in casos
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for widget, params in casos:
+            individual = self.client.get(f'/api/v1/dashboard/{widget}/', params)
+            self.assertEqual(individual.status_code, status.HTTP_400_BAD_REQUEST, widget)
+            self.assertIn(response.data['widgets'][widget]['error'], individual.data['error'], widget)
+
+    def test_lote_mal_formado(self):
+        """Test: Lote vacío, no lista o con claves duplicadas retorna 400"""
+        self.client.force_authenticate(user=self.user)
+        for cuerpo in (
+            {},
+            {'widgets': []},
+            {'widgets': 'resumen'},
+            {'widgets': [{'widget': 'resumen'}] * 21},
+            {'widgets': [{'widget': 'resumen'}, {'widget': 'resumen'}]},
+            {'widgets': [{'widget': 'resumen', 'params': [1]}]},
+        ):
+            response = self.client.post('/api/v1/dashboard/lote/', cuerpo, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, cuerpo)
+
 
 class DashboardMultiEmpresaTest(APITestCase):
     """Tests para verificar aislamiento multi-tenant"""
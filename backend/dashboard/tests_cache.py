@@ -0,0 +1,228 @@
+"""
+Tests del caché por empresa del Dashboard
+
+Cubren:
+- Aciertos de caché y clave por parámetros
+- Invalidación por signals al cambiar documentos
+- Aislamiento entre empresas
+- Endpoint de estadísticas
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from clientes.models import Cliente
+from dashboard.cache import DashboardCache
+from empresas.models import Empresa
+from inventario.models import Almacen, InventarioProducto
+from inventario.services import ServicioAlertasInventario
+from productos.models import Producto
+from ventas.models import Factura
+
+
+User = get_user_model()
+
+
+class DashboardCacheTest(TestCase):
+    """Tests para DashboardCache"""
+
+    def setUp(self):
+        cache.clear()
+        self.empresa = Empresa.objects.create(nombre='Empresa Cache', rnc='123456780')
+        self.empresa2 = Empresa.objects.create(nombre='Empresa Cache 2', rnc='123456781')
+        self.user = User.objects.create_user(
+            username='cacheuser', password='testpass123', empresa=self.empresa
+        )
+        self.cliente = Cliente.objects.create(
+            empresa=self.empresa,
+            nombre='Cliente Cache',
+            tipo_identificacion='RNC',
+            numero_identificacion='987654320'
+        )
+        self.llamadas = 0
+
+    def _calcular(self):
+        self.llamadas += 1
+        return {'llamada': self.llamadas}
+
+    def test_segunda_llamada_es_acierto(self):
+        """Test: La segunda lectura del mismo widget no recalcula"""
+        primero = DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        segundo = DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+
+        self.assertEqual(self.llamadas, 1)
+        self.assertEqual(primero, segundo)
+
+    def test_parametros_distintos_no_comparten_entrada(self):
+        """Test: Los parámetros del widget forman parte de la clave"""
+        DashboardCache.obtener(self.empresa, 'ventas_periodo', self._calcular, dias=30)
+        DashboardCache.obtener(self.empresa, 'ventas_periodo', self._calcular, dias=7)
+
+        self.assertEqual(self.llamadas, 2)
+
+    def test_empresas_no_comparten_entrada(self):
+        """Test: Cada empresa tiene su propio caché"""
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        DashboardCache.obtener(self.empresa2, 'resumen', self._calcular)
+
+        self.assertEqual(self.llamadas, 2)
+
+    def test_crear_factura_invalida_solo_su_empresa(self):
+        """Test: Guardar una factura invalida el caché de su empresa"""
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        DashboardCache.obtener(self.empresa2, 'resumen', self._calcular)
+
+        Factura.objects.create(
+            empresa=self.empresa,
+            cliente=self.cliente,
+            numero_factura='FAC-CACHE-001',
+            total=Decimal('100.00'),
+            estado='PAGADA',
+            usuario=self.user
+        )
+
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        DashboardCache.obtener(self.empresa2, 'resumen', self._calcular)
+
+        self.assertEqual(self.llamadas, 3)
+
+    def test_eliminar_factura_invalida(self):
+        """Test: Eliminar una factura invalida el caché"""
+        factura = Factura.objects.create(
+            empresa=self.empresa,
+            cliente=self.cliente,
+            numero_factura='FAC-CACHE-002',
+            total=Decimal('100.00'),
+            usuario=self.user
+        )
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+
+        factura.delete()
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+
+        self.assertEqual(self.llamadas, 2)
+
+    @override_settings(DASHBOARD_CACHE_TIMEOUT=0)
+    def test_timeout_cero_deshabilita_cache(self):
+        """Test: Con TTL 0 siempre se recalcula"""
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+
+        self.assertEqual(self.llamadas, 2)
+
+    def test_obtener_varios_comparte_entradas(self):
+        """Test: El lote reutiliza las entradas de obtener() y aísla los errores"""
+        DashboardCache.obtener(self.empresa, 'ventas_periodo', self._calcular, dias=30)
+
+        def fallar():
+            raise RuntimeError('falla')
+
+        resultados = DashboardCache.obtener_varios(self.empresa, {
+            'ventas': ('ventas_periodo', {'dias': 30}, self._calcular),
+            'resumen': ('resumen', {}, self._calcular),
+            'resumen_otra_vez': ('resumen', {}, self._calcular),
+            'roto': ('top_productos', {}, fallar),
+        })
+
+        self.assertEqual(resultados['ventas'], {'llamada': 1})
+        self.assertEqual(resultados['resumen'], {'llamada': 2})
+        self.assertEqual(resultados['resumen_otra_vez'], {'llamada': 2})
+        self.assertIsInstance(resultados['roto'], RuntimeError)
+        self.assertEqual(self.llamadas, 2)
+        # Lo calculado en el lote queda disponible para obtener()
+        self.assertEqual(DashboardCache.obtener(self.empresa, 'resumen', self._calcular), {'llamada': 2})
+
+    def test_estadisticas_aciertos_y_recalculos(self):
+        """Test: Las estadísticas reflejan aciertos y recálculos"""
+        DashboardCache.reiniciar_estadisticas()
+
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+        DashboardCache.obtener(self.empresa, 'resumen', self._calcular)
+
+        stats = DashboardCache.obtener_estadisticas()
+        self.assertEqual(stats['widgets']['resumen']['hits'], 2)
+        self.assertEqual(stats['widgets']['resumen']['misses'], 1)
+        self.assertAlmostEqual(stats['widgets']['resumen']['hit_rate'], 0.6667, places=4)
+        self.assertIsNotNone(stats['widgets']['resumen']['recalculo_promedio_ms'])
+
+
+class DashboardCacheAPITest(APITestCase):
+    """Tests del caché a través de la API"""
+
+    def setUp(self):
+        cache.clear()
+        self.empresa = Empresa.objects.create(nombre='Empresa API Cache', rnc='123456782')
+        self.user = User.objects.create_user(
+            username='apicache', password='testpass123', empresa=self.empresa
+        )
+        self.staff = User.objects.create_user(
+            username='staffcache', password='testpass123', empresa=self.empresa, is_staff=True
+        )
+        self.cliente = Cliente.objects.create(
+            empresa=self.empresa,
+            nombre='Cliente API Cache',
+            tipo_identificacion='RNC',
+            numero_identificacion='987654322'
+        )
+
+    def test_resumen_refleja_factura_nueva(self):
+        """Test: El resumen cacheado se actualiza al crear una factura"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/v1/dashboard/resumen/')
+        self.assertEqual(response.data['ventas']['hoy']['cantidad'], 0)
+
+        Factura.objects.create(
+            empresa=self.empresa,
+            cliente=self.cliente,
+            numero_factura='FAC-API-CACHE',
+            total=Decimal('250.00'),
+            estado='PAGADA',
+            usuario=self.user
+        )
+
+        response = self.client.get('/api/v1/dashboard/resumen/')
+        self.assertEqual(response.data['ventas']['hoy']['cantidad'], 1)
+
+    def test_resumen_refleja_alertas_generadas_en_bloque(self):
+        """Test: El resumen cacheado refleja las alertas creadas y resueltas por generar_todas_las_alertas"""
+        almacen = Almacen.objects.create(empresa=self.empresa, nombre='Almacén Cache', activo=True)
+        producto = Producto.objects.create(
+            codigo_sku='PROD-CACHE', nombre='Producto Cache',
+            precio_venta_base=Decimal('100.00'), tipo_producto='ALMACENABLE', activo=True
+        )
+        inventario = InventarioProducto.objects.create(
+            empresa=self.empresa, producto=producto, almacen=almacen,
+            cantidad_disponible=Decimal('5'), stock_minimo=Decimal('10'), punto_reorden=Decimal('20')
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/v1/dashboard/resumen/')
+        self.assertEqual(response.data['inventario']['alertas_total'], 0)
+
+        ServicioAlertasInventario.generar_todas_las_alertas()
+
+        response = self.client.get('/api/v1/dashboard/resumen/')
+        self.assertEqual(response.data['inventario']['alertas_total'], 1)
+
+        # update() no emite post_save: solo la sincronización invalida el caché
+        InventarioProducto.objects.filter(pk=inventario.pk).update(cantidad_disponible=Decimal('50'))
+        ServicioAlertasInventario.generar_todas_las_alertas()
+
+        response = self.client.get('/api/v1/dashboard/resumen/')
+        self.assertEqual(response.data['inventario']['alertas_total'], 0)
+
+    def test_estadisticas_cache_requiere_staff(self):
+        """Test: Solo staff puede consultar estadísticas del caché"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/v1/dashboard/estadisticas_cache/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get('/api/v1/dashboard/estadisticas_cache/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('hit_rate', response.data)
+        self.assertIn('resumen', response.data['widgets'])
@@ -0,0 +1,630 @@
+"""
+Tests de servicios del módulo Dashboard
+
+Cubren:
+- Resúmenes (rollups) mantenidos incrementalmente y su equivalencia con
+  los cálculos directos sobre los documentos
+- Motor de antigüedad de saldos CxC/CxP en una sola consulta
+"""
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum, Count
+from django.db.models.functions import Coalesce
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clientes.models import Cliente
+from compras.models import Compra
+from cuentas_cobrar.models import CuentaPorCobrar
+from cuentas_pagar.models import CuentaPorPagar
+from dashboard.constants import (
+    RANGOS_VENCIMIENTO, RANGOS_ANTIGUEDAD, ESTADOS_CXC_ACTIVOS, DECIMAL_CERO
+)
+from dashboard.models import Actividad, VentaClienteDiaria, VentaDiaria, VentaProductoDiaria
+from dashboard.services import (
+    ActividadService, DashboardService, EjecutorWidgets, RankingVentasService, VentaDiariaService
+)
+from empresas.models import Empresa
+from productos.models import Producto
+from proveedores.models import Proveedor
+from ventas.models import DetalleFactura, Factura
+
+
+User = get_user_model()
+
+
+class VentaDiariaTest(TestCase):
+    """Tests del resumen diario de ventas"""
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(nombre='Empresa Rollup', rnc='223456789')
+        self.user = User.objects.create_user(
+            username='rollup', password='testpass123', empresa=self.empresa
+        )
+        self.cliente = Cliente.objects.create(
+            empresa=self.empresa,
+            nombre='Cliente Rollup',
+            tipo_identificacion='RNC',
+            numero_identificacion='987654300',
+            limite_credito=Decimal('100000.00')
+        )
+        self.hoy = timezone.localdate()
+        self.secuencia = 0
+
+    def _crear_factura(self, total, estado='PAGADA', itbis=Decimal('0.00')):
+        self.secuencia += 1
+        return Factura.objects.create(
+            empresa=self.empresa,
+            cliente=self.cliente,
+            numero_factura=f'FAC-RU-{self.secuencia:03d}',
+            subtotal=total - itbis,
+            itbis=itbis,
+            total=total,
+            monto_pendiente=total if estado == 'PENDIENTE_PAGO' else Decimal('0.00'),
+            estado=estado,
+            tipo_venta='CREDITO' if estado == 'PENDIENTE_PAGO' else 'CONTADO',
+            usuario=self.user
+        )
+
+    def _fila(self, estado):
+        return VentaDiaria.objects.filter(empresa=self.empresa, fecha=self.hoy, estado=estado).first()
+
+    def test_crear_factura_suma_al_resumen(self):
+        """Test: Crear facturas acumula total, itbis y cantidad"""
+        self._crear_factura(Decimal('118.00'), itbis=Decimal('18.00'))
+        self._crear_factura(Decimal('236.00'), itbis=Decimal('36.00'))
+
+        fila = self._fila('PAGADA')
+        self.assertEqual(fila.cantidad, 2)
+        self.assertEqual(fila.total, Decimal('354.00'))
+        self.assertEqual(fila.itbis, Decimal('54.00'))
+
+    def test_cambio_de_estado_mueve_la_factura(self):
+        """Test: Cambiar el estado traslada la factura de fila"""
+        factura = self._crear_factura(Decimal('500.00'), estado='PENDIENTE_PAGO')
+
+        factura.estado = 'CANCELADA'
+        factura.save()
+
+        self.assertEqual(self._fila('PENDIENTE_PAGO').cantidad, 0)
+        self.assertEqual(self._fila('PENDIENTE_PAGO').total, Decimal('0.00'))
+        self.assertEqual(self._fila('CANCELADA').cantidad, 1)
+        self.assertEqual(self._fila('CANCELADA').total, Decimal('500.00'))
+
+    def test_cambio_de_total_aplica_diferencia(self):
+        """Test: Modificar el total ajusta solo la diferencia"""
+        factura = self._crear_factura(Decimal('100.00'))
+
+        factura.total = Decimal('150.00')
+        factura.subtotal = Decimal('150.00')
+        factura.save()
+
+        fila = self._fila('PAGADA')
+        self.assertEqual(fila.cantidad, 1)
+        self.assertEqual(fila.total, Decimal('150.00'))
+
+    def test_eliminar_factura_descuenta(self):
+        """Test: Eliminar una factura la descuenta del resumen"""
+        factura = self._crear_factura(Decimal('100.00'))
+        self._crear_factura(Decimal('40.00'))
+
+        factura.delete()
+
+        fila = self._fila('PAGADA')
+        self.assertEqual(fila.cantidad, 1)
+        self.assertEqual(fila.total, Decimal('40.00'))
+
+    def test_reconstruir_coincide_con_mantenimiento_incremental(self):
+        """Test: El backfill produce el mismo resumen que los signals"""
+        self._crear_factura(Decimal('100.00'))
+        self._crear_factura(Decimal('200.00'), estado='PENDIENTE_PAGO')
+        factura = self._crear_factura(Decimal('300.00'))
+        factura.estado = 'CANCELADA'
+        factura.save()
+
+        incremental = {
+            (f.estado, f.cantidad, f.total)
+            for f in VentaDiaria.objects.filter(empresa=self.empresa, cantidad__gt=0)
+        }
+
+        VentaDiaria.objects.all().delete()
+        out = StringIO()
+        call_command('reconstruir_ventas_diarias', '--empresa', str(self.empresa.id), stdout=out)
+
+        reconstruido = {
+            (f.estado, f.cantidad, f.total)
+            for f in VentaDiaria.objects.filter(empresa=self.empresa)
+        }
+        self.assertEqual(incremental, reconstruido)
+        self.assertIn('Resumen reconstruido', out.getvalue())
+
+    def test_dashboard_lee_del_resumen(self):
+        """Test: Ventas del período y del día provienen del resumen"""
+        self._crear_factura(Decimal('100.00'))
+        self._crear_factura(Decimal('50.00'), estado='PENDIENTE_PAGO')
+        self._crear_factura(Decimal('70.00'), estado='CANCELADA')
+
+        resumen = DashboardService.obtener_resumen(self.empresa)
+        self.assertEqual(resumen['ventas']['hoy']['cantidad'], 2)
+        self.assertEqual(resumen['ventas']['hoy']['pagadas'], 1)
+        self.assertEqual(resumen['ventas']['hoy']['pendientes'], 1)
+        self.assertEqual(Decimal(resumen['ventas']['hoy']['total']), Decimal('150.00'))
+
+        periodo = DashboardService.obtener_ventas_periodo(self.empresa, 7)
+        self.assertEqual(len(periodo['datos']), 1)
+        self.assertEqual(periodo['datos'][0]['cantidad'], 2)
+
+        # 365 días leen a lo sumo una fila por día y estado
+        with self.assertNumQueries(1):
+            DashboardService.obtener_ventas_periodo(self.empresa, 365)
+
+    def test_snapshot_factura_sin_empresa(self):
+        """Test: Facturas sin empresa no alimentan el resumen"""
+        self.assertIsNone(VentaDiariaService.snapshot_factura({
+            'empresa_id': None, 'fecha': timezone.now(), 'estado': 'PAGADA',
+            'total': Decimal('1.00'), 'itbis': Decimal('0.00')
+        }))
+
+
+def _detalle_cxc_por_rangos(empresa, hoy):
+    """
+    Implementación anterior de obtener_detalle_cxc (una consulta por rango).
+
+    Se conserva como referencia para verificar que el motor de antigüedad
+    produce exactamente el mismo resultado.
+    """
+    resumen = CuentaPorCobrar.objects.filter(empresa=empresa).values('estado').annotate(
+        total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO),
+        cantidad=Count('id')
+    )
+    por_vencer = {}
+    for dias in RANGOS_VENCIMIENTO:
+        resultado = CuentaPorCobrar.objects.filter(
+            empresa=empresa,
+            estado__in=['PENDIENTE', 'PARCIAL'],
+            fecha_vencimiento__lte=hoy + timedelta(days=dias),
+            fecha_vencimiento__gt=hoy
+        ).aggregate(total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO), cantidad=Count('id'))
+        por_vencer[f'dias_{dias}'] = {'total': str(resultado['total']), 'cantidad': resultado['cantidad']}
+
+    vencidas = {}
+    for inicio, fin in RANGOS_ANTIGUEDAD:
+        filtros = {
+            'empresa': empresa,
+            'estado__in': ESTADOS_CXC_ACTIVOS,
+            'fecha_vencimiento__lt': hoy - timedelta(days=inicio - 1)
+        }
+        if fin:
+            filtros['fecha_vencimiento__gte'] = hoy - timedelta(days=fin)
+        resultado = CuentaPorCobrar.objects.filter(**filtros).aggregate(
+            total=Coalesce(Sum('monto_pendiente'), DECIMAL_CERO), cantidad=Count('id')
+        )
+        key = f'{inicio}_a_{fin}_dias' if fin else f'mas_de_{inicio}_dias'
+        vencidas[key] = {'total': str(resultado['total']), 'cantidad': resultado['cantidad']}
+
+    return {
+        'resumen_por_estado': {
+            r['estado']: {'total': str(r['total']), 'cantidad': r['cantidad']} for r in resumen
+        },
+        'por_vencer': por_vencer,
+        'vencidas_por_antiguedad': vencidas
+    }
+
+
+class AntiguedadSaldosTest(TestCase):
+    """Tests del motor de antigüedad de saldos (CxC/CxP)"""
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(nombre='Empresa Aging', rnc='323456789')
+        self.user = User.objects.create_user(
+            username='aging', password='testpass123', empresa=self.empresa
+        )
+        self.cliente = Cliente.objects.create(
+            empresa=self.empresa,
+            nombre='Cliente Aging',
+            tipo_identificacion='RNC',
+            numero_identificacion='987654301',
+            limite_credito=Decimal('1000000.00')
+        )
+        self.proveedor = Proveedor.objects.create(
+            empresa=self.empresa,
+            nombre='Proveedor Aging',
+            tipo_identificacion='RNC',
+            numero_identificacion='111222300'
+        )
+        self.hoy = timezone.localdate()
+
+        # Vencimientos en todos los rangos: por vencer, vencidas y al límite
+        desfases = [3, 7, 10, 15, 25, 30, 45, 0, -1, -30, -31, -60, -61, -90, -91, -200]
+        estados = ['PENDIENTE', 'PARCIAL', 'VENCIDA', 'COBRADA']
+        for i, dias in enumerate(desfases):
+            factura = Factura.objects.create(
+                empresa=self.empresa,
+                cliente=self.cliente,
+                numero_factura=f'FAC-AG-{i:03d}',
+                total=Decimal('1000.00') + i,
+                monto_pendiente=Decimal('1000.00') + i,
+                estado='PENDIENTE_PAGO',
+                tipo_venta='CREDITO',
+                usuario=self.user
+            )
+            CuentaPorCobrar.objects.create(
+                empresa=self.empresa,
+                cliente=self.cliente,
+                factura=factura,
+                numero_documento=f'CXC-AG-{i:03d}',
+                monto_original=Decimal('1000.00') + i,
+                fecha_documento=self.hoy - timedelta(days=365),
+                fecha_vencimiento=self.hoy + timedelta(days=dias),
+                estado=estados[i % len(estados)]
+            )
+            compra = Compra.objects.create(
+                empresa=self.empresa,
+                proveedor=self.proveedor,
+                fecha_compra=self.hoy - timedelta(days=365),
+                numero_factura_proveedor=f'FP-AG-{i:03d}',
+                total=Decimal('500.00') + i,
+                estado='CXP'
+            )
+            CuentaPorPagar.objects.create(
+                empresa=self.empresa,
+                proveedor=self.proveedor,
+                compra=compra,
+                numero_documento=f'CXP-AG-{i:03d}',
+                monto_original=Decimal('500.00') + i,
+                fecha_documento=self.hoy - timedelta(days=365),
+                fecha_vencimiento=self.hoy + timedelta(days=dias),
+                estado=['PENDIENTE', 'PARCIAL', 'VENCIDA', 'PAGADA'][i % 4]
+            )
+
+    def test_cxc_identico_a_implementacion_por_rangos(self):
+        """Test: El motor produce el mismo detalle CxC que la versión por rangos"""
+        esperado = _detalle_cxc_por_rangos(self.empresa, self.hoy)
+        self.assertEqual(DashboardService.obtener_detalle_cxc(self.empresa), esperado)
+
+    def test_cxp_incluye_resumen_y_por_vencer(self):
+        """Test: El detalle CxP conserva su estructura (sin antigüedad)"""
+        detalle = DashboardService.obtener_detalle_cxp(self.empresa)
+
+        self.assertEqual(set(detalle), {'resumen_por_estado', 'por_vencer'})
+        self.assertEqual(set(detalle['por_vencer']), {f'dias_{d}' for d in RANGOS_VENCIMIENTO})
+        self.assertEqual(
+            sum(v['cantidad'] for v in detalle['resumen_por_estado'].values()),
+            CuentaPorPagar.objects.filter(empresa=self.empresa).count()
+        )
+
+    def test_cantidad_de_consultas(self):
+        """Test: El detalle pasa de 1 + rangos consultas a una sola"""
+        with CaptureQueriesContext(connection) as anterior:
+            _detalle_cxc_por_rangos(self.empresa, self.hoy)
+        self.assertEqual(
+            len(anterior.captured_queries),
+            1 + len(RANGOS_VENCIMIENTO) + len(RANGOS_ANTIGUEDAD)
+        )
+
+        with self.assertNumQueries(1):
+            DashboardService.obtener_detalle_cxc(self.empresa)
+        with self.assertNumQueries(1):
+            DashboardService.obtener_detalle_cxp(self.empresa)
+
+
+class EjecutorWidgetsTest(TestCase):
+    """Tests para la evaluación concurrente de widgets"""
+
+    def test_concurrente_devuelve_mismos_resultados(self):
+        """Test: El modo concurrente produce el mismo dict que el secuencial"""
+        tareas = {f'tarea_{i}': (lambda i=i: i * i) for i in range(8)}
+
+        secuencial = EjecutorWidgets.ejecutar(tareas, concurrente=False)
+        concurrente = EjecutorWidgets.ejecutar(tareas, concurrente=True)
+
+        self.assertEqual(secuencial, concurrente)
+        self.assertEqual(list(concurrente), list(tareas))
+
+    def test_concurrente_propaga_excepciones(self):
+        """Test: Un error en una tarea se propaga al llamador"""
+        def fallar():
+            raise ValueError('fallo')
+
+        with self.assertRaises(ValueError):
+            EjecutorWidgets.ejecutar({'ok': lambda: 1, 'error': fallar}, concurrente=True)
+
+    @override_settings(DASHBOARD_EJECUCION_CONCURRENTE=True)
+    def test_secuencial_en_sqlite_o_transaccion(self):
+        """Test: SQLite y transacciones abiertas fuerzan modo secuencial"""
+        # Los TestCase siempre corren dentro de una transacción
+        self.assertFalse(EjecutorWidgets.usar_concurrencia())
+        with EjecutorWidgets.forzar_modo(True):
+            self.assertEqual(EjecutorWidgets.usar_concurrencia(), connection.vendor != 'sqlite')
+        self.assertIsNone(EjecutorWidgets._modo_forzado.get())
+
+    def test_forzar_modo_no_afecta_otros_hilos(self):
+        """Test: El modo forzado en un hilo no cambia la decisión de otro"""
+        resultados = []
+        with EjecutorWidgets.forzar_modo(True):
+            hilo = threading.Thread(
+                target=lambda: resultados.append(EjecutorWidgets._modo_forzado.get())
+            )
+            hilo.start()
+            hilo.join()
+            self.assertTrue(EjecutorWidgets._modo_forzado.get())
+        self.assertEqual(resultados, [None])
+
+    def test_resumen_identico_en_ambos_modos(self):
+        """Test: obtener_resumen no depende del modo de ejecución"""
+        empresa = Empresa.objects.create(nombre='Empresa Ejecutor', rnc='123456799')
+        with EjecutorWidgets.forzar_modo(False):
+            secuencial = DashboardService.obtener_resumen(empresa)
+        with EjecutorWidgets.forzar_modo(True):
+            concurrente = DashboardService.obtener_resumen(empresa)
+
+        secuencial.pop('fecha_actualizacion', None)
+        concurrente.pop('fecha_actualizacion', None)
+        self.assertEqual(secuencial, concurrente)
+
+
+class ActividadFeedTest(TestCase):
+    """Tests del feed de actividad con paginación por cursor"""
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(nombre='Empresa Feed', rnc='423456789')
+        self.user = User.objects.create_user(
+            username='feed', password='testpass123', empresa=self.empresa,
+            first_name='Ana', last_name='Feed'
+        )
+        self.cliente = Cliente.objects.create(
+            empresa=self.empresa,
+            nombre='Cliente Feed',
+            tipo_identificacion='RNC',
+            numero_identificacion='987654302',
+            limite_credito=Decimal('100000.00')
+        )
+        self.proveedor = Proveedor.objects.create(
+            empresa=self.empresa,
+            nombre='Proveedor Feed',
+            tipo_identificacion='RNC',
+            numero_identificacion='111222301'
+        )
+
+    def _crear_factura(self, numero, estado='PAGADA'):
+        return Factura.objects.create(
+            empresa=self.empresa,
+            cliente=self.cliente,
+            numero_factura=numero,
+            total=Decimal('100.00'),
+            estado=estado,
+            usuario=self.user
+        )
+
+    def test_crear_documentos_registra_actividad(self):
+        """Test: Facturas y compras nuevas aparecen en el feed"""
+        self._crear_factura('FAC-FEED-001')
+        Compra.objects.create(
+            empresa=self.empresa,
+            proveedor=self.proveedor,
+            fecha_compra=timezone.localdate(),
+            numero_factura_proveedor='FP-FEED-001',
+            total=Decimal('50.00'),
+        )
+
+        resultado = DashboardService.obtener_actividad_reciente(self.empresa, 10)
+
+        self.assertEqual(resultado['total'], 2)
+        self.assertIsNone(resultado['siguiente_cursor'])
+        self.assertEqual([a['tipo'] for a in resultado['actividades']], ['COMPRA', 'FACTURA'])
+        factura = resultado['actividades'][1]
+        self.assertEqual(factura['descripcion'], 'Factura #FAC-FEED-001 - Cliente Feed')
+        self.assertEqual(factura['monto'], '100.00')
+        self.assertEqual(factura['usuario'], 'Ana Feed')
+
+    def test_cambio_de_estado_agrega_evento(self):
+        """Test: Un cambio de estado agrega una entrada; otros cambios no"""
+        factura = self._crear_factura('FAC-FEED-002', estado='PENDIENTE_PAGO')
+        factura.ncf = 'B0100000001'
+        factura.save()
+        factura.estado = 'CANCELADA'
+        factura.save()
+
+        estados = list(Actividad.objects.filter(empresa=self.empresa).values_list('estado', flat=True))
+        self.assertEqual(estados, ['CANCELADA', 'PENDIENTE_PAGO'])
+
+    def test_paginacion_recorre_todo_sin_duplicados(self):
+        """Test: Los cursores recorren el histórico completo aun con fechas iguales"""
+        for i in range(25):
+            self._crear_factura(f'FAC-FEED-P{i:02d}')
+        # Empates de fecha: el orden lo decide el id
+        Actividad.objects.filter(empresa=self.empresa).update(fecha=timezone.now())
+
+        vistos = []
+        cursor = None
+        paginas = 0
+        while True:
+            with self.assertNumQueries(1):
+                pagina = ActividadService.listar(self.empresa, 10, cursor)
+            paginas += 1
+            vistos.extend(a['descripcion'] for a in pagina['actividades'])
+            cursor = pagina['siguiente_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(paginas, 3)
+        self.assertEqual(len(vistos), 25)
+        self.assertEqual(len(set(vistos)), 25)
+        self.assertEqual(vistos[0], 'Factura #FAC-FEED-P24 - Cliente Feed')
+
+    def test_feed_aislado_por_empresa(self):
+        """Test: El feed solo muestra actividad de la empresa"""
+        otra = Empresa.objects.create(nombre='Otra Feed', rnc='423456780')
+        self._crear_factura('FAC-FEED-003')
+
+        self.assertEqual(ActividadService.listar(otra, 10)['total'], 0)
+
+    def test_reconstruir_feed(self):
+        """Test: El feed se reconstruye desde los documentos con su estado actual"""
+        self._crear_factura('FAC-FEED-R01')
+        cancelada = self._crear_factura('FAC-FEED-R02', estado='PENDIENTE_PAGO')
+        Factura.objects.filter(pk=cancelada.pk).update(estado='CANCELADA')
+        otra = Empresa.objects.create(nombre='Otra Feed', rnc='423456781')
+        Actividad.objects.all().delete()
+        Actividad.objects.create(
+            empresa=otra, fecha=timezone.now(), tipo='FACTURA', descripcion='Ajena',
+            modelo='ventas.Factura', objeto_id=0,
+        )
+
+        creadas = ActividadService.reconstruir(empresa=self.empresa)
+
+        self.assertEqual(creadas, 2)
+        self.assertEqual(
+            sorted(Actividad.objects.filter(empresa=self.empresa).values_list('estado', flat=True)),
+            ['CANCELADA', 'PAGADA']
+        )
+        self.assertTrue(Actividad.objects.filter(empresa=otra).exists())
+
+    def test_cursor_invalido(self):
+        """Test: Un cursor corrupto lanza ValidationError"""
+        with self.assertRaises(ValidationError):
+            ActividadService.listar(self.empresa, 10, 'no-es-un-cursor')
+
+
+class RankingVentasTest(TestCase):
+    """Tests de los resúmenes por producto y cliente y sus rankings"""
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(nombre='Empresa Ranking', rnc='523456789')
+        self.user = User.objects.create_user(
+            username='ranking', password='testpass123', empresa=self.empresa
+        )
+        self.clientes = [
+            Cliente.objects.create(
+                empresa=self.empresa,
+                nombre=f'Cliente Ranking {i}',
+                tipo_identificacion='RNC',
+                numero_identificacion=f'98765440{i}',
+                limite_credito=Decimal('100000.00')
+            )
+            for i in range(3)
+        ]
+        self.productos = [
+            Producto.objects.create(
+                empresa=self.empresa,
+                codigo_sku=f'RNK-{i}',
+                nombre=f'Producto Ranking {i}',
+                precio_venta_base=Decimal('10.00')
+            )
+            for i in range(4)
+        ]
+        self.secuencia = 0
+
+    def _crear_factura(self, cliente, lineas, estado='PAGADA'):
+        """Crea una factura con líneas [(producto, cantidad, precio)]"""
+        self.secuencia += 1
+        factura = Factura.objects.create(
+            empresa=self.empresa,
+            cliente=cliente,
+            numero_factura=f'FAC-RNK-{self.secuencia:03d}',
+            total=sum(cantidad * precio for _, cantidad, precio in lineas),
+            estado=estado,
+            usuario=self.user
+        )
+        for producto, cantidad, precio in lineas:
+            DetalleFactura.objects.create(
+                factura=factura, producto=producto, cantidad=cantidad, precio_unitario=precio
+            )
+        return factura
+
+    def _top_productos_directo(self, limite):
+        """Ranking calculado directamente sobre DetalleFactura (referencia)"""
+        filas = DetalleFactura.objects.filter(
+            factura__empresa=self.empresa,
+            factura__estado__in=['PAGADA', 'PAGADA_PARCIAL']
+        ).values('producto_id').annotate(
+            cantidad_vendida=Sum('cantidad'), total_vendido=Sum('importe')
+        ).order_by('-cantidad_vendida', 'producto_id')[:limite]
+        return [(f['producto_id'], f['cantidad_vendida'], f['total_vendido']) for f in filas]
+
+    def _top_productos_resumen(self, limite):
+        top = RankingVentasService.top_productos(self.empresa, limite, timezone.localdate())
+        return [(p['id'], Decimal(p['cantidad_vendida']), Decimal(p['total_vendido'])) for p in top]
+
+    def _cargar_ventas(self):
+        p0, p1, p2, p3 = self.productos
+        c0, c1, c2 = self.clientes
+        self._crear_factura(c0, [(p0, Decimal('5'), Decimal('10.00')), (p1, Decimal('2'), Decimal('20.00'))])
+        self._crear_factura(c1, [(p1, Decimal('4'), Decimal('20.00')), (p2, Decimal('1'), Decimal('99.00'))])
+        self._crear_factura(c2, [(p3, Decimal('50'), Decimal('1.00'))], estado='PENDIENTE_PAGO')
+        self._crear_factura(c0, [(p2, Decimal('6'), Decimal('5.00'))], estado='PAGADA_PARCIAL')
+
+    def test_ranking_productos_coincide_con_consulta_directa(self):
+        """Test: El ranking desde el resumen coincide con DetalleFactura"""
+        self._cargar_ventas()
+
+        self.assertEqual(self._top_productos_resumen(10), self._top_productos_directo(10))
+        self.assertEqual(self._top_productos_resumen(2), self._top_productos_directo(2))
+
+    def test_ranking_clientes(self):
+        """Test: El ranking de clientes suma facturas pagadas por cliente"""
+        self._cargar_ventas()
+
+        top = DashboardService.obtener_top_clientes(self.empresa, 10, 30)['clientes']
+
+        self.assertEqual([c['id'] for c in top], [self.clientes[1].id, self.clientes[0].id])
+        self.assertEqual(Decimal(top[0]['total_compras']), Decimal('179.00'))
+        self.assertEqual(top[1]['cantidad_facturas'], 2)
+
+    def test_cambios_de_estado_mueven_lineas(self):
+        """Test: Pagar y cancelar una factura mueve sus líneas en el ranking"""
+        p0 = self.productos[0]
+        factura = self._crear_factura(self.clientes[0], [(p0, Decimal('3'), Decimal('10.00'))], estado='PENDIENTE_PAGO')
+        self.assertEqual(self._top_productos_resumen(10), [])
+
+        factura.estado = 'PAGADA'
+        factura.save()
+        self.assertEqual(self._top_productos_resumen(10), [(p0.id, Decimal('3.00'), Decimal('30.00'))])
+
+        factura.estado = 'CANCELADA'
+        factura.save()
+        self.assertEqual(self._top_productos_resumen(10), [])
+        self.assertEqual(DashboardService.obtener_top_clientes(self.empresa, 10, 30)['clientes'], [])
+
+    def test_editar_y_eliminar_lineas(self):
+        """Test: Editar o eliminar una línea aplica la diferencia"""
+        p0, p1 = self.productos[:2]
+        factura = self._crear_factura(self.clientes[0], [(p0, Decimal('3'), Decimal('10.00'))])
+        detalle = DetalleFactura.objects.create(
+            factura=factura, producto=p1, cantidad=Decimal('1'), precio_unitario=Decimal('10.00')
+        )
+
+        detalle.cantidad = Decimal('7')
+        detalle.save()
+        self.assertEqual(self._top_productos_resumen(10), self._top_productos_directo(10))
+
+        detalle.delete()
+        self.assertEqual(self._top_productos_resumen(10), self._top_productos_directo(10))
+
+        factura.delete()
+        self.assertEqual(self._top_productos_resumen(10), [])
+        self.assertFalse(
+            VentaProductoDiaria.objects.filter(empresa=self.empresa).exclude(cantidad=0).exists()
+        )
+        self.assertFalse(
+            VentaClienteDiaria.objects.filter(empresa=self.empresa).exclude(cantidad=0).exists()
+        )
+
+    def test_reconstruir_coincide_con_mantenimiento_incremental(self):
+        """Test: reconstruir() produce los mismos rankings"""
+        self._cargar_ventas()
+        productos_antes = self._top_productos_resumen(10)
+        clientes_antes = DashboardService.obtener_top_clientes(self.empresa, 10, 30)
+
+        RankingVentasService.reconstruir(empresa=self.empresa)
+
+        self.assertEqual(self._top_productos_resumen(10), productos_antes)
+        self.assertEqual(DashboardService.obtener_top_clientes(self.empresa, 10, 30), clientes_antes)
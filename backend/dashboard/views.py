@@ -13,31 +13,54 @@ Endpoints:
     GET /api/v1/dashboard/top_clientes/?limite=10&dias=90 - Top clientes
     GET /api/v1/dashboard/cuentas_por_cobrar/ - Detalle CxC
     GET /api/v1/dashboard/cuentas_por_pagar/ - Detalle CxP
-    GET /api/v1/dashboard/actividad_reciente/?limite=20 - Actividad reciente
+    GET /api/v1/dashboard/actividad_reciente/?limite=20&cursor= - Actividad reciente
     GET /api/v1/dashboard/indicadores_financieros/ - Indicadores financieros
+    GET /api/v1/dashboard/estadisticas_cache/ - Aciertos y recálculos del caché (staff)
+    POST /api/v1/dashboard/lote/ - Varios widgets en una sola petición
+
+Los widgets se sirven desde un caché por empresa (ver cache.py) que se
+invalida mediante signals al cambiar los documentos de origen.
 """
 import logging
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
+from .cache import DashboardCache
 from .services import DashboardService
 from .constants import (
     DIAS_MAXIMO_DASHBOARD, MESES_MAXIMO_DASHBOARD,
     LIMITE_MAXIMO_PRODUCTOS, LIMITE_MAXIMO_CLIENTES, LIMITE_MAXIMO_ACTIVIDADES,
-    DIAS_DEFAULT_VENTAS, MESES_DEFAULT_VENTAS,
+    DIAS_DEFAULT_VENTAS, DIAS_DEFAULT_CLIENTES, MESES_DEFAULT_VENTAS,
     LIMITE_DEFAULT_PRODUCTOS, LIMITE_DEFAULT_CLIENTES,
     LIMITE_DEFAULT_ACTIVIDADES, LIMITE_DEFAULT_STOCK_BAJO,
     ERROR_EMPRESA_NO_ASIGNADA, ERROR_DIAS_INVALIDO, ERROR_MESES_INVALIDO,
     ERROR_LIMITE_INVALIDO, ERROR_RESUMEN_DASHBOARD, ERROR_VENTAS_PERIODO,
     ERROR_TOP_PRODUCTOS, ERROR_STOCK_BAJO, ERROR_TOP_CLIENTES,
     ERROR_CUENTAS_COBRAR, ERROR_CUENTAS_PAGAR, ERROR_ACTIVIDAD_RECIENTE,
-    ERROR_INDICADORES
+    ERROR_INDICADORES, ERROR_ESTADISTICAS_CACHE,
+    WIDGETS_MAXIMO_LOTE, ERROR_LOTE_INVALIDO, ERROR_WIDGET_INVALIDO,
+    ERROR_WIDGET_DESCONOCIDO, ERROR_CLAVE_DUPLICADA, ERROR_LOTE_DASHBOARD
 )
 
 logger = logging.getLogger(__name__)
 
+# Mensaje de error genérico por widget (errores inesperados en el lote)
+ERRORES_WIDGET = {
+    'resumen': ERROR_RESUMEN_DASHBOARD,
+    'ventas_periodo': ERROR_VENTAS_PERIODO,
+    'ventas_por_mes': ERROR_VENTAS_PERIODO,
+    'top_productos': ERROR_TOP_PRODUCTOS,
+    'productos_stock_bajo': ERROR_STOCK_BAJO,
+    'top_clientes': ERROR_TOP_CLIENTES,
+    'cuentas_por_cobrar': ERROR_CUENTAS_COBRAR,
+    'cuentas_por_pagar': ERROR_CUENTAS_PAGAR,
+    'actividad_reciente': ERROR_ACTIVIDAD_RECIENTE,
+    'indicadores_financieros': ERROR_INDICADORES,
+}
+
 
 class DashboardViewSet(viewsets.ViewSet):
     """
@@ -132,6 +155,116 @@ class DashboardViewSet(viewsets.ViewSet):
         except (ValueError, TypeError):
             return default
 
+    # ==================== PARÁMETROS ====================
+    # Lectura y validación de parámetros de cada widget, compartida por el
+    # endpoint individual (query params) y el lote (params del widget) para
+    # que ambos apliquen los mismos defaults y compartan las entradas del caché.
+
+    def _parametros_ventas_periodo(self, params):
+        """
+        Parámetros de ventas_periodo.
+
+        Returns:
+            dict: {'dias': int}
+
+        Raises:
+            ValidationError: Si días está fuera de rango
+        """
+        return {'dias': self._validar_dias(self._parse_int(params.get('dias'), DIAS_DEFAULT_VENTAS))}
+
+    def _parametros_ventas_por_mes(self, params):
+        """
+        Parámetros de ventas_por_mes.
+
+        Returns:
+            dict: {'meses': int}
+
+        Raises:
+            ValidationError: Si meses está fuera de rango
+        """
+        return {'meses': self._validar_meses(self._parse_int(params.get('meses'), MESES_DEFAULT_VENTAS))}
+
+    def _parametros_top_productos(self, params):
+        """
+        Parámetros de top_productos.
+
+        Returns:
+            dict: {'limite': int, 'dias': int}
+
+        Raises:
+            ValidationError: Si límite o días están fuera de rango
+        """
+        return {
+            'limite': self._validar_limite(
+                self._parse_int(params.get('limite'), LIMITE_DEFAULT_PRODUCTOS), LIMITE_MAXIMO_PRODUCTOS
+            ),
+            'dias': self._validar_dias(self._parse_int(params.get('dias'), DIAS_DEFAULT_VENTAS)),
+        }
+
+    def _parametros_productos_stock_bajo(self, params):
+        """
+        Parámetros de productos_stock_bajo.
+
+        Returns:
+            dict: {'limite': int}
+
+        Raises:
+            ValidationError: Si límite está fuera de rango
+        """
+        return {
+            'limite': self._validar_limite(
+                self._parse_int(params.get('limite'), LIMITE_DEFAULT_STOCK_BAJO), LIMITE_MAXIMO_PRODUCTOS
+            ),
+        }
+
+    def _parametros_top_clientes(self, params):
+        """
+        Parámetros de top_clientes.
+
+        Returns:
+            dict: {'limite': int, 'dias': int}
+
+        Raises:
+            ValidationError: Si límite o días están fuera de rango
+        """
+        return {
+            'limite': self._validar_limite(
+                self._parse_int(params.get('limite'), LIMITE_DEFAULT_CLIENTES), LIMITE_MAXIMO_CLIENTES
+            ),
+            'dias': self._validar_dias(self._parse_int(params.get('dias'), DIAS_DEFAULT_CLIENTES)),
+        }
+
+    def _parametros_actividad_reciente(self, params):
+        """
+        Parámetros de actividad_reciente (el cursor se lee aparte).
+
+        Returns:
+            dict: {'limite': int}
+
+        Raises:
+            ValidationError: Si límite está fuera de rango
+        """
+        return {
+            'limite': self._validar_limite(
+                self._parse_int(params.get('limite'), LIMITE_DEFAULT_ACTIVIDADES), LIMITE_MAXIMO_ACTIVIDADES
+            ),
+        }
+
+    def _obtener_widget(self, empresa, widget, calcular, **params):
+        """
+        Obtiene un widget desde el caché por empresa o lo calcula.
+
+        Args:
+            empresa: Instancia de Empresa
+            widget: Nombre del widget
+            calcular: Callable que calcula el widget
+            **params: Parámetros del widget (forman parte de la clave)
+
+        Returns:
+            dict: Resultado del widget
+        """
+        return DashboardCache.obtener(empresa, widget, calcular, **params)
+
     # ==================== ENDPOINT PRINCIPAL ====================
 
     @action(detail=False, methods=['get'])
@@ -160,7 +293,10 @@ class DashboardViewSet(viewsets.ViewSet):
             empresa = self.get_empresa(request)
             logger.info(f"Dashboard resumen solicitado por usuario {request.user.id}")
 
-            resumen = DashboardService.obtener_resumen(empresa)
+            resumen = self._obtener_widget(
+                empresa, 'resumen',
+                lambda: DashboardService.obtener_resumen(empresa)
+            )
 
             logger.debug(f"Resumen generado para empresa {empresa.id}")
             return Response(resumen)
@@ -199,15 +335,15 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         try:
             empresa = self.get_empresa(request)
-            dias = self._parse_int(
-                request.query_params.get('dias'),
-                DIAS_DEFAULT_VENTAS
-            )
-            dias = self._validar_dias(dias)
+            dias = self._parametros_ventas_periodo(request.query_params)['dias']
 
             logger.info(f"Ventas período ({dias} días) solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_ventas_periodo(empresa, dias)
+            resultado = self._obtener_widget(
+                empresa, 'ventas_periodo',
+                lambda: DashboardService.obtener_ventas_periodo(empresa, dias),
+                dias=dias
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -242,15 +378,15 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         try:
             empresa = self.get_empresa(request)
-            meses = self._parse_int(
-                request.query_params.get('meses'),
-                MESES_DEFAULT_VENTAS
-            )
-            meses = self._validar_meses(meses)
+            meses = self._parametros_ventas_por_mes(request.query_params)['meses']
 
             logger.info(f"Ventas por mes ({meses} meses) solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_ventas_por_mes(empresa, meses)
+            resultado = self._obtener_widget(
+                empresa, 'ventas_por_mes',
+                lambda: DashboardService.obtener_ventas_por_mes(empresa, meses),
+                meses=meses
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -288,20 +424,16 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         try:
             empresa = self.get_empresa(request)
-            limite = self._parse_int(
-                request.query_params.get('limite'),
-                LIMITE_DEFAULT_PRODUCTOS
-            )
-            dias = self._parse_int(
-                request.query_params.get('dias'),
-                DIAS_DEFAULT_VENTAS
-            )
-            limite = self._validar_limite(limite, LIMITE_MAXIMO_PRODUCTOS)
-            dias = self._validar_dias(dias)
+            params = self._parametros_top_productos(request.query_params)
+            limite, dias = params['limite'], params['dias']
 
             logger.info(f"Top productos ({limite}, {dias} días) solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_top_productos(empresa, limite, dias)
+            resultado = self._obtener_widget(
+                empresa, 'top_productos',
+                lambda: DashboardService.obtener_top_productos(empresa, limite, dias),
+                limite=limite, dias=dias
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -336,15 +468,15 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         try:
             empresa = self.get_empresa(request)
-            limite = self._parse_int(
-                request.query_params.get('limite'),
-                LIMITE_DEFAULT_STOCK_BAJO
-            )
-            limite = self._validar_limite(limite, LIMITE_MAXIMO_PRODUCTOS)
+            limite = self._parametros_productos_stock_bajo(request.query_params)['limite']
 
             logger.info(f"Stock bajo ({limite}) solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_productos_stock_bajo(empresa, limite)
+            resultado = self._obtener_widget(
+                empresa, 'productos_stock_bajo',
+                lambda: DashboardService.obtener_productos_stock_bajo(empresa, limite),
+                limite=limite
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -382,20 +514,16 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         try:
             empresa = self.get_empresa(request)
-            limite = self._parse_int(
-                request.query_params.get('limite'),
-                LIMITE_DEFAULT_CLIENTES
-            )
-            dias = self._parse_int(
-                request.query_params.get('dias'),
-                90  # Default específico para clientes
-            )
-            limite = self._validar_limite(limite, LIMITE_MAXIMO_CLIENTES)
-            dias = self._validar_dias(dias)
+            params = self._parametros_top_clientes(request.query_params)
+            limite, dias = params['limite'], params['dias']
 
             logger.info(f"Top clientes ({limite}, {dias} días) solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_top_clientes(empresa, limite, dias)
+            resultado = self._obtener_widget(
+                empresa, 'top_clientes',
+                lambda: DashboardService.obtener_top_clientes(empresa, limite, dias),
+                limite=limite, dias=dias
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -435,7 +563,10 @@ class DashboardViewSet(viewsets.ViewSet):
             empresa = self.get_empresa(request)
             logger.info(f"CxC detalle solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_detalle_cxc(empresa)
+            resultado = self._obtener_widget(
+                empresa, 'cuentas_por_cobrar',
+                lambda: DashboardService.obtener_detalle_cxc(empresa)
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -472,7 +603,10 @@ class DashboardViewSet(viewsets.ViewSet):
             empresa = self.get_empresa(request)
             logger.info(f"CxP detalle solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_detalle_cxp(empresa)
+            resultado = self._obtener_widget(
+                empresa, 'cuentas_por_pagar',
+                lambda: DashboardService.obtener_detalle_cxp(empresa)
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -493,13 +627,14 @@ class DashboardViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def actividad_reciente(self, request):
         """
-        Retorna las últimas actividades del sistema.
+        Retorna el feed de actividad del sistema, paginado por cursor.
 
         Query params:
             - limite: Cantidad de actividades (default: 20, max: 100)
+            - cursor: Valor de 'siguiente_cursor' de la página anterior
 
         Returns:
-            dict: {'total': int, 'actividades': [...]}
+            dict: {'total': int, 'actividades': [...], 'siguiente_cursor': str | None}
 
         Status Codes:
             - 200: OK
@@ -509,15 +644,20 @@ class DashboardViewSet(viewsets.ViewSet):
         """
         try:
             empresa = self.get_empresa(request)
-            limite = self._parse_int(
-                request.query_params.get('limite'),
-                LIMITE_DEFAULT_ACTIVIDADES
-            )
-            limite = self._validar_limite(limite, LIMITE_MAXIMO_ACTIVIDADES)
+            limite = self._parametros_actividad_reciente(request.query_params)['limite']
+            cursor = request.query_params.get('cursor')
 
             logger.info(f"Actividad reciente ({limite}) solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_actividad_reciente(empresa, limite)
+            if cursor:
+                # Las páginas siguientes no se cachean: cada una es un rango del índice
+                return Response(DashboardService.obtener_actividad_reciente(empresa, limite, cursor))
+
+            resultado = self._obtener_widget(
+                empresa, 'actividad_reciente',
+                lambda: DashboardService.obtener_actividad_reciente(empresa, limite),
+                limite=limite
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -560,7 +700,10 @@ class DashboardViewSet(viewsets.ViewSet):
             empresa = self.get_empresa(request)
             logger.info(f"Indicadores financieros solicitado por usuario {request.user.id}")
 
-            resultado = DashboardService.obtener_indicadores_financieros(empresa)
+            resultado = self._obtener_widget(
+                empresa, 'indicadores_financieros',
+                lambda: DashboardService.obtener_indicadores_financieros(empresa)
+            )
             return Response(resultado)
 
         except ValidationError as e:
@@ -575,3 +718,192 @@ class DashboardViewSet(viewsets.ViewSet):
                 {'error': ERROR_INDICADORES},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    # ==================== LOTE ====================
+
+    def _preparar_widget(self, empresa, widget, params, hoy):
+        """
+        Valida los parámetros de un widget del lote.
+
+        Usa los mismos _parametros_<widget> que el endpoint individual, de
+        modo que ambos comparten valores por defecto, límites y caché.
+
+        Args:
+            empresa: Instancia de Empresa
+            widget: Nombre del widget (acción del ViewSet)
+            params: dict de parámetros del widget
+            hoy: Fecha de referencia compartida por todo el lote
+
+        Returns:
+            tuple: (params de caché, callable que calcula el widget)
+
+        Raises:
+            ValidationError: Widget desconocido o parámetros inválidos
+        """
+        if widget == 'resumen':
+            return {}, lambda: DashboardService.obtener_resumen(empresa, hoy)
+
+        if widget == 'ventas_periodo':
+            params = self._parametros_ventas_periodo(params)
+            return params, lambda: DashboardService.obtener_ventas_periodo(empresa, hoy=hoy, **params)
+
+        if widget == 'ventas_por_mes':
+            params = self._parametros_ventas_por_mes(params)
+            return params, lambda: DashboardService.obtener_ventas_por_mes(empresa, hoy=hoy, **params)
+
+        if widget == 'top_productos':
+            params = self._parametros_top_productos(params)
+            return params, lambda: DashboardService.obtener_top_productos(empresa, hoy=hoy, **params)
+
+        if widget == 'productos_stock_bajo':
+            params = self._parametros_productos_stock_bajo(params)
+            return params, lambda: DashboardService.obtener_productos_stock_bajo(empresa, **params)
+
+        if widget == 'top_clientes':
+            params = self._parametros_top_clientes(params)
+            return params, lambda: DashboardService.obtener_top_clientes(empresa, hoy=hoy, **params)
+
+        if widget == 'cuentas_por_cobrar':
+            return {}, lambda: DashboardService.obtener_detalle_cxc(empresa, hoy)
+
+        if widget == 'cuentas_por_pagar':
+            return {}, lambda: DashboardService.obtener_detalle_cxp(empresa, hoy)
+
+        if widget == 'actividad_reciente':
+            # Solo la primera página; las siguientes usan el endpoint con cursor
+            params = self._parametros_actividad_reciente(params)
+            return params, lambda: DashboardService.obtener_actividad_reciente(empresa, **params)
+
+        if widget == 'indicadores_financieros':
+            return {}, lambda: DashboardService.obtener_indicadores_financieros(empresa, hoy)
+
+        raise ValidationError(ERROR_WIDGET_DESCONOCIDO.format(widget=widget))
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Evalúa varios widgets en una sola petición.
+
+        La autenticación, la empresa y la fecha de referencia se resuelven
+        una vez para todo el lote, y el caché se consulta con una sola
+        lectura (ver DashboardCache.obtener_varios).
+
+        Body:
+            {
+                "widgets": [
+                    {"widget": "resumen"},
+                    {"widget": "top_productos", "params": {"limite": 5, "dias": 7}},
+                    {"widget": "top_productos", "params": {"dias": 90}, "clave": "top_trimestre"}
+                ]
+            }
+            'clave' identifica el widget en la respuesta (default: el nombre
+            del widget) y debe ser única dentro del lote.
+
+        Returns:
+            dict: {
+                'fecha': str (ISO format),
+                'widgets': {clave: resultado | {'error': str}}
+            }
+            Un widget con parámetros inválidos o que falla retorna 'error'
+            sin afectar a los demás.
+
+        Status Codes:
+            - 200: OK (aunque algún widget tenga 'error')
+            - 400: Lote mal formado o sin empresa
+            - 401: No autenticado
+            - 500: Error del servidor
+        """
+        try:
+            empresa = self.get_empresa(request)
+            especificaciones = request.data.get('widgets') if hasattr(request.data, 'get') else None
+            if (not isinstance(especificaciones, list)
+                    or not 1 <= len(especificaciones) <= WIDGETS_MAXIMO_LOTE):
+                raise ValidationError(ERROR_LOTE_INVALIDO.format(max=WIDGETS_MAXIMO_LOTE))
+
+            hoy = timezone.localdate()
+            solicitudes = {}
+            errores = {}
+            for especificacion in especificaciones:
+                if not isinstance(especificacion, dict) or not isinstance(especificacion.get('params', {}), dict):
+                    raise ValidationError(ERROR_WIDGET_INVALIDO)
+                widget = especificacion.get('widget')
+                clave = str(especificacion.get('clave') or widget)
+                if clave in solicitudes or clave in errores:
+                    raise ValidationError(ERROR_CLAVE_DUPLICADA.format(clave=clave))
+                try:
+                    params, calcular = self._preparar_widget(
+                        empresa, widget, especificacion.get('params') or {}, hoy
+                    )
+                except ValidationError as e:
+                    errores[clave] = {'error': ' '.join(e.messages)}
+                    continue
+                solicitudes[clave] = (widget, params, calcular)
+
+            logger.info(
+                f"Dashboard lote ({len(especificaciones)} widgets) solicitado por usuario {request.user.id}"
+            )
+
+            resultados = DashboardCache.obtener_varios(empresa, solicitudes, hoy)
+
+            widgets = {}
+            for especificacion in especificaciones:
+                clave = str(especificacion.get('clave') or especificacion.get('widget'))
+                if clave in errores:
+                    widgets[clave] = errores[clave]
+                    continue
+                resultado = resultados[clave]
+                if isinstance(resultado, ValidationError):
+                    widgets[clave] = {'error': ' '.join(resultado.messages)}
+                elif isinstance(resultado, Exception):
+                    widget = solicitudes[clave][0]
+                    logger.error(f"Error en widget {widget} del lote: {resultado}", exc_info=resultado)
+                    widgets[clave] = {'error': ERRORES_WIDGET[widget]}
+                else:
+                    widgets[clave] = resultado
+
+            return Response({'fecha': hoy.isoformat(), 'widgets': widgets})
+
+        except ValidationError as e:
+            logger.warning(f"Error de validación en lote: {e}")
+            return Response(
+                {'error': ' '.join(e.messages)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error en lote dashboard: {e}", exc_info=True)
+            return Response(
+                {'error': ERROR_LOTE_DASHBOARD},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    # ==================== CACHÉ ====================
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def estadisticas_cache(self, request):
+        """
+        Retorna la tasa de aciertos y el tiempo de recálculo del caché
+        de widgets del dashboard.
+
+        Returns:
+            dict: {
+                'timeout_segundos': int,
+                'hits': int,
+                'misses': int,
+                'hit_rate': float,
+                'widgets': {...}
+            }
+
+        Status Codes:
+            - 200: OK
+            - 401: No autenticado
+            - 403: Usuario no es staff
+            - 500: Error del servidor
+        """
+        try:
+            return Response(DashboardCache.obtener_estadisticas())
+        except Exception as e:
+            logger.error(f"Error en estadisticas_cache: {e}", exc_info=True)
+            return Response(
+                {'error': ERROR_ESTADISTICAS_CACHE},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -3,7 +3,7 @@ Configuración del Admin para el módulo DGII
 """
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import TipoComprobante, SecuenciaNCF
+from .models import TipoComprobante, SecuenciaNCF, BloqueNCF, ArtefactoReporteDGII, ContribuyenteDGII
 
 
 class SecuenciaNCFInline(admin.TabularInline):
@@ -186,3 +186,62 @@ class SecuenciaNCFAdmin(admin.ModelAdmin):
             'empresa', 'tipo_comprobante', 'tipo_comprobante__empresa',
             'usuario_creacion', 'usuario_modificacion'
         )
+
+
+@admin.register(BloqueNCF)
+class BloqueNCFAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para BloqueNCF (rastro de auditoría)"""
+    list_display = (
+        'secuencia', 'titular', 'numero_inicial', 'numero_final',
+        'ultimo_usado', 'estado', 'numeros_devueltos', 'numeros_anulados',
+        'fecha_creacion', 'fecha_cierre'
+    )
+    list_filter = ('estado', 'empresa')
+    search_fields = ('titular',)
+    ordering = ['-fecha_creacion']
+    raw_id_fields = ['empresa', 'secuencia']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArtefactoReporteDGII)
+class ArtefactoReporteDGIIAdmin(admin.ModelAdmin):
+    """Admin para ArtefactoReporteDGII; permite eliminar archivos antiguos"""
+    list_display = (
+        'tipo', 'anio', 'mes', 'formato', 'empresa',
+        'cantidad_registros', 'tamano', 'disponible', 'fecha_creacion'
+    )
+    list_filter = ('tipo', 'formato', 'disponible', 'empresa')
+    ordering = ['-fecha_creacion']
+    raw_id_fields = ['empresa']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ContribuyenteDGII)
+class ContribuyenteDGIIAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para el padrón (se carga con importar_padron_rnc)"""
+    list_display = ('rnc', 'nombre', 'nombre_comercial', 'estado', 'regimen_pago')
+    list_filter = ('estado',)
+    search_fields = ('=rnc', 'nombre', 'nombre_comercial')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -3,6 +3,10 @@ Constantes para el módulo DGII
 
 Centraliza valores para mantener DRY y facilitar mantenimiento.
 """
+from ventas.constants import (
+    METODO_PAGO_CHEQUE, METODO_PAGO_EFECTIVO, METODO_PAGO_OTRO,
+    METODO_PAGO_TARJETA, METODO_PAGO_TRANSFERENCIA,
+)
 
 # =============================================================================
 # PREFIJOS NCF
@@ -76,11 +80,137 @@ TIPO_ANULACION_CHOICES = (
     (TIPO_ANULACION_ERROR_SECUENCIA, 'Errores en secuencia NCF'),
 )
 
+# =============================================================================
+# BLOQUES DE NCF
+# =============================================================================
+
+# Números reservados de una vez por cada titular (proceso o caja)
+TAMANO_BLOQUE_NCF = 50
+
+ESTADO_BLOQUE_ABIERTO = 'ABIERTO'
+ESTADO_BLOQUE_CERRADO = 'CERRADO'
+
+ESTADO_BLOQUE_CHOICES = (
+    (ESTADO_BLOQUE_ABIERTO, 'Abierto'),
+    (ESTADO_BLOQUE_CERRADO, 'Cerrado'),
+)
+
+# =============================================================================
+# REPORTES FISCALES
+# =============================================================================
+
+TIPO_REPORTE_606 = '606'
+TIPO_REPORTE_607 = '607'
+TIPO_REPORTE_608 = '608'
+
+TIPO_REPORTE_CHOICES = (
+    (TIPO_REPORTE_606, '606 - Compras de bienes y servicios'),
+    (TIPO_REPORTE_607, '607 - Ventas de bienes y servicios'),
+    (TIPO_REPORTE_608, '608 - Comprobantes anulados'),
+)
+
+# Columna de forma de pago del 607 para cada método de PagoCaja. La parte
+# de la factura sin pagar en el período va a efectivo (contado) o a
+# venta_credito (crédito).
+COLUMNAS_607_METODO_PAGO = {
+    METODO_PAGO_EFECTIVO: 'efectivo',
+    METODO_PAGO_CHEQUE: 'cheque_transferencia_deposito',
+    METODO_PAGO_TRANSFERENCIA: 'cheque_transferencia_deposito',
+    METODO_PAGO_TARJETA: 'tarjeta_debito_credito',
+    METODO_PAGO_OTRO: 'otras_formas_venta',
+}
+
+# Nivel zlib del TXT guardado en ReporteDGIIGenerado (texto muy repetitivo)
+NIVEL_COMPRESION_REPORTE = 6
+
+# Artefactos (archivos gzip) que dejan las tareas asíncronas de reportes
+FORMATO_ARTEFACTO_TXT = 'txt'
+FORMATO_ARTEFACTO_JSON = 'json'
+
+FORMATO_ARTEFACTO_CHOICES = (
+    (FORMATO_ARTEFACTO_TXT, 'TXT DGII'),
+    (FORMATO_ARTEFACTO_JSON, 'JSON'),
+)
+
+# Carpeta dentro de MEDIA_ROOT (se agrega el ID de la empresa)
+RUTA_ARTEFACTOS_REPORTE = 'dgii/reportes'
+
+# Bytes por lectura al calcular el hash del archivo comprimido
+CHUNK_SIZE_ARCHIVO = 64 * 1024
+
+# Días que se conserva un artefacto después de que otro más nuevo lo reemplaza
+DIAS_RETENCION_ARTEFACTOS = 7
+
+# =============================================================================
+# VALIDACIÓN PREVIA AL ENVÍO (606/607)
+# =============================================================================
+
+# NCF: B o E + tipo (2) + secuencia (8); e-CF también con secuencia de 10
+PATRON_NCF = r'^(?:[BE]\d{10}|E\d{12})$'
+
+# Pesos del dígito verificador del RNC (módulo 11) sobre los 8 primeros dígitos
+PESOS_RNC = (7, 9, 8, 6, 5, 4, 3, 2)
+
+# El ITBIS no puede superar esta tasa del monto facturado (+ tolerancia de redondeo)
+TASA_ITBIS_MAXIMA = 0.18
+TOLERANCIA_ITBIS = 0.01
+
+# Errores devueltos en el detalle; el resumen cuenta todos
+MAX_ERRORES_VALIDACION = 1000
+
+REGLA_IDENTIFICACION_FORMATO = 'identificacion_formato'
+REGLA_RNC_DIGITO_VERIFICADOR = 'rnc_digito_verificador'
+REGLA_CEDULA_DIGITO_VERIFICADOR = 'cedula_digito_verificador'
+REGLA_NCF_FORMATO = 'ncf_formato'
+REGLA_NCF_DUPLICADO = 'ncf_duplicado'
+REGLA_ITBIS_EXCEDE_TASA = 'itbis_excede_tasa'
+REGLA_FECHA_FUERA_PERIODO = 'fecha_fuera_periodo'
+
+MENSAJES_VALIDACION = {
+    REGLA_IDENTIFICACION_FORMATO: 'RNC/cédula debe tener 9 u 11 dígitos',
+    REGLA_RNC_DIGITO_VERIFICADOR: 'Dígito verificador de RNC inválido',
+    REGLA_CEDULA_DIGITO_VERIFICADOR: 'Dígito verificador de cédula inválido',
+    REGLA_NCF_FORMATO: 'Formato de NCF inválido',
+    REGLA_NCF_DUPLICADO: 'NCF duplicado en el período',
+    REGLA_ITBIS_EXCEDE_TASA: 'El ITBIS excede el 18% del monto facturado',
+    REGLA_FECHA_FUERA_PERIODO: 'Fecha inválida o fuera del período',
+}
+
+# =============================================================================
+# PADRÓN DE CONTRIBUYENTES (RNC)
+# =============================================================================
+
+# Archivo DGII_RNC.TXT: campos separados por '|' en latin-1
+CODIFICACION_PADRON = 'latin-1'
+SEPARADOR_PADRON = '|'
+
+# Posición de cada campo en la línea del padrón
+CAMPOS_PADRON = {
+    'rnc': 0,
+    'nombre': 1,
+    'nombre_comercial': 2,
+    'actividad': 3,
+    'fecha_inicio': 8,
+    'estado': 9,
+    'regimen_pago': 10,
+}
+
+ESTADO_CONTRIBUYENTE_ACTIVO = 'ACTIVO'
+
+# Líneas del padrón comparadas e insertadas por transacción
+TAMANO_LOTE_PADRON = 2000
+
+# Caché de consultas al padrón; cada importación con cambios cambia la versión
+CACHE_PREFIJO_PADRON = 'padron_rnc'
+CACHE_TIMEOUT_PADRON = 3600
+
 # =============================================================================
 # VALORES POR DEFECTO
 # =============================================================================
 
 ALERTA_CANTIDAD_DEFAULT = 10
+# Días antes del vencimiento en que una secuencia aparece en por_vencer
+DIAS_ALERTA_VENCIMIENTO = 30
 PREFIJO_DEFAULT = PREFIJO_B
 
 # =============================================================================
@@ -91,6 +221,9 @@ PAGE_SIZE_DEFAULT = 100
 PAGE_SIZE_MAX = 500
 PAGE_SIZE_REPORTES = 20
 
+# Filas leídas por bloque al exportar reportes TXT en streaming
+CHUNK_SIZE_EXPORTACION = 2000
+
 # =============================================================================
 # MENSAJES DE ERROR
 # =============================================================================
@@ -119,3 +252,9 @@ ERROR_SECUENCIA_VENCIDA = 'Esta secuencia ha vencido'
 ERROR_NO_SECUENCIA_DISPONIBLE = 'No hay secuencia disponible para este tipo de comprobante'
 ERROR_MES_ANIO_REQUERIDOS = 'Debe especificar mes y año'
 ERROR_MES_ANIO_NUMEROS = 'mes y año deben ser números'
+ERROR_MES_INVALIDO = 'mes debe estar entre 1 y 12'
+ERROR_TIPO_REPORTE_INVALIDO = 'tipo debe ser 606, 607 o 608'
+ERROR_TIPO_VALIDACION_INVALIDO = 'tipo debe ser 606 o 607'
+ERROR_ARTEFACTO_NO_ENCONTRADO = 'Archivo de reporte no encontrado'
+ERROR_ARTEFACTO_NO_DISPONIBLE = 'El archivo de reporte ya no está disponible; vuelva a generarlo'
+ERROR_CONTRIBUYENTE_NO_ENCONTRADO = 'RNC/cédula no encontrado en el padrón de la DGII'
@@ -0,0 +1,49 @@
+"""
+Comando de gestión para cerrar bloques NCF abiertos (ver AsignadorNCF).
+
+Debe ejecutarse al detener un proceso o caja (o periódicamente para
+bloques abandonados por procesos que terminaron sin liberarlos). Los
+números sin usar vuelven a la secuencia si el bloque es el último
+reservado; si no, quedan anulados y se reportan en el 608.
+
+Uso:
+    python manage.py cerrar_bloques_ncf --titular caja-3
+    python manage.py cerrar_bloques_ncf --inactivos-minutos 120
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dgii.models import BloqueNCF
+from dgii.services import AsignadorNCF
+
+
+class Command(BaseCommand):
+    help = 'Cierra los bloques NCF abiertos de un titular o sin uso reciente'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titular',
+            help='Titular (proceso o caja) cuyos bloques se cierran',
+        )
+        parser.add_argument(
+            '--inactivos-minutos',
+            type=int,
+            help='Cierra los bloques sin NCF entregados en los últimos N minutos',
+        )
+
+    def handle(self, *args, **options):
+        if bool(options['titular']) == (options['inactivos_minutos'] is not None):
+            raise CommandError('Indique --titular o --inactivos-minutos')
+
+        if options['titular']:
+            resumen = AsignadorNCF.liberar(titular=options['titular'])
+        else:
+            limite = timezone.now() - timedelta(minutes=options['inactivos_minutos'])
+            resumen = AsignadorNCF.liberar(bloques=BloqueNCF.objects.filter(fecha_actualizacion__lt=limite))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Bloques cerrados: {resumen['bloques']} "
+            f"(números devueltos: {resumen['devueltos']}, anulados: {resumen['anulados']})"
+        ))
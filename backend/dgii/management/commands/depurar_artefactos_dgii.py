@@ -0,0 +1,37 @@
+"""
+Comando de gestión para depurar los archivos de reportes DGII
+(ArtefactoReporteDGII) que ya no se usan.
+
+Elimina las filas y los archivos de los artefactos reemplazados por una
+versión más nueva del mismo reporte y formato hace más de --dias días, y
+los que quedaron sin archivo en el storage. Conviene programarlo a diario.
+
+Uso:
+    python manage.py depurar_artefactos_dgii
+    python manage.py depurar_artefactos_dgii --dias 30 --empresa 1
+"""
+from django.core.management.base import BaseCommand
+
+from dgii.constants import DIAS_RETENCION_ARTEFACTOS
+from dgii.services import ArtefactosReporteService
+
+
+class Command(BaseCommand):
+    help = 'Elimina los artefactos de reportes DGII reemplazados o sin archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=DIAS_RETENCION_ARTEFACTOS,
+            help=f'Días que se conserva una versión reemplazada (default: {DIAS_RETENCION_ARTEFACTOS})',
+        )
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            help='ID de la empresa (default: todas)',
+        )
+
+    def handle(self, *args, **options):
+        eliminados = ArtefactosReporteService.depurar(dias=options['dias'], empresa_id=options['empresa'])
+        self.stdout.write(self.style.SUCCESS(f"Artefactos eliminados: {eliminados}"))
@@ -0,0 +1,134 @@
+"""
+Comando de gestión para generar en lote los reportes DGII (cierre de mes)
+de todas las empresas activas.
+
+Reparte las unidades (empresa, tipo, período) entre un pool de procesos
+(LoteReportesService) o las encola como tareas para los workers de
+django_tasks. Cada unidad deja sus artefactos
+(ArtefactoReporteDGII); al volver a ejecutar el comando se omiten las
+unidades de períodos cerrados que ya tienen artefactos vigentes, por lo
+que una corrida interrumpida se reanuda donde quedó.
+
+Uso:
+    python manage.py generar_reportes_dgii
+    python manage.py generar_reportes_dgii --desde 2025-01 --hasta 2025-06 --procesos 8
+    python manage.py generar_reportes_dgii --tipos 606 607 --empresas 3 5
+    python manage.py generar_reportes_dgii --encolar
+"""
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dgii.services import LoteReportesService
+from empresas.models import Empresa
+
+TIPOS_REPORTE = ('606', '607', '608')
+
+
+def _periodo(valor):
+    try:
+        fecha = datetime.strptime(valor, '%Y-%m')
+    except ValueError:
+        raise CommandError(f'Período inválido: {valor} (use AAAA-MM)')
+    return fecha.year, fecha.month
+
+
+class Command(BaseCommand):
+    help = 'Genera los artefactos de reportes DGII de todas las empresas activas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Primer período AAAA-MM (por defecto, el mes anterior)')
+        parser.add_argument('--hasta', help='Último período AAAA-MM (por defecto, igual a --desde)')
+        parser.add_argument('--tipos', nargs='+', choices=TIPOS_REPORTE, default=list(TIPOS_REPORTE))
+        parser.add_argument('--empresas', nargs='+', type=int, help='IDs de empresas (por defecto, todas las activas)')
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos en paralelo (1 = en este proceso)',
+        )
+        parser.add_argument(
+            '--encolar',
+            action='store_true',
+            help='Encola las tareas generar_reporte_60X en lugar de generarlas aquí',
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Genera también las unidades que ya tienen artefactos vigentes',
+        )
+
+    def handle(self, *args, **options):
+        if options['desde']:
+            desde = _periodo(options['desde'])
+        else:
+            hoy = timezone.localdate()
+            desde = (hoy.year - 1, 12) if hoy.month == 1 else (hoy.year, hoy.month - 1)
+        hasta = _periodo(options['hasta']) if options['hasta'] else desde
+        if hasta < desde:
+            raise CommandError('--hasta debe ser igual o posterior a --desde')
+        if options['procesos'] < 1:
+            raise CommandError('--procesos debe ser al menos 1')
+
+        empresas = Empresa.objects.filter(activo=True)
+        if options['empresas']:
+            empresas = empresas.filter(id__in=options['empresas'])
+        empresa_ids = list(empresas.order_by('id').values_list('id', flat=True))
+
+        unidades = LoteReportesService.unidades(
+            empresa_ids, options['tipos'], LoteReportesService.periodos(desde, hasta)
+        )
+        pendientes = unidades if options['forzar'] else LoteReportesService.pendientes(unidades)
+        self.stdout.write(
+            f'Empresas: {len(empresa_ids)} | unidades: {len(unidades)} | '
+            f'ya generadas: {len(unidades) - len(pendientes)} | pendientes: {len(pendientes)}'
+        )
+
+        if options['encolar']:
+            self._encolar(pendientes)
+            return
+
+        total = len(pendientes)
+        completadas = 0
+
+        def al_terminar(resultado):
+            nonlocal completadas
+            completadas += 1
+            detalle = (
+                f"{resultado['cantidad_registros']} registros"
+                if resultado['status'] == 'completed' else f"ERROR: {resultado['error']}"
+            )
+            self.stdout.write(
+                f"[{completadas}/{total}] empresa {resultado['empresa_id']} "
+                f"{resultado['tipo']} {resultado['periodo']}: {detalle} ({resultado['segundos']}s)"
+            )
+
+        resultados = LoteReportesService.ejecutar(pendientes, options['procesos'], al_terminar)
+        fallidas = self._resumen(resultados)
+        if fallidas:
+            raise CommandError(
+                f'{fallidas} unidad(es) fallaron; vuelva a ejecutar el comando para reintentarlas'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Reportes generados: {len(resultados)}'))
+
+    def _encolar(self, unidades):
+        from dgii import tasks
+
+        for empresa_id, tipo, anio, mes in unidades:
+            getattr(tasks, f'generar_reporte_{tipo}').enqueue(empresa_id, anio, mes)
+        self.stdout.write(self.style.SUCCESS(f'Tareas encoladas: {len(unidades)}'))
+
+    def _resumen(self, resultados):
+        """Resumen por empresa. Returns: cantidad de unidades fallidas"""
+        por_empresa = defaultdict(lambda: {'completed': 0, 'error': 0})
+        for resultado in resultados:
+            por_empresa[resultado['empresa_id']][resultado['status']] += 1
+
+        for empresa_id in sorted(por_empresa):
+            conteo = por_empresa[empresa_id]
+            linea = f"Empresa {empresa_id}: {conteo['completed']} generadas, {conteo['error']} con error"
+            self.stdout.write(self.style.ERROR(linea) if conteo['error'] else linea)
+        return sum(conteo['error'] for conteo in por_empresa.values())
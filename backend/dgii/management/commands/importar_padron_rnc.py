@@ -0,0 +1,74 @@
+"""
+Comando de gestión para importar el padrón de contribuyentes (RNC) de la DGII.
+
+Lee el archivo DGII_RNC.TXT (o el DGII_RNC.zip que publica la DGII) línea
+por línea y sincroniza ContribuyenteDGII (ver PadronRNCService.importar):
+solo se escriben las filas nuevas o modificadas, por lo que reimportar el
+padrón actualizado es incremental.
+
+Uso:
+    python manage.py importar_padron_rnc /ruta/DGII_RNC.zip
+    python manage.py importar_padron_rnc DGII_RNC.TXT --sin-eliminar
+"""
+import io
+import zipfile
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dgii.constants import CODIFICACION_PADRON, TAMANO_LOTE_PADRON
+from dgii.services import PadronRNCService
+
+
+@contextmanager
+def abrir_padron(ruta, codificacion):
+    """Abre el TXT del padrón, directo o dentro de un .zip, como texto."""
+    try:
+        if zipfile.is_zipfile(ruta):
+            with zipfile.ZipFile(ruta) as comprimido:
+                nombres = [nombre for nombre in comprimido.namelist() if nombre.lower().endswith('.txt')]
+                if not nombres:
+                    raise CommandError(f'{ruta} no contiene un archivo .txt')
+                with comprimido.open(nombres[0]) as binario:
+                    yield io.TextIOWrapper(binario, encoding=codificacion, errors='replace')
+        else:
+            with open(ruta, encoding=codificacion, errors='replace') as archivo:
+                yield archivo
+    except FileNotFoundError:
+        raise CommandError(f'No existe el archivo {ruta}')
+
+
+class Command(BaseCommand):
+    help = 'Importa o actualiza el padrón de contribuyentes (RNC) de la DGII'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='DGII_RNC.TXT o DGII_RNC.zip')
+        parser.add_argument('--codificacion', default=CODIFICACION_PADRON)
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_PADRON, help='Líneas por transacción')
+        parser.add_argument(
+            '--sin-eliminar',
+            action='store_true',
+            help='Conserva los RNC que ya no aparecen en el archivo',
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser al menos 1')
+
+        def al_procesar(resumen):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Líneas procesadas: {resumen['leidas']}")
+
+        with abrir_padron(options['archivo'], options['codificacion']) as lineas:
+            resumen = PadronRNCService.importar(
+                lineas,
+                tamano_lote=options['lote'],
+                eliminar_ausentes=not options['sin_eliminar'],
+                al_procesar=al_procesar,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Padrón importado: {resumen['leidas']} líneas, {resumen['nuevos']} nuevos, "
+            f"{resumen['actualizados']} actualizados, {resumen['sin_cambios']} sin cambios, "
+            f"{resumen['eliminados']} eliminados, {resumen['ignoradas']} ignoradas"
+        ))
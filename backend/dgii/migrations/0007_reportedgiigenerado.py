@@ -0,0 +1,37 @@
+# Generated by Django 6.1.2 on 2026-10-16 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0006_add_permissions'),
+        ('empresas', '0003_add_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteDGIIGenerado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('606', '606 - Compras de bienes y servicios'), ('607', '607 - Ventas de bienes y servicios'), ('608', '608 - Comprobantes anulados')], max_length=3, verbose_name='Tipo de Reporte')),
+                ('anio', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mes')),
+                ('contenido', models.BinaryField(help_text='Archivo TXT comprimido con zlib')),
+                ('hash_contenido', models.CharField(help_text='SHA-256 del TXT sin comprimir', max_length=64)),
+                ('cantidad_registros', models.PositiveIntegerField(default=0)),
+                ('totales', models.JSONField(blank=True, default=dict)),
+                ('fecha_generacion', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reportes_dgii', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Reporte DGII Generado',
+                'verbose_name_plural': 'Reportes DGII Generados',
+                'ordering': ['-anio', '-mes', 'tipo'],
+                'indexes': [models.Index(fields=['empresa', 'anio', 'mes'], name='dgii_report_empresa_430ce9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'tipo', 'anio', 'mes'), name='unique_reporte_dgii_empresa_tipo_periodo')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-16 14:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0007_reportedgiigenerado'),
+        ('empresas', '0003_add_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BloqueNCF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titular', models.CharField(help_text='Proceso o caja que usa el bloque', max_length=100)),
+                ('numero_inicial', models.IntegerField()),
+                ('numero_final', models.IntegerField()),
+                ('ultimo_usado', models.IntegerField(help_text='Último número entregado del bloque')),
+                ('estado', models.CharField(choices=[('ABIERTO', 'Abierto'), ('CERRADO', 'Cerrado')], default='ABIERTO', max_length=10)),
+                ('numeros_devueltos', models.IntegerField(default=0)),
+                ('numeros_anulados', models.IntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('fecha_cierre', models.DateTimeField(blank=True, null=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bloques_ncf', to='empresas.empresa', verbose_name='Empresa')),
+                ('secuencia', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bloques', to='dgii.secuenciancf', verbose_name='Secuencia')),
+            ],
+            options={
+                'verbose_name': 'Bloque NCF',
+                'verbose_name_plural': 'Bloques NCF',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['secuencia', 'titular', 'estado'], name='dgii_bloque_secuenc_5f4a41_idx'), models.Index(fields=['titular', 'estado'], name='dgii_bloque_titular_21b6b5_idx'), models.Index(fields=['empresa', 'fecha_cierre'], name='dgii_bloque_empresa_6f59b3_idx')],
+            },
+        ),
+    ]
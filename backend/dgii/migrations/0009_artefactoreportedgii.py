@@ -0,0 +1,41 @@
+# Generated by Django 6.1.2 on 2026-10-16 14:52
+
+import dgii.models
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0008_bloquencf'),
+        ('empresas', '0003_add_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtefactoReporteDGII',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('tipo', models.CharField(choices=[('606', '606 - Compras de bienes y servicios'), ('607', '607 - Ventas de bienes y servicios'), ('608', '608 - Comprobantes anulados')], max_length=3, verbose_name='Tipo de Reporte')),
+                ('anio', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mes')),
+                ('formato', models.CharField(choices=[('txt', 'TXT DGII'), ('json', 'JSON')], max_length=4)),
+                ('archivo', models.FileField(help_text='Archivo comprimido con gzip', max_length=255, upload_to=dgii.models.ruta_artefacto_reporte)),
+                ('tamano', models.PositiveBigIntegerField(default=0, help_text='Bytes del archivo comprimido')),
+                ('hash_contenido', models.CharField(help_text='SHA-256 del contenido sin comprimir', max_length=64)),
+                ('cantidad_registros', models.PositiveIntegerField(default=0)),
+                ('totales', models.JSONField(blank=True, default=dict)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artefactos_reporte_dgii', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Artefacto de Reporte DGII',
+                'verbose_name_plural': 'Artefactos de Reportes DGII',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['empresa', 'tipo', 'anio', 'mes'], name='dgii_artefa_empresa_f1ebc0_idx')],
+            },
+        ),
+    ]
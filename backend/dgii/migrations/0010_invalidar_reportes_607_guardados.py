@@ -0,0 +1,20 @@
+# Generated manually: los totales del 607 incluyen las formas de pago
+
+from django.db import migrations
+
+
+def invalidar_reportes_607(apps, schema_editor):
+    """Eliminar los 607 guardados; se regeneran con los nuevos totales en la siguiente consulta"""
+    ReporteDGIIGenerado = apps.get_model('dgii', 'ReporteDGIIGenerado')
+    ReporteDGIIGenerado.objects.filter(tipo='607').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0009_artefactoreportedgii'),
+    ]
+
+    operations = [
+        migrations.RunPython(invalidar_reportes_607, migrations.RunPython.noop),
+    ]
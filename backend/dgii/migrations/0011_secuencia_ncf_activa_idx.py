@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-16 15:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0010_invalidar_reportes_607_guardados'),
+        ('empresas', '0003_add_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='secuenciancf',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['empresa', 'tipo_comprobante', 'secuencia_inicial'], name='secuencia_ncf_activa_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.1.2 on 2026-10-16 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0011_secuencia_ncf_activa_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContribuyenteDGII',
+            fields=[
+                ('rnc', models.CharField(max_length=11, primary_key=True, serialize=False, verbose_name='RNC/Cédula')),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre o razón social')),
+                ('nombre_comercial', models.CharField(blank=True, max_length=255)),
+                ('actividad', models.CharField(blank=True, max_length=255, verbose_name='Actividad económica')),
+                ('fecha_inicio', models.DateField(blank=True, null=True, verbose_name='Inicio de operaciones')),
+                ('estado', models.CharField(blank=True, max_length=30)),
+                ('regimen_pago', models.CharField(blank=True, max_length=30, verbose_name='Régimen de pago')),
+                ('huella', models.BigIntegerField(help_text='Hash de los campos de la línea del padrón')),
+            ],
+            options={
+                'verbose_name': 'Contribuyente DGII',
+                'verbose_name_plural': 'Padrón de Contribuyentes DGII',
+            },
+        ),
+    ]
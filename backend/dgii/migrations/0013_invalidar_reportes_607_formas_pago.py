@@ -0,0 +1,20 @@
+# Generated manually: el 607 toma las formas de pago de PagoCaja
+
+from django.db import migrations
+
+
+def invalidar_reportes_607(apps, schema_editor):
+    """Eliminar los 607 guardados; se regeneran con el desglose de pagos en la siguiente consulta"""
+    ReporteDGIIGenerado = apps.get_model('dgii', 'ReporteDGIIGenerado')
+    ReporteDGIIGenerado.objects.filter(tipo='607').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0012_contribuyentedgii'),
+    ]
+
+    operations = [
+        migrations.RunPython(invalidar_reportes_607, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.1.2 on 2026-10-16 17:33
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def poblar_hash_archivo(apps, schema_editor):
+    """Calcular el hash de los archivos existentes; los que faltan quedan no disponibles"""
+    ArtefactoReporteDGII = apps.get_model('dgii', 'ArtefactoReporteDGII')
+
+    for artefacto in ArtefactoReporteDGII.objects.only('id', 'archivo').iterator():
+        resumen = hashlib.sha256()
+        try:
+            with artefacto.archivo.open('rb') as archivo:
+                for bloque in archivo.chunks():
+                    resumen.update(bloque)
+        except (FileNotFoundError, OSError, ValueError):
+            ArtefactoReporteDGII.objects.filter(pk=artefacto.pk).update(disponible=False)
+            continue
+        ArtefactoReporteDGII.objects.filter(pk=artefacto.pk).update(hash_archivo=resumen.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dgii', '0013_invalidar_reportes_607_formas_pago'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artefactoreportedgii',
+            name='disponible',
+            field=models.BooleanField(default=True, help_text='False si el archivo ya no está en el storage'),
+        ),
+        migrations.AddField(
+            model_name='artefactoreportedgii',
+            name='hash_archivo',
+            field=models.CharField(blank=True, help_text='SHA-256 del archivo comprimido (ETag de la descarga)', max_length=64),
+        ),
+        migrations.RunPython(poblar_hash_archivo, migrations.RunPython.noop),
+    ]
@@ -5,14 +5,21 @@ Gestiona tipos de comprobantes fiscales y secuencias NCF
 para cumplir con requerimientos de la DGII de República Dominicana.
 """
 from django.db import models
+from django.db.models import BooleanField, DurationField, Exists, ExpressionWrapper, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from datetime import timedelta
+import csv
 import uuid
+import zlib
 
 from .constants import (
     PREFIJOS_NCF_VALIDOS, PREFIJO_DEFAULT, LONGITUD_CODIGO_TIPO,
-    ALERTA_CANTIDAD_DEFAULT,
+    ALERTA_CANTIDAD_DEFAULT, TIPO_REPORTE_CHOICES, ESTADO_CONTRIBUYENTE_ACTIVO,
+    FORMATO_ARTEFACTO_CHOICES, RUTA_ARTEFACTOS_REPORTE,
+    ESTADO_BLOQUE_CHOICES, ESTADO_BLOQUE_ABIERTO,
     ERROR_CODIGO_LONGITUD, ERROR_PREFIJO_INVALIDO,
     ERROR_SECUENCIA_FINAL_MAYOR, ERROR_SECUENCIA_ACTUAL_NEGATIVA,
     ERROR_SECUENCIA_ACTUAL_MENOR_INICIAL, ERROR_SECUENCIA_ACTUAL_MAYOR_FINAL,
@@ -111,6 +118,75 @@ class TipoComprobante(models.Model):
         return f"{self.prefijo}{self.codigo} - {self.nombre}"
 
 
+class SecuenciaNCFQuerySet(models.QuerySet):
+    """
+    QuerySet personalizado para SecuenciaNCF.
+
+    Calcula en SQL lo que las propiedades agotada/disponibles calculan por
+    fila, para filtrar y ordenar sin cargar las secuencias en Python. Los
+    nombres llevan sufijo _anotado/_anotada porque las propiedades del
+    modelo ocupan los originales.
+    """
+
+    def con_disponibilidad(self, hoy=None):
+        """Anota disponibles_anotado, agotada_anotada y dias_para_vencer (timedelta)."""
+        hoy = hoy or timezone.localdate()
+        return self.annotate(
+            disponibles_anotado=F('secuencia_final') - Greatest(
+                F('secuencia_actual'), F('secuencia_inicial') - 1
+            ),
+            agotada_anotada=ExpressionWrapper(
+                Q(secuencia_actual__gte=F('secuencia_final')),
+                output_field=BooleanField()
+            ),
+            dias_para_vencer=ExpressionWrapper(
+                F('fecha_vencimiento') - Value(hoy, output_field=models.DateField()),
+                output_field=DurationField()
+            ),
+        )
+
+    def vigentes(self, hoy=None):
+        """Activas y no vencidas (usa el índice parcial de secuencias activas)."""
+        return self.filter(activo=True, fecha_vencimiento__gte=hoy or timezone.localdate())
+
+    def disponibles(self, hoy=None):
+        """Vigentes con números sin reservar."""
+        return self.vigentes(hoy).filter(secuencia_actual__lt=F('secuencia_final'))
+
+    def por_vencer(self, dias, hoy=None):
+        """
+        Activas que vencen dentro de `dias` o con disponibles <= alerta_cantidad,
+        anotadas con alerta_vencimiento_anotada y alerta_cantidad_anotada.
+        """
+        hoy = hoy or timezone.localdate()
+        fecha_alerta = hoy + timedelta(days=dias)
+        alerta_vencimiento = Q(fecha_vencimiento__lte=fecha_alerta)
+        alerta_cantidad = Q(disponibles_anotado__lte=F('alerta_cantidad'))
+        return self.filter(activo=True).con_disponibilidad(hoy).annotate(
+            alerta_vencimiento_anotada=ExpressionWrapper(alerta_vencimiento, output_field=BooleanField()),
+            alerta_cantidad_anotada=ExpressionWrapper(alerta_cantidad, output_field=BooleanField()),
+        ).filter(alerta_vencimiento | alerta_cantidad)
+
+    def para_asignar(self, titular, hoy=None):
+        """
+        Secuencias de las que `titular` puede obtener un NCF, en el orden en
+        que deben usarse: primero la que tiene un bloque abierto del titular
+        con números (para no dejar bloques a medias) y luego el rango más
+        bajo (secuencia_inicial) con números sin reservar.
+        """
+        bloque_abierto = BloqueNCF.objects.filter(
+            secuencia=OuterRef('pk'),
+            titular=titular,
+            estado=ESTADO_BLOQUE_ABIERTO,
+            ultimo_usado__lt=F('numero_final'),
+        )
+        return self.vigentes(hoy).annotate(
+            con_bloque_abierto=Exists(bloque_abierto)
+        ).filter(
+            Q(con_bloque_abierto=True) | Q(secuencia_actual__lt=F('secuencia_final'))
+        ).order_by('-con_bloque_abierto', 'secuencia_inicial', 'id')
+
+
 class SecuenciaNCF(models.Model):
     """
     Control de secuencias por empresa y tipo de comprobante.
@@ -169,6 +245,8 @@ class SecuenciaNCF(models.Model):
         blank=True
     )
 
+    objects = SecuenciaNCFQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Secuencia NCF'
         verbose_name_plural = 'Secuencias NCF'
@@ -177,6 +255,13 @@ class SecuenciaNCF(models.Model):
             models.Index(fields=['empresa', 'tipo_comprobante']),
             models.Index(fields=['empresa', 'activo']),
             models.Index(fields=['empresa', 'fecha_vencimiento']),
+            # Solo secuencias activas: asignación por tipo (rango más bajo)
+            # y listados de activas/por vencer
+            models.Index(
+                fields=['empresa', 'tipo_comprobante', 'secuencia_inicial'],
+                condition=Q(activo=True),
+                name='secuencia_ncf_activa_idx'
+            ),
         ]
         permissions = [
             ('gestionar_secuenciancf', 'Puede gestionar secuencias NCF'),
@@ -257,16 +342,21 @@ class SecuenciaNCF(models.Model):
         """Indica si la secuencia está agotada"""
         return self.secuencia_actual >= self.secuencia_final
 
+    @property
+    def ultimo_numero(self):
+        """Último número usado o reservado (secuencia_inicial - 1 si aún no se usa)"""
+        return max(self.secuencia_actual, self.secuencia_inicial - 1)
+
     @property
     def disponibles(self):
         """Retorna cantidad de NCF disponibles"""
-        return self.secuencia_final - self.secuencia_actual
+        return self.secuencia_final - self.ultimo_numero
 
     @property
     def porcentaje_uso(self):
         """Retorna porcentaje de uso de la secuencia"""
         total = self.secuencia_final - self.secuencia_inicial + 1
-        usados = self.secuencia_actual - self.secuencia_inicial + 1
+        usados = self.ultimo_numero - self.secuencia_inicial + 1
         if total > 0:
             return round((usados / total) * 100, 2)
         return 0
@@ -279,8 +369,248 @@ class SecuenciaNCF(models.Model):
         if self.agotada:
             raise ValueError(ERROR_SECUENCIA_AGOTADA)
 
-        siguiente = self.secuencia_actual + 1
+        siguiente = self.ultimo_numero + 1
         # Formato NCF: Prefijo (B) + Tipo (01) + Secuencia (8 dígitos) = B0100000001
         ncf_formateado = f"{self.tipo_comprobante.prefijo}{self.tipo_comprobante.codigo}{siguiente:08d}"
 
         return ncf_formateado
+
+
+class BloqueNCF(models.Model):
+    """
+    Bloque de números NCF reservado de una SecuenciaNCF por un titular
+    (proceso de la aplicación o caja).
+
+    Los NCF del bloque se entregan sin bloquear la secuencia (ver
+    AsignadorNCF); ultimo_usado registra el avance. Al cerrarse, los
+    números sin usar se devuelven a la secuencia si el bloque era el último
+    reservado (numeros_devueltos) o quedan anulados (numeros_anulados) y se
+    reportan en el 608 con la fecha de cierre. Las filas no se eliminan:
+    son el rastro de auditoría de la numeración.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.PROTECT,
+        related_name='bloques_ncf',
+        verbose_name='Empresa'
+    )
+    secuencia = models.ForeignKey(
+        SecuenciaNCF,
+        on_delete=models.PROTECT,
+        related_name='bloques',
+        verbose_name='Secuencia'
+    )
+    titular = models.CharField(max_length=100, help_text="Proceso o caja que usa el bloque")
+    numero_inicial = models.IntegerField()
+    numero_final = models.IntegerField()
+    ultimo_usado = models.IntegerField(help_text="Último número entregado del bloque")
+    estado = models.CharField(max_length=10, choices=ESTADO_BLOQUE_CHOICES, default=ESTADO_BLOQUE_ABIERTO)
+    numeros_devueltos = models.IntegerField(default=0)
+    numeros_anulados = models.IntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    fecha_cierre = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Bloque NCF'
+        verbose_name_plural = 'Bloques NCF'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['secuencia', 'titular', 'estado']),
+            models.Index(fields=['titular', 'estado']),
+            models.Index(fields=['empresa', 'fecha_cierre']),
+        ]
+
+    def __str__(self):
+        return f"{self.secuencia_id} [{self.numero_inicial}-{self.numero_final}] {self.titular}"
+
+    @property
+    def sobrantes(self):
+        """Números del bloque aún sin entregar"""
+        return self.numero_final - self.ultimo_usado
+
+
+class ReporteDGIIGenerado(models.Model):
+    """
+    Reporte DGII (606/607/608) ya generado de un período cerrado.
+
+    Guarda el TXT comprimido con zlib, su hash SHA-256 y los totales para
+    atender las consultas repetidas con una sola fila en lugar de recorrer
+    Compra/Factura. Los signals de Compra y Factura eliminan los reportes
+    del período cuando un documento se crea, modifica o cancela
+    (ver signals.py); ReportesGuardadosService lo vuelve a generar en la
+    siguiente consulta.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='reportes_dgii',
+        verbose_name='Empresa'
+    )
+    tipo = models.CharField(max_length=3, choices=TIPO_REPORTE_CHOICES, verbose_name='Tipo de Reporte')
+    anio = models.PositiveSmallIntegerField(verbose_name='Año')
+    mes = models.PositiveSmallIntegerField(verbose_name='Mes')
+    contenido = models.BinaryField(help_text="Archivo TXT comprimido con zlib")
+    hash_contenido = models.CharField(max_length=64, help_text="SHA-256 del TXT sin comprimir")
+    cantidad_registros = models.PositiveIntegerField(default=0)
+    totales = models.JSONField(default=dict, blank=True)
+    fecha_generacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Reporte DGII Generado'
+        verbose_name_plural = 'Reportes DGII Generados'
+        ordering = ['-anio', '-mes', 'tipo']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'tipo', 'anio', 'mes'],
+                name='unique_reporte_dgii_empresa_tipo_periodo'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['empresa', 'anio', 'mes']),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.anio}-{self.mes:02d} ({self.empresa_id})"
+
+    def iterar_texto(self, tamano_bloque=64 * 1024):
+        """Descomprime el TXT por bloques (apto para StreamingHttpResponse)."""
+        descompresor = zlib.decompressobj()
+        datos = bytes(self.contenido)
+        for inicio in range(0, len(datos), tamano_bloque):
+            bloque = descompresor.decompress(datos[inicio:inicio + tamano_bloque])
+            if bloque:
+                yield bloque
+        resto = descompresor.flush()
+        if resto:
+            yield resto
+
+    def texto(self):
+        """Contenido TXT completo."""
+        return zlib.decompress(bytes(self.contenido)).decode('utf-8')
+
+    def iterar_lineas(self):
+        """Líneas del TXT (con su terminador), descomprimidas por bloques."""
+        pendiente = b''
+        for bloque in self.iterar_texto():
+            *lineas, pendiente = (pendiente + bloque).split(b'\n')
+            for linea in lineas:
+                yield (linea + b'\n').decode('utf-8')
+        if pendiente:
+            yield pendiente.decode('utf-8')
+
+    def iterar_registros(self, campos):
+        """
+        Reconstruye los registros del reporte a partir del TXT, uno a uno.
+
+        Args:
+            campos: Campos del reporte en el orden del archivo
+
+        Returns:
+            Generador de dict, iguales a los de GeneradorReportesDGII
+        """
+        for fila in csv.reader(self.iterar_lineas(), delimiter='|'):
+            yield dict(zip(campos, fila))
+
+    def registros(self, campos):
+        """Lista completa de registros (ver iterar_registros)."""
+        return list(self.iterar_registros(campos))
+
+
+def ruta_artefacto_reporte(instance, filename):
+    """dgii/reportes/<empresa_id>/<archivo> dentro del storage de MEDIA."""
+    return f"{RUTA_ARTEFACTOS_REPORTE}/{instance.empresa_id}/{filename}"
+
+
+class ArtefactoReporteDGII(models.Model):
+    """
+    Archivo generado por una tarea asíncrona de reporte DGII.
+
+    Las tareas escriben el TXT y el JSON del reporte comprimidos con gzip
+    en el storage de archivos y retornan solo estos metadatos, de modo que
+    el resultado de la tarea no carga los registros. Se descargan desde
+    ReportesDGIIViewSet.descargar_artefacto (admite peticiones Range).
+
+    Si el archivo desaparece del storage la fila queda con disponible=False
+    y el lote la vuelve a generar. Las versiones reemplazadas por una más
+    nueva se eliminan con el comando depurar_artefactos_dgii.
+    """
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='artefactos_reporte_dgii',
+        verbose_name='Empresa'
+    )
+    tipo = models.CharField(max_length=3, choices=TIPO_REPORTE_CHOICES, verbose_name='Tipo de Reporte')
+    anio = models.PositiveSmallIntegerField(verbose_name='Año')
+    mes = models.PositiveSmallIntegerField(verbose_name='Mes')
+    formato = models.CharField(max_length=4, choices=FORMATO_ARTEFACTO_CHOICES)
+    archivo = models.FileField(upload_to=ruta_artefacto_reporte, max_length=255, help_text="Archivo comprimido con gzip")
+    tamano = models.PositiveBigIntegerField(default=0, help_text="Bytes del archivo comprimido")
+    hash_contenido = models.CharField(max_length=64, help_text="SHA-256 del contenido sin comprimir")
+    hash_archivo = models.CharField(
+        max_length=64, blank=True, help_text="SHA-256 del archivo comprimido (ETag de la descarga)"
+    )
+    disponible = models.BooleanField(default=True, help_text="False si el archivo ya no está en el storage")
+    cantidad_registros = models.PositiveIntegerField(default=0)
+    totales = models.JSONField(default=dict, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Artefacto de Reporte DGII'
+        verbose_name_plural = 'Artefactos de Reportes DGII'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['empresa', 'tipo', 'anio', 'mes']),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.anio}-{self.mes:02d} {self.formato} ({self.empresa_id})"
+
+    @property
+    def nombre_descarga(self):
+        """Nombre sugerido al descargar, p. ej. 606_101000001_202501.txt.gz"""
+        return f"{self.tipo}_{self.empresa.rnc}_{self.anio}{self.mes:02d}.{self.formato}.gz"
+
+    def metadatos(self):
+        """Datos del archivo que retorna la tarea y lista la API."""
+        return {
+            'id': str(self.uuid),
+            'formato': self.formato,
+            'ruta': self.archivo.name,
+            'tamano': self.tamano,
+            'hash_contenido': self.hash_contenido,
+            'hash_archivo': self.hash_archivo,
+        }
+
+
+class ContribuyenteDGII(models.Model):
+    """
+    Contribuyente del padrón de RNC de la DGII (archivo DGII_RNC.TXT).
+
+    Catálogo global (no pertenece a una empresa) que se carga con el
+    comando importar_padron_rnc. La clave primaria es el RNC/cédula sin
+    guiones, de modo que la consulta es una búsqueda por índice. huella
+    resume los campos de la línea para que las reimportaciones solo
+    escriban las filas que cambiaron.
+    """
+    rnc = models.CharField(max_length=11, primary_key=True, verbose_name='RNC/Cédula')
+    nombre = models.CharField(max_length=255, verbose_name='Nombre o razón social')
+    nombre_comercial = models.CharField(max_length=255, blank=True)
+    actividad = models.CharField(max_length=255, blank=True, verbose_name='Actividad económica')
+    fecha_inicio = models.DateField(null=True, blank=True, verbose_name='Inicio de operaciones')
+    estado = models.CharField(max_length=30, blank=True)
+    regimen_pago = models.CharField(max_length=30, blank=True, verbose_name='Régimen de pago')
+    huella = models.BigIntegerField(help_text="Hash de los campos de la línea del padrón")
+
+    class Meta:
+        verbose_name = 'Contribuyente DGII'
+        verbose_name_plural = 'Padrón de Contribuyentes DGII'
+
+    def __str__(self):
+        return f"{self.rnc} - {self.nombre}"
+
+    @property
+    def activo(self):
+        return self.estado == ESTADO_CONTRIBUYENTE_ACTIVO
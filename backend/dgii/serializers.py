@@ -164,8 +164,4 @@ class GenerarNCFSerializer(serializers.Serializer):
                 raise serializers.ValidationError(
                     'No hay secuencia activa para este tipo de comprobante.'
                 )
-            if secuencia.agotada:
-                raise serializers.ValidationError(
-                    'La secuencia de este tipo de comprobante está agotada.'
-                )
         return value
@@ -8,15 +8,83 @@ Los reportes DGII son:
 - 606: Compras de bienes y servicios
 - 607: Ventas de bienes y servicios
 - 608: Comprobantes fiscales anulados
+
+Los registros se leen con values_list().iterator() y se transforman en un
+generador, de modo que la exportación TXT (ExportacionDGII) puede enviarse
+en streaming con memoria constante sin importar el volumen del período.
+
+Los reportes de períodos cerrados se guardan en ReporteDGIIGenerado
+(ReportesGuardadosService) y se sirven desde ahí mientras ningún
+documento del período cambie.
+
+Las tareas asíncronas escriben el reporte en archivos gzip
+(ArtefactosReporteService) y retornan solo sus metadatos;
+LoteReportesService los genera en lote para todas las empresas.
+
+PadronRNCService carga y consulta el padrón de contribuyentes (RNC) de la DGII.
+
+AsignadorNCF entrega los NCF desde bloques reservados por proceso o caja
+(BloqueNCF), de modo que las cajas no compiten por la fila de SecuenciaNCF.
 """
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from itertools import islice
 import csv
+import gzip
+import hashlib
+import heapq
 import io
+import json
 import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import zlib
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import IntegrityError, connections, transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least, NullIf
+from django.utils import timezone
+
+from core.descargas import Eco
+from core.fechas import filtro_rango, limites_mes, rango_mes
+
+from .constants import (
+    CHUNK_SIZE_EXPORTACION, CHUNK_SIZE_ARCHIVO, NIVEL_COMPRESION_REPORTE, TAMANO_BLOQUE_NCF,
+    DIAS_RETENCION_ARTEFACTOS,
+    FORMATO_ARTEFACTO_TXT, FORMATO_ARTEFACTO_JSON,
+    ESTADO_BLOQUE_ABIERTO, ESTADO_BLOQUE_CERRADO,
+    TIPO_ANULACION_ERROR_IMPRESION, TIPO_ANULACION_ERROR_SECUENCIA,
+    ERROR_SECUENCIA_AGOTADA, ERROR_SECUENCIA_NO_ACTIVA, ERROR_SECUENCIA_VENCIDA,
+    ERROR_NO_SECUENCIA_DISPONIBLE, CAMPOS_PADRON, SEPARADOR_PADRON, TAMANO_LOTE_PADRON, ESTADO_CONTRIBUYENTE_ACTIVO,
+    CACHE_PREFIJO_PADRON, CACHE_TIMEOUT_PADRON, COLUMNAS_607_METODO_PAGO,
+    LONGITUD_RNC, LONGITUD_CEDULA,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _fecha_dgii(fecha) -> str:
+    """
+    Formatea una fecha como AAAAMMDD para los reportes DGII.
+
+    Las fechas con hora se convierten antes a la zona local: una factura
+    de las 22:30 del último día del mes es de ese día, no del siguiente en UTC.
+    """
+    if isinstance(fecha, datetime):
+        fecha = timezone.localtime(fecha)
+    return fecha.strftime('%Y%m%d')
+
+
 def _get_tipo_identificacion(numero: str) -> str:
     """
     Determina el tipo de identificación según el formato DGII.
@@ -37,6 +105,36 @@ def _get_tipo_identificacion(numero: str) -> str:
     return '3'  # Otro
 
 
+class ExportacionDGII:
+    """
+    Archivo TXT de un reporte DGII generado en streaming.
+
+    Al iterarla produce las líneas del archivo a medida que se leen los
+    registros, apta para StreamingHttpResponse. cantidad_registros y
+    totales se calculan en la misma pasada y quedan completos al terminar
+    la iteración.
+    """
+
+    def __init__(self, registros, campos, nombre_archivo, campos_totales=()):
+        self._registros = registros
+        self.campos = campos
+        self.nombre_archivo = nombre_archivo
+        self.cantidad_registros = 0
+        self._totales = {campo: Decimal('0') for campo in campos_totales}
+
+    def __iter__(self):
+        writer = csv.writer(Eco(), delimiter='|')
+        for registro in self._registros:
+            self.cantidad_registros += 1
+            for campo in self._totales:
+                self._totales[campo] += Decimal(registro[campo])
+            yield writer.writerow([registro.get(campo, '') for campo in self.campos])
+
+    @property
+    def totales(self):
+        return {campo: str(valor) for campo, valor in self._totales.items()}
+
+
 class GeneradorReportesDGII:
     """
     Servicio para generar reportes fiscales DGII.
@@ -70,6 +168,19 @@ class GeneradorReportesDGII:
 
     CAMPOS_608 = ['ncf', 'tipo_anulacion', 'fecha_comprobante']
 
+    # Columnas de forma de pago del 607
+    CAMPOS_FORMAS_PAGO_607 = (
+        'efectivo', 'cheque_transferencia_deposito', 'tarjeta_debito_credito',
+        'venta_credito', 'bonos_certificados_regalo', 'permuta', 'otras_formas_venta',
+    )
+
+    # Campos sumados en los totales de cada reporte
+    CAMPOS_TOTALES = {
+        '606': ('monto_facturado', 'itbis_facturado'),
+        '607': ('monto_facturado', 'itbis_facturado') + CAMPOS_FORMAS_PAGO_607,
+        '608': (),
+    }
+
     @staticmethod
     def generar_606(empresa, anio, mes):
         """
@@ -83,35 +194,7 @@ class GeneradorReportesDGII:
         Returns:
             dict con registros, totales y contenido TXT
         """
-        from compras.models import Compra
-
-        compras = Compra.objects.filter(
-            empresa=empresa,
-            fecha_compra__year=anio,
-            fecha_compra__month=mes,
-            estado__in=['REGISTRADA', 'CXP', 'PAGADA']
-        ).select_related('proveedor').order_by('fecha_compra')
-
-        registros = []
-        for compra in compras:
-            registro = GeneradorReportesDGII._transformar_compra_606(compra)
-            registros.append(registro)
-
-        contenido_txt = GeneradorReportesDGII._generar_txt(
-            registros,
-            GeneradorReportesDGII.CAMPOS_606
-        )
-
-        return {
-            'status': 'completed',
-            'periodo': f'{anio}-{mes:02d}',
-            'rnc_empresa': empresa.rnc,
-            'cantidad_registros': len(registros),
-            'registros': registros,
-            'totales': GeneradorReportesDGII._calcular_totales_606(registros),
-            'contenido_txt': contenido_txt,
-            'nombre_archivo': f"606_{empresa.rnc}_{anio}{mes:02d}.txt"
-        }
+        return GeneradorReportesDGII._generar('606', empresa, anio, mes)
 
     @staticmethod
     def generar_607(empresa, anio, mes):
@@ -126,98 +209,324 @@ class GeneradorReportesDGII:
         Returns:
             dict con registros, totales y contenido TXT
         """
-        from ventas.models import Factura
+        return GeneradorReportesDGII._generar('607', empresa, anio, mes)
 
-        facturas = Factura.objects.filter(
-            empresa=empresa,
-            fecha__year=anio,
-            fecha__month=mes,
-            estado__in=['PENDIENTE_PAGO', 'PAGADA_PARCIAL', 'PAGADA'],
-            venta_sin_comprobante=False
-        ).select_related('cliente').order_by('fecha')
+    @staticmethod
+    def generar_608(empresa, anio, mes):
+        """
+        Genera el reporte 608 de comprobantes anulados.
 
-        registros = []
-        for factura in facturas:
-            registro = GeneradorReportesDGII._transformar_factura_607(factura)
-            registros.append(registro)
+        Args:
+            empresa: Instancia de Empresa
+            anio: Año del reporte
+            mes: Mes del reporte (1-12)
 
-        contenido_txt = GeneradorReportesDGII._generar_txt(
-            registros,
-            GeneradorReportesDGII.CAMPOS_607
+        Returns:
+            dict con registros y contenido TXT
+        """
+        return GeneradorReportesDGII._generar('608', empresa, anio, mes)
+
+    @staticmethod
+    def exportar_txt(tipo, empresa, anio, mes, chunk_size=CHUNK_SIZE_EXPORTACION):
+        """
+        Prepara la exportación TXT en streaming de un reporte.
+
+        No consulta la base de datos hasta que se itera el resultado; los
+        registros se leen por bloques de chunk_size filas.
+
+        Args:
+            tipo: '606', '607' o '608'
+            empresa: Instancia de Empresa
+            anio: Año del reporte
+            mes: Mes del reporte (1-12)
+
+        Returns:
+            ExportacionDGII
+        """
+        return ExportacionDGII(
+            GeneradorReportesDGII.iterar_registros(tipo, empresa, anio, mes, chunk_size),
+            GeneradorReportesDGII.campos(tipo),
+            GeneradorReportesDGII.nombre_archivo(tipo, empresa, anio, mes),
+            GeneradorReportesDGII.CAMPOS_TOTALES[tipo],
         )
 
+    @staticmethod
+    def iterar_registros(tipo, empresa, anio, mes, chunk_size=CHUNK_SIZE_EXPORTACION):
+        """
+        Genera los registros de un reporte uno a uno.
+
+        Returns:
+            Generador de dict con los campos del reporte
+        """
+        filas = {
+            '606': GeneradorReportesDGII._filas_606,
+            '607': GeneradorReportesDGII._filas_607,
+            '608': GeneradorReportesDGII._filas_608,
+        }
+        transformaciones = {
+            '606': GeneradorReportesDGII._transformar_compra_606,
+            '607': GeneradorReportesDGII._transformar_factura_607,
+            '608': GeneradorReportesDGII._transformar_anulacion_608,
+        }
+        transformar = transformaciones[tipo]
+        for fila in filas[tipo](empresa, anio, mes, chunk_size):
+            yield transformar(fila)
+
+    @staticmethod
+    def campos(tipo):
+        """Campos del reporte en el orden del archivo TXT."""
+        return getattr(GeneradorReportesDGII, f'CAMPOS_{tipo}')
+
+    @staticmethod
+    def nombre_archivo(tipo, empresa, anio, mes):
+        return f"{tipo}_{empresa.rnc}_{anio}{mes:02d}.txt"
+
+    @staticmethod
+    def resumen(tipo, empresa, anio, mes):
+        """
+        Cantidad de registros y totales de un reporte calculados en la base
+        de datos, sin leer ni transformar los registros.
+
+        606 y 607 usan un solo aggregate sobre la misma consulta del
+        reporte; 608 suma las facturas canceladas y los números anulados
+        de bloques NCF.
+
+        Returns:
+            dict con cantidad_registros y totales (606/607), con los mismos
+            valores que ExportacionDGII calcula al recorrer los registros
+        """
+        if tipo == '608':
+            canceladas, bloques = GeneradorReportesDGII._consulta_608(empresa, anio, mes)
+            anulados = bloques.aggregate(total=Sum('numeros_anulados'))['total'] or 0
+            return {'cantidad_registros': canceladas.count() + anulados}
+
+        if tipo == '606':
+            consulta = GeneradorReportesDGII._consulta_606(empresa, anio, mes)
+            sumas = {'monto_facturado': Sum('total'), 'itbis_facturado': Sum('impuestos')}
+        else:
+            # Suma sobre el GROUP BY por factura del desglose de pagos
+            # (Django lo envuelve en una subconsulta)
+            consulta = GeneradorReportesDGII._consulta_607_formas_pago(empresa, anio, mes)
+            sumas = {
+                'monto_facturado': Sum('total'),
+                'itbis_facturado': Sum('itbis'),
+                **{
+                    columna: Sum(f'forma_{columna}')
+                    for columna in GeneradorReportesDGII._columnas_formas_pago_607()
+                },
+            }
+
+        resultado = consulta.aggregate(cantidad_registros=Count('id'), **sumas)
+
+        def formatear(valor):
+            # SQLite no conserva la escala de la columna en SUM; el archivo
+            # muestra los montos con 2 decimales y '0' si no hay montos
+            return str(valor.quantize(Decimal('0.01'))) if valor else '0'
+
         return {
+            'cantidad_registros': resultado.pop('cantidad_registros'),
+            'totales': {
+                campo: formatear(resultado.get(campo))
+                for campo in GeneradorReportesDGII.CAMPOS_TOTALES[tipo]
+            },
+        }
+
+    @staticmethod
+    def _generar(tipo, empresa, anio, mes):
+        """
+        Genera un reporte completo en memoria (registros y contenido TXT).
+
+        La cantidad de registros y los totales salen de resumen() (SQL),
+        no de recorrer los registros.
+        """
+        registros = list(GeneradorReportesDGII.iterar_registros(tipo, empresa, anio, mes))
+
+        resultado = {
             'status': 'completed',
             'periodo': f'{anio}-{mes:02d}',
             'rnc_empresa': empresa.rnc,
-            'cantidad_registros': len(registros),
+            **GeneradorReportesDGII.resumen(tipo, empresa, anio, mes),
             'registros': registros,
-            'totales': GeneradorReportesDGII._calcular_totales_607(registros),
-            'contenido_txt': contenido_txt,
-            'nombre_archivo': f"607_{empresa.rnc}_{anio}{mes:02d}.txt"
         }
+        resultado['contenido_txt'] = GeneradorReportesDGII._generar_txt(
+            registros,
+            GeneradorReportesDGII.campos(tipo)
+        )
+        resultado['nombre_archivo'] = GeneradorReportesDGII.nombre_archivo(tipo, empresa, anio, mes)
+        resultado['hash_contenido'] = hashlib.sha256(resultado['contenido_txt'].encode('utf-8')).hexdigest()
+        return resultado
+
+    # ==================== CONSULTAS ====================
 
     @staticmethod
-    def generar_608(empresa, anio, mes):
+    def _consulta_606(empresa, anio, mes):
+        """Compras del período que entran en el 606."""
+        from compras.models import Compra
+
+        return Compra.objects.filter(
+            empresa=empresa,
+            **filtro_rango('fecha_compra', *limites_mes(anio, mes)),
+            estado__in=['REGISTRADA', 'CXP', 'PAGADA']
+        )
+
+    @staticmethod
+    def _consulta_607(empresa, anio, mes):
+        """Facturas con comprobante del período que entran en el 607."""
+        from ventas.models import Factura
+
+        return Factura.objects.filter(
+            empresa=empresa,
+            **filtro_rango('fecha', *rango_mes(anio, mes)),
+            estado__in=['PENDIENTE_PAGO', 'PAGADA_PARCIAL', 'PAGADA'],
+            venta_sin_comprobante=False
+        )
+
+    @staticmethod
+    def _columnas_formas_pago_607():
+        """Columnas del 607 calculadas en _consulta_607_formas_pago."""
+        return list(dict.fromkeys([*COLUMNAS_607_METODO_PAGO.values(), 'venta_credito']))
+
+    @staticmethod
+    def _consulta_607_formas_pago(empresa, anio, mes):
         """
-        Genera el reporte 608 de comprobantes anulados.
+        Facturas del 607 con el desglose por forma de pago (forma_<columna>).
 
-        Args:
-            empresa: Instancia de Empresa
-            anio: Año del reporte
-            mes: Mes del reporte (1-12)
+        Un solo GROUP BY por factura sobre el join Factura–PagoCaja suma
+        los pagos hechos hasta el cierre del período por método
+        (COLUMNAS_607_METODO_PAGO); lo no pagado va a efectivo si la venta
+        es de contado o a venta_credito si es a crédito. Así el reporte no
+        hace una consulta de pagos por factura.
 
-        Returns:
-            dict con registros y contenido TXT
+        Un pago puede cubrir varias facturas (PagoCaja.facturas): su monto
+        se reparte entre ellas en proporción al total de cada una, y lo
+        pagado por método nunca supera el total de la factura.
+        """
+        from ventas.models import PagoCaja
+
+        fin = rango_mes(anio, mes)[1]
+        monto = DecimalField(max_digits=14, decimal_places=2)
+        cero = Value(Decimal('0'), output_field=monto)
+
+        # Suma de los totales de las facturas que cubre el pago del join
+        cubierto = Subquery(
+            PagoCaja.facturas.through.objects.filter(pagocaja_id=OuterRef('pagos__id'))
+            .values('pagocaja_id').annotate(total=Sum('factura__total')).values('total'),
+            output_field=monto
+        )
+        asignado = ExpressionWrapper(F('pagos__monto') * F('total') / NullIf(cubierto, 0), output_field=monto)
+
+        def pagado(filtro=Q()):
+            return Least(
+                Coalesce(Sum(asignado, filter=Q(pagos__fecha_pago__lt=fin) & filtro), cero, output_field=monto),
+                F('total'), output_field=monto
+            )
+
+        metodos_por_columna = {}
+        for metodo, columna in COLUMNAS_607_METODO_PAGO.items():
+            metodos_por_columna.setdefault(columna, []).append(metodo)
+
+        pendiente = Greatest(F('total') - pagado(), cero, output_field=monto)
+        contado = Q(tipo_venta='CONTADO')
+        formas = {
+            f'forma_{columna}': pagado(Q(pagos__metodo_pago__in=metodos))
+            for columna, metodos in metodos_por_columna.items()
+        }
+        formas['forma_efectivo'] = ExpressionWrapper(
+            formas['forma_efectivo'] + Case(When(contado, then=pendiente), default=cero),
+            output_field=monto
+        )
+        formas['forma_venta_credito'] = Case(When(contado, then=cero), default=pendiente, output_field=monto)
+
+        return GeneradorReportesDGII._consulta_607(empresa, anio, mes).annotate(**formas)
+
+    @staticmethod
+    def _consulta_608(empresa, anio, mes):
+        """
+        Consultas del 608: (facturas canceladas con NCF, bloques NCF
+        cerrados en el período con números anulados).
         """
         from ventas.models import Factura
+        from .models import BloqueNCF
 
-        facturas_anuladas = Factura.objects.filter(
+        canceladas = Factura.objects.filter(
             empresa=empresa,
-            fecha__year=anio,
-            fecha__month=mes,
+            **filtro_rango('fecha', *rango_mes(anio, mes)),
             estado='CANCELADA',
             ncf__isnull=False
-        ).exclude(ncf='').order_by('fecha')
+        ).exclude(ncf='')
 
-        registros = []
-        for factura in facturas_anuladas:
-            registro = GeneradorReportesDGII._transformar_anulacion_608(factura)
-            registros.append(registro)
+        bloques = BloqueNCF.objects.filter(
+            empresa=empresa,
+            **filtro_rango('fecha_cierre', *rango_mes(anio, mes)),
+            numeros_anulados__gt=0
+        )
+        return canceladas, bloques
 
-        contenido_txt = GeneradorReportesDGII._generar_txt(
-            registros,
-            GeneradorReportesDGII.CAMPOS_608
+    @staticmethod
+    def _filas_606(empresa, anio, mes, chunk_size):
+        """Compras del período, solo con las columnas del 606."""
+        return GeneradorReportesDGII._consulta_606(empresa, anio, mes).order_by(
+            'fecha_compra', 'id'
+        ).values_list(
+            'proveedor__numero_identificacion', 'tipo_gasto', 'numero_ncf',
+            'ncf_modificado', 'fecha_compra', 'total', 'impuestos',
+        ).iterator(chunk_size=chunk_size)
+
+    @staticmethod
+    def _filas_607(empresa, anio, mes, chunk_size):
+        """
+        Facturas con comprobante del período, solo con las columnas del 607
+        y el desglose por forma de pago en la misma consulta.
+        """
+        formas = [f'forma_{columna}' for columna in GeneradorReportesDGII._columnas_formas_pago_607()]
+        return GeneradorReportesDGII._consulta_607_formas_pago(empresa, anio, mes).order_by(
+            'fecha', 'id'
+        ).values_list(
+            'cliente__numero_identificacion', 'ncf', 'fecha', 'total', 'itbis', *formas,
+        ).iterator(chunk_size=chunk_size)
+
+    @staticmethod
+    def _filas_608(empresa, anio, mes, chunk_size):
+        """
+        Comprobantes anulados del período, ordenados por fecha: facturas
+        canceladas con NCF y números sin usar de bloques NCF cerrados.
+        """
+        canceladas, bloques = GeneradorReportesDGII._consulta_608(empresa, anio, mes)
+        canceladas = canceladas.order_by('fecha', 'id').values_list('ncf', 'fecha')
+        bloques = bloques.order_by('fecha_cierre', 'id').values_list(
+            'secuencia__tipo_comprobante__prefijo', 'secuencia__tipo_comprobante__codigo',
+            'numero_final', 'numeros_anulados', 'fecha_cierre',
         )
 
-        return {
-            'status': 'completed',
-            'periodo': f'{anio}-{mes:02d}',
-            'rnc_empresa': empresa.rnc,
-            'cantidad_registros': len(registros),
-            'registros': registros,
-            'contenido_txt': contenido_txt,
-            'nombre_archivo': f"608_{empresa.rnc}_{anio}{mes:02d}.txt"
-        }
+        def facturas():
+            for ncf, fecha in canceladas.iterator(chunk_size=chunk_size):
+                yield ncf, fecha, TIPO_ANULACION_ERROR_IMPRESION
+
+        def sobrantes():
+            for prefijo, codigo, final, anulados, fecha in bloques.iterator(chunk_size=chunk_size):
+                for numero in range(final - anulados + 1, final + 1):
+                    yield f"{prefijo}{codigo}{numero:08d}", fecha, TIPO_ANULACION_ERROR_SECUENCIA
+
+        return heapq.merge(facturas(), sobrantes(), key=lambda fila: fila[1])
 
     # ==================== MÉTODOS DE TRANSFORMACIÓN ====================
 
     @staticmethod
-    def _transformar_compra_606(compra):
-        """Transforma una Compra al formato de registro 606."""
-        proveedor = compra.proveedor
-        rnc = proveedor.numero_identificacion.replace('-', '').replace(' ', '') if proveedor.numero_identificacion else ''
+    def _transformar_compra_606(fila):
+        """Transforma una fila de _filas_606 al formato de registro 606."""
+        identificacion, tipo_gasto, ncf, ncf_modificado, fecha, total, impuestos = fila
+        rnc = identificacion.replace('-', '').replace(' ', '') if identificacion else ''
 
         return {
             'rnc_cedula': rnc,
             'tipo_identificacion': _get_tipo_identificacion(rnc),
-            'tipo_bienes_servicios': compra.tipo_gasto or '01',
-            'ncf': compra.numero_ncf or '',
-            'ncf_modificado': compra.ncf_modificado or '',
-            'fecha_comprobante': compra.fecha_compra.strftime('%Y%m%d'),
-            'fecha_pago': compra.fecha_compra.strftime('%Y%m%d'),
-            'monto_facturado': str(compra.total),
-            'itbis_facturado': str(compra.impuestos),
+            'tipo_bienes_servicios': tipo_gasto or '01',
+            'ncf': ncf or '',
+            'ncf_modificado': ncf_modificado or '',
+            'fecha_comprobante': _fecha_dgii(fecha),
+            'fecha_pago': _fecha_dgii(fecha),
+            'monto_facturado': str(total),
+            'itbis_facturado': str(impuestos),
             'itbis_retenido': '0',
             'itbis_sujeto_proporcionalidad': '0',
             'itbis_llevado_costo': '0',
@@ -233,21 +542,25 @@ class GeneradorReportesDGII:
         }
 
     @staticmethod
-    def _transformar_factura_607(factura):
-        """Transforma una Factura al formato de registro 607."""
-        cliente = factura.cliente
-        rnc = cliente.numero_identificacion.replace('-', '').replace(' ', '') if cliente.numero_identificacion else ''
+    def _transformar_factura_607(fila):
+        """Transforma una fila de _filas_607 al formato de registro 607."""
+        identificacion, ncf, fecha, total, itbis, *montos = fila
+        rnc = identificacion.replace('-', '').replace(' ', '') if identificacion else ''
+        formas = {
+            columna: str(valor.quantize(Decimal('0.01'))) if valor else '0'
+            for columna, valor in zip(GeneradorReportesDGII._columnas_formas_pago_607(), montos)
+        }
 
         return {
             'rnc_cedula': rnc,
             'tipo_identificacion': _get_tipo_identificacion(rnc),
-            'ncf': factura.ncf or '',
+            'ncf': ncf or '',
             'ncf_modificado': '',
             'tipo_ingreso': '01',  # Ingresos por operaciones
-            'fecha_comprobante': factura.fecha.strftime('%Y%m%d'),
+            'fecha_comprobante': _fecha_dgii(fecha),
             'fecha_retencion': '',
-            'monto_facturado': str(factura.total),
-            'itbis_facturado': str(factura.itbis),
+            'monto_facturado': str(total),
+            'itbis_facturado': str(itbis),
             'itbis_retenido_terceros': '0',
             'itbis_percibido': '0',
             'retencion_renta_terceros': '0',
@@ -255,22 +568,23 @@ class GeneradorReportesDGII:
             'impuesto_selectivo_consumo': '0',
             'otros_impuestos_tasas': '0',
             'monto_propina_legal': '0',
-            'efectivo': str(factura.total) if factura.tipo_venta == 'CONTADO' else '0',
-            'cheque_transferencia_deposito': '0',
-            'tarjeta_debito_credito': '0',
-            'venta_credito': str(factura.total) if factura.tipo_venta == 'CREDITO' else '0',
+            'efectivo': formas['efectivo'],
+            'cheque_transferencia_deposito': formas['cheque_transferencia_deposito'],
+            'tarjeta_debito_credito': formas['tarjeta_debito_credito'],
+            'venta_credito': formas['venta_credito'],
             'bonos_certificados_regalo': '0',
             'permuta': '0',
-            'otras_formas_venta': '0',
+            'otras_formas_venta': formas['otras_formas_venta'],
         }
 
     @staticmethod
-    def _transformar_anulacion_608(factura):
-        """Transforma una factura anulada al formato de registro 608."""
+    def _transformar_anulacion_608(fila):
+        """Transforma una fila de _filas_608 al formato de registro 608."""
+        ncf, fecha, tipo_anulacion = fila
         return {
-            'ncf': factura.ncf,
-            'tipo_anulacion': '02',  # Error de impresión
-            'fecha_comprobante': factura.fecha.strftime('%Y%m%d'),
+            'ncf': ncf,
+            'tipo_anulacion': tipo_anulacion,
+            'fecha_comprobante': _fecha_dgii(fecha),
         }
 
     # ==================== MÉTODOS DE GENERACIÓN Y TOTALES ====================
@@ -295,25 +609,919 @@ class GeneradorReportesDGII:
         return output.getvalue()
 
     @staticmethod
-    def _calcular_totales_606(registros):
-        """Calcula los totales para el reporte 606."""
+    def calcular_totales(tipo, registros):
+        """Suma los campos de CAMPOS_TOTALES[tipo] de los registros."""
         return {
-            'monto_facturado': str(sum(
-                Decimal(r['monto_facturado']) for r in registros
-            )),
-            'itbis_facturado': str(sum(
-                Decimal(r['itbis_facturado']) for r in registros
-            )),
+            campo: str(sum((Decimal(r[campo]) for r in registros), Decimal('0')))
+            for campo in GeneradorReportesDGII.CAMPOS_TOTALES[tipo]
         }
 
+
+class ReportesGuardadosService:
+    """
+    Reportes DGII de períodos cerrados guardados en ReporteDGIIGenerado.
+
+    La primera consulta de un período cerrado lo genera en streaming
+    (comprimiendo y calculando el hash en la misma pasada) y las siguientes
+    leen una sola fila. Los períodos abiertos siempre se generan en vivo:
+    sus documentos cambian continuamente.
+    """
+
     @staticmethod
-    def _calcular_totales_607(registros):
-        """Calcula los totales para el reporte 607."""
-        return {
-            'monto_facturado': str(sum(
-                Decimal(r['monto_facturado']) for r in registros
-            )),
-            'itbis_facturado': str(sum(
-                Decimal(r['itbis_facturado']) for r in registros
-            )),
+    def periodo_cerrado(anio, mes):
+        """Indica si el mes ya terminó (hora local)."""
+        return limites_mes(anio, mes)[1] <= timezone.localdate()
+
+    @staticmethod
+    def obtener(tipo, empresa, anio, mes):
+        """
+        Reporte guardado del período, generándolo si no existe.
+
+        Returns:
+            ReporteDGIIGenerado, o None si el período no está cerrado
+        """
+        from .models import ReporteDGIIGenerado
+
+        if not ReportesGuardadosService.periodo_cerrado(anio, mes):
+            return None
+
+        reporte = ReporteDGIIGenerado.objects.filter(
+            empresa=empresa, tipo=tipo, anio=anio, mes=mes
+        ).first()
+        if reporte is not None:
+            return reporte
+
+        exportacion = GeneradorReportesDGII.exportar_txt(tipo, empresa, anio, mes)
+        compresor = zlib.compressobj(NIVEL_COMPRESION_REPORTE)
+        resumen = hashlib.sha256()
+        partes = []
+        for linea in exportacion:
+            datos = linea.encode('utf-8')
+            resumen.update(datos)
+            partes.append(compresor.compress(datos))
+        partes.append(compresor.flush())
+
+        reporte = ReporteDGIIGenerado(
+            empresa=empresa,
+            tipo=tipo,
+            anio=anio,
+            mes=mes,
+            contenido=b''.join(partes),
+            hash_contenido=resumen.hexdigest(),
+            cantidad_registros=exportacion.cantidad_registros,
+            totales=exportacion.totales,
+        )
+        try:
+            with transaction.atomic():
+                reporte.save()
+        except IntegrityError:
+            # Otra petición lo guardó primero
+            return ReporteDGIIGenerado.objects.get(empresa=empresa, tipo=tipo, anio=anio, mes=mes)
+
+        logger.info(
+            f"Reporte {tipo} {anio}-{mes:02d} guardado "
+            f"(empresa_id={empresa.id}, registros={reporte.cantidad_registros})"
+        )
+        return reporte
+
+    @staticmethod
+    def generar(tipo, empresa, anio, mes):
+        """
+        Igual que GeneradorReportesDGII.generar_60X, usando el reporte
+        guardado cuando el período está cerrado.
+
+        Returns:
+            dict con registros, totales, contenido TXT y hash
+        """
+        reporte = ReportesGuardadosService.obtener(tipo, empresa, anio, mes)
+        if reporte is None:
+            return GeneradorReportesDGII._generar(tipo, empresa, anio, mes)
+
+        resultado = {
+            'status': 'completed',
+            'periodo': f'{anio}-{mes:02d}',
+            'rnc_empresa': empresa.rnc,
+            'cantidad_registros': reporte.cantidad_registros,
+            'registros': reporte.registros(GeneradorReportesDGII.campos(tipo)),
         }
+        if GeneradorReportesDGII.CAMPOS_TOTALES[tipo]:
+            resultado['totales'] = reporte.totales
+        resultado['contenido_txt'] = reporte.texto()
+        resultado['nombre_archivo'] = GeneradorReportesDGII.nombre_archivo(tipo, empresa, anio, mes)
+        resultado['hash_contenido'] = reporte.hash_contenido
+        return resultado
+
+    @staticmethod
+    def invalidar(empresa_id, periodos):
+        """
+        Elimina los reportes guardados de los períodos indicados.
+
+        Se ejecuta ahora y nuevamente al confirmar la transacción, para
+        descartar lo que otra petición haya guardado mientras el cambio
+        aún no era visible.
+
+        Args:
+            empresa_id: ID de la empresa
+            periodos: Iterable de (anio, mes)
+        """
+        from .models import ReporteDGIIGenerado
+
+        periodos = {periodo for periodo in periodos if periodo}
+        if empresa_id is None or not periodos:
+            return
+
+        filtro = Q()
+        for anio, mes in periodos:
+            filtro |= Q(anio=anio, mes=mes)
+
+        def eliminar():
+            ReporteDGIIGenerado.objects.filter(filtro, empresa_id=empresa_id).delete()
+
+        eliminar()
+        transaction.on_commit(eliminar)
+
+
+class _ArchivoGzip:
+    """
+    Archivo temporal comprimido con gzip que calcula el SHA-256 del texto
+    escrito y el del archivo comprimido (el ETag de la descarga).
+    """
+
+    def __init__(self):
+        self.archivo = tempfile.TemporaryFile()
+        self._gzip = gzip.GzipFile(
+            fileobj=self.archivo, mode='wb', compresslevel=NIVEL_COMPRESION_REPORTE, mtime=0
+        )
+        self._resumen = hashlib.sha256()
+
+    def escribir(self, texto):
+        datos = texto.encode('utf-8')
+        self._resumen.update(datos)
+        self._gzip.write(datos)
+
+    def cerrar(self):
+        """Termina el gzip y rebobina el archivo. Returns: (tamaño, hash, hash del archivo)"""
+        self._gzip.close()
+        tamano = self.archivo.tell()
+        self.archivo.seek(0)
+        resumen_archivo = hashlib.sha256()
+        for bloque in iter(lambda: self.archivo.read(CHUNK_SIZE_ARCHIVO), b''):
+            resumen_archivo.update(bloque)
+        self.archivo.seek(0)
+        return tamano, self._resumen.hexdigest(), resumen_archivo.hexdigest()
+
+
+class ArtefactosReporteService:
+    """
+    Genera los archivos (ArtefactoReporteDGII) de las tareas asíncronas.
+
+    Una sola pasada sobre los registros escribe el TXT y el JSON,
+    comprimidos con gzip en archivos temporales, y calcula hash, totales y
+    cantidad de registros; luego ambos se copian al storage de MEDIA. La
+    memoria no depende del volumen del período.
+    """
+
+    @staticmethod
+    def generar(tipo, empresa, anio, mes):
+        """
+        Genera el TXT y el JSON de un reporte y guarda sus artefactos.
+
+        Los períodos cerrados se leen del reporte guardado
+        (ReportesGuardadosService) en lugar de Compra/Factura.
+
+        Returns:
+            dict con status, periodo, tipo, cantidad_registros, totales
+            (606/607), hash_contenido del TXT y 'artefactos' con los
+            metadatos de cada archivo por formato
+        """
+        from .models import ArtefactoReporteDGII
+
+        campos = GeneradorReportesDGII.campos(tipo)
+        reporte = ReportesGuardadosService.obtener(tipo, empresa, anio, mes)
+        if reporte is not None:
+            registros = reporte.iterar_registros(campos)
+        else:
+            registros = GeneradorReportesDGII.iterar_registros(tipo, empresa, anio, mes)
+
+        txt = _ArchivoGzip()
+        contenido_json = _ArchivoGzip()
+        try:
+            def registros_con_json():
+                contenido_json.escribir('{"registros": [')
+                for indice, registro in enumerate(registros):
+                    separador = ', ' if indice else ''
+                    contenido_json.escribir(separador + json.dumps(registro, ensure_ascii=False))
+                    yield registro
+
+            exportacion = ExportacionDGII(
+                registros_con_json(),
+                campos,
+                GeneradorReportesDGII.nombre_archivo(tipo, empresa, anio, mes),
+                GeneradorReportesDGII.CAMPOS_TOTALES[tipo],
+            )
+            for linea in exportacion:
+                txt.escribir(linea)
+
+            resultado = {
+                'status': 'completed',
+                'periodo': f'{anio}-{mes:02d}',
+                'rnc_empresa': empresa.rnc,
+                'tipo': tipo,
+                'cantidad_registros': exportacion.cantidad_registros,
+            }
+            if GeneradorReportesDGII.CAMPOS_TOTALES[tipo]:
+                resultado['totales'] = exportacion.totales
+            # Cierra la lista de registros y agrega el resumen al mismo objeto JSON
+            contenido_json.escribir('], ' + json.dumps(
+                {clave: valor for clave, valor in resultado.items() if clave != 'status'},
+                ensure_ascii=False
+            )[1:])
+
+            artefactos = {}
+            for formato, archivo in ((FORMATO_ARTEFACTO_TXT, txt), (FORMATO_ARTEFACTO_JSON, contenido_json)):
+                tamano, hash_contenido, hash_archivo = archivo.cerrar()
+                artefacto = ArtefactoReporteDGII(
+                    empresa=empresa,
+                    tipo=tipo,
+                    anio=anio,
+                    mes=mes,
+                    formato=formato,
+                    tamano=tamano,
+                    hash_contenido=hash_contenido,
+                    hash_archivo=hash_archivo,
+                    cantidad_registros=exportacion.cantidad_registros,
+                    totales=exportacion.totales,
+                )
+                artefacto.archivo.save(f'{artefacto.uuid}.{formato}.gz', File(archivo.archivo), save=False)
+                artefactos[formato] = artefacto
+        finally:
+            txt.archivo.close()
+            contenido_json.archivo.close()
+
+        # Ambas filas o ninguna: un lote reanudado no debe ver un TXT sin su JSON
+        with transaction.atomic():
+            for artefacto in artefactos.values():
+                artefacto.save()
+        artefactos = {formato: artefacto.metadatos() for formato, artefacto in artefactos.items()}
+
+        resultado['hash_contenido'] = artefactos[FORMATO_ARTEFACTO_TXT]['hash_contenido']
+        resultado['artefactos'] = artefactos
+        logger.info(
+            f"Artefactos del reporte {tipo} {anio}-{mes:02d} guardados "
+            f"(empresa_id={empresa.id}, registros={resultado['cantidad_registros']})"
+        )
+        return resultado
+
+    @staticmethod
+    def marcar_no_disponible(artefacto):
+        """Marca un artefacto cuyo archivo ya no está en el storage."""
+        from .models import ArtefactoReporteDGII
+
+        ArtefactoReporteDGII.objects.filter(pk=artefacto.pk).update(disponible=False)
+        logger.warning(
+            f"Archivo del artefacto {artefacto.uuid} no encontrado en el storage "
+            f"({artefacto.archivo.name}); marcado como no disponible"
+        )
+
+    @staticmethod
+    def depurar(dias=DIAS_RETENCION_ARTEFACTOS, empresa_id=None):
+        """
+        Elimina los artefactos reemplazados hace más de `dias` días por uno
+        más nuevo del mismo reporte y formato, y los que ya no tienen
+        archivo. Sus archivos se borran del storage al confirmar
+        (señal post_delete).
+
+        El plazo deja terminar las descargas reanudables de la versión
+        anterior.
+
+        Returns:
+            int: Artefactos eliminados
+        """
+        from .models import ArtefactoReporteDGII
+
+        limite = timezone.now() - timedelta(days=dias)
+        reemplazo = ArtefactoReporteDGII.objects.filter(
+            empresa_id=OuterRef('empresa_id'), tipo=OuterRef('tipo'), anio=OuterRef('anio'),
+            mes=OuterRef('mes'), formato=OuterRef('formato'),
+            fecha_creacion__gt=OuterRef('fecha_creacion'), fecha_creacion__lt=limite,
+        )
+        artefactos = ArtefactoReporteDGII.objects.filter(Q(Exists(reemplazo)) | Q(disponible=False))
+        if empresa_id is not None:
+            artefactos = artefactos.filter(empresa_id=empresa_id)
+
+        with transaction.atomic():
+            eliminados = artefactos.delete()[0]
+        logger.info(f"Artefactos de reportes DGII depurados: {eliminados}")
+        return eliminados
+
+
+class PadronRNCService:
+    """
+    Padrón de contribuyentes de la DGII (ContribuyenteDGII).
+
+    importar() sincroniza la tabla con las líneas del archivo por lotes de
+    TAMANO_LOTE_PADRON: por lote trae las huellas existentes con una
+    consulta e inserta o actualiza solo las filas nuevas o distintas, así
+    que una reimportación del padrón completo escribe únicamente lo que
+    cambió. Los RNC que ya no están en el archivo se eliminan al final;
+    los vistos se guardan como enteros en un array compacto para no
+    cargar millones de strings en memoria.
+
+    consultar() es una búsqueda por clave primaria con caché por RNC.
+    """
+
+    CAMPOS = ('nombre', 'nombre_comercial', 'actividad', 'fecha_inicio', 'estado', 'regimen_pago')
+
+    @staticmethod
+    def normalizar(numero):
+        """RNC/cédula sin guiones ni espacios."""
+        return (numero or '').replace('-', '').replace(' ', '').strip()
+
+    @staticmethod
+    def _version_cache():
+        """Versión vigente del caché del padrón (ver invalidar_cache)."""
+        clave = f'{CACHE_PREFIJO_PADRON}:version'
+        version = cache.get(clave)
+        if version is None:
+            cache.add(clave, time.time_ns(), None)
+            version = cache.get(clave)
+        return version
+
+    @staticmethod
+    def invalidar_cache():
+        """Deja obsoletas todas las consultas cacheadas del padrón."""
+        cache.set(f'{CACHE_PREFIJO_PADRON}:version', time.time_ns(), None)
+
+    @staticmethod
+    def consultar(numero):
+        """
+        Datos del contribuyente en el padrón.
+
+        La respuesta (también la ausencia) se cachea por RNC hasta la
+        siguiente importación con cambios o CACHE_TIMEOUT_PADRON, de modo
+        que las consultas repetidas no llegan a la base de datos.
+
+        Returns:
+            dict con rnc, CAMPOS y activo, o None si no está en el padrón
+        """
+        from .models import ContribuyenteDGII
+
+        rnc = PadronRNCService.normalizar(numero)
+        clave = f'{CACHE_PREFIJO_PADRON}:{PadronRNCService._version_cache()}:{rnc}'
+        fila = cache.get(clave)
+        if fila is None:
+            fila = ContribuyenteDGII.objects.filter(pk=rnc).values('rnc', *PadronRNCService.CAMPOS).first()
+            if fila is not None:
+                fila['activo'] = fila['estado'] == ESTADO_CONTRIBUYENTE_ACTIVO
+            # False distingue "no está en el padrón" de "no está en caché"
+            cache.set(clave, fila or False, CACHE_TIMEOUT_PADRON)
+        return fila or None
+
+    @staticmethod
+    def consultar_varios(numeros):
+        """
+        Consulta varios RNC/cédulas (p. ej. las filas de un 606/607).
+
+        Returns:
+            dict {rnc: datos} solo con los que están en el padrón
+        """
+        from .models import ContribuyenteDGII
+
+        numeros = sorted({PadronRNCService.normalizar(numero) for numero in numeros} - {''})
+        resultado = {}
+        for inicio in range(0, len(numeros), TAMANO_LOTE_PADRON):
+            filas = ContribuyenteDGII.objects.filter(
+                pk__in=numeros[inicio:inicio + TAMANO_LOTE_PADRON]
+            ).values('rnc', *PadronRNCService.CAMPOS)
+            for fila in filas:
+                fila['activo'] = fila['estado'] == ESTADO_CONTRIBUYENTE_ACTIVO
+                resultado[fila['rnc']] = fila
+        return resultado
+
+    @staticmethod
+    def _interpretar(linea):
+        """
+        Campos de una línea del padrón.
+
+        Returns:
+            tuple (rnc, huella, valores), o None si la línea no es válida
+        """
+        partes = [parte.strip() for parte in linea.rstrip('\r\n').split(SEPARADOR_PADRON)]
+        if len(partes) <= max(CAMPOS_PADRON.values()):
+            return None
+        valores = {campo: partes[posicion][:255] for campo, posicion in CAMPOS_PADRON.items()}
+        rnc = PadronRNCService.normalizar(valores.pop('rnc'))
+        if not rnc.isdigit() or len(rnc) not in (LONGITUD_RNC, LONGITUD_CEDULA):
+            return None
+
+        huella = hashlib.blake2b(
+            SEPARADOR_PADRON.join(valores.values()).encode('utf-8'), digest_size=8
+        ).digest()
+        return rnc, int.from_bytes(huella, 'big', signed=True), valores
+
+    @staticmethod
+    def _contribuyente(rnc, huella, valores):
+        """ContribuyenteDGII sin guardar a partir de _interpretar()."""
+        from .models import ContribuyenteDGII
+
+        # dd/mm/aaaa; split es bastante más rápido que strptime en millones de líneas
+        try:
+            dia, mes, anio = valores['fecha_inicio'].split('/')
+            fecha_inicio = date(int(anio), int(mes), int(dia))
+        except ValueError:
+            fecha_inicio = None
+        return ContribuyenteDGII(rnc=rnc, huella=huella, **{**valores, 'fecha_inicio': fecha_inicio})
+
+    @staticmethod
+    def _clave(rnc):
+        """RNC como entero; la longitud distingue cédulas con ceros a la izquierda."""
+        return int(rnc) * 100 + len(rnc)
+
+    @staticmethod
+    def importar(lineas, tamano_lote=TAMANO_LOTE_PADRON, eliminar_ausentes=True, al_procesar=None):
+        """
+        Sincroniza el padrón con las líneas del archivo DGII_RNC.TXT.
+
+        Args:
+            lineas: Iterable de str (una línea del archivo cada una)
+            tamano_lote: Líneas por transacción
+            eliminar_ausentes: Elimina los RNC que no están en el archivo
+                (se omite si el archivo no tiene ninguna línea válida)
+            al_procesar: Callable(resumen) opcional, llamado tras cada lote
+
+        Returns:
+            dict con leidas, ignoradas, nuevos, actualizados, sin_cambios
+            y eliminados
+        """
+        import numpy as np
+        from .models import ContribuyenteDGII
+
+        resumen = dict.fromkeys(
+            ('leidas', 'ignoradas', 'nuevos', 'actualizados', 'sin_cambios', 'eliminados'), 0
+        )
+        vistos = array('q')
+        campos_actualizables = list(PadronRNCService.CAMPOS) + ['huella']
+
+        def guardar(lote):
+            existentes = dict(
+                ContribuyenteDGII.objects.filter(pk__in=list(lote)).values_list('rnc', 'huella')
+            )
+            # Solo se construyen instancias para lo que hay que escribir
+            nuevos = [
+                PadronRNCService._contribuyente(rnc, *fila)
+                for rnc, fila in lote.items() if rnc not in existentes
+            ]
+            cambiados = [
+                PadronRNCService._contribuyente(rnc, *fila)
+                for rnc, fila in lote.items() if rnc in existentes and existentes[rnc] != fila[0]
+            ]
+            with transaction.atomic():
+                ContribuyenteDGII.objects.bulk_create(nuevos, batch_size=tamano_lote)
+                ContribuyenteDGII.objects.bulk_update(cambiados, campos_actualizables, batch_size=tamano_lote)
+            resumen['nuevos'] += len(nuevos)
+            resumen['actualizados'] += len(cambiados)
+            resumen['sin_cambios'] += len(lote) - len(nuevos) - len(cambiados)
+            if al_procesar:
+                al_procesar(resumen)
+
+        lote = {}
+        for linea in lineas:
+            resumen['leidas'] += 1
+            fila = PadronRNCService._interpretar(linea)
+            if fila is None:
+                resumen['ignoradas'] += 1
+                continue
+            rnc, huella, valores = fila
+            # Si el RNC se repite en el archivo, vale la última línea
+            lote[rnc] = (huella, valores)
+            vistos.append(PadronRNCService._clave(rnc))
+            if len(lote) >= tamano_lote:
+                guardar(lote)
+                lote = {}
+        if lote:
+            guardar(lote)
+
+        if eliminar_ausentes and vistos:
+            vistos = np.unique(np.frombuffer(vistos, dtype=np.int64))
+            rncs = ContribuyenteDGII.objects.values_list('rnc', flat=True).iterator(chunk_size=tamano_lote)
+            ausentes = []
+            while bloque := list(islice(rncs, tamano_lote)):
+                claves = np.array([PadronRNCService._clave(rnc) for rnc in bloque], dtype=np.int64)
+                posiciones = np.minimum(np.searchsorted(vistos, claves), len(vistos) - 1)
+                ausentes.extend(
+                    rnc for rnc, esta in zip(bloque, vistos[posiciones] == claves) if not esta
+                )
+            for inicio in range(0, len(ausentes), tamano_lote):
+                ContribuyenteDGII.objects.filter(pk__in=ausentes[inicio:inicio + tamano_lote]).delete()
+            resumen['eliminados'] = len(ausentes)
+
+        if resumen['nuevos'] or resumen['actualizados'] or resumen['eliminados']:
+            PadronRNCService.invalidar_cache()
+
+        logger.info(
+            f"Padrón RNC importado: {resumen['nuevos']} nuevos, {resumen['actualizados']} actualizados, "
+            f"{resumen['eliminados']} eliminados, {resumen['ignoradas']} líneas ignoradas"
+        )
+        return resumen
+
+
+def _inicializar_proceso_lote():
+    """Prepara un proceso del pool: Django configurado y sin conexiones heredadas."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    # Cada proceso abre sus propias conexiones
+    connections.close_all()
+
+
+class LoteReportesService:
+    """
+    Generación de reportes DGII en lote (cierre de mes) para varias
+    empresas, tipos y períodos.
+
+    Cada unidad (empresa, tipo, anio, mes) es independiente y deja sus
+    artefactos con ArtefactosReporteService, por lo que las unidades se
+    reparten entre procesos (o tareas) y el tiempo total escala con los
+    núcleos disponibles. Un lote interrumpido se reanuda volviendo a
+    ejecutarlo: pendientes() descarta las unidades de períodos cerrados
+    cuyo TXT ya coincide con el reporte guardado vigente (los signals de
+    Compra/Factura eliminan ese reporte si algo cambió).
+    """
+
+    @staticmethod
+    def periodos(desde, hasta):
+        """Lista de (anio, mes) entre dos (anio, mes), inclusive."""
+        anio, mes = desde
+        periodos = []
+        while (anio, mes) <= hasta:
+            periodos.append((anio, mes))
+            anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+        return periodos
+
+    @staticmethod
+    def unidades(empresa_ids, tipos, periodos):
+        """Producto empresa x período x tipo, agrupado por empresa."""
+        return [
+            (empresa_id, tipo, anio, mes)
+            for empresa_id in empresa_ids
+            for anio, mes in periodos
+            for tipo in tipos
+        ]
+
+    @staticmethod
+    def pendientes(unidades):
+        """
+        Unidades que aún no tienen artefactos vigentes.
+
+        Usa dos consultas para todo el lote: los hashes de los reportes
+        guardados y los de los TXT generados.
+        """
+        from .models import ArtefactoReporteDGII, ReporteDGIIGenerado
+
+        if not unidades:
+            return []
+        empresa_ids = {unidad[0] for unidad in unidades}
+        anios = {unidad[2] for unidad in unidades}
+        campos = ('empresa_id', 'tipo', 'anio', 'mes', 'hash_contenido')
+
+        guardados = set(ReporteDGIIGenerado.objects.filter(
+            empresa_id__in=empresa_ids, anio__in=anios
+        ).values_list(*campos))
+        generados = set(ArtefactoReporteDGII.objects.filter(
+            empresa_id__in=empresa_ids, anio__in=anios, formato=FORMATO_ARTEFACTO_TXT, disponible=True
+        ).values_list(*campos))
+        vigentes = {fila[:4] for fila in guardados & generados}
+
+        return [unidad for unidad in unidades if unidad not in vigentes]
+
+    @staticmethod
+    def generar_unidad(unidad):
+        """
+        Genera los artefactos de una unidad sin propagar errores.
+
+        Returns:
+            dict con la unidad, status ('completed' o 'error'),
+            cantidad_registros o error, y segundos
+        """
+        from empresas.models import Empresa
+
+        empresa_id, tipo, anio, mes = unidad
+        inicio = time.perf_counter()
+        try:
+            empresa = Empresa.objects.get(pk=empresa_id)
+            resultado = ArtefactosReporteService.generar(tipo, empresa, anio, mes)
+            salida = {'status': 'completed', 'cantidad_registros': resultado['cantidad_registros']}
+        except Exception as e:
+            logger.error(f"Error generando reporte {tipo} {anio}-{mes:02d} (empresa_id={empresa_id}): {e}")
+            salida = {'status': 'error', 'error': str(e)}
+        salida.update({
+            'empresa_id': empresa_id,
+            'tipo': tipo,
+            'periodo': f'{anio}-{mes:02d}',
+            'segundos': round(time.perf_counter() - inicio, 3),
+        })
+        return salida
+
+    @staticmethod
+    def ejecutar(unidades, procesos=1, al_terminar=None):
+        """
+        Genera las unidades, en paralelo si procesos > 1.
+
+        Args:
+            unidades: Lista de (empresa_id, tipo, anio, mes)
+            procesos: Tamaño del pool de procesos (1 = en este proceso)
+            al_terminar: Callable(resultado) opcional, llamado al terminar
+                cada unidad (en el orden en que terminan)
+
+        Returns:
+            list de dict de generar_unidad
+        """
+        resultados = []
+
+        def registrar(resultado):
+            resultados.append(resultado)
+            if al_terminar:
+                al_terminar(resultado)
+
+        if procesos <= 1 or len(unidades) <= 1:
+            for unidad in unidades:
+                registrar(LoteReportesService.generar_unidad(unidad))
+            return resultados
+
+        # Los hijos no deben heredar las conexiones abiertas del padre
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso_lote) as pool:
+            futuros = [pool.submit(LoteReportesService.generar_unidad, unidad) for unidad in unidades]
+            for futuro in as_completed(futuros):
+                registrar(futuro.result())
+        return resultados
+
+
+class _BloqueEnMemoria:
+    """Estado de un BloqueNCF abierto en este proceso."""
+    __slots__ = ('id', 'ultimo_usado', 'numero_final', 'prefijo')
+
+    def __init__(self, bloque, prefijo):
+        self.id = bloque.id
+        self.ultimo_usado = bloque.ultimo_usado
+        self.numero_final = bloque.numero_final
+        self.prefijo = prefijo
+
+
+class AsignadorNCF:
+    """
+    Entrega NCF desde bloques reservados por titular (proceso o caja).
+
+    Reservar un bloque es la única operación que bloquea la fila de
+    SecuenciaNCF: una transacción corta avanza secuencia_actual hasta
+    TAMANO_BLOQUE_NCF números y crea el BloqueNCF. Cada NCF siguiente sale
+    de memoria y solo actualiza ultimo_usado del bloque del titular con un
+    UPDATE condicional, sin competir con las demás cajas. Si el UPDATE no
+    afecta filas (el bloque se cerró o lo avanzó otro proceso con el mismo
+    titular) se descarta el estado en memoria y se vuelve a leer o reservar,
+    por lo que un número nunca se entrega dos veces.
+
+    Al detener un proceso o caja debe llamarse liberar() (o el comando
+    cerrar_bloques_ncf): los números sin usar vuelven a la secuencia si el
+    bloque es el último reservado, o quedan anulados y se reportan en el 608.
+    """
+    _bloques = {}
+    _locks = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def titular_actual():
+        """Titular por defecto: host y PID del proceso."""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _lock_de(secuencia_id):
+        with AsignadorNCF._lock:
+            return AsignadorNCF._locks.setdefault(secuencia_id, threading.Lock())
+
+    @staticmethod
+    def siguiente_ncf(secuencia_id, titular=None, usuario=None, tamano=TAMANO_BLOQUE_NCF):
+        """
+        Entrega el siguiente NCF de la secuencia para el titular.
+
+        Args:
+            secuencia_id: ID de SecuenciaNCF (activa y vigente; se valida
+                al reservar cada bloque)
+            titular: Proceso o caja (default: titular_actual())
+            usuario: Usuario registrado como modificador de la secuencia
+            tamano: Números a reservar cuando se agota el bloque
+
+        Returns:
+            tuple: (ncf, numero)
+
+        Raises:
+            ValidationError: Si la secuencia está agotada
+        """
+        from .models import BloqueNCF
+
+        titular = titular or AsignadorNCF.titular_actual()
+        clave = (secuencia_id, titular)
+
+        with AsignadorNCF._lock_de(secuencia_id):
+            while True:
+                bloque = AsignadorNCF._bloques.get(clave)
+                if bloque is None or bloque.ultimo_usado >= bloque.numero_final:
+                    bloque = AsignadorNCF._obtener_bloque(secuencia_id, titular, usuario, tamano)
+                    AsignadorNCF._bloques[clave] = bloque
+
+                numero = bloque.ultimo_usado + 1
+                actualizados = BloqueNCF.objects.filter(
+                    pk=bloque.id, secuencia_id=secuencia_id, titular=titular,
+                    estado=ESTADO_BLOQUE_ABIERTO, ultimo_usado=bloque.ultimo_usado
+                ).update(ultimo_usado=numero, fecha_actualizacion=timezone.now())
+                if actualizados:
+                    bloque.ultimo_usado = numero
+                    return f"{bloque.prefijo}{numero:08d}", numero
+
+                # El bloque cambió fuera de este proceso: releer
+                del AsignadorNCF._bloques[clave]
+
+    @staticmethod
+    def siguiente_ncf_por_tipo(empresa, tipo_comprobante_id, titular=None, usuario=None,
+                               tamano=TAMANO_BLOQUE_NCF):
+        """
+        Entrega el siguiente NCF de un tipo de comprobante.
+
+        La secuencia sale de una consulta ordenada (SecuenciaNCFQuerySet.para_asignar,
+        sobre el índice parcial de secuencias activas): la del bloque abierto
+        del titular o, si no hay, la de rango más bajo con números. Solo si
+        otra caja la agota entre la consulta y la reserva se pasa a la
+        siguiente.
+
+        Returns:
+            tuple: (secuencia, ncf, numero)
+
+        Raises:
+            ValidationError: Si no hay secuencia vigente con números
+        """
+        from .models import SecuenciaNCF
+
+        titular = titular or AsignadorNCF.titular_actual()
+        descartadas = []
+        while True:
+            secuencia = SecuenciaNCF.objects.filter(
+                empresa=empresa, tipo_comprobante_id=tipo_comprobante_id
+            ).exclude(pk__in=descartadas).para_asignar(titular).select_related('tipo_comprobante').first()
+            if secuencia is None:
+                raise ValidationError(ERROR_NO_SECUENCIA_DISPONIBLE)
+            try:
+                ncf, numero = AsignadorNCF.siguiente_ncf(secuencia.pk, titular, usuario, tamano)
+                return secuencia, ncf, numero
+            except ValidationError:
+                descartadas.append(secuencia.pk)
+
+    @staticmethod
+    def _obtener_bloque(secuencia_id, titular, usuario, tamano):
+        """Bloque abierto del titular con números libres, o uno nuevo."""
+        from .models import BloqueNCF
+
+        abiertos = BloqueNCF.objects.filter(
+            secuencia_id=secuencia_id, titular=titular, estado=ESTADO_BLOQUE_ABIERTO
+        )
+        # Los bloques consumidos por completo se cierran sin sobrantes
+        abiertos.filter(ultimo_usado__gte=F('numero_final')).update(
+            estado=ESTADO_BLOQUE_CERRADO, fecha_cierre=timezone.now()
+        )
+
+        bloque = abiertos.filter(ultimo_usado__lt=F('numero_final')).select_related(
+            'secuencia__tipo_comprobante'
+        ).order_by('numero_inicial').first()
+        if bloque is None:
+            bloque = AsignadorNCF.reservar_bloque(secuencia_id, titular, usuario, tamano)
+
+        tipo = bloque.secuencia.tipo_comprobante
+        return _BloqueEnMemoria(bloque, f"{tipo.prefijo}{tipo.codigo}")
+
+    @staticmethod
+    def reservar_bloque(secuencia_id, titular, usuario=None, tamano=TAMANO_BLOQUE_NCF):
+        """
+        Reserva hasta `tamano` números de la secuencia para el titular.
+
+        Returns:
+            BloqueNCF creado
+
+        Raises:
+            ValidationError: Si la secuencia está inactiva, vencida o agotada
+        """
+        from .models import BloqueNCF, SecuenciaNCF
+
+        with transaction.atomic():
+            secuencia = SecuenciaNCF.objects.select_for_update().select_related(
+                'tipo_comprobante'
+            ).get(pk=secuencia_id)
+            if not secuencia.activo:
+                raise ValidationError(ERROR_SECUENCIA_NO_ACTIVA)
+            if secuencia.fecha_vencimiento < timezone.localdate():
+                raise ValidationError(ERROR_SECUENCIA_VENCIDA)
+            if secuencia.agotada:
+                raise ValidationError(ERROR_SECUENCIA_AGOTADA)
+
+            inicial = secuencia.ultimo_numero + 1
+            final = min(secuencia.ultimo_numero + tamano, secuencia.secuencia_final)
+            cambios = {'secuencia_actual': final, 'fecha_actualizacion': timezone.now()}
+            if usuario is not None:
+                cambios['usuario_modificacion'] = usuario
+            SecuenciaNCF.objects.filter(pk=secuencia.pk).update(**cambios)
+
+            bloque = BloqueNCF.objects.create(
+                empresa_id=secuencia.empresa_id,
+                secuencia=secuencia,
+                titular=titular,
+                numero_inicial=inicial,
+                numero_final=final,
+                ultimo_usado=inicial - 1,
+            )
+
+        disponibles = secuencia.secuencia_final - final
+        if disponibles <= secuencia.alerta_cantidad:
+            logger.warning(
+                f"ALERTA: Secuencia NCF {secuencia.pk} ({secuencia.tipo_comprobante}) "
+                f"tiene solo {disponibles} NCF sin reservar"
+            )
+        logger.info(f"Bloque NCF reservado: secuencia={secuencia.pk} [{inicial}-{final}] titular={titular}")
+        return bloque
+
+    @staticmethod
+    def cerrar_bloque(bloque_id):
+        """
+        Cierra un bloque y resuelve sus números sin usar.
+
+        Si el bloque es el último reservado de la secuencia los sobrantes se
+        devuelven (secuencia_actual retrocede); si no, quedan anulados y se
+        reportan en el 608 del mes de cierre.
+
+        Returns:
+            BloqueNCF cerrado, o None si ya estaba cerrado
+        """
+        from .models import BloqueNCF, SecuenciaNCF
+
+        with transaction.atomic():
+            bloque = BloqueNCF.objects.select_for_update().get(pk=bloque_id)
+            if bloque.estado != ESTADO_BLOQUE_ABIERTO:
+                return None
+
+            sobrantes = bloque.sobrantes
+            if sobrantes:
+                secuencia = SecuenciaNCF.objects.select_for_update().get(pk=bloque.secuencia_id)
+                if secuencia.secuencia_actual == bloque.numero_final:
+                    # Si no se usó ningún número del rango, la secuencia vuelve a 0 (sin uso)
+                    actual = bloque.ultimo_usado if bloque.ultimo_usado >= secuencia.secuencia_inicial else 0
+                    SecuenciaNCF.objects.filter(pk=secuencia.pk).update(
+                        secuencia_actual=actual, fecha_actualizacion=timezone.now()
+                    )
+                    bloque.numeros_devueltos = sobrantes
+                else:
+                    bloque.numeros_anulados = sobrantes
+
+            bloque.estado = ESTADO_BLOQUE_CERRADO
+            bloque.fecha_cierre = timezone.now()
+            bloque.save(update_fields=[
+                'estado', 'fecha_cierre', 'numeros_devueltos', 'numeros_anulados', 'fecha_actualizacion'
+            ])
+
+        if bloque.numeros_anulados:
+            cierre = timezone.localtime(bloque.fecha_cierre)
+            ReportesGuardadosService.invalidar(bloque.empresa_id, [(cierre.year, cierre.month)])
+        logger.info(
+            f"Bloque NCF {bloque.pk} cerrado: devueltos={bloque.numeros_devueltos} "
+            f"anulados={bloque.numeros_anulados}"
+        )
+        return bloque
+
+    @staticmethod
+    def liberar(titular=None, bloques=None):
+        """
+        Cierra los bloques abiertos de un titular (al detener el proceso o caja).
+
+        Args:
+            titular: Default titular_actual()
+            bloques: QuerySet opcional de BloqueNCF a cerrar en lugar del titular
+
+        Returns:
+            dict: bloques, devueltos, anulados
+        """
+        from .models import BloqueNCF
+
+        if bloques is None:
+            titular = titular or AsignadorNCF.titular_actual()
+            bloques = BloqueNCF.objects.filter(titular=titular)
+            with AsignadorNCF._lock:
+                for clave in [c for c in AsignadorNCF._bloques if c[1] == titular]:
+                    del AsignadorNCF._bloques[clave]
+
+        resumen = {'bloques': 0, 'devueltos': 0, 'anulados': 0}
+        ids = bloques.filter(estado=ESTADO_BLOQUE_ABIERTO).order_by('-numero_final').values_list('id', flat=True)
+        for bloque_id in list(ids):
+            bloque = AsignadorNCF.cerrar_bloque(bloque_id)
+            if bloque is not None:
+                resumen['bloques'] += 1
+                resumen['devueltos'] += bloque.numeros_devueltos
+                resumen['anulados'] += bloque.numeros_anulados
+        return resumen
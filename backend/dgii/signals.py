@@ -1,12 +1,30 @@
 """
 Señales para el módulo DGII
 
-Maneja eventos para auditoría y alertas de secuencias.
+Maneja eventos para auditoría y alertas de secuencias, invalida los
+reportes guardados (ReporteDGIIGenerado) cuando cambia una Compra o una
+Factura de su período (o un PagoCaja de sus facturas, que define las
+formas de pago del 607, o la identificación del Cliente o Proveedor de
+sus documentos) y elimina del storage los archivos de los
+ArtefactoReporteDGII eliminados.
+
+Las actualizaciones masivas (QuerySet.update, bulk_create) no emiten
+señales: quien las use debe llamar a ReportesGuardadosService.invalidar.
 """
 import logging
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models import DateTimeField
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import TipoComprobante, SecuenciaNCF
+from django.utils import timezone
+
+from clientes.models import Cliente
+from compras.models import Compra
+from proveedores.models import Proveedor
+from ventas.models import Factura, PagoCaja
+
+from .models import TipoComprobante, SecuenciaNCF, ArtefactoReporteDGII
+from .services import ReportesGuardadosService
 
 logger = logging.getLogger(__name__)
 
@@ -62,3 +80,186 @@ def secuencia_ncf_post_save(sender, instance, created, **kwargs):
             f"ALERTA: Secuencia NCF {instance.pk} ({instance.tipo_comprobante}) "
             f"está AGOTADA"
         )
+
+
+# ============================================================
+# INVALIDACIÓN DE REPORTES GUARDADOS
+# ============================================================
+
+# Campos que aparecen en los reportes o deciden si el documento se incluye
+CAMPOS_REPORTE = {
+    Compra: {
+        'empresa', 'proveedor', 'tipo_gasto', 'numero_ncf', 'ncf_modificado',
+        'fecha_compra', 'total', 'impuestos', 'estado',
+    },
+    Factura: {
+        'empresa', 'cliente', 'ncf', 'fecha', 'total', 'itbis',
+        'tipo_venta', 'estado', 'venta_sin_comprobante',
+    },
+}
+CAMPO_FECHA = {Compra: 'fecha_compra', Factura: 'fecha'}
+
+# Campos del tercero que se copian a los reportes de sus documentos
+CAMPOS_IDENTIFICACION = ('tipo_identificacion', 'numero_identificacion')
+DOCUMENTOS_TERCERO = {Cliente: (Factura, 'cliente'), Proveedor: (Compra, 'proveedor')}
+
+
+def _periodo(fecha):
+    """(anio, mes) local de una fecha o fecha-hora."""
+    if fecha is None:
+        return None
+    if hasattr(fecha, 'hour') and timezone.is_aware(fecha):
+        fecha = timezone.localtime(fecha)
+    return fecha.year, fecha.month
+
+
+@receiver(pre_save, sender=Compra)
+@receiver(pre_save, sender=Factura)
+def documento_capturar_periodo_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Pre-save para Compra y Factura.
+    Guarda empresa y período previos: si cambian, el reporte anterior
+    también queda desactualizado.
+    """
+    instance._reporte_dgii_anterior = None
+    instance._reporte_dgii_omitir = False
+    if raw:
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & CAMPOS_REPORTE[sender]:
+        instance._reporte_dgii_omitir = True
+        return
+
+    if instance.pk:
+        instance._reporte_dgii_anterior = sender.objects.filter(pk=instance.pk).values_list(
+            'empresa_id', CAMPO_FECHA[sender]
+        ).first()
+
+
+@receiver(post_save, sender=Compra)
+@receiver(post_save, sender=Factura)
+def documento_invalidar_reportes(sender, instance, raw=False, **kwargs):
+    """
+    Post-save para Compra y Factura.
+    Invalida los reportes guardados del período del documento.
+    """
+    if raw or getattr(instance, '_reporte_dgii_omitir', False):
+        return
+
+    periodo = _periodo(getattr(instance, CAMPO_FECHA[sender]))
+    anterior = getattr(instance, '_reporte_dgii_anterior', None)
+    if anterior and anterior[0] != instance.empresa_id:
+        ReportesGuardadosService.invalidar(anterior[0], [_periodo(anterior[1])])
+        anterior = None
+
+    periodos = {periodo, _periodo(anterior[1]) if anterior else None} - {None}
+    ReportesGuardadosService.invalidar(instance.empresa_id, periodos)
+
+
+@receiver(post_delete, sender=Compra)
+@receiver(post_delete, sender=Factura)
+def documento_eliminado_invalidar_reportes(sender, instance, **kwargs):
+    """
+    Post-delete para Compra y Factura.
+    Invalida los reportes guardados del período del documento.
+    """
+    periodo = _periodo(getattr(instance, CAMPO_FECHA[sender]))
+    if periodo:
+        ReportesGuardadosService.invalidar(instance.empresa_id, [periodo])
+
+
+@receiver(pre_save, sender=Cliente)
+@receiver(pre_save, sender=Proveedor)
+def tercero_capturar_identificacion_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Pre-save para Cliente y Proveedor.
+    Guarda la identificación previa para detectar si cambia.
+    """
+    instance._identificacion_dgii_anterior = None
+    if raw or not instance.pk:
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_IDENTIFICACION):
+        return
+
+    instance._identificacion_dgii_anterior = sender.objects.filter(pk=instance.pk).values_list(
+        *CAMPOS_IDENTIFICACION
+    ).first()
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Proveedor)
+def tercero_invalidar_reportes(sender, instance, raw=False, **kwargs):
+    """
+    Post-save para Cliente y Proveedor.
+    Si cambia el RNC/cédula o su tipo, invalida los reportes guardados de
+    los períodos con documentos del tercero (607 para clientes, 606 para
+    proveedores).
+    """
+    anterior = getattr(instance, '_identificacion_dgii_anterior', None)
+    if raw or anterior is None:
+        return
+    if anterior == tuple(getattr(instance, campo) for campo in CAMPOS_IDENTIFICACION):
+        return
+
+    modelo, campo = DOCUMENTOS_TERCERO[sender]
+    documentos = modelo.objects.filter(**{campo: instance})
+    campo_fecha = CAMPO_FECHA[modelo]
+    if isinstance(modelo._meta.get_field(campo_fecha), DateTimeField):
+        meses = documentos.datetimes(campo_fecha, 'month')
+    else:
+        meses = documentos.dates(campo_fecha, 'month')
+    ReportesGuardadosService.invalidar(instance.empresa_id, [_periodo(mes) for mes in meses])
+
+
+def _invalidar_periodos_facturas(facturas):
+    """Invalida los reportes de los períodos de un QuerySet de facturas."""
+    periodos = {}
+    for empresa_id, fecha in facturas.values_list('empresa_id', 'fecha'):
+        periodos.setdefault(empresa_id, set()).add(_periodo(fecha))
+    for empresa_id, periodos_empresa in periodos.items():
+        ReportesGuardadosService.invalidar(empresa_id, periodos_empresa)
+
+
+@receiver(m2m_changed, sender=PagoCaja.facturas.through)
+def pago_caja_facturas_invalidar_reportes(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    M2M PagoCaja–Factura.
+    Invalida los períodos de las facturas que ganan o pierden un pago.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        facturas = Factura.objects.filter(pk=instance.pk)
+    elif action == 'pre_clear':
+        facturas = instance.facturas.all()
+    else:
+        facturas = Factura.objects.filter(pk__in=pk_set or [])
+    _invalidar_periodos_facturas(facturas)
+
+
+@receiver(post_save, sender=PagoCaja)
+@receiver(pre_delete, sender=PagoCaja)
+def pago_caja_invalidar_reportes(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Post-save y pre-delete para PagoCaja.
+    Un pago nuevo aún no tiene facturas (se agregan con m2m_changed); al
+    modificarlo o eliminarlo se invalidan los períodos de sus facturas.
+    """
+    if raw or created:
+        return
+    _invalidar_periodos_facturas(instance.facturas.all())
+
+
+@receiver(post_delete, sender=ArtefactoReporteDGII)
+def artefacto_reporte_eliminar_archivo(sender, instance, **kwargs):
+    """
+    Post-delete para ArtefactoReporteDGII.
+    Elimina el archivo al confirmar la transacción (si se revierte, la
+    fila vuelve a existir y el archivo debe seguir ahí).
+    """
+    if instance.archivo:
+        archivo = instance.archivo
+        transaction.on_commit(lambda: archivo.delete(save=False))
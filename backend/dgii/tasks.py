@@ -4,8 +4,11 @@ Django 6.0 Background Tasks para reportes DGII.
 Estas tareas permiten generar reportes fiscales de forma asíncrona,
 evitando bloquear el servidor durante la generación de reportes grandes.
 
-KISS Principle: La lógica de negocio está delegada a GeneradorReportesDGII
-para evitar código duplicado y funciones largas.
+KISS Principle: La lógica de negocio está delegada a ArtefactosReporteService
+para evitar código duplicado y funciones largas. El TXT y el JSON se
+escriben comprimidos en el storage de archivos (ArtefactoReporteDGII) y la
+tarea retorna solo metadatos: ruta, tamaño, hash, totales y cantidad de
+registros. Los archivos se descargan desde /api/v1/dgii/reportes/artefactos/<id>/.
 """
 from django.tasks import task
 import logging
@@ -18,17 +21,17 @@ def generar_reporte_606(empresa_id: int, anio: int, mes: int) -> dict:
     """
     Genera el reporte 606 de compras de bienes y servicios.
 
-    Delega la lógica a GeneradorReportesDGII para mantener
+    Delega la lógica a ArtefactosReporteService para mantener
     el principio KISS y evitar funciones largas.
     """
     from empresas.models import Empresa
-    from .services import GeneradorReportesDGII
+    from .services import ArtefactosReporteService
 
     logger.info(f"Iniciando generación de reporte 606 para empresa {empresa_id}, período {anio}-{mes:02d}")
 
     try:
         empresa = Empresa.objects.get(id=empresa_id)
-        resultado = GeneradorReportesDGII.generar_606(empresa, anio, mes)
+        resultado = ArtefactosReporteService.generar('606', empresa, anio, mes)
 
         logger.info(f"Reporte 606 generado exitosamente: {resultado['cantidad_registros']} registros")
         return resultado
@@ -46,17 +49,17 @@ def generar_reporte_607(empresa_id: int, anio: int, mes: int) -> dict:
     """
     Genera el reporte 607 de ventas de bienes y servicios.
 
-    Delega la lógica a GeneradorReportesDGII para mantener
+    Delega la lógica a ArtefactosReporteService para mantener
     el principio KISS y evitar funciones largas.
     """
     from empresas.models import Empresa
-    from .services import GeneradorReportesDGII
+    from .services import ArtefactosReporteService
 
     logger.info(f"Iniciando generación de reporte 607 para empresa {empresa_id}, período {anio}-{mes:02d}")
 
     try:
         empresa = Empresa.objects.get(id=empresa_id)
-        resultado = GeneradorReportesDGII.generar_607(empresa, anio, mes)
+        resultado = ArtefactosReporteService.generar('607', empresa, anio, mes)
 
         logger.info(f"Reporte 607 generado exitosamente: {resultado['cantidad_registros']} registros")
         return resultado
@@ -74,17 +77,17 @@ def generar_reporte_608(empresa_id: int, anio: int, mes: int) -> dict:
     """
     Genera el reporte 608 de comprobantes anulados.
 
-    Delega la lógica a GeneradorReportesDGII para mantener
+    Delega la lógica a ArtefactosReporteService para mantener
     el principio KISS y evitar funciones largas.
     """
     from empresas.models import Empresa
-    from .services import GeneradorReportesDGII
+    from .services import ArtefactosReporteService
 
     logger.info(f"Iniciando generación de reporte 608 para empresa {empresa_id}, período {anio}-{mes:02d}")
 
     try:
         empresa = Empresa.objects.get(id=empresa_id)
-        resultado = GeneradorReportesDGII.generar_608(empresa, anio, mes)
+        resultado = ArtefactosReporteService.generar('608', empresa, anio, mes)
 
         logger.info(f"Reporte 608 generado exitosamente: {resultado['cantidad_registros']} registros")
         return resultado
@@ -1,6 +1,8 @@
 """
 Tests para DGII (Comprobantes Fiscales)
 """
+import hashlib
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
@@ -340,10 +342,19 @@ class SecuenciaNCFAPITest(APITestCase):
             secuencia_final=100,
             fecha_vencimiento=date.today() + timedelta(days=365)
         )
+        SecuenciaNCF.objects.create(
+            empresa=self.empresa,
+            tipo_comprobante=self.tipo,
+            descripcion='Talonario Agotado',
+            secuencia_inicial=200,
+            secuencia_final=300,
+            secuencia_actual=300,
+            fecha_vencimiento=date.today() + timedelta(days=365)
+        )
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/v1/dgii/secuencias/activas/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(response.data) >= 1)
+        self.assertEqual([s['descripcion'] for s in response.data], ['Talonario Activo'])
 
     def test_endpoint_por_vencer(self):
         """Test: Endpoint de secuencias por vencer"""
@@ -355,9 +366,24 @@ class SecuenciaNCFAPITest(APITestCase):
             secuencia_final=100,
             fecha_vencimiento=date.today() + timedelta(days=15)
         )
+        SecuenciaNCF.objects.create(
+            empresa=self.empresa,
+            tipo_comprobante=self.tipo,
+            descripcion='Talonario Lejano',
+            secuencia_inicial=200,
+            secuencia_final=300,
+            fecha_vencimiento=date.today() + timedelta(days=365)
+        )
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/v1/dgii/secuencias/por_vencer/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        alerta = response.data[0]
+        self.assertEqual(alerta['secuencia']['descripcion'], 'Talonario Por Vencer')
+        self.assertTrue(alerta['alerta_vencimiento'])
+        self.assertFalse(alerta['alerta_cantidad'])
+        self.assertEqual(alerta['dias_para_vencer'], 15)
+        self.assertEqual(alerta['ncf_disponibles'], 100)
 
     def test_generar_por_tipo(self):
         """Test: Generar NCF por tipo de comprobante"""
@@ -507,6 +533,13 @@ class ReportesDGIIAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('mes', response.data['error'])
 
+    def test_formato_607_mes_fuera_de_rango(self):
+        """Test: Formato 607 rechaza un mes fuera de 1-12"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/v1/dgii/reportes/formato_607/?mes=13&anio=2025')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('mes', response.data['error'])
+
     def test_formato_607_json(self):
         """Test: Formato 607 retorna JSON"""
         self.client.force_authenticate(user=self.user)
@@ -529,6 +562,45 @@ class ReportesDGIIAPITest(APITestCase):
         self.assertIn('attachment', response['Content-Disposition'])
         self.assertIn('607_', response['Content-Disposition'])
 
+    def test_formato_607_txt_streaming(self):
+        """Test: Formato 607 TXT se envía en streaming con el mismo contenido del servicio"""
+        from .services import GeneradorReportesDGII
+
+        self.client.force_authenticate(user=self.user)
+        mes = date.today().month
+        anio = date.today().year
+        response = self.client.get(f'/api/v1/dgii/reportes/formato_607/?mes={mes}&anio={anio}&formato=txt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        esperado = GeneradorReportesDGII.generar_607(self.empresa, anio, mes)
+        self.assertEqual(contenido, esperado['contenido_txt'])
+        self.assertEqual(len(contenido.splitlines()), 1)
+
+    def test_formato_606_txt_periodo_cerrado_desde_guardado(self):
+        """Test: Un período cerrado se sirve desde el reporte guardado con ETag"""
+        from compras.models import Compra
+        from .models import ReporteDGIIGenerado
+
+        Compra.objects.filter(pk=self.compra.pk).update(fecha_compra=date(2024, 12, 5))
+        self.client.force_authenticate(user=self.user)
+        url = '/api/v1/dgii/reportes/formato_606/?mes=12&anio=2024'
+
+        response = self.client.get(url + '&formato=txt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        reporte = ReporteDGIIGenerado.objects.get(empresa=self.empresa, tipo='606', anio=2024, mes=12)
+        self.assertEqual(contenido, reporte.texto())
+        self.assertEqual(response['ETag'], f'"{reporte.hash_contenido}"')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cantidad_registros'], 1)
+        self.assertEqual(response.data['registros'][0]['ncf'], 'B0100000001')
+        self.assertEqual(response.data['totales']['monto_facturado'], '5000.00')
+        self.assertEqual(ReporteDGIIGenerado.objects.count(), 1)
+
     def test_formato_608_requiere_mes_y_anio(self):
         """Test: Formato 608 requiere mes y anio"""
         self.client.force_authenticate(user=self.user)
@@ -562,6 +634,63 @@ class ReportesDGIIAPITest(APITestCase):
         response = self.client.get('/api/v1/dgii/reportes/formato_606/?mes=12&anio=2024')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_resumen_reporte(self):
+        """Test: Resumen retorna cantidad y totales sin generar el archivo"""
+        self.client.force_authenticate(user=self.user)
+        mes = date.today().month
+        anio = date.today().year
+        response = self.client.get(f'/api/v1/dgii/reportes/resumen/?tipo=607&mes={mes}&anio={anio}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cantidad_registros'], 1)
+        self.assertEqual(response.data['totales']['monto_facturado'], '3000.00')
+        self.assertEqual(response.data['totales']['efectivo'], '3000.00')
+        self.assertNotIn('registros', response.data)
+
+        response = self.client.get(f'/api/v1/dgii/reportes/resumen/?tipo=607&mes=13&anio={anio}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_validar_reporte(self):
+        """Test: validar retorna el resumen de errores del 607; el 608 no se valida"""
+        self.client.force_authenticate(user=self.user)
+        mes = date.today().month
+        anio = date.today().year
+        response = self.client.get(f'/api/v1/dgii/reportes/validar/?tipo=607&mes={mes}&anio={anio}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cantidad_registros'], 1)
+        self.assertEqual(response.data['cantidad_errores'], len(response.data['errores']))
+        self.assertIn('resumen', response.data)
+
+        response = self.client.get(f'/api/v1/dgii/reportes/validar/?tipo=608&mes={mes}&anio={anio}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_formato_606_json_paginado(self):
+        """Test: La página pedida trae sus registros y la cantidad total"""
+        from compras.models import Compra
+        from decimal import Decimal
+
+        Compra.objects.create(
+            empresa=self.empresa,
+            proveedor=self.proveedor,
+            fecha_compra=date.today(),
+            numero_factura_proveedor='FAC-PROV-002',
+            numero_ncf='B0100000002',
+            tipo_gasto='02',
+            total=Decimal('1000.00'),
+            impuestos=Decimal('180.00'),
+            estado='REGISTRADA'
+        )
+        self.client.force_authenticate(user=self.user)
+        mes = date.today().month
+        anio = date.today().year
+        response = self.client.get(
+            f'/api/v1/dgii/reportes/formato_606/?mes={mes}&anio={anio}&page=2&page_size=1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cantidad_registros'], 2)
+        self.assertEqual(response.data['total_pages'], 2)
+        self.assertEqual([r['ncf'] for r in response.data['registros']], ['B0100000002'])
+        self.assertEqual(response.data['totales']['monto_facturado'], '6000.00')
+
     def test_formato_606_periodo_sin_registros(self):
         """Test: Formato 606 periodo sin registros retorna lista vacia"""
         self.client.force_authenticate(user=self.user)
@@ -569,3 +698,145 @@ class ReportesDGIIAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['cantidad_registros'], 0)
         self.assertEqual(len(response.data['registros']), 0)
+
+
+class ArtefactosReporteAPITest(APITestCase):
+    """Tests para la descarga de archivos de las tareas asíncronas"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        from .services import ArtefactosReporteService
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+        self.empresa = Empresa.objects.create(nombre='Empresa Principal', rnc='123456789')
+        self.user = User.objects.create_user(
+            username='usuario', password='user123', empresa=self.empresa, rol='admin'
+        )
+        resultado = ArtefactosReporteService.generar('606', self.empresa, 2020, 1)
+        self.metadatos = resultado['artefactos']['json']
+        self.url = f"/api/v1/dgii/reportes/artefactos/{self.metadatos['id']}/"
+        with open(f"{media}/{self.metadatos['ruta']}", 'rb') as archivo:
+            self.contenido = archivo.read()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_descarga_completa(self):
+        """Test: Sin Range se envía el archivo completo con ETag"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.contenido)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], str(len(self.contenido)))
+        # El ETag identifica los bytes enviados (el gzip), no el contenido sin comprimir
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.contenido).hexdigest()}"')
+        self.assertIn('606_123456789_202001.json.gz', response['Content-Disposition'])
+
+    def test_descarga_parcial(self):
+        """Test: Range devuelve 206 con el fragmento pedido"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[:10])
+        self.assertEqual(response['Content-Range'], f'bytes 0-9/{len(self.contenido)}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-')
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[10:])
+
+    def test_rango_fuera_del_archivo(self):
+        """Test: Un rango posterior al final devuelve 416"""
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.contenido)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.contenido)}')
+
+    def test_if_range_distinto_envia_completo(self):
+        """Test: Si el ETag cambió se ignora Range"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.contenido)
+
+    def test_archivo_eliminado_del_storage(self):
+        """Test: Si el archivo ya no existe responde 410 y el artefacto deja de listarse"""
+        from .models import ArtefactoReporteDGII
+
+        artefacto = ArtefactoReporteDGII.objects.get(uuid=self.metadatos['id'])
+        artefacto.archivo.storage.delete(artefacto.archivo.name)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        artefacto.refresh_from_db()
+        self.assertFalse(artefacto.disponible)
+
+        response = self.client.get('/api/v1/dgii/reportes/artefactos/?tipo=606')
+        self.assertEqual([a['formato'] for a in response.data], ['txt'])
+
+    def test_artefacto_de_otra_empresa(self):
+        """Test: No se descargan archivos de otra empresa"""
+        otra = Empresa.objects.create(nombre='Otra', rnc='987654321')
+        usuario = User.objects.create_user(username='otro', password='user123', empresa=otra, rol='admin')
+        self.client.force_authenticate(user=usuario)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sin_permiso_del_reporte(self):
+        """Test: Se requiere el permiso del tipo de reporte"""
+        cajero = User.objects.create_user(
+            username='cajero', password='user123', empresa=self.empresa, rol='cajero'
+        )
+        self.client.force_authenticate(user=cajero)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/api/v1/dgii/reportes/artefactos/?tipo=606')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_listar_artefactos(self):
+        """Test: Lista los archivos del tipo y período"""
+        response = self.client.get('/api/v1/dgii/reportes/artefactos/?tipo=606&anio=2020&mes=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({a['formato'] for a in response.data}, {'txt', 'json'})
+
+        response = self.client.get('/api/v1/dgii/reportes/artefactos/?tipo=999')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PadronRNCAPITest(APITestCase):
+    """Tests para la consulta del padrón de contribuyentes"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import ContribuyenteDGII
+
+        cache.clear()
+        self.empresa = Empresa.objects.create(nombre='Empresa Principal', rnc='123456789')
+        self.user = User.objects.create_user(
+            username='cajero', password='user123', empresa=self.empresa, rol='cajero'
+        )
+        ContribuyenteDGII.objects.create(
+            rnc='101000001', nombre='EMPRESA EJEMPLO SRL', estado='ACTIVO',
+            regimen_pago='NORMAL', huella=0
+        )
+        self.client = APIClient()
+
+    def test_consultar_rnc(self):
+        """Test: Retorna nombre y estado; acepta el RNC con guiones"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/v1/dgii/padron/1-01-00000-1/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['nombre'], 'EMPRESA EJEMPLO SRL')
+        self.assertTrue(response.data['activo'])
+
+        response = self.client.get('/api/v1/dgii/padron/999999999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requiere_autenticacion(self):
+        """Test: La consulta requiere usuario autenticado"""
+        response = self.client.get('/api/v1/dgii/padron/101000001/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -6,17 +6,43 @@ Estos tests verifican la generación correcta de los reportes fiscales:
 - 607: Ventas de bienes y servicios
 - 608: Comprobantes fiscales anulados
 """
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 from decimal import Decimal
-from datetime import date
-
-from .services import GeneradorReportesDGII, _get_tipo_identificacion
+from datetime import date, datetime, timedelta
+
+from .constants import ESTADO_BLOQUE_ABIERTO, ESTADO_BLOQUE_CERRADO, TIPO_ANULACION_ERROR_SECUENCIA
+from .models import (
+    ArtefactoReporteDGII, BloqueNCF, ContribuyenteDGII, ReporteDGIIGenerado, SecuenciaNCF, TipoComprobante
+)
+from .validacion import ValidacionReportesService
+from .services import (
+    ArtefactosReporteService, AsignadorNCF, GeneradorReportesDGII, LoteReportesService,
+    PadronRNCService, ReportesGuardadosService, _get_tipo_identificacion
+)
 from empresas.models import Empresa
 from proveedores.models import Proveedor
 from clientes.models import Cliente
 from productos.models import Producto
 from compras.models import Compra, DetalleCompra
-from ventas.models import Factura
+from ventas.models import Factura, PagoCaja
 from usuarios.models import User
 
 
@@ -293,6 +319,88 @@ class Generar607Test(GeneradorReportesDGIITest):
         self.assertEqual(registro['venta_credito'], '3000.00')
         self.assertEqual(registro['efectivo'], '0')
 
+    def test_generar_607_y_608_fecha_local(self):
+        """Test: Una factura de las 22:30 del último día del mes sale con esa fecha local"""
+        noche = timezone.make_aware(datetime(2025, 1, 31, 22, 30))
+        factura = self._crear_factura(ncf='B0100000001')
+        cancelada = self._crear_factura(ncf='B0100000002')
+        Factura.objects.filter(pk__in=[factura.pk, cancelada.pk]).update(fecha=noche)
+        Factura.objects.filter(pk=cancelada.pk).update(estado='CANCELADA')
+
+        registros_607 = GeneradorReportesDGII.generar_607(self.empresa, 2025, 1)['registros']
+        registros_608 = GeneradorReportesDGII.generar_608(self.empresa, 2025, 1)['registros']
+
+        self.assertEqual([r['fecha_comprobante'] for r in registros_607], ['20250131'])
+        self.assertEqual([r['fecha_comprobante'] for r in registros_608], ['20250131'])
+
+    def _pagar(self, factura, monto, metodo_pago):
+        pago = PagoCaja.objects.create(
+            empresa=self.empresa, cliente=self.cliente, monto=Decimal(monto),
+            metodo_pago=metodo_pago, usuario=self.user
+        )
+        pago.facturas.add(factura)
+        return pago
+
+    def test_generar_607_formas_de_pago(self):
+        """Test: El desglose sale de PagoCaja; lo no pagado va a efectivo o crédito"""
+        contado = self._crear_factura(ncf='B0100000001')
+        self._pagar(contado, '1000.00', 'TARJETA')
+        self._pagar(contado, '300.00', 'TRANSFERENCIA')
+        self._pagar(contado, '200.00', 'CHEQUE')
+        self._pagar(contado, '500.00', 'EFECTIVO')
+        credito = self._crear_factura(ncf='B0100000002')
+        Factura.objects.filter(pk=credito.pk).update(tipo_venta='CREDITO', estado='PAGADA_PARCIAL')
+        self._pagar(credito, '1000.00', 'EFECTIVO')
+        # Un pago posterior al período no cambia el reporte del período
+        posterior = self._pagar(credito, '500.00', 'TARJETA')
+        PagoCaja.objects.filter(pk=posterior.pk).update(fecha_pago=timezone.now() + timedelta(days=40))
+        hoy = date.today()
+
+        with self.assertNumQueries(1):
+            registros = list(GeneradorReportesDGII.iterar_registros('607', self.empresa, hoy.year, hoy.month))
+
+        formas = [
+            {campo: registro[campo] for campo in GeneradorReportesDGII.CAMPOS_FORMAS_PAGO_607}
+            for registro in registros
+        ]
+        self.assertEqual(formas, [
+            {
+                'efectivo': '1500.00', 'cheque_transferencia_deposito': '500.00',
+                'tarjeta_debito_credito': '1000.00', 'venta_credito': '0',
+                'bonos_certificados_regalo': '0', 'permuta': '0', 'otras_formas_venta': '0',
+            },
+            {
+                'efectivo': '1000.00', 'cheque_transferencia_deposito': '0',
+                'tarjeta_debito_credito': '0', 'venta_credito': '2000.00',
+                'bonos_certificados_regalo': '0', 'permuta': '0', 'otras_formas_venta': '0',
+            },
+        ])
+
+        resumen = GeneradorReportesDGII.resumen('607', self.empresa, hoy.year, hoy.month)
+        totales = GeneradorReportesDGII.calcular_totales('607', registros)
+        self.assertEqual(resumen['totales'], totales)
+        self.assertEqual(resumen['totales']['efectivo'], '2500.00')
+
+    def test_generar_607_pago_que_cubre_varias_facturas(self):
+        """Test: Un pago de varias facturas se reparte entre ellas y no supera su total"""
+        primera = self._crear_factura(ncf='B0100000001')
+        segunda = self._crear_factura(ncf='B0100000002')
+        Factura.objects.filter(pk=segunda.pk).update(total=Decimal('1000.00'))
+        pago = self._pagar(primera, '2000.00', 'TARJETA')
+        pago.facturas.add(segunda)
+        # Un pago mayor que la factura no reporta más que su total
+        self._pagar(segunda, '5000.00', 'CHEQUE')
+        hoy = date.today()
+
+        registros = list(GeneradorReportesDGII.iterar_registros('607', self.empresa, hoy.year, hoy.month))
+
+        self.assertEqual(
+            [(r['tarjeta_debito_credito'], r['cheque_transferencia_deposito'], r['efectivo']) for r in registros],
+            [('1500.00', '0', '1500.00'), ('500.00', '1000.00', '0')]
+        )
+        resumen = GeneradorReportesDGII.resumen('607', self.empresa, hoy.year, hoy.month)
+        self.assertEqual(resumen['totales']['tarjeta_debito_credito'], '2000.00')
+
     def test_generar_607_excluye_sin_comprobante(self):
         """Test: Excluye ventas sin comprobante fiscal"""
         factura = self._crear_factura()
@@ -475,3 +583,910 @@ class GenerarTXTTest(GeneradorReportesDGIITest):
 
         # 2 facturas con 540 de ITBIS c/u = 1080
         self.assertEqual(Decimal(totales['itbis_facturado']), Decimal('1080.00'))
+
+
+class ExportacionTXTTest(GeneradorReportesDGIITest):
+    """Tests para la exportación TXT en streaming"""
+
+    def test_exportacion_igual_a_contenido_txt(self):
+        """Test: El TXT en streaming coincide con el generado en memoria"""
+        for i in range(5):
+            self._crear_compra(ncf=f'B01{i:08d}')
+            self._crear_factura(ncf=f'B02{i:08d}')
+        self._crear_factura(estado='CANCELADA', ncf='B0299999999')
+        hoy = date.today()
+
+        for tipo in ('606', '607', '608'):
+            with self.subTest(tipo=tipo):
+                resultado = getattr(GeneradorReportesDGII, f'generar_{tipo}')(self.empresa, hoy.year, hoy.month)
+                exportacion = GeneradorReportesDGII.exportar_txt(
+                    tipo, self.empresa, hoy.year, hoy.month, chunk_size=2
+                )
+
+                self.assertEqual(''.join(exportacion), resultado['contenido_txt'])
+                self.assertEqual(exportacion.cantidad_registros, resultado['cantidad_registros'])
+                self.assertEqual(exportacion.totales, resultado.get('totales', {}))
+                self.assertEqual(exportacion.nombre_archivo, resultado['nombre_archivo'])
+
+    def test_exportacion_totales_en_la_misma_pasada(self):
+        """Test: Los totales se acumulan mientras se itera, sin consultas adicionales"""
+        self._crear_compra(ncf='B0100000001')
+        self._crear_compra(ncf='B0100000002')
+        hoy = date.today()
+
+        with self.assertNumQueries(0):
+            exportacion = GeneradorReportesDGII.exportar_txt('606', self.empresa, hoy.year, hoy.month)
+        with self.assertNumQueries(1):
+            lineas = list(exportacion)
+
+        self.assertEqual(len(lineas), 2)
+        self.assertEqual(Decimal(exportacion.totales['monto_facturado']), Decimal('10000.00'))
+        self.assertEqual(Decimal(exportacion.totales['itbis_facturado']), Decimal('1800.00'))
+
+    def test_exportacion_periodo_vacio(self):
+        """Test: Período sin registros produce un archivo vacío con totales en cero"""
+        exportacion = GeneradorReportesDGII.exportar_txt('607', self.empresa, 2020, 1)
+
+        self.assertEqual(list(exportacion), [])
+        self.assertEqual(exportacion.cantidad_registros, 0)
+        self.assertEqual(
+            exportacion.totales,
+            {campo: '0' for campo in GeneradorReportesDGII.CAMPOS_TOTALES['607']}
+        )
+
+
+class ResumenReporteTest(GeneradorReportesDGIITest):
+    """Tests para la cantidad y totales calculados en la base de datos"""
+
+    def _exportar(self, tipo):
+        hoy = date.today()
+        exportacion = GeneradorReportesDGII.exportar_txt(tipo, self.empresa, hoy.year, hoy.month)
+        for _ in exportacion:
+            pass
+        return exportacion
+
+    def test_resumen_606_coincide_con_exportacion(self):
+        """Test: 606 con un solo aggregate y los mismos valores que el archivo"""
+        self._crear_compra(ncf='B0100000001')
+        self._crear_compra(ncf='B0100000002')
+        self._crear_compra(estado='ANULADA', ncf='B0100000003')
+        hoy = date.today()
+
+        with self.assertNumQueries(1):
+            resumen = GeneradorReportesDGII.resumen('606', self.empresa, hoy.year, hoy.month)
+
+        exportacion = self._exportar('606')
+        self.assertEqual(resumen['cantidad_registros'], exportacion.cantidad_registros)
+        self.assertEqual(resumen['totales'], exportacion.totales)
+        self.assertEqual(resumen['totales']['monto_facturado'], '10000.00')
+
+    def test_resumen_607_incluye_formas_de_pago(self):
+        """Test: 607 separa contado y crédito en el mismo aggregate"""
+        self._crear_factura(ncf='B0100000001')
+        credito = self._crear_factura(ncf='B0100000002')
+        Factura.objects.filter(pk=credito.pk).update(tipo_venta='CREDITO', estado='PENDIENTE_PAGO')
+        hoy = date.today()
+
+        with self.assertNumQueries(1):
+            resumen = GeneradorReportesDGII.resumen('607', self.empresa, hoy.year, hoy.month)
+
+        exportacion = self._exportar('607')
+        self.assertEqual(resumen['totales'], exportacion.totales)
+        self.assertEqual(resumen['totales']['efectivo'], '3000.00')
+        self.assertEqual(resumen['totales']['venta_credito'], '3000.00')
+        self.assertEqual(resumen['totales']['permuta'], '0')
+
+    def test_resumen_608_cuenta_anulados(self):
+        """Test: 608 solo retorna la cantidad de comprobantes anulados"""
+        self._crear_factura(estado='CANCELADA', ncf='B0100000001')
+        hoy = date.today()
+
+        resumen = GeneradorReportesDGII.resumen('608', self.empresa, hoy.year, hoy.month)
+
+        self.assertEqual(resumen, {'cantidad_registros': 1})
+
+    def test_resumen_periodo_vacio(self):
+        """Test: Sin registros los totales quedan en cero como en el archivo"""
+        resumen = GeneradorReportesDGII.resumen('606', self.empresa, 2020, 1)
+        self.assertEqual(resumen, {
+            'cantidad_registros': 0,
+            'totales': {'monto_facturado': '0', 'itbis_facturado': '0'},
+        })
+
+
+class ReportesGuardadosTest(GeneradorReportesDGIITest):
+    """Tests para los reportes guardados de períodos cerrados"""
+
+    def _crear_compra_en(self, fecha, ncf='B0100000001'):
+        compra = self._crear_compra(ncf=ncf)
+        Compra.objects.filter(pk=compra.pk).update(fecha_compra=fecha)
+        compra.refresh_from_db()
+        return compra
+
+    def _crear_factura_en(self, fecha, estado='PAGADA', ncf='B0100000001'):
+        factura = self._crear_factura(estado=estado, ncf=ncf)
+        Factura.objects.filter(pk=factura.pk).update(
+            fecha=timezone.make_aware(datetime(fecha.year, fecha.month, fecha.day, 10))
+        )
+        factura.refresh_from_db()
+        return factura
+
+    def test_periodo_abierto_no_se_guarda(self):
+        """Test: El mes en curso se genera en vivo"""
+        self._crear_compra()
+        hoy = timezone.localdate()
+
+        self.assertIsNone(ReportesGuardadosService.obtener('606', self.empresa, hoy.year, hoy.month))
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+
+    def test_periodo_cerrado_se_guarda_y_reutiliza(self):
+        """Test: El segundo pedido de un período cerrado lee una sola fila"""
+        self._crear_compra_en(date(2024, 12, 5), ncf='B0100000001')
+        self._crear_compra_en(date(2024, 12, 20), ncf='B0100000002')
+        esperado = GeneradorReportesDGII.generar_606(self.empresa, 2024, 12)
+
+        reporte = ReportesGuardadosService.obtener('606', self.empresa, 2024, 12)
+        self.assertEqual(reporte.texto(), esperado['contenido_txt'])
+        self.assertEqual(reporte.hash_contenido, esperado['hash_contenido'])
+        self.assertEqual(reporte.totales, esperado['totales'])
+        self.assertEqual(reporte.cantidad_registros, 2)
+        self.assertLess(len(bytes(reporte.contenido)), len(esperado['contenido_txt']))
+
+        with self.assertNumQueries(1):
+            resultado = ReportesGuardadosService.generar('606', self.empresa, 2024, 12)
+        self.assertEqual(resultado, esperado)
+
+    def test_modificar_compra_invalida_su_periodo(self):
+        """Test: Cambiar una compra elimina el reporte de su período"""
+        compra = self._crear_compra_en(date(2024, 12, 5))
+        ReportesGuardadosService.obtener('606', self.empresa, 2024, 12)
+        ReportesGuardadosService.obtener('606', self.empresa, 2024, 11)
+
+        compra.total = Decimal('7000.00')
+        compra.save()
+
+        self.assertEqual(
+            list(ReporteDGIIGenerado.objects.values_list('anio', 'mes')),
+            [(2024, 11)]
+        )
+        reporte = ReportesGuardadosService.obtener('606', self.empresa, 2024, 12)
+        self.assertEqual(reporte.totales['monto_facturado'], '7000.00')
+
+    def test_mover_compra_invalida_ambos_periodos(self):
+        """Test: Cambiar la fecha invalida el período anterior y el nuevo"""
+        compra = self._crear_compra_en(date(2024, 12, 5))
+        ReportesGuardadosService.obtener('606', self.empresa, 2024, 12)
+        ReportesGuardadosService.obtener('606', self.empresa, 2024, 11)
+
+        compra.fecha_compra = date(2024, 11, 30)
+        compra.save()
+
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+
+    def test_cambiar_identificacion_de_tercero_invalida_sus_periodos(self):
+        """Test: Cambiar el RNC de un cliente o proveedor invalida los períodos de sus documentos"""
+        self._crear_factura_en(date(2024, 12, 5))
+        self._crear_compra_en(date(2024, 11, 5))
+        for tipo, mes in (('607', 12), ('606', 11), ('606', 10)):
+            ReportesGuardadosService.obtener(tipo, self.empresa, 2024, mes)
+
+        self.cliente.nombre = 'Cliente Renombrado'
+        self.cliente.save()
+        self.assertEqual(ReporteDGIIGenerado.objects.count(), 3)
+
+        self.cliente.numero_identificacion = '444555777'
+        self.cliente.save()
+        self.proveedor.numero_identificacion = '111222444'
+        self.proveedor.save()
+
+        self.assertEqual(
+            list(ReporteDGIIGenerado.objects.values_list('tipo', 'anio', 'mes')),
+            [('606', 2024, 10)]
+        )
+
+    def test_cancelar_factura_invalida_607_y_608(self):
+        """Test: Cancelar una factura invalida los reportes de ventas del período"""
+        factura = self._crear_factura_en(date(2024, 12, 5))
+        for tipo in ('607', '608'):
+            ReportesGuardadosService.obtener(tipo, self.empresa, 2024, 12)
+
+        factura.estado = 'CANCELADA'
+        factura.save(update_fields=['estado'])
+
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+        self.assertEqual(ReportesGuardadosService.obtener('608', self.empresa, 2024, 12).cantidad_registros, 1)
+        self.assertEqual(ReportesGuardadosService.obtener('607', self.empresa, 2024, 12).cantidad_registros, 0)
+
+    def test_cambio_sin_campos_del_reporte_no_invalida(self):
+        """Test: Guardar campos que no aparecen en el reporte conserva el guardado"""
+        compra = self._crear_compra_en(date(2024, 12, 5))
+        ReportesGuardadosService.obtener('606', self.empresa, 2024, 12)
+
+        compra.monto_pagado = Decimal('1000.00')
+        compra.save(update_fields=['monto_pagado'])
+
+        self.assertTrue(ReporteDGIIGenerado.objects.exists())
+
+    def test_eliminar_factura_invalida_periodo(self):
+        """Test: Eliminar una factura invalida los reportes de su período"""
+        factura = self._crear_factura_en(date(2024, 12, 5))
+        ReportesGuardadosService.obtener('607', self.empresa, 2024, 12)
+
+        factura.delete()
+
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+
+    def test_pago_de_factura_invalida_periodo(self):
+        """Test: Agregar, modificar o eliminar un pago invalida el 607 de la factura"""
+        factura = self._crear_factura_en(date(2024, 12, 5))
+        ReportesGuardadosService.obtener('607', self.empresa, 2024, 12)
+
+        pago = PagoCaja.objects.create(
+            empresa=self.empresa, cliente=self.cliente, monto=Decimal('100.00'),
+            metodo_pago='TARJETA', usuario=self.user
+        )
+        self.assertTrue(ReporteDGIIGenerado.objects.exists())
+        pago.facturas.add(factura)
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+
+        ReportesGuardadosService.obtener('607', self.empresa, 2024, 12)
+        pago.metodo_pago = 'EFECTIVO'
+        pago.save()
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+
+        ReportesGuardadosService.obtener('607', self.empresa, 2024, 12)
+        pago.delete()
+        self.assertFalse(ReporteDGIIGenerado.objects.exists())
+
+
+class ArtefactosReporteTest(GeneradorReportesDGIITest):
+    """Tests para los archivos que generan las tareas asíncronas"""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+    def _leer(self, resultado, formato):
+        artefacto = ArtefactoReporteDGII.objects.get(uuid=resultado['artefactos'][formato]['id'])
+        with artefacto.archivo.open('rb') as archivo:
+            return gzip.decompress(archivo.read()).decode('utf-8')
+
+    def test_genera_txt_y_json_comprimidos(self):
+        """Test: TXT y JSON coinciden con el reporte en memoria y el resultado solo trae metadatos"""
+        self._crear_compra(ncf='B0100000001')
+        self._crear_compra(ncf='B0100000002')
+        hoy = date.today()
+        esperado = GeneradorReportesDGII.generar_606(self.empresa, hoy.year, hoy.month)
+
+        resultado = ArtefactosReporteService.generar('606', self.empresa, hoy.year, hoy.month)
+
+        self.assertNotIn('registros', resultado)
+        self.assertNotIn('contenido_txt', resultado)
+        self.assertEqual(resultado['cantidad_registros'], 2)
+        self.assertEqual(resultado['totales'], esperado['totales'])
+        self.assertEqual(resultado['hash_contenido'], esperado['hash_contenido'])
+
+        self.assertEqual(self._leer(resultado, 'txt'), esperado['contenido_txt'])
+        contenido = json.loads(self._leer(resultado, 'json'))
+        self.assertEqual(contenido['registros'], esperado['registros'])
+        self.assertEqual(contenido['totales'], esperado['totales'])
+        self.assertEqual(contenido['cantidad_registros'], 2)
+
+        for metadatos in resultado['artefactos'].values():
+            artefacto = ArtefactoReporteDGII.objects.get(uuid=metadatos['id'])
+            self.assertEqual(artefacto.archivo.size, metadatos['tamano'])
+            self.assertTrue(metadatos['ruta'].startswith(f'dgii/reportes/{self.empresa.id}/'))
+
+    def test_periodo_sin_registros(self):
+        """Test: Un período vacío deja un TXT vacío y un JSON válido"""
+        resultado = ArtefactosReporteService.generar('608', self.empresa, 2020, 1)
+
+        self.assertEqual(resultado['cantidad_registros'], 0)
+        self.assertNotIn('totales', resultado)
+        self.assertEqual(self._leer(resultado, 'txt'), '')
+        self.assertEqual(json.loads(self._leer(resultado, 'json'))['registros'], [])
+
+    def test_periodo_cerrado_usa_reporte_guardado(self):
+        """Test: Un período cerrado se escribe desde ReporteDGIIGenerado"""
+        compra = self._crear_compra()
+        Compra.objects.filter(pk=compra.pk).update(fecha_compra=date(2024, 12, 5))
+        reporte = ReportesGuardadosService.obtener('606', self.empresa, 2024, 12)
+
+        resultado = ArtefactosReporteService.generar('606', self.empresa, 2024, 12)
+
+        self.assertEqual(self._leer(resultado, 'txt'), reporte.texto())
+        self.assertEqual(resultado['hash_contenido'], reporte.hash_contenido)
+        self.assertEqual(
+            json.loads(self._leer(resultado, 'json'))['registros'],
+            reporte.registros(GeneradorReportesDGII.CAMPOS_606)
+        )
+
+    def test_eliminar_artefacto_elimina_archivo(self):
+        """Test: Al eliminar el artefacto se borra su archivo del storage"""
+        resultado = ArtefactosReporteService.generar('606', self.empresa, 2020, 1)
+        artefacto = ArtefactoReporteDGII.objects.get(uuid=resultado['artefactos']['txt']['id'])
+        storage, ruta = artefacto.archivo.storage, artefacto.archivo.name
+        self.assertTrue(storage.exists(ruta))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            artefacto.delete()
+
+        self.assertFalse(storage.exists(ruta))
+
+
+    def test_depurar_elimina_versiones_reemplazadas(self):
+        """Test: Se conservan la versión vigente y las reemplazadas dentro del plazo"""
+        viejo = ArtefactosReporteService.generar('606', self.empresa, 2020, 1)['artefactos']
+        ArtefactoReporteDGII.objects.update(fecha_creacion=timezone.now() - timedelta(days=30))
+        reemplazo = ArtefactosReporteService.generar('606', self.empresa, 2020, 1)['artefactos']
+        ArtefactoReporteDGII.objects.filter(uuid__in=[m['id'] for m in reemplazo.values()]).update(
+            fecha_creacion=timezone.now() - timedelta(days=10)
+        )
+        vigente = ArtefactosReporteService.generar('606', self.empresa, 2020, 1)['artefactos']
+        storage = ArtefactoReporteDGII.objects.first().archivo.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            eliminados = ArtefactosReporteService.depurar(dias=7)
+
+        self.assertEqual(eliminados, 2)
+        self.assertEqual(
+            set(ArtefactoReporteDGII.objects.values_list('uuid', flat=True)),
+            {uuid.UUID(m['id']) for m in [*reemplazo.values(), *vigente.values()]}
+        )
+        self.assertFalse(any(storage.exists(m['ruta']) for m in viejo.values()))
+
+    def test_hash_archivo_es_el_del_gzip(self):
+        """Test: hash_archivo corresponde a los bytes comprimidos guardados"""
+        metadatos = ArtefactosReporteService.generar('606', self.empresa, 2020, 1)['artefactos']['txt']
+        artefacto = ArtefactoReporteDGII.objects.get(uuid=metadatos['id'])
+
+        with artefacto.archivo.open('rb') as archivo:
+            self.assertEqual(metadatos['hash_archivo'], hashlib.sha256(archivo.read()).hexdigest())
+
+
+class ValidacionReportesTest(GeneradorReportesDGIITest):
+    """Tests para la validación previa al envío (606/607)"""
+
+    RNC_VALIDO = '123456786'
+    CEDULA_VALIDA = '00100000009'
+
+    def setUp(self):
+        super().setUp()
+        Proveedor.objects.filter(pk=self.proveedor.pk).update(numero_identificacion=self.RNC_VALIDO)
+        Cliente.objects.filter(pk=self.cliente.pk).update(numero_identificacion=self.CEDULA_VALIDA)
+        hoy = date.today()
+        self.anio, self.mes = hoy.year, hoy.month
+
+    def _validar(self, tipo):
+        return ValidacionReportesService.validar(tipo, self.empresa, self.anio, self.mes)
+
+    def test_reporte_valido(self):
+        """Test: Registros correctos no producen errores"""
+        self._crear_compra(ncf='B0100000001')
+        self._crear_factura(ncf='B0100000001')
+
+        for tipo in ('606', '607'):
+            resultado = self._validar(tipo)
+            self.assertTrue(resultado['valido'], resultado['errores'])
+            self.assertEqual(resultado['cantidad_registros'], 1)
+
+    def test_identificacion(self):
+        """Test: Se valida longitud y dígito verificador de RNC y cédula"""
+        for numero in ('123456789', '00100000001', '12345', ''):
+            Proveedor.objects.filter(pk=self.proveedor.pk).update(numero_identificacion=numero)
+            Compra.objects.all().delete()
+            self._crear_compra()
+
+            resultado = self._validar('606')
+
+            esperado = {
+                '123456789': 'rnc_digito_verificador',
+                '00100000001': 'cedula_digito_verificador',
+                '12345': 'identificacion_formato',
+                '': 'identificacion_formato',
+            }[numero]
+            self.assertEqual(resultado['resumen'], {esperado: 1}, numero)
+
+    def test_identificacion_opcional_en_consumo(self):
+        """Test: El 607 de consumidor final no exige RNC/cédula"""
+        Cliente.objects.filter(pk=self.cliente.pk).update(numero_identificacion='')
+        self._crear_factura(ncf='B0200000001')
+        self.assertTrue(self._validar('607')['valido'])
+
+        self._crear_factura(ncf='B0100000002')
+        self.assertEqual(self._validar('607')['resumen'], {'identificacion_formato': 1})
+
+    def test_ncf_formato_y_duplicados(self):
+        """Test: NCF mal formados y repetidos en el período"""
+        self._crear_compra(ncf='B0100000001')
+        self._crear_compra(ncf='B0100000001')
+        self._crear_compra(ncf='X01')
+
+        resultado = self._validar('606')
+
+        self.assertEqual(resultado['resumen'], {'ncf_duplicado': 2, 'ncf_formato': 1})
+        self.assertEqual(
+            [(error['linea'], error['regla']) for error in resultado['errores']],
+            [(1, 'ncf_duplicado'), (2, 'ncf_duplicado'), (3, 'ncf_formato')]
+        )
+        self.assertEqual(resultado['errores'][2]['valor'], 'X01')
+
+    def test_ncf_repetido_de_otro_proveedor(self):
+        """Test: En el 606 el mismo NCF de proveedores distintos no es duplicado"""
+        self._crear_compra(ncf='B0100000001')
+        compra = self._crear_compra(ncf='B0100000001')
+        otro = Proveedor.objects.create(
+            empresa=self.empresa, nombre='Otro Proveedor', numero_identificacion=self.CEDULA_VALIDA
+        )
+        Compra.objects.filter(pk=compra.pk).update(proveedor=otro)
+
+        self.assertTrue(self._validar('606')['valido'])
+
+    def test_itbis_excede_tasa(self):
+        """Test: ITBIS mayor al 18% del monto facturado"""
+        factura = self._crear_factura()
+        Factura.objects.filter(pk=factura.pk).update(itbis=Decimal('540.02'))
+
+        resultado = self._validar('607')
+
+        self.assertEqual(resultado['resumen'], {'itbis_excede_tasa': 1})
+        self.assertEqual(resultado['errores'][0]['mensaje'], 'El ITBIS excede el 18% del monto facturado')
+
+    def test_fecha_fuera_del_periodo(self):
+        """Test: Reglas sobre un TXT con fechas de otro mes"""
+        datos = ValidacionReportesService.cargar('606', self.empresa, 2020, 1)
+        self.assertTrue(datos.empty)
+
+        datos.loc[0] = [self.RNC_VALIDO, 'B0100000001', '', '20200201', '100.00', '18.00']
+        datos.loc[1] = [self.RNC_VALIDO, 'B0100000002', '', '20200131', '100.00', '18.00']
+        errores = ValidacionReportesService.errores(datos, '606', 2020, 1)
+
+        self.assertEqual(errores[['linea', 'regla']].values.tolist(), [[1, 'fecha_fuera_periodo']])
+
+    def test_factura_nocturna_del_ultimo_dia_esta_en_el_periodo(self):
+        """Test: Una factura de las 22:30 del último día del mes no queda fuera del período"""
+        factura = self._crear_factura(ncf='B0100000001')
+        Factura.objects.filter(pk=factura.pk).update(fecha=timezone.make_aware(datetime(2025, 1, 31, 22, 30)))
+
+        resultado = ValidacionReportesService.validar('607', self.empresa, 2025, 1)
+
+        self.assertEqual(resultado['cantidad_registros'], 1)
+        self.assertTrue(resultado['valido'], resultado['errores'])
+
+    def test_limite_de_errores(self):
+        """Test: El detalle se trunca pero el resumen cuenta todos"""
+        for _ in range(3):
+            self._crear_compra(ncf='X')
+
+        resultado = ValidacionReportesService.validar('606', self.empresa, self.anio, self.mes, limite=2)
+
+        self.assertEqual(resultado['cantidad_errores'], 3)
+        self.assertEqual(len(resultado['errores']), 2)
+        self.assertTrue(resultado['errores_truncados'])
+
+
+class LoteReportesTest(GeneradorReportesDGIITest):
+    """Tests para la generación en lote (comando generar_reportes_dgii)"""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.otra_empresa = Empresa.objects.create(nombre='Otra Empresa DGII', rnc='987654321')
+        Empresa.objects.create(nombre='Empresa Inactiva', rnc='555555555', activo=False)
+
+    def _ejecutar(self, *argumentos):
+        salida = StringIO()
+        call_command(
+            'generar_reportes_dgii', '--desde', '2024-11', '--hasta', '2024-12',
+            '--procesos', '1', *argumentos, stdout=salida
+        )
+        return salida.getvalue()
+
+    def test_periodos(self):
+        """Test: Los períodos cruzan el cambio de año"""
+        self.assertEqual(
+            LoteReportesService.periodos((2024, 11), (2025, 2)),
+            [(2024, 11), (2024, 12), (2025, 1), (2025, 2)]
+        )
+
+    def test_genera_artefactos_de_empresas_activas(self):
+        """Test: Cada empresa activa, tipo y período deja su TXT y JSON"""
+        compra = self._crear_compra()
+        Compra.objects.filter(pk=compra.pk).update(fecha_compra=date(2024, 12, 5))
+
+        salida = self._ejecutar()
+
+        self.assertIn('[12/12]', salida)
+        self.assertEqual(ArtefactoReporteDGII.objects.count(), 24)
+        self.assertEqual(
+            set(ArtefactoReporteDGII.objects.values_list('empresa_id', flat=True)),
+            {self.empresa.id, self.otra_empresa.id}
+        )
+        artefacto = ArtefactoReporteDGII.objects.get(
+            empresa=self.empresa, tipo='606', anio=2024, mes=12, formato='txt'
+        )
+        self.assertEqual(artefacto.cantidad_registros, 1)
+
+    def test_reanuda_solo_unidades_pendientes(self):
+        """Test: Una segunda corrida omite lo generado y rehace lo que cambió"""
+        self._ejecutar()
+        self.assertIn('ya generadas: 12 | pendientes: 0', self._ejecutar())
+
+        # Una compra nueva invalida los reportes guardados de su período
+        compra = self._crear_compra()
+        Compra.objects.filter(pk=compra.pk).update(fecha_compra=date(2024, 12, 5))
+        ReportesGuardadosService.invalidar(self.empresa.id, [(2024, 12)])
+
+        salida = self._ejecutar()
+
+        self.assertIn('ya generadas: 9 | pendientes: 3', salida)
+        self.assertIn(f'empresa {self.empresa.id} 606 2024-12: 1 registros', salida)
+
+    def test_reporta_fallas_por_empresa(self):
+        """Test: Una unidad fallida no detiene el lote y queda pendiente"""
+        generar = ArtefactosReporteService.generar
+
+        def fallar_otra_empresa(tipo, empresa, anio, mes):
+            if empresa.id == self.otra_empresa.id and tipo == '607':
+                raise RuntimeError('sin conexión')
+            return generar(tipo, empresa, anio, mes)
+
+        salida = StringIO()
+        with mock.patch.object(ArtefactosReporteService, 'generar', side_effect=fallar_otra_empresa):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'generar_reportes_dgii', '--desde', '2024-11', '--hasta', '2024-12',
+                    '--procesos', '1', stdout=salida
+                )
+
+        self.assertIn('ERROR: sin conexión', salida.getvalue())
+        self.assertIn(f'Empresa {self.empresa.id}: 6 generadas, 0 con error', salida.getvalue())
+        self.assertIn(f'Empresa {self.otra_empresa.id}: 4 generadas, 2 con error', salida.getvalue())
+        self.assertIn('pendientes: 2', self._ejecutar())
+
+
+class PadronRNCTest(TestCase):
+    """Tests para la importación y consulta del padrón de RNC"""
+
+    LINEAS = [
+        '101000001|EMPRESA UNO SRL|UNO|VENTA AL POR MAYOR| | | | |01/02/2005|ACTIVO|NORMAL',
+        '00100000009|JUAN PEREZ| |SERVICIOS| | | | |15/06/2010|ACTIVO|NORMAL',
+        '101000002|EMPRESA DOS SA| |CONSTRUCCION| | | | |no-fecha|SUSPENDIDO|NORMAL',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def _importar(self, lineas, *argumentos, nombre='DGII_RNC.TXT'):
+        ruta = os.path.join(self.directorio, nombre)
+        with open(ruta, 'w', encoding='latin-1') as archivo:
+            archivo.write('\r\n'.join(lineas) + '\r\n')
+        salida = StringIO()
+        call_command('importar_padron_rnc', ruta, *argumentos, stdout=salida)
+        return salida.getvalue()
+
+    def test_importar_y_consultar(self):
+        """Test: Carga el archivo, ignora líneas inválidas y consulta por RNC"""
+        salida = self._importar(self.LINEAS + ['ENCABEZADO|INVALIDO', 'ABC123|X| | | | | | | |ACTIVO|'])
+
+        self.assertIn('3 nuevos', salida)
+        self.assertIn('2 ignoradas', salida)
+        contribuyente = PadronRNCService.consultar('1-01-00000-1')
+        self.assertEqual(contribuyente['nombre'], 'EMPRESA UNO SRL')
+        self.assertEqual(contribuyente['fecha_inicio'], date(2005, 2, 1))
+        self.assertTrue(contribuyente['activo'])
+        self.assertFalse(PadronRNCService.consultar('101000002')['activo'])
+        self.assertIsNone(PadronRNCService.consultar('101000002')['fecha_inicio'])
+        self.assertIsNone(PadronRNCService.consultar('999999999'))
+        self.assertEqual(
+            set(PadronRNCService.consultar_varios(['001-0000000-9', '101000001', '555'])),
+            {'00100000009', '101000001'}
+        )
+
+    def test_reimportacion_incremental(self):
+        """Test: Reimportar solo escribe las filas nuevas, modificadas o eliminadas"""
+        self._importar(self.LINEAS)
+        ContribuyenteDGII.objects.filter(pk='00100000009').update(nombre='SIN TOCAR')
+        self.assertTrue(PadronRNCService.consultar('101000001')['activo'])
+
+        lineas = [
+            self.LINEAS[0].replace('ACTIVO', 'SUSPENDIDO'),
+            self.LINEAS[1],
+            '101000003|EMPRESA TRES SRL| |COMERCIO| | | | |01/01/2020|ACTIVO|NORMAL',
+        ]
+        salida = self._importar(lineas)
+
+        self.assertIn('1 nuevos, 1 actualizados, 1 sin cambios, 1 eliminados', salida)
+        self.assertEqual(ContribuyenteDGII.objects.get(pk='101000001').estado, 'SUSPENDIDO')
+        # La importación invalida las consultas cacheadas
+        self.assertFalse(PadronRNCService.consultar('101000001')['activo'])
+        self.assertIsNone(PadronRNCService.consultar('101000002'))
+        # La fila sin cambios en el archivo no se reescribe
+        self.assertEqual(ContribuyenteDGII.objects.get(pk='00100000009').nombre, 'SIN TOCAR')
+        self.assertFalse(ContribuyenteDGII.objects.filter(pk='101000002').exists())
+
+        self._importar(lineas[:1], '--sin-eliminar')
+        self.assertEqual(ContribuyenteDGII.objects.count(), 3)
+
+    def test_importar_zip(self):
+        """Test: Acepta el .zip que publica la DGII"""
+        ruta = os.path.join(self.directorio, 'DGII_RNC.zip')
+        with zipfile.ZipFile(ruta, 'w') as comprimido:
+            comprimido.writestr('TMP/DGII_RNC.TXT', '\r\n'.join(self.LINEAS).encode('latin-1'))
+
+        call_command('importar_padron_rnc', ruta, '--lote', '2', stdout=StringIO())
+
+        self.assertEqual(ContribuyenteDGII.objects.count(), 3)
+
+
+class AsignadorNCFTest(TestCase):
+    """Tests para la entrega de NCF por bloques"""
+
+    def setUp(self):
+        AsignadorNCF._bloques.clear()
+        self.empresa = Empresa.objects.create(nombre='Empresa NCF', rnc='987654321')
+        self.tipo = TipoComprobante.objects.create(
+            empresa=self.empresa, codigo='01', nombre='Factura CF', prefijo='B'
+        )
+        self.secuencia = SecuenciaNCF.objects.create(
+            empresa=self.empresa,
+            tipo_comprobante=self.tipo,
+            descripcion='Talonario',
+            secuencia_inicial=1,
+            secuencia_final=100,
+            fecha_vencimiento=date.today() + timedelta(days=365)
+        )
+
+    def _ncf(self, titular='caja-1', tamano=10):
+        return AsignadorNCF.siguiente_ncf(self.secuencia.pk, titular=titular, tamano=tamano)[0]
+
+    def test_entrega_consecutivos_con_una_reserva(self):
+        """Test: Los NCF salen del bloque sin volver a tocar la secuencia"""
+        self.assertEqual(self._ncf(), 'B0100000001')
+        # Un UPDATE de ultimo_usado por NCF
+        with self.assertNumQueries(4):
+            ncfs = [self._ncf() for _ in range(4)]
+
+        self.assertEqual(ncfs, [f'B01{n:08d}' for n in range(2, 6)])
+        self.secuencia.refresh_from_db()
+        self.assertEqual(self.secuencia.secuencia_actual, 10)
+        bloque = BloqueNCF.objects.get()
+        self.assertEqual((bloque.numero_inicial, bloque.numero_final, bloque.ultimo_usado), (1, 10, 5))
+
+    def test_titulares_usan_bloques_distintos(self):
+        """Test: Cada caja recibe su propio rango"""
+        caja1 = [self._ncf('caja-1'), self._ncf('caja-1')]
+        caja2 = [self._ncf('caja-2')]
+        caja1.append(self._ncf('caja-1'))
+
+        self.assertEqual(caja1, ['B0100000001', 'B0100000002', 'B0100000003'])
+        self.assertEqual(caja2, ['B0100000011'])
+
+    def test_bloque_consumido_reserva_otro(self):
+        """Test: Al agotar el bloque se cierra y se reserva el siguiente"""
+        ncfs = [self._ncf(tamano=3) for _ in range(5)]
+
+        self.assertEqual(ncfs, [f'B01{n:08d}' for n in range(1, 6)])
+        estados = list(BloqueNCF.objects.order_by('numero_inicial').values_list('estado', flat=True))
+        self.assertEqual(estados, [ESTADO_BLOQUE_CERRADO, ESTADO_BLOQUE_ABIERTO])
+
+    def test_ultimo_bloque_parcial_y_secuencia_agotada(self):
+        """Test: El último bloque se recorta al final y luego la secuencia se agota"""
+        SecuenciaNCF.objects.filter(pk=self.secuencia.pk).update(secuencia_actual=98)
+
+        self.assertEqual([self._ncf(), self._ncf()], ['B0100000099', 'B0100000100'])
+        with self.assertRaises(ValidationError):
+            self._ncf()
+
+    def test_no_reserva_bloques_de_secuencia_inactiva_o_vencida(self):
+        """Test: Solo se reservan bloques de secuencias activas y vigentes"""
+        SecuenciaNCF.objects.filter(pk=self.secuencia.pk).update(activo=False)
+        with self.assertRaises(ValidationError):
+            self._ncf()
+
+        SecuenciaNCF.objects.filter(pk=self.secuencia.pk).update(
+            activo=True, fecha_vencimiento=timezone.localdate() - timedelta(days=1)
+        )
+        with self.assertRaises(ValidationError):
+            self._ncf()
+        self.assertFalse(BloqueNCF.objects.exists())
+
+    def test_cambio_externo_del_bloque_no_duplica(self):
+        """Test: Si otro proceso con el mismo titular avanza el bloque, se relee"""
+        self._ncf()
+        BloqueNCF.objects.update(ultimo_usado=5)
+
+        self.assertEqual(self._ncf(), 'B0100000006')
+
+    def test_bloque_cerrado_externamente_no_duplica(self):
+        """Test: Un bloque cerrado por el comando deja de usarse en memoria"""
+        self._ncf()
+        self._ncf('caja-2')
+        call_command('cerrar_bloques_ncf', titular='caja-1', stdout=StringIO())
+
+        self.assertEqual(self._ncf(), 'B0100000021')
+
+    def test_liberar_devuelve_sobrantes_del_ultimo_bloque(self):
+        """Test: Los números del último bloque reservado vuelven a la secuencia"""
+        self._ncf()
+        self._ncf()
+
+        resumen = AsignadorNCF.liberar('caja-1')
+
+        self.assertEqual(resumen, {'bloques': 1, 'devueltos': 8, 'anulados': 0})
+        self.secuencia.refresh_from_db()
+        self.assertEqual(self.secuencia.secuencia_actual, 2)
+        self.assertEqual(self._ncf('caja-2'), 'B0100000003')
+
+    def test_liberar_anula_sobrantes_y_los_reporta_en_608(self):
+        """Test: Los sobrantes de un bloque intermedio quedan anulados en el 608"""
+        self._ncf('caja-1')
+        self._ncf('caja-1')
+        self._ncf('caja-2')
+
+        resumen = AsignadorNCF.liberar('caja-1')
+
+        self.assertEqual(resumen, {'bloques': 1, 'devueltos': 0, 'anulados': 8})
+        hoy = timezone.localdate()
+        registros = GeneradorReportesDGII.generar_608(self.empresa, hoy.year, hoy.month)['registros']
+        self.assertEqual([r['ncf'] for r in registros], [f'B01{n:08d}' for n in range(3, 11)])
+        self.assertEqual({r['tipo_anulacion'] for r in registros}, {TIPO_ANULACION_ERROR_SECUENCIA})
+
+
+class SecuenciaNCFQuerySetTest(TestCase):
+    """Tests para la disponibilidad de secuencias calculada en SQL"""
+
+    def setUp(self):
+        AsignadorNCF._bloques.clear()
+        self.empresa = Empresa.objects.create(nombre='Empresa NCF', rnc='987654321')
+        self.tipo = TipoComprobante.objects.create(
+            empresa=self.empresa, codigo='01', nombre='Factura CF', prefijo='B'
+        )
+
+    def _secuencia(self, inicial, final, actual=0, dias=365, descripcion='Talonario'):
+        secuencia = SecuenciaNCF.objects.create(
+            empresa=self.empresa,
+            tipo_comprobante=self.tipo,
+            descripcion=descripcion,
+            secuencia_inicial=inicial,
+            secuencia_final=final,
+            fecha_vencimiento=date.today() + timedelta(days=dias)
+        )
+        if actual:
+            SecuenciaNCF.objects.filter(pk=secuencia.pk).update(secuencia_actual=actual)
+        return secuencia
+
+    def test_anotaciones_coinciden_con_propiedades(self):
+        """Test: disponibles, agotada y días para vencer calculados en SQL"""
+        self._secuencia(1, 100, actual=40, dias=10)
+        self._secuencia(101, 200, actual=200, dias=20)
+
+        for secuencia in SecuenciaNCF.objects.con_disponibilidad():
+            self.assertEqual(secuencia.disponibles_anotado, secuencia.disponibles)
+            self.assertEqual(secuencia.agotada_anotada, secuencia.agotada)
+            self.assertEqual(
+                secuencia.dias_para_vencer.days,
+                (secuencia.fecha_vencimiento - timezone.localdate()).days
+            )
+
+    def test_disponibles_excluye_agotadas_y_vencidas(self):
+        """Test: disponibles() filtra en la base de datos"""
+        disponible = self._secuencia(1, 100)
+        self._secuencia(101, 200, actual=200)
+        vencida = self._secuencia(201, 300)
+        SecuenciaNCF.objects.filter(pk=vencida.pk).update(fecha_vencimiento=date.today() - timedelta(days=1))
+
+        self.assertEqual(list(SecuenciaNCF.objects.disponibles()), [disponible])
+
+    def test_por_vencer_marca_cada_alerta(self):
+        """Test: por_vencer() filtra por vencimiento o por cantidad"""
+        vence = self._secuencia(1, 100, dias=10, descripcion='Vence')
+        pocas = self._secuencia(101, 200, actual=195, descripcion='Pocas')
+        self._secuencia(201, 300, descripcion='Sin alerta')
+
+        alertas = {s.pk: s for s in SecuenciaNCF.objects.por_vencer(30)}
+
+        self.assertEqual(set(alertas), {vence.pk, pocas.pk})
+        self.assertTrue(alertas[vence.pk].alerta_vencimiento_anotada)
+        self.assertFalse(alertas[vence.pk].alerta_cantidad_anotada)
+        self.assertTrue(alertas[pocas.pk].alerta_cantidad_anotada)
+        self.assertEqual(alertas[pocas.pk].disponibles_anotado, 5)
+
+    def test_por_tipo_usa_rango_mas_bajo(self):
+        """Test: Sin bloque abierto se usa la secuencia de rango más bajo con números"""
+        self._secuencia(201, 300)
+        self._secuencia(1, 100, actual=100)
+        baja = self._secuencia(101, 200)
+
+        secuencia, ncf, numero = AsignadorNCF.siguiente_ncf_por_tipo(self.empresa, self.tipo.id, 'caja-1', tamano=5)
+
+        self.assertEqual(secuencia.pk, baja.pk)
+        self.assertEqual(ncf, 'B0100000101')
+
+    def test_por_tipo_prefiere_bloque_abierto(self):
+        """Test: Un bloque abierto del titular se agota antes de reservar otro"""
+        alta = self._secuencia(101, 200)
+        AsignadorNCF.siguiente_ncf(alta.pk, titular='caja-1', tamano=5)
+        self._secuencia(1, 100)
+        # La secuencia alta queda sin números por reservar, pero el bloque sigue abierto
+        SecuenciaNCF.objects.filter(pk=alta.pk).update(secuencia_actual=200)
+        AsignadorNCF._bloques.clear()
+
+        with self.assertNumQueries(4):
+            secuencia, ncf, _ = AsignadorNCF.siguiente_ncf_por_tipo(self.empresa, self.tipo.id, 'caja-1')
+
+        self.assertEqual(secuencia.pk, alta.pk)
+        self.assertEqual(ncf, 'B0100000102')
+
+    def test_rango_que_no_empieza_en_uno(self):
+        """Test: El primer NCF de una secuencia sin uso es su secuencia_inicial"""
+        secuencia = self._secuencia(101, 200)
+
+        self.assertEqual(secuencia.disponibles, 100)
+        self.assertEqual(SecuenciaNCF.objects.con_disponibilidad().get().disponibles_anotado, 100)
+        self.assertEqual(secuencia.siguiente_numero(), 'B0100000101')
+        bloque = AsignadorNCF.reservar_bloque(secuencia.pk, 'caja-1', tamano=5)
+        self.assertEqual((bloque.numero_inicial, bloque.numero_final), (101, 105))
+
+        AsignadorNCF.cerrar_bloque(bloque.pk)
+        secuencia.refresh_from_db()
+        self.assertEqual(secuencia.secuencia_actual, 0)
+
+    def test_por_tipo_sin_secuencias(self):
+        """Test: Sin secuencias con números se informa el error"""
+        self._secuencia(1, 100, actual=100)
+        with self.assertRaises(ValidationError):
+            AsignadorNCF.siguiente_ncf_por_tipo(self.empresa, self.tipo.id, 'caja-1')
+
+
+class AsignadorNCFConcurrenciaTest(TransactionTestCase):
+    """Entrega concurrente de NCF desde varios hilos y cajas"""
+
+    def test_hilos_no_reciben_ncf_duplicados(self):
+        """Test: Ningún NCF se entrega dos veces ni los bloques se solapan"""
+        AsignadorNCF._bloques.clear()
+        empresa = Empresa.objects.create(nombre='Empresa Concurrencia', rnc='112233445')
+        tipo = TipoComprobante.objects.create(empresa=empresa, codigo='02', nombre='Consumo', prefijo='B')
+        secuencia = SecuenciaNCF.objects.create(
+            empresa=empresa,
+            tipo_comprobante=tipo,
+            descripcion='Talonario',
+            secuencia_inicial=1,
+            secuencia_final=10000,
+            fecha_vencimiento=date.today() + timedelta(days=365)
+        )
+        hilos, por_hilo = 8, 25
+        entregados = []
+        errores = []
+
+        def trabajar(indice):
+            titular = f'caja-{indice % 3}' if indice % 4 else None
+            try:
+                for _ in range(por_hilo):
+                    entregados.append(AsignadorNCF.siguiente_ncf(secuencia.pk, titular=titular, tamano=7)[0])
+            except Exception as e:  # pragma: no cover - se reporta abajo
+                errores.append(e)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            list(pool.map(trabajar, range(hilos)))
+
+        self.assertEqual(errores, [])
+        self.assertEqual(len(entregados), hilos * por_hilo)
+        self.assertEqual(len(set(entregados)), hilos * por_hilo)
+
+        rangos = sorted(BloqueNCF.objects.values_list('numero_inicial', 'numero_final'))
+        for (_, fin_anterior), (inicio, _) in zip(rangos, rangos[1:]):
+            self.assertGreater(inicio, fin_anterior)
+        AsignadorNCF.liberar()
@@ -0,0 +1,225 @@
+"""
+Validación previa al envío de los reportes 606 y 607 a la DGII.
+
+El TXT del reporte (el mismo que se descarga, desde ReporteDGIIGenerado si
+el período está cerrado) se carga en un DataFrame con read_csv y cada regla
+se evalúa como una operación vectorizada sobre columnas completas, sin
+recorrer las filas en Python:
+- RNC/cédula: solo dígitos, 9 u 11 de longitud y dígito verificador
+  (módulo 11 para RNC, Luhn para cédula). En el 607 solo es obligatorio
+  con NCF de crédito fiscal.
+- NCF y NCF modificado con formato válido; NCF sin duplicados en el período
+  (en el 606, por proveedor).
+- ITBIS no mayor al 18% del monto facturado.
+- Fecha del comprobante dentro del período.
+
+Uso:
+    resultado = ValidacionReportesService.validar('606', empresa, 2025, 1)
+    if not resultado['valido']:
+        resultado['resumen']  # {'ncf_duplicado': 3, ...}
+"""
+import calendar
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .constants import (
+    LONGITUD_CEDULA, LONGITUD_RNC, MAX_ERRORES_VALIDACION, MENSAJES_VALIDACION,
+    PATRON_NCF, PESOS_RNC, TASA_ITBIS_MAXIMA, TIPO_FACTURA_CREDITO_FISCAL, TOLERANCIA_ITBIS,
+    REGLA_CEDULA_DIGITO_VERIFICADOR, REGLA_FECHA_FUERA_PERIODO, REGLA_IDENTIFICACION_FORMATO,
+    REGLA_ITBIS_EXCEDE_TASA, REGLA_NCF_DUPLICADO, REGLA_NCF_FORMATO, REGLA_RNC_DIGITO_VERIFICADOR,
+)
+from .services import GeneradorReportesDGII, ReportesGuardadosService
+
+# Columnas del TXT que usan las reglas (iguales en 606 y 607)
+COLUMNAS_VALIDACION = (
+    'rnc_cedula', 'ncf', 'ncf_modificado', 'fecha_comprobante',
+    'monto_facturado', 'itbis_facturado',
+)
+
+# Campos que identifican un NCF repetido
+CLAVES_DUPLICADO = {
+    '606': ['rnc_cedula', 'ncf'],
+    '607': ['ncf'],
+}
+
+
+def _digitos(numeros, longitud):
+    """Matriz (filas x longitud) con los dígitos de cada número."""
+    potencias = 10 ** np.arange(longitud - 1, -1, -1, dtype=np.int64)
+    return (numeros.astype(np.int64).to_numpy()[:, None] // potencias) % 10
+
+
+def rnc_valido(numeros):
+    """
+    Dígito verificador de RNC (módulo 11).
+
+    Args:
+        numeros: Serie de strings de 9 dígitos
+
+    Returns:
+        ndarray de bool
+    """
+    digitos = _digitos(numeros, LONGITUD_RNC)
+    resto = digitos[:, :-1] @ np.array(PESOS_RNC) % 11
+    verificador = np.select([resto == 0, resto == 1], [2, 1], 11 - resto)
+    return verificador == digitos[:, -1]
+
+
+def cedula_valida(numeros):
+    """
+    Dígito verificador de cédula (Luhn, pesos 1 y 2 alternados).
+
+    Args:
+        numeros: Serie de strings de 11 dígitos
+
+    Returns:
+        ndarray de bool
+    """
+    digitos = _digitos(numeros, LONGITUD_CEDULA)
+    productos = digitos[:, :-1] * np.tile([1, 2], (LONGITUD_CEDULA - 1) // 2)
+    productos = np.where(productos > 9, productos - 9, productos)
+    verificador = (10 - productos.sum(axis=1) % 10) % 10
+    return verificador == digitos[:, -1]
+
+
+class ValidacionReportesService:
+    """Reglas de la DGII sobre los registros de un reporte 606/607"""
+
+    @staticmethod
+    def cargar(tipo, empresa, anio, mes):
+        """
+        DataFrame con las columnas de COLUMNAS_VALIDACION del TXT del reporte.
+
+        El TXT se escribe a un archivo temporal y lo lee el parser de
+        pandas; todas las columnas quedan como texto, igual que en el
+        archivo. El índice es la línea del archivo menos uno.
+        """
+        campos = GeneradorReportesDGII.campos(tipo)
+        reporte = ReportesGuardadosService.obtener(tipo, empresa, anio, mes)
+
+        with tempfile.TemporaryFile() as archivo:
+            if reporte is not None:
+                for bloque in reporte.iterar_texto():
+                    archivo.write(bloque)
+            else:
+                for linea in GeneradorReportesDGII.exportar_txt(tipo, empresa, anio, mes):
+                    archivo.write(linea.encode('utf-8'))
+
+            if not archivo.tell():
+                return pd.DataFrame({columna: pd.Series(dtype=str) for columna in COLUMNAS_VALIDACION})
+
+            archivo.seek(0)
+            return pd.read_csv(
+                archivo, sep='|', header=None, names=campos, usecols=COLUMNAS_VALIDACION,
+                dtype=str, keep_default_na=False, encoding='utf-8',
+            )
+
+    @staticmethod
+    def errores(datos, tipo, anio, mes):
+        """
+        Evalúa las reglas sobre los registros.
+
+        Args:
+            datos: DataFrame de cargar()
+            tipo: '606' o '607'
+
+        Returns:
+            DataFrame (linea, regla, campo, valor) ordenado por línea
+        """
+        hallazgos = []
+
+        def agregar(mascara, regla, campo):
+            mascara = np.asarray(mascara, dtype=bool)
+            if mascara.any():
+                hallazgos.append(pd.DataFrame({
+                    'linea': datos.index.to_numpy()[mascara] + 1,
+                    'regla': regla,
+                    'campo': campo,
+                    'valor': datos[campo].to_numpy()[mascara],
+                }))
+
+        # RNC / cédula
+        identificacion = datos['rnc_cedula']
+        longitud = identificacion.str.len()
+        numerica = identificacion.str.fullmatch(r'\d+')
+        vacia = identificacion.eq('')
+        if tipo == '606':
+            requerida = pd.Series(True, index=datos.index)
+        else:
+            requerida = datos['ncf'].str[1:3].eq(TIPO_FACTURA_CREDITO_FISCAL)
+        agregar(
+            (vacia & requerida) | (~vacia & ~(numerica & longitud.isin([LONGITUD_RNC, LONGITUD_CEDULA]))),
+            REGLA_IDENTIFICACION_FORMATO, 'rnc_cedula'
+        )
+        for longitud_valida, verificar, regla in (
+            (LONGITUD_RNC, rnc_valido, REGLA_RNC_DIGITO_VERIFICADOR),
+            (LONGITUD_CEDULA, cedula_valida, REGLA_CEDULA_DIGITO_VERIFICADOR),
+        ):
+            candidatos = (numerica & longitud.eq(longitud_valida)).to_numpy()
+            invalidos = np.zeros(len(datos), dtype=bool)
+            if candidatos.any():
+                invalidos[candidatos] = ~verificar(identificacion[candidatos])
+            agregar(invalidos, regla, 'rnc_cedula')
+
+        # NCF
+        ncf_valido = datos['ncf'].str.fullmatch(PATRON_NCF)
+        agregar(~ncf_valido, REGLA_NCF_FORMATO, 'ncf')
+        modificado = datos['ncf_modificado']
+        agregar(modificado.ne('') & ~modificado.str.fullmatch(PATRON_NCF), REGLA_NCF_FORMATO, 'ncf_modificado')
+        agregar(
+            ncf_valido & datos.duplicated(subset=CLAVES_DUPLICADO[tipo], keep=False),
+            REGLA_NCF_DUPLICADO, 'ncf'
+        )
+
+        # ITBIS
+        monto = pd.to_numeric(datos['monto_facturado'], errors='coerce')
+        itbis = pd.to_numeric(datos['itbis_facturado'], errors='coerce')
+        agregar(itbis > monto * TASA_ITBIS_MAXIMA + TOLERANCIA_ITBIS, REGLA_ITBIS_EXCEDE_TASA, 'itbis_facturado')
+
+        # Fecha del comprobante
+        fechas = pd.to_datetime(datos['fecha_comprobante'], format='%Y%m%d', errors='coerce')
+        inicio = pd.Timestamp(anio, mes, 1)
+        fin = pd.Timestamp(anio, mes, calendar.monthrange(anio, mes)[1])
+        agregar(~fechas.between(inicio, fin), REGLA_FECHA_FUERA_PERIODO, 'fecha_comprobante')
+
+        if not hallazgos:
+            return pd.DataFrame(columns=['linea', 'regla', 'campo', 'valor'])
+        return pd.concat(hallazgos, ignore_index=True).sort_values('linea', kind='stable', ignore_index=True)
+
+    @staticmethod
+    def validar(tipo, empresa, anio, mes, limite=MAX_ERRORES_VALIDACION):
+        """
+        Valida el reporte de un período.
+
+        Args:
+            tipo: '606' o '607'
+            empresa: Instancia de Empresa
+            anio: Año del reporte
+            mes: Mes del reporte (1-12)
+            limite: Máximo de errores en el detalle
+
+        Returns:
+            dict con periodo, tipo, cantidad_registros, valido,
+            cantidad_errores, resumen ({regla: cantidad}), errores (hasta
+            `limite`, con linea, regla, campo, valor y mensaje) y
+            errores_truncados
+        """
+        datos = ValidacionReportesService.cargar(tipo, empresa, anio, mes)
+        errores = ValidacionReportesService.errores(datos, tipo, anio, mes)
+
+        detalle = errores.head(limite).assign(mensaje=lambda df: df['regla'].map(MENSAJES_VALIDACION))
+        return {
+            'tipo': tipo,
+            'periodo': f'{anio}-{mes:02d}',
+            'rnc_empresa': empresa.rnc,
+            'cantidad_registros': len(datos),
+            'valido': errores.empty,
+            'cantidad_errores': len(errores),
+            'resumen': {regla: int(cantidad) for regla, cantidad in errores['regla'].value_counts().items()},
+            'errores': [
+                {**error, 'linea': int(error['linea'])} for error in detalle.to_dict('records')
+            ],
+            'errores_truncados': len(errores) > limite,
+        }
@@ -2,24 +2,27 @@
 Views para DGII (Comprobantes Fiscales)
 
 Incluye gestión de tipos de comprobante, secuencias NCF,
-y generación de reportes fiscales (606, 607, 608).
+generación de reportes fiscales (606, 607, 608) y consulta del
+padrón de contribuyentes.
 """
 import logging
+from itertools import islice
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from django.db import transaction
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 from datetime import date
-from decimal import Decimal
-import csv
-import io
 
+from core.descargas import ArchivoNoDisponible, respuesta_archivo
 from core.mixins import EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixin
 from usuarios.permissions import ActionBasedPermission
-from .models import TipoComprobante, SecuenciaNCF
+from .models import TipoComprobante, SecuenciaNCF, ArtefactoReporteDGII
+from .services import (
+    AsignadorNCF, ArtefactosReporteService, GeneradorReportesDGII, PadronRNCService, ReportesGuardadosService,
+)
 from .serializers import (
     TipoComprobanteSerializer, TipoComprobanteListSerializer,
     SecuenciaNCFSerializer, SecuenciaNCFListSerializer,
@@ -30,12 +33,12 @@ from .permissions import (
     CanGenerarReporte608, CanGestionarTipoComprobante, CanGestionarSecuencia
 )
 from .constants import (
-    PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, PAGE_SIZE_REPORTES,
-    TIPO_IDENTIFICACION_RNC, TIPO_IDENTIFICACION_CEDULA,
-    TIPO_IDENTIFICACION_OTRO, LONGITUD_RNC, LONGITUD_CEDULA,
+    PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, PAGE_SIZE_REPORTES, DIAS_ALERTA_VENCIMIENTO,
     ERROR_SECUENCIA_NO_ACTIVA, ERROR_SECUENCIA_AGOTADA_ACCION,
     ERROR_SECUENCIA_VENCIDA, ERROR_NO_SECUENCIA_DISPONIBLE,
-    ERROR_MES_ANIO_REQUERIDOS, ERROR_MES_ANIO_NUMEROS
+    ERROR_MES_ANIO_REQUERIDOS, ERROR_MES_ANIO_NUMEROS, ERROR_MES_INVALIDO,
+    ERROR_TIPO_REPORTE_INVALIDO, ERROR_TIPO_VALIDACION_INVALIDO, ERROR_ARTEFACTO_NO_ENCONTRADO,
+    ERROR_ARTEFACTO_NO_DISPONIBLE, ERROR_CONTRIBUYENTE_NO_ENCONTRADO
 )
 
 logger = logging.getLogger(__name__)
@@ -59,30 +62,6 @@ class SecuenciaNCFPagination(PageNumberPagination):
     max_page_size = PAGE_SIZE_MAX
 
 
-# =============================================================================
-# HELPERS
-# =============================================================================
-
-def get_tipo_identificacion(numero):
-    """
-    Determina el tipo de identificación según el formato.
-
-    Args:
-        numero: Número de identificación
-
-    Returns:
-        str: '1' para RNC, '2' para Cédula, '3' para Otro
-    """
-    if not numero:
-        return TIPO_IDENTIFICACION_OTRO
-    numero = numero.replace('-', '').replace(' ', '')
-    if len(numero) == LONGITUD_RNC:
-        return TIPO_IDENTIFICACION_RNC
-    elif len(numero) == LONGITUD_CEDULA:
-        return TIPO_IDENTIFICACION_CEDULA
-    return TIPO_IDENTIFICACION_OTRO
-
-
 # =============================================================================
 # VIEWSETS
 # =============================================================================
@@ -221,13 +200,8 @@ class SecuenciaNCFViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
 
         Endpoint: GET /api/v1/dgii/secuencias/activas/
         """
-        secuencias = self.get_queryset().filter(
-            activo=True,
-            fecha_vencimiento__gte=date.today()
-        )
-        # Filtrar las agotadas en Python (property)
-        secuencias_disponibles = [s for s in secuencias if not s.agotada]
-        serializer = self.get_serializer(secuencias_disponibles, many=True)
+        secuencias = self.get_queryset().disponibles().order_by('tipo_comprobante', 'secuencia_inicial')
+        serializer = self.get_serializer(secuencias, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
@@ -237,22 +211,24 @@ class SecuenciaNCFViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
 
         Endpoint: GET /api/v1/dgii/secuencias/por_vencer/
         """
-        from datetime import timedelta
-        fecha_alerta = date.today() + timedelta(days=30)
-
-        secuencias = self.get_queryset().filter(activo=True)
-
-        alertas = []
-        for secuencia in secuencias:
-            disponibles = secuencia.disponibles
-            if secuencia.fecha_vencimiento <= fecha_alerta or disponibles <= secuencia.alerta_cantidad:
-                alertas.append({
-                    'secuencia': SecuenciaNCFSerializer(secuencia).data,
-                    'alerta_vencimiento': secuencia.fecha_vencimiento <= fecha_alerta,
-                    'alerta_cantidad': disponibles <= secuencia.alerta_cantidad,
-                    'dias_para_vencer': (secuencia.fecha_vencimiento - date.today()).days,
-                    'ncf_disponibles': disponibles
-                })
+        # Filtro, alertas y orden en SQL; un solo serializer para todas
+        secuencias = list(
+            self.get_queryset().por_vencer(DIAS_ALERTA_VENCIMIENTO).order_by(
+                'fecha_vencimiento', 'disponibles_anotado'
+            )
+        )
+        datos = SecuenciaNCFSerializer(secuencias, many=True).data
+
+        alertas = [
+            {
+                'secuencia': dato,
+                'alerta_vencimiento': secuencia.alerta_vencimiento_anotada,
+                'alerta_cantidad': secuencia.alerta_cantidad_anotada,
+                'dias_para_vencer': secuencia.dias_para_vencer.days,
+                'ncf_disponibles': secuencia.disponibles_anotado
+            }
+            for secuencia, dato in zip(secuencias, datos)
+        ]
 
         logger.info(
             f"Consulta de secuencias por vencer: {len(alertas)} alertas "
@@ -267,6 +243,9 @@ class SecuenciaNCFViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
 
         IDEMPOTENTE: Cada llamada genera un nuevo NCF (esto es intencional).
 
+        El número sale del bloque reservado por este proceso (AsignadorNCF);
+        la secuencia solo se bloquea al reservar un bloque nuevo.
+
         Endpoint: POST /api/v1/dgii/secuencias/{id}/generar_ncf/
 
         Returns:
@@ -284,49 +263,44 @@ class SecuenciaNCFViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if secuencia.agotada:
+        if secuencia.fecha_vencimiento < date.today():
             logger.warning(
-                f"Intento de generar NCF en secuencia agotada {pk} "
+                f"Intento de generar NCF en secuencia vencida {pk} "
                 f"por usuario {request.user.id}"
             )
             return Response(
-                {'error': ERROR_SECUENCIA_AGOTADA_ACCION},
+                {'error': ERROR_SECUENCIA_VENCIDA},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if secuencia.fecha_vencimiento < date.today():
+        try:
+            ncf, numero = AsignadorNCF.siguiente_ncf(secuencia.pk, usuario=request.user)
+        except ValidationError:
             logger.warning(
-                f"Intento de generar NCF en secuencia vencida {pk} "
+                f"Intento de generar NCF en secuencia agotada {pk} "
                 f"por usuario {request.user.id}"
             )
             return Response(
-                {'error': ERROR_SECUENCIA_VENCIDA},
+                {'error': ERROR_SECUENCIA_AGOTADA_ACCION},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        with transaction.atomic():
-            # Bloquear el registro para evitar concurrencia
-            secuencia = SecuenciaNCF.objects.select_for_update().get(pk=secuencia.pk)
-            ncf = secuencia.siguiente_numero()
-            secuencia.secuencia_actual += 1
-            secuencia.usuario_modificacion = request.user
-            secuencia.save(update_fields=['secuencia_actual', 'usuario_modificacion', 'fecha_actualizacion'])
-
         logger.info(
             f"NCF generado: {ncf} (secuencia={pk}, usuario={request.user.id})"
         )
 
         return Response({
             'ncf': ncf,
-            'secuencia_actual': secuencia.secuencia_actual,
-            'disponibles': secuencia.disponibles
+            'secuencia_actual': numero,
+            'disponibles': secuencia.secuencia_final - numero
         })
 
     @action(detail=False, methods=['post'])
     def generar_por_tipo(self, request):
         """
         Genera NCF dado un tipo de comprobante.
-        Busca automáticamente la secuencia activa correspondiente.
+        Usa la secuencia del bloque abierto de este proceso o, si no hay,
+        la de rango más bajo con números (consulta indexada, sin recorrerlas).
 
         Endpoint: POST /api/v1/dgii/secuencias/generar_por_tipo/
 
@@ -341,28 +315,19 @@ class SecuenciaNCFViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
 
         tipo_id = serializer.validated_data['tipo_comprobante_id']
 
-        with transaction.atomic():
-            secuencia = SecuenciaNCF.objects.select_for_update().filter(
-                empresa=request.user.empresa,
-                tipo_comprobante_id=tipo_id,
-                activo=True,
-                fecha_vencimiento__gte=date.today()
-            ).first()
-
-            if not secuencia or secuencia.agotada:
-                logger.warning(
-                    f"No hay secuencia disponible para tipo {tipo_id} "
-                    f"(empresa_id={request.user.empresa_id})"
-                )
-                return Response(
-                    {'error': ERROR_NO_SECUENCIA_DISPONIBLE},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            ncf = secuencia.siguiente_numero()
-            secuencia.secuencia_actual += 1
-            secuencia.usuario_modificacion = request.user
-            secuencia.save(update_fields=['secuencia_actual', 'usuario_modificacion', 'fecha_actualizacion'])
+        try:
+            secuencia, ncf, numero = AsignadorNCF.siguiente_ncf_por_tipo(
+                request.user.empresa, tipo_id, usuario=request.user
+            )
+        except ValidationError:
+            logger.warning(
+                f"No hay secuencia disponible para tipo {tipo_id} "
+                f"(empresa_id={request.user.empresa_id})"
+            )
+            return Response(
+                {'error': ERROR_NO_SECUENCIA_DISPONIBLE},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         logger.info(
             f"NCF generado por tipo: {ncf} (tipo={tipo_id}, secuencia={secuencia.id}, "
@@ -373,7 +338,7 @@ class SecuenciaNCFViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
             'ncf': ncf,
             'tipo_comprobante': str(secuencia.tipo_comprobante),
             'secuencia_id': secuencia.id,
-            'disponibles': secuencia.disponibles
+            'disponibles': secuencia.secuencia_final - numero
         })
 
 
@@ -388,13 +353,29 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
     - Use ?page=N y ?page_size=N para paginar resultados JSON
     - El formato TXT siempre exporta todos los registros (requerido por DGII)
 
+    resumen entrega cantidad y totales (aggregate SQL) sin generar el
+    archivo, para mostrarlos de inmediato en períodos grandes. validar
+    revisa el 606/607 contra las reglas de la DGII antes de enviarlo.
+
+    Las tareas asíncronas dejan el TXT y el JSON en archivos gzip
+    (ArtefactoReporteDGII): artefactos los lista y descargar_artefacto los
+    entrega con soporte de HTTP Range para reanudar descargas.
+
     Permisos:
         - CanGenerarReporte606 para formato_606 y formato_606_async
         - CanGenerarReporte607 para formato_607 y formato_607_async
         - CanGenerarReporte608 para formato_608 y formato_608_async
+        - El del tipo de reporte para resumen, validar, artefactos y
+          descargar_artefacto
     """
     permission_classes = [IsAuthenticated]
 
+    PERMISOS_REPORTE = {
+        '606': CanGenerarReporte606,
+        '607': CanGenerarReporte607,
+        '608': CanGenerarReporte608,
+    }
+
     def get_permissions(self):
         """Aplica permisos según la acción"""
         if self.action in ['formato_606', 'formato_606_async']:
@@ -405,9 +386,93 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
             return [IsAuthenticated(), ActionBasedPermission(), CanGenerarReporte608()]
         return [IsAuthenticated(), ActionBasedPermission()]
 
-    def _paginate_registros(self, request, registros):
+    def _responder_reporte(self, request, tipo, empresa, anio, mes, formato):
+        """
+        Respuesta TXT o JSON de un reporte.
+
+        Los períodos cerrados se sirven desde el reporte guardado
+        (ReportesGuardadosService); los abiertos se generan en vivo y el
+        TXT se envía en streaming con memoria constante.
+        """
+        reporte = ReportesGuardadosService.obtener(tipo, empresa, anio, mes)
+
+        if formato == 'txt':
+            if reporte is not None:
+                response = StreamingHttpResponse(reporte.iterar_texto(), content_type='text/plain')
+                response['ETag'] = f'"{reporte.hash_contenido}"'
+            else:
+                response = StreamingHttpResponse(
+                    GeneradorReportesDGII.exportar_txt(tipo, empresa, anio, mes),
+                    content_type='text/plain'
+                )
+            nombre_archivo = GeneradorReportesDGII.nombre_archivo(tipo, empresa, anio, mes)
+            response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+            return response
+
+        if reporte is not None:
+            registros = reporte.iterar_registros(GeneradorReportesDGII.campos(tipo))
+            resumen = {'cantidad_registros': reporte.cantidad_registros, 'totales': reporte.totales}
+        else:
+            # Cantidad y totales salen de un aggregate; los registros solo se
+            # recorren hasta la página pedida
+            registros = GeneradorReportesDGII.iterar_registros(tipo, empresa, anio, mes)
+            resumen = GeneradorReportesDGII.resumen(tipo, empresa, anio, mes)
+
+        # Respuesta JSON con paginación opcional
+        paginacion = self._paginate_registros(request, registros, resumen['cantidad_registros'])
+        datos = {
+            'periodo': f'{anio}-{mes:02d}',
+            'rnc_empresa': empresa.rnc,
+            'cantidad_registros': paginacion['count'],
+            'page': paginacion.get('page'),
+            'page_size': paginacion.get('page_size'),
+            'total_pages': paginacion.get('total_pages'),
+            'has_next': paginacion.get('has_next'),
+            'has_previous': paginacion.get('has_previous'),
+            'registros': paginacion['registros'],
+        }
+        if GeneradorReportesDGII.CAMPOS_TOTALES[tipo]:
+            datos['totales'] = resumen['totales']
+        return Response(datos)
+
+    @staticmethod
+    def _leer_periodo(datos):
         """
-        Aplica paginación a una lista de registros.
+        Lee y valida mes y anio de los query params o del body.
+
+        Returns:
+            tuple: ((anio, mes), None) o (None, Response 400 con el error)
+        """
+        mes = datos.get('mes')
+        anio = datos.get('anio')
+        if not mes or not anio:
+            error = ERROR_MES_ANIO_REQUERIDOS
+        else:
+            try:
+                mes = int(mes)
+                anio = int(anio)
+            except (TypeError, ValueError):
+                error = ERROR_MES_ANIO_NUMEROS
+            else:
+                if 1 <= mes <= 12:
+                    return (anio, mes), None
+                error = ERROR_MES_INVALIDO
+        return None, Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _verificar_permiso_reporte(self, request, tipo):
+        """Aplica el permiso del tipo de reporte (acciones que reciben el tipo como dato)."""
+        permiso = self.PERMISOS_REPORTE[tipo]()
+        if not permiso.has_permission(request, self):
+            self.permission_denied(request, message=getattr(permiso, 'message', None))
+
+    def _paginate_registros(self, request, registros, total_count=None):
+        """
+        Aplica paginación a los registros.
+
+        Args:
+            registros: Lista, o iterable si se indica total_count (se
+                consume solo hasta el final de la página pedida)
+            total_count: Cantidad total de registros, si ya se conoce
 
         Returns:
             dict con 'results', 'count', 'page', 'page_size', 'total_pages'
@@ -420,14 +485,15 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
         except (ValueError, TypeError):
             page_size = PAGE_SIZE_DEFAULT
 
-        total_count = len(registros)
+        if total_count is None:
+            total_count = len(registros)
         total_pages = (total_count + page_size - 1) // page_size if page_size > 0 else 1
 
         if page is None:
             # Sin paginación - retornar todos
             return {
                 'count': total_count,
-                'registros': registros
+                'registros': list(registros)
             }
 
         try:
@@ -447,7 +513,7 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
             'total_pages': total_pages,
             'has_next': page < total_pages,
             'has_previous': page > 1,
-            'registros': registros[start:end]
+            'registros': list(islice(registros, start, end))
         }
 
     # ==================== ENDPOINTS ASYNC (Django 6.0 Tasks) ====================
@@ -467,23 +533,10 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
         from .tasks import generar_reporte_606
 
         empresa = request.user.empresa
-        mes = request.data.get('mes')
-        anio = request.data.get('anio')
-
-        if not mes or not anio:
-            return Response(
-                {'error': ERROR_MES_ANIO_REQUERIDOS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            mes = int(mes)
-            anio = int(anio)
-        except ValueError:
-            return Response(
-                {'error': ERROR_MES_ANIO_NUMEROS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        periodo, error = self._leer_periodo(request.data)
+        if error:
+            return error
+        anio, mes = periodo
 
         logger.info(
             f"Iniciando generación async reporte 606 {anio}-{mes:02d} "
@@ -518,23 +571,10 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
         from .tasks import generar_reporte_607
 
         empresa = request.user.empresa
-        mes = request.data.get('mes')
-        anio = request.data.get('anio')
-
-        if not mes or not anio:
-            return Response(
-                {'error': ERROR_MES_ANIO_REQUERIDOS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            mes = int(mes)
-            anio = int(anio)
-        except ValueError:
-            return Response(
-                {'error': ERROR_MES_ANIO_NUMEROS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        periodo, error = self._leer_periodo(request.data)
+        if error:
+            return error
+        anio, mes = periodo
 
         logger.info(
             f"Iniciando generación async reporte 607 {anio}-{mes:02d} "
@@ -568,23 +608,10 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
         from .tasks import generar_reporte_608
 
         empresa = request.user.empresa
-        mes = request.data.get('mes')
-        anio = request.data.get('anio')
-
-        if not mes or not anio:
-            return Response(
-                {'error': ERROR_MES_ANIO_REQUERIDOS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            mes = int(mes)
-            anio = int(anio)
-        except ValueError:
-            return Response(
-                {'error': ERROR_MES_ANIO_NUMEROS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        periodo, error = self._leer_periodo(request.data)
+        if error:
+            return error
+        anio, mes = periodo
 
         logger.info(
             f"Iniciando generación async reporte 608 {anio}-{mes:02d} "
@@ -615,122 +642,19 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
         - anio: Año del reporte (YYYY)
         - formato: 'json' (default) o 'txt'
         """
-        from compras.models import Compra
-
         empresa = request.user.empresa
-        mes = request.query_params.get('mes')
-        anio = request.query_params.get('anio')
+        periodo, error = self._leer_periodo(request.query_params)
+        if error:
+            return error
+        anio, mes = periodo
         formato = request.query_params.get('formato', 'json')
 
-        if not mes or not anio:
-            return Response(
-                {'error': ERROR_MES_ANIO_REQUERIDOS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            mes = int(mes)
-            anio = int(anio)
-        except ValueError:
-            return Response(
-                {'error': ERROR_MES_ANIO_NUMEROS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         logger.info(
             f"Generando reporte 606 {anio}-{mes:02d} formato={formato} "
             f"(empresa_id={empresa.id}, usuario={request.user.id})"
         )
 
-        # Filtrar compras del período
-        compras = Compra.objects.filter(
-            empresa=empresa,
-            fecha_compra__year=anio,
-            fecha_compra__month=mes,
-            estado__in=['REGISTRADA', 'CXP', 'PAGADA']
-        ).select_related('proveedor').order_by('fecha_compra')
-
-        registros = []
-        for compra in compras:
-            proveedor = compra.proveedor
-            rnc = proveedor.numero_identificacion.replace('-', '').replace(' ', '') if proveedor.numero_identificacion else ''
-
-            registro = {
-                'rnc_cedula': rnc,
-                'tipo_identificacion': get_tipo_identificacion(rnc),
-                'tipo_bienes_servicios': compra.tipo_gasto,
-                'ncf': compra.numero_ncf or '',
-                'ncf_modificado': compra.ncf_modificado or '',
-                'fecha_comprobante': compra.fecha_compra.strftime('%Y%m%d'),
-                'fecha_pago': compra.fecha_compra.strftime('%Y%m%d'),
-                'monto_facturado': str(compra.total),
-                'itbis_facturado': str(compra.impuestos),
-                'itbis_retenido': '0',
-                'itbis_sujeto_proporcionalidad': '0',
-                'itbis_llevado_costo': '0',
-                'itbis_por_adelantar': '0',
-                'itbis_percibido_compras': '0',
-                'tipo_retencion_isr': '',
-                'monto_retencion_renta': '0',
-                'isr_percibido_compras': '0',
-                'impuesto_selectivo_consumo': '0',
-                'otros_impuestos_tasas': '0',
-                'monto_propina_legal': '0',
-                'forma_pago': '01',
-            }
-            registros.append(registro)
-
-        if formato == 'txt':
-            # Generar archivo TXT para DGII
-            output = io.StringIO()
-            writer = csv.writer(output, delimiter='|')
-
-            for reg in registros:
-                writer.writerow([
-                    reg['rnc_cedula'],
-                    reg['tipo_identificacion'],
-                    reg['tipo_bienes_servicios'],
-                    reg['ncf'],
-                    reg['ncf_modificado'],
-                    reg['fecha_comprobante'],
-                    reg['fecha_pago'],
-                    reg['monto_facturado'],
-                    reg['itbis_facturado'],
-                    reg['itbis_retenido'],
-                    reg['itbis_sujeto_proporcionalidad'],
-                    reg['itbis_llevado_costo'],
-                    reg['itbis_por_adelantar'],
-                    reg['itbis_percibido_compras'],
-                    reg['tipo_retencion_isr'],
-                    reg['monto_retencion_renta'],
-                    reg['isr_percibido_compras'],
-                    reg['impuesto_selectivo_consumo'],
-                    reg['otros_impuestos_tasas'],
-                    reg['monto_propina_legal'],
-                    reg['forma_pago'],
-                ])
-
-            response = HttpResponse(output.getvalue(), content_type='text/plain')
-            response['Content-Disposition'] = f'attachment; filename="606_{empresa.rnc}_{anio}{mes:02d}.txt"'
-            return response
-
-        # Respuesta JSON con paginación opcional
-        paginacion = self._paginate_registros(request, registros)
-        return Response({
-            'periodo': f'{anio}-{mes:02d}',
-            'rnc_empresa': empresa.rnc,
-            'cantidad_registros': paginacion['count'],
-            'page': paginacion.get('page'),
-            'page_size': paginacion.get('page_size'),
-            'total_pages': paginacion.get('total_pages'),
-            'has_next': paginacion.get('has_next'),
-            'has_previous': paginacion.get('has_previous'),
-            'registros': paginacion['registros'],
-            'totales': {
-                'monto_facturado': str(sum(Decimal(r['monto_facturado']) for r in registros)),
-                'itbis_facturado': str(sum(Decimal(r['itbis_facturado']) for r in registros)),
-            }
-        })
+        return self._responder_reporte(request, '606', empresa, anio, mes, formato)
 
     @action(detail=False, methods=['get'])
     def formato_607(self, request):
@@ -742,212 +666,202 @@ class ReportesDGIIViewSet(viewsets.ViewSet):
         - anio: Año del reporte (YYYY)
         - formato: 'json' (default) o 'txt'
         """
-        from ventas.models import Factura
-
         empresa = request.user.empresa
-        mes = request.query_params.get('mes')
-        anio = request.query_params.get('anio')
+        periodo, error = self._leer_periodo(request.query_params)
+        if error:
+            return error
+        anio, mes = periodo
         formato = request.query_params.get('formato', 'json')
 
-        if not mes or not anio:
-            return Response(
-                {'error': ERROR_MES_ANIO_REQUERIDOS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        logger.info(
+            f"Generando reporte 607 {anio}-{mes:02d} formato={formato} "
+            f"(empresa_id={empresa.id}, usuario={request.user.id})"
+        )
 
-        try:
-            mes = int(mes)
-            anio = int(anio)
-        except ValueError:
-            return Response(
-                {'error': ERROR_MES_ANIO_NUMEROS},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return self._responder_reporte(request, '607', empresa, anio, mes, formato)
+
+    @action(detail=False, methods=['get'])
+    def formato_608(self, request):
+        """
+        Genera el reporte 608 de comprobantes anulados.
+
+        Query params:
+        - mes: Mes del reporte (1-12)
+        - anio: Año del reporte (YYYY)
+        - formato: 'json' (default) o 'txt'
+        """
+        empresa = request.user.empresa
+        periodo, error = self._leer_periodo(request.query_params)
+        if error:
+            return error
+        anio, mes = periodo
+        formato = request.query_params.get('formato', 'json')
 
         logger.info(
-            f"Generando reporte 607 {anio}-{mes:02d} formato={formato} "
+            f"Generando reporte 608 {anio}-{mes:02d} formato={formato} "
             f"(empresa_id={empresa.id}, usuario={request.user.id})"
         )
 
-        # Filtrar facturas del período (solo con NCF)
-        facturas = Factura.objects.filter(
-            empresa=empresa,
-            fecha__year=anio,
-            fecha__month=mes,
-            estado__in=['PENDIENTE_PAGO', 'PAGADA_PARCIAL', 'PAGADA'],
-            venta_sin_comprobante=False
-        ).select_related('cliente').order_by('fecha')
-
-        registros = []
-        for factura in facturas:
-            cliente = factura.cliente
-            rnc = cliente.numero_identificacion.replace('-', '').replace(' ', '') if cliente.numero_identificacion else ''
-
-            # Determinar tipo de ingreso basado en NCF
-            tipo_ingreso = '01'  # Ingresos por operaciones (no financieros)
-
-            registro = {
-                'rnc_cedula': rnc,
-                'tipo_identificacion': get_tipo_identificacion(rnc),
-                'ncf': factura.ncf or '',
-                'ncf_modificado': '',
-                'tipo_ingreso': tipo_ingreso,
-                'fecha_comprobante': factura.fecha.strftime('%Y%m%d'),
-                'fecha_retencion': '',
-                'monto_facturado': str(factura.total),
-                'itbis_facturado': str(factura.itbis),
-                'itbis_retenido_terceros': '0',
-                'itbis_percibido': '0',
-                'retencion_renta_terceros': '0',
-                'isr_percibido': '0',
-                'impuesto_selectivo_consumo': '0',
-                'otros_impuestos_tasas': '0',
-                'monto_propina_legal': '0',
-                'efectivo': str(factura.total) if factura.tipo_venta == 'CONTADO' else '0',
-                'cheque_transferencia_deposito': '0',
-                'tarjeta_debito_credito': '0',
-                'venta_credito': str(factura.total) if factura.tipo_venta == 'CREDITO' else '0',
-                'bonos_certificados_regalo': '0',
-                'permuta': '0',
-                'otras_formas_venta': '0',
-            }
-            registros.append(registro)
+        return self._responder_reporte(request, '608', empresa, anio, mes, formato)
 
-        if formato == 'txt':
-            # Generar archivo TXT para DGII
-            output = io.StringIO()
-            writer = csv.writer(output, delimiter='|')
-
-            for reg in registros:
-                writer.writerow([
-                    reg['rnc_cedula'],
-                    reg['tipo_identificacion'],
-                    reg['ncf'],
-                    reg['ncf_modificado'],
-                    reg['tipo_ingreso'],
-                    reg['fecha_comprobante'],
-                    reg['fecha_retencion'],
-                    reg['monto_facturado'],
-                    reg['itbis_facturado'],
-                    reg['itbis_retenido_terceros'],
-                    reg['itbis_percibido'],
-                    reg['retencion_renta_terceros'],
-                    reg['isr_percibido'],
-                    reg['impuesto_selectivo_consumo'],
-                    reg['otros_impuestos_tasas'],
-                    reg['monto_propina_legal'],
-                    reg['efectivo'],
-                    reg['cheque_transferencia_deposito'],
-                    reg['tarjeta_debito_credito'],
-                    reg['venta_credito'],
-                    reg['bonos_certificados_regalo'],
-                    reg['permuta'],
-                    reg['otras_formas_venta'],
-                ])
-
-            response = HttpResponse(output.getvalue(), content_type='text/plain')
-            response['Content-Disposition'] = f'attachment; filename="607_{empresa.rnc}_{anio}{mes:02d}.txt"'
-            return response
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Vista previa de un reporte: cantidad de registros y totales
+        calculados en la base de datos, sin generar el archivo.
 
-        # Respuesta JSON con paginación opcional
-        paginacion = self._paginate_registros(request, registros)
+        Query params:
+        - tipo: '606', '607' o '608'
+        - mes: Mes del reporte (1-12)
+        - anio: Año del reporte (YYYY)
+        """
+        tipo = request.query_params.get('tipo')
+        if tipo not in self.PERMISOS_REPORTE:
+            return Response(
+                {'error': ERROR_TIPO_REPORTE_INVALIDO},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        self._verificar_permiso_reporte(request, tipo)
+
+        periodo, error = self._leer_periodo(request.query_params)
+        if error:
+            return error
+        anio, mes = periodo
+
+        empresa = request.user.empresa
         return Response({
+            'tipo': tipo,
             'periodo': f'{anio}-{mes:02d}',
             'rnc_empresa': empresa.rnc,
-            'cantidad_registros': paginacion['count'],
-            'page': paginacion.get('page'),
-            'page_size': paginacion.get('page_size'),
-            'total_pages': paginacion.get('total_pages'),
-            'has_next': paginacion.get('has_next'),
-            'has_previous': paginacion.get('has_previous'),
-            'registros': paginacion['registros'],
-            'totales': {
-                'monto_facturado': str(sum(Decimal(r['monto_facturado']) for r in registros)),
-                'itbis_facturado': str(sum(Decimal(r['itbis_facturado']) for r in registros)),
-            }
+            **GeneradorReportesDGII.resumen(tipo, empresa, anio, mes),
         })
 
     @action(detail=False, methods=['get'])
-    def formato_608(self, request):
+    def validar(self, request):
         """
-        Genera el reporte 608 de comprobantes anulados.
+        Validación previa al envío de un 606 o 607: RNC/cédula, NCF
+        (formato y duplicados), ITBIS y fechas del período.
 
         Query params:
+        - tipo: '606' o '607'
         - mes: Mes del reporte (1-12)
         - anio: Año del reporte (YYYY)
-        - formato: 'json' (default) o 'txt'
         """
-        from ventas.models import Factura
+        from .validacion import ValidacionReportesService
 
-        empresa = request.user.empresa
-        mes = request.query_params.get('mes')
-        anio = request.query_params.get('anio')
-        formato = request.query_params.get('formato', 'json')
+        tipo = request.query_params.get('tipo')
+        if tipo not in ('606', '607'):
+            return Response(
+                {'error': ERROR_TIPO_VALIDACION_INVALIDO},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        self._verificar_permiso_reporte(request, tipo)
 
-        if not mes or not anio:
+        periodo, error = self._leer_periodo(request.query_params)
+        if error:
+            return error
+        anio, mes = periodo
+
+        return Response(ValidacionReportesService.validar(tipo, request.user.empresa, anio, mes))
+
+    # ==================== ARTEFACTOS DE TAREAS ASYNC ====================
+
+    @action(detail=False, methods=['get'])
+    def artefactos(self, request):
+        """
+        Lista los archivos generados por las tareas asíncronas.
+
+        Query params:
+        - tipo: '606', '607' o '608' (requerido)
+        - anio, mes: Filtran por período (opcionales)
+        """
+        tipo = request.query_params.get('tipo')
+        if tipo not in self.PERMISOS_REPORTE:
             return Response(
-                {'error': ERROR_MES_ANIO_REQUERIDOS},
+                {'error': ERROR_TIPO_REPORTE_INVALIDO},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        self._verificar_permiso_reporte(request, tipo)
 
+        artefactos = ArtefactoReporteDGII.objects.filter(empresa=request.user.empresa, tipo=tipo, disponible=True)
         try:
-            mes = int(mes)
-            anio = int(anio)
+            if request.query_params.get('anio'):
+                artefactos = artefactos.filter(anio=int(request.query_params['anio']))
+            if request.query_params.get('mes'):
+                artefactos = artefactos.filter(mes=int(request.query_params['mes']))
         except ValueError:
             return Response(
                 {'error': ERROR_MES_ANIO_NUMEROS},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        logger.info(
-            f"Generando reporte 608 {anio}-{mes:02d} formato={formato} "
-            f"(empresa_id={empresa.id}, usuario={request.user.id})"
+        return Response([
+            {
+                **artefacto.metadatos(),
+                'periodo': f'{artefacto.anio}-{artefacto.mes:02d}',
+                'cantidad_registros': artefacto.cantidad_registros,
+                'totales': artefacto.totales,
+                'fecha_creacion': artefacto.fecha_creacion,
+            }
+            for artefacto in artefactos[:PAGE_SIZE_DEFAULT]
+        ])
+
+    @action(detail=False, methods=['get'], url_path=r'artefactos/(?P<artefacto_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})')
+    def descargar_artefacto(self, request, artefacto_id=None):
+        """
+        Descarga un archivo generado por una tarea asíncrona (gzip).
+
+        Admite Range (un rango de bytes) e If-Range para reanudar descargas;
+        el ETag es el hash SHA-256 del archivo comprimido que se envía. Si
+        el archivo ya no está en el storage responde 410 y el artefacto
+        queda como no disponible.
+        """
+        artefacto = ArtefactoReporteDGII.objects.select_related('empresa').filter(
+            uuid=artefacto_id, empresa=request.user.empresa
+        ).first()
+        if artefacto is None:
+            return Response(
+                {'error': ERROR_ARTEFACTO_NO_ENCONTRADO},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        self._verificar_permiso_reporte(request, artefacto.tipo)
+
+        if artefacto.disponible:
+            try:
+                return respuesta_archivo(
+                    request,
+                    artefacto.archivo,
+                    artefacto.tamano,
+                    artefacto.nombre_descarga,
+                    'application/gzip',
+                    etag=artefacto.hash_archivo,
+                )
+            except ArchivoNoDisponible:
+                ArtefactosReporteService.marcar_no_disponible(artefacto)
+
+        return Response(
+            {'error': ERROR_ARTEFACTO_NO_DISPONIBLE},
+            status=status.HTTP_410_GONE
         )
 
-        # Facturas canceladas con NCF
-        facturas_anuladas = Factura.objects.filter(
-            empresa=empresa,
-            fecha__year=anio,
-            fecha__month=mes,
-            estado='CANCELADA',
-            ncf__isnull=False
-        ).exclude(ncf='').order_by('fecha')
-
-        registros = []
-        for factura in facturas_anuladas:
-            registro = {
-                'ncf': factura.ncf,
-                'tipo_anulacion': '02',
-                'fecha_comprobante': factura.fecha.strftime('%Y%m%d'),
-            }
-            registros.append(registro)
 
-        if formato == 'txt':
-            # Generar archivo TXT para DGII
-            output = io.StringIO()
-            writer = csv.writer(output, delimiter='|')
-
-            for reg in registros:
-                writer.writerow([
-                    reg['ncf'],
-                    reg['tipo_anulacion'],
-                    reg['fecha_comprobante'],
-                ])
-
-            response = HttpResponse(output.getvalue(), content_type='text/plain')
-            response['Content-Disposition'] = f'attachment; filename="608_{empresa.rnc}_{anio}{mes:02d}.txt"'
-            return response
+class PadronRNCViewSet(viewsets.ViewSet):
+    """
+    Consulta del padrón de contribuyentes de la DGII (ContribuyenteDGII).
 
-        # Respuesta JSON con paginación opcional
-        paginacion = self._paginate_registros(request, registros)
-        return Response({
-            'periodo': f'{anio}-{mes:02d}',
-            'rnc_empresa': empresa.rnc,
-            'cantidad_registros': paginacion['count'],
-            'page': paginacion.get('page'),
-            'page_size': paginacion.get('page_size'),
-            'total_pages': paginacion.get('total_pages'),
-            'has_next': paginacion.get('has_next'),
-            'has_previous': paginacion.get('has_previous'),
-            'registros': paginacion['registros']
-        })
+    GET /api/v1/dgii/padron/<rnc>/ retorna nombre, estado y demás datos del
+    RNC/cédula (con o sin guiones); 404 si no está en el padrón. Es una
+    búsqueda por clave primaria; el padrón se carga con el comando
+    importar_padron_rnc.
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_value_regex = r'[0-9-]+'
+
+    def retrieve(self, request, pk=None):
+        contribuyente = PadronRNCService.consultar(pk)
+        if contribuyente is None:
+            return Response(
+                {'error': ERROR_CONTRIBUYENTE_NO_ENCONTRADO},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(contribuyente)
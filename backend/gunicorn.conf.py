@@ -0,0 +1,36 @@
+"""
+Configuración de gunicorn.
+
+Uso:
+    gunicorn core.wsgi -c gunicorn.conf.py --bind 0.0.0.0:$PORT
+
+Cada worker es un titular de bloques NCF (AsignadorNCF.titular_actual():
+host y PID). Al salir el worker se cierran sus bloques abiertos para que
+los números sin usar vuelvan a la secuencia o queden anulados en el 608.
+Si el worker muere sin pasar por este hook (SIGKILL, OOM), los bloques
+los cierra el comando cerrar_bloques_ncf --inactivos-minutos.
+"""
+import logging
+import socket
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def worker_exit(server, worker):
+    """Libera los bloques NCF del worker que termina."""
+    from django.apps import apps
+
+    # El worker pudo salir antes de cargar la aplicación
+    if not apps.ready:
+        return
+
+    from dgii.services import AsignadorNCF
+
+    titular = f"{socket.gethostname()}:{worker.pid}"
+    try:
+        resumen = AsignadorNCF.liberar(titular=titular)
+    except Exception:
+        logger.exception(f"No se pudieron liberar los bloques NCF de {titular}")
+        return
+    if resumen['bloques']:
+        logger.info(f"Bloques NCF liberados para {titular}: {resumen}")
@@ -4,7 +4,7 @@ from .models import (
     ReservaStock, Lote, AlertaInventario,
     TransferenciaInventario, DetalleTransferencia,
     AjusteInventario, DetalleAjusteInventario,
-    ConteoFisico, DetalleConteoFisico
+    ConteoFisico, DetalleConteoFisico, SaldoInventario
 )
 
 
@@ -317,3 +317,20 @@ class ConteoFisicoAdmin(admin.ModelAdmin):
         obj.usuario_modificacion = request.user
         super().save_model(request, obj, form, change)
 
+
+
+# ========== ADMIN DE SALDOS DE INVENTARIO ==========
+
+@admin.register(SaldoInventario)
+class SaldoInventarioAdmin(admin.ModelAdmin):
+    """Admin de solo lectura (los saldos los genera generar_saldos_inventario)"""
+    list_display = ('fecha_corte', 'producto', 'almacen', 'lote', 'cantidad', 'costo_promedio', 'valor', 'pendiente')
+    list_filter = ('pendiente', 'fecha_corte', 'almacen')
+    search_fields = ('producto__nombre', 'producto__codigo_sku', 'lote__codigo_lote')
+    list_select_related = ('producto', 'almacen', 'lote')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -9,6 +9,4 @@ class InventarioConfig(AppConfig):
 
     def ready(self):
         """Registra las señales cuando la aplicación está lista"""
-        # Si se implementan señales en el futuro:
-        # import inventario.signals  # noqa: F401
-        pass
+        import inventario.signals  # noqa: F401
@@ -32,6 +32,20 @@ TIPOS_MOVIMIENTO_SALIDA = [
     TIPO_DEVOLUCION_PROVEEDOR,
 ]
 
+# Salidas que, en productos con control de stock, no pueden tomar stock reservado
+TIPOS_SALIDA_RESPETAN_RESERVAS = [
+    TIPO_SALIDA_VENTA,
+    TIPO_SALIDA_AJUSTE,
+    TIPO_TRANSFERENCIA_SALIDA,
+]
+
+# Movimientos que actualizan la cantidad del lote
+TIPOS_MOVIMIENTO_ENTRADA_LOTE = [TIPO_ENTRADA_COMPRA, TIPO_ENTRADA_AJUSTE]
+TIPOS_MOVIMIENTO_SALIDA_LOTE = [TIPO_SALIDA_VENTA, TIPO_SALIDA_AJUSTE]
+
+# Filas por bulk_create/bulk_update al registrar movimientos en lote
+TAMANO_LOTE_MOVIMIENTOS = 500
+
 # =============================================================================
 # ESTADOS DE RESERVA
 # =============================================================================
@@ -99,6 +113,13 @@ TIPO_ALERTA_STOCK_MAXIMO = 'STOCK_MAXIMO'
 TIPO_ALERTA_VENCIMIENTO = 'VENCIMIENTO'
 TIPO_ALERTA_REORDEN = 'REORDEN'
 
+# Tipos de AlertaInventario
+TIPO_ALERTA_STOCK_BAJO = 'STOCK_BAJO'
+TIPO_ALERTA_STOCK_AGOTADO = 'STOCK_AGOTADO'
+TIPO_ALERTA_VENCIMIENTO_PROXIMO = 'VENCIMIENTO_PROXIMO'
+TIPO_ALERTA_VENCIMIENTO_VENCIDO = 'VENCIMIENTO_VENCIDO'
+TIPO_ALERTA_STOCK_EXCESIVO = 'STOCK_EXCESIVO'
+
 # =============================================================================
 # PRIORIDADES DE ALERTA
 # =============================================================================
@@ -115,6 +136,44 @@ PRIORIDAD_CRITICA = 'CRITICA'
 PAGE_SIZE_DEFAULT = 20
 PAGE_SIZE_MAX = 100
 
+# =============================================================================
+# CONFIGURACIÓN DE KARDEX
+# =============================================================================
+
+KARDEX_PAGE_SIZE_DEFAULT = 100
+KARDEX_PAGE_SIZE_MAX = 1000
+
+# Filas por lectura del cursor al exportar el Kardex en streaming
+TAMANO_BLOQUE_KARDEX = 2000
+
+FORMATO_KARDEX_JSON = 'json'
+FORMATO_KARDEX_CSV = 'csv'
+FORMATO_KARDEX_JSONL = 'jsonl'
+FORMATOS_KARDEX = [FORMATO_KARDEX_JSON, FORMATO_KARDEX_CSV, FORMATO_KARDEX_JSONL]
+
+# Columnas de cada fila del Kardex (y del CSV exportado)
+COLUMNAS_KARDEX = [
+    'id', 'fecha', 'tipo_movimiento', 'tipo_movimiento_display', 'referencia',
+    'entrada', 'salida', 'costo_unitario', 'valor_movimiento', 'saldo', 'saldo_valor',
+    'numero_serie', 'numero_lote_proveedor', 'lote_codigo', 'usuario', 'notas',
+]
+
+# =============================================================================
+# SALDOS POR FECHA DE CORTE
+# =============================================================================
+
+PERIODICIDAD_SALDOS_MENSUAL = 'mensual'
+PERIODICIDAD_SALDOS_SEMANAL = 'semanal'
+PERIODICIDAD_SALDOS_DIARIA = 'diaria'
+PERIODICIDADES_SALDOS = [
+    PERIODICIDAD_SALDOS_MENSUAL,
+    PERIODICIDAD_SALDOS_SEMANAL,
+    PERIODICIDAD_SALDOS_DIARIA,
+]
+
+# Filas por bulk_create al escribir los saldos de un corte
+TAMANO_LOTE_SALDOS = 1000
+
 # =============================================================================
 # CONFIGURACIÓN DE ALERTAS
 # =============================================================================
@@ -123,6 +182,9 @@ DIAS_ANTES_VENCIMIENTO_ALERTA = 30
 DIAS_CRITICO_VENCIMIENTO = 7
 DIAS_ALTA_PRIORIDAD_VENCIMIENTO = 15
 
+# Filas por bulk_create al generar las alertas de un tipo
+TAMANO_LOTE_ALERTAS = 1000
+
 # =============================================================================
 # MENSAJES DE ERROR
 # =============================================================================
@@ -154,3 +216,7 @@ ERROR_CONTEO_SOLO_EN_PROCESO = 'Solo se pueden finalizar conteos en proceso'
 ERROR_CONTEO_SOLO_FINALIZADOS = 'Solo se pueden ajustar conteos finalizados'
 
 ERROR_KARDEX_PARAMETROS_REQUERIDOS = 'Los parámetros producto_id y almacen_id son requeridos'
+ERROR_KARDEX_FECHA = 'Fecha inválida en {campo} (use AAAA-MM-DD)'
+ERROR_KARDEX_CURSOR = 'Cursor inválido en after (use <fecha ISO>,<id>)'
+ERROR_KARDEX_FORMATO = 'Formato inválido (use json, csv o jsonl)'
+ERROR_PERIODICIDAD_SALDOS = 'Periodicidad inválida: {periodicidad} (use mensual, semanal o diaria)'
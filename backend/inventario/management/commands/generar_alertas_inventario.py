@@ -2,11 +2,16 @@
 Comando de gestión para generar alertas de inventario.
 Ejecutar periódicamente con cron o task scheduler.
 
+Además de crear las alertas nuevas, resuelve las alertas abiertas cuya
+condición ya no se cumple (ver ServicioAlertasInventario).
+
 Uso:
     python manage.py generar_alertas_inventario
     python manage.py generar_alertas_inventario --dias-vencimiento 30
+    python manage.py generar_alertas_inventario --empresa 3
 """
 from django.core.management.base import BaseCommand
+from inventario.constants import DIAS_ANTES_VENCIMIENTO_ALERTA
 from inventario.services import ServicioAlertasInventario
 
 
@@ -17,28 +22,32 @@ class Command(BaseCommand):
         parser.add_argument(
             '--dias-vencimiento',
             type=int,
-            default=30,
-            help='Días antes del vencimiento para alertar (default: 30)',
+            default=DIAS_ANTES_VENCIMIENTO_ALERTA,
+            help=f'Días antes del vencimiento para alertar (default: {DIAS_ANTES_VENCIMIENTO_ALERTA})',
+        )
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            help='ID de la empresa (por defecto, todas)',
         )
 
     def handle(self, *args, **options):
-        dias_vencimiento = options['dias_vencimiento']
-        
         self.stdout.write('Generando alertas de inventario...')
         
         try:
-            resultado = ServicioAlertasInventario.generar_todas_las_alertas()
-            
-            # También verificar vencimientos con el parámetro personalizado
-            vencimientos = ServicioAlertasInventario.verificar_vencimientos(dias_vencimiento)
+            resultado = ServicioAlertasInventario.generar_todas_las_alertas(
+                empresa_id=options['empresa'],
+                dias_antes=options['dias_vencimiento'],
+            )
             
             self.stdout.write(
                 self.style.SUCCESS(
                     f'\nAlertas generadas exitosamente:\n'
                     f'  - Stock bajo/agotado: {resultado["stock_bajo"]}\n'
-                    f'  - Vencimientos: {vencimientos}\n'
+                    f'  - Vencimientos: {resultado["vencimientos"]}\n'
                     f'  - Stock excesivo: {resultado["stock_excesivo"]}\n'
-                    f'  - Total: {resultado["stock_bajo"] + vencimientos + resultado["stock_excesivo"]}'
+                    f'  - Total: {resultado["total"]}\n'
+                    f'  - Resueltas: {resultado["resueltas"]}'
                 )
             )
         except Exception as e:
@@ -46,8 +55,3 @@ class Command(BaseCommand):
                 self.style.ERROR(f'Error al generar alertas: {str(e)}')
             )
             raise
-
-
-
-
-
@@ -0,0 +1,63 @@
+"""
+Comando de gestión para generar los saldos de inventario por fecha de corte.
+Ejecutar periódicamente con cron o task scheduler (por ejemplo, el día 1 de
+cada mes con la periodicidad mensual por defecto).
+
+Genera los cortes vencidos desde el último existente (o desde el primer
+movimiento) y recalcula los marcados como pendientes por movimientos
+con fecha anterior a un corte.
+
+Uso:
+    python manage.py generar_saldos_inventario
+    python manage.py generar_saldos_inventario --periodicidad semanal
+    python manage.py generar_saldos_inventario --regenerar 2025-01-01
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.fechas import inicio_del_dia
+from inventario.constants import PERIODICIDADES_SALDOS
+from inventario.services import ServicioSaldosInventario
+
+
+class Command(BaseCommand):
+    help = 'Genera los saldos de inventario por fecha de corte y recalcula los pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodicidad',
+            choices=PERIODICIDADES_SALDOS,
+            help='Período entre cortes (default: settings.INVENTARIO_PERIODICIDAD_SALDOS)',
+        )
+        parser.add_argument(
+            '--regenerar',
+            metavar='AAAA-MM-DD',
+            help='Regenera solo el corte de ese día (00:00 local)',
+        )
+
+    def handle(self, *args, **options):
+        if options['regenerar']:
+            try:
+                dia = datetime.strptime(options['regenerar'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['regenerar']} (use AAAA-MM-DD)")
+            corte = inicio_del_dia(dia)
+            if corte > timezone.now():
+                raise CommandError('El corte no puede ser posterior a la fecha actual')
+            filas = ServicioSaldosInventario.generar_corte(corte)
+            self.stdout.write(self.style.SUCCESS(f'Corte {dia} regenerado: {filas} saldos'))
+            return
+
+        try:
+            resultado = ServicioSaldosInventario.generar_pendientes(periodicidad=options['periodicidad'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for corte in resultado['cortes']:
+            self.stdout.write(f'Corte generado: {corte}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Saldos de inventario: {len(resultado['cortes'])} cortes nuevos, "
+            f"{resultado['recalculados']} grupos recalculados, {resultado['filas']} filas"
+        ))
@@ -0,0 +1,48 @@
+"""
+Comando de gestión para verificar el stock reservado de los inventarios.
+
+Compara InventarioProducto.cantidad_reservada (contador que mantienen las
+señales de ReservaStock) con la suma de las reservas activas. Sin
+--corregir solo informa las diferencias y termina con error si las hay.
+
+Uso:
+    python manage.py reconciliar_stock_reservado
+    python manage.py reconciliar_stock_reservado --empresa 3 --corregir
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.services import ServicioInventario
+
+
+class Command(BaseCommand):
+    help = 'Verifica (y opcionalmente corrige) el stock reservado contra las reservas activas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='ID de la empresa (por defecto, todas)')
+        parser.add_argument(
+            '--corregir',
+            action='store_true',
+            help='Reemplaza los contadores con diferencias por la suma de reservas',
+        )
+
+    def handle(self, *args, **options):
+        diferencias = ServicioInventario.reconciliar_reservas(
+            empresa_id=options['empresa'],
+            corregir=options['corregir'],
+        )
+
+        for fila in diferencias:
+            self.stdout.write(
+                f"Inventario {fila['inventario_id']} (producto {fila['producto_id']}, "
+                f"almacén {fila['almacen_id']}): registrado {fila['registrado']}, "
+                f"calculado {fila['calculado']}"
+            )
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('Stock reservado consistente'))
+        elif options['corregir']:
+            self.stdout.write(self.style.SUCCESS(f'Inventarios corregidos: {len(diferencias)}'))
+        else:
+            raise CommandError(
+                f'{len(diferencias)} inventario(s) con diferencias; ejecute con --corregir para repararlos'
+            )
@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-16 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_add_permissions'),
+        ('inventario', '0007_add_permissions_and_indexes'),
+        ('productos', '0006_add_empresa_multitenancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_corte', models.DateTimeField(help_text='Incluye los movimientos anteriores a esta fecha')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('valor', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('costo_promedio', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('pendiente', models.BooleanField(default=False, help_text='Desactualizado por un movimiento anterior al corte')),
+                ('fecha_generacion', models.DateTimeField(auto_now=True)),
+                ('almacen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.almacen')),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saldos_inventario', to='empresas.empresa')),
+                ('lote', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.lote')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_inventario', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Inventario',
+                'verbose_name_plural': 'Saldos de Inventario',
+                'ordering': ['-fecha_corte'],
+                'indexes': [models.Index(fields=['producto', 'almacen', 'fecha_corte'], name='inventario__product_804994_idx'), models.Index(condition=models.Q(('pendiente', True)), fields=['fecha_corte'], name='saldo_inventario_pendiente')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('lote__isnull', False)), fields=('producto', 'almacen', 'lote', 'fecha_corte'), name='unique_saldo_inventario_lote_corte'), models.UniqueConstraint(condition=models.Q(('lote__isnull', True)), fields=('producto', 'almacen', 'fecha_corte'), name='unique_saldo_inventario_sin_lote_corte')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.1.2 on 2026-10-16 16:27
+
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def poblar_cantidad_reservada(apps, schema_editor):
+    """Inicializar el contador con la suma de las reservas activas"""
+    InventarioProducto = apps.get_model('inventario', 'InventarioProducto')
+    ReservaStock = apps.get_model('inventario', 'ReservaStock')
+
+    reservado = ReservaStock.objects.filter(
+        inventario=OuterRef('pk'),
+        estado__in=['PENDIENTE', 'CONFIRMADA']
+    ).values('inventario').annotate(total=Sum('cantidad_reservada')).values('total')
+
+    InventarioProducto.objects.filter(reservas__estado__in=['PENDIENTE', 'CONFIRMADA']).update(
+        cantidad_reservada=Coalesce(
+            Subquery(reservado), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_saldoinventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventarioproducto',
+            name='cantidad_reservada',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Suma de las reservas activas (se mantiene con las señales de ReservaStock)', max_digits=12),
+        ),
+        migrations.RunPython(poblar_cantidad_reservada, migrations.RunPython.noop),
+    ]
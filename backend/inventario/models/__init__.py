@@ -9,6 +9,7 @@ Estructura:
 - movimientos.py: MovimientoInventario, ReservaStock, Lote, AlertaInventario
 - transferencias.py: TransferenciaInventario, DetalleTransferencia
 - ajustes.py: AjusteInventario, DetalleAjusteInventario, ConteoFisico, DetalleConteoFisico
+- saldos.py: SaldoInventario
 """
 
 # Almacén e inventario
@@ -41,6 +42,9 @@ from .ajustes import (
     DetalleConteoFisico,
 )
 
+# Saldos por fecha de corte
+from .saldos import SaldoInventario
+
 __all__ = [
     # Almacén
     'Almacen',
@@ -60,4 +64,6 @@ __all__ = [
     'DetalleAjusteInventario',
     'ConteoFisico',
     'DetalleConteoFisico',
+    # Saldos
+    'SaldoInventario',
 ]
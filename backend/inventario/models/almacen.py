@@ -23,28 +23,11 @@ from ..constants import (
 class InventarioProductoQuerySet(models.QuerySet):
     """
     QuerySet personalizado para InventarioProducto.
-
-    Django 6.0: Usa Subquery para evitar N+1 en stock_reservado.
     """
 
     def with_stock_reservado(self):
-        """Anota el queryset con stock_reservado calculado mediante Subquery."""
-        from .movimientos import ReservaStock
-
-        reservas_subquery = ReservaStock.objects.filter(
-            inventario=OuterRef('pk'),
-            estado__in=['PENDIENTE', 'CONFIRMADA']
-        ).values('inventario').annotate(
-            total=Sum('cantidad_reservada')
-        ).values('total')
-
-        return self.annotate(
-            stock_reservado_anotado=Coalesce(
-                Subquery(reservas_subquery),
-                Value(0),
-                output_field=models.DecimalField(max_digits=12, decimal_places=2)
-            )
-        )
+        """Anota el queryset con stock_reservado (contador cantidad_reservada)."""
+        return self.annotate(stock_reservado_anotado=F('cantidad_reservada'))
 
     def with_stock_disponible_real(self):
         """Anota el queryset con stock disponible real (cantidad - reservado)."""
@@ -198,6 +181,13 @@ class InventarioProducto(models.Model):
     producto = models.ForeignKey(Producto, on_delete=models.PROTECT, related_name='inventarios')
     almacen = models.ForeignKey(Almacen, on_delete=models.PROTECT, related_name='inventarios')
     cantidad_disponible = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cantidad_reservada = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Suma de las reservas activas (se mantiene con las señales de ReservaStock)"
+    )
     costo_promedio = models.DecimalField(max_digits=12, decimal_places=4, default=0)
 
     metodo_valoracion = models.CharField(
@@ -298,7 +288,14 @@ class InventarioProducto(models.Model):
             raise ValidationError(errors)
 
     def save(self, *args, **kwargs):
-        """Guarda con validaciones."""
+        """
+        Guarda con validaciones.
+
+        cantidad_reservada solo la mueven las señales de ReservaStock con
+        UPDATE atómicos: un save() completo de una instancia cargada antes
+        de una reserva la pisaría con el valor viejo, así que en las
+        actualizaciones se excluye de los campos escritos.
+        """
         update_fields = kwargs.get('update_fields')
         campos_criticos = [
             'empresa', 'producto', 'almacen', 'cantidad_disponible',
@@ -309,6 +306,12 @@ class InventarioProducto(models.Model):
         if update_fields is None or any(f in update_fields for f in campos_criticos):
             self.full_clean()
 
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and not campo.generated and campo.name != 'cantidad_reservada'
+            ]
+
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -324,13 +327,7 @@ class InventarioProducto(models.Model):
 
     @property
     def stock_reservado(self):
-        from .movimientos import ReservaStock
-        return ReservaStock.objects.filter(
-            inventario=self,
-            estado__in=['PENDIENTE', 'CONFIRMADA']
-        ).aggregate(
-            total=Sum('cantidad_reservada')
-        )['total'] or 0
+        return self.cantidad_reservada
 
     @property
     def stock_disponible_real(self):
@@ -340,7 +337,15 @@ class InventarioProducto(models.Model):
         return self.stock_disponible_real >= cantidad
 
     def actualizar_costo_promedio(self, nueva_cantidad, nuevo_costo):
-        """Actualiza el costo promedio usando método de promedio ponderado."""
+        """Actualiza y guarda el costo promedio usando método de promedio ponderado."""
+        self.calcular_costo_promedio(nueva_cantidad, nuevo_costo)
+        self.save()
+
+    def calcular_costo_promedio(self, nueva_cantidad, nuevo_costo):
+        """
+        Recalcula en memoria (sin guardar) el costo promedio ponderado de
+        una entrada, antes de sumar su cantidad a cantidad_disponible.
+        """
         from decimal import Decimal, ROUND_HALF_UP
         if self.cantidad_disponible == 0:
             self.costo_promedio = nuevo_costo
@@ -353,7 +358,6 @@ class InventarioProducto(models.Model):
             nuevo_promedio = (total_valor_actual + total_valor_nuevo) / cantidad_total
             self.costo_promedio = nuevo_promedio.quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP)
             self.costo_unitario_actual = self.costo_promedio
-        self.save()
 
     def rotacion_promedio(self, dias=30):
         """Calcula rotación de inventario en los últimos N días."""
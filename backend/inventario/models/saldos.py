@@ -0,0 +1,63 @@
+"""
+Modelo de saldos de inventario a una fecha de corte.
+"""
+from django.db import models
+from django.db.models import Q
+from productos.models import Producto
+
+
+class SaldoInventario(models.Model):
+    """
+    Saldo de un producto en un almacén (y lote) a una fecha de corte.
+
+    Resume todos los movimientos con fecha anterior a fecha_corte: el saldo
+    a cualquier fecha se obtiene con el último corte anterior más los
+    movimientos posteriores a él, sin recorrer todo el historial (ver
+    ServicioSaldosInventario). Los genera la tarea programada
+    generar_saldos_inventario al cierre de cada período (mensual por
+    defecto, settings.INVENTARIO_PERIODICIDAD_SALDOS).
+
+    Un movimiento modificado o eliminado con fecha anterior a un corte deja
+    los saldos posteriores de su producto y almacén como pendientes; no se
+    usan hasta que la tarea los recalcula.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='saldos_inventario',
+        null=True,
+        blank=True
+    )
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='saldos_inventario')
+    almacen = models.ForeignKey('inventario.Almacen', on_delete=models.CASCADE, related_name='saldos')
+    lote = models.ForeignKey('Lote', on_delete=models.CASCADE, null=True, blank=True, related_name='saldos')
+    fecha_corte = models.DateTimeField(help_text="Incluye los movimientos anteriores a esta fecha")
+    cantidad = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    valor = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    costo_promedio = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    pendiente = models.BooleanField(default=False, help_text="Desactualizado por un movimiento anterior al corte")
+    fecha_generacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Saldo de Inventario'
+        verbose_name_plural = 'Saldos de Inventario'
+        ordering = ['-fecha_corte']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['producto', 'almacen', 'lote', 'fecha_corte'],
+                condition=Q(lote__isnull=False),
+                name='unique_saldo_inventario_lote_corte'
+            ),
+            models.UniqueConstraint(
+                fields=['producto', 'almacen', 'fecha_corte'],
+                condition=Q(lote__isnull=True),
+                name='unique_saldo_inventario_sin_lote_corte'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['producto', 'almacen', 'fecha_corte']),
+            models.Index(fields=['fecha_corte'], condition=Q(pendiente=True), name='saldo_inventario_pendiente'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto} - {self.almacen} al {self.fecha_corte:%Y-%m-%d}: {self.cantidad}"
@@ -5,18 +5,43 @@ Incluye:
 - ServicioInventario: Movimientos, reservas y stock
 - ServicioAlertasInventario: Generación de alertas
 - ServicioKardex: Cálculo de Kardex
+- ServicioSaldosInventario: Saldos por fecha de corte
 """
+import csv
+import json
 import logging
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
-from django.db.models import F
+from django.db.models import (
+    Case, Count, DecimalField, Exists, F, Max, Min, OuterRef, Q, Subquery, Sum, Value, When, Window
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from datetime import timedelta
+from core.descargas import Eco
+from core.fechas import filtro_rango, inicio_del_dia, rango_dias
 from .models import (
     InventarioProducto, MovimientoInventario, ReservaStock,
-    AlertaInventario, Lote
+    AlertaInventario, Lote, SaldoInventario
+)
+from .constants import (
+    COLUMNAS_KARDEX, FORMATO_KARDEX_CSV, TAMANO_BLOQUE_KARDEX,
+    TIPOS_MOVIMIENTO_ENTRADA, TIPOS_MOVIMIENTO_SALIDA, TIPO_ENTRADA_COMPRA,
+    TIPOS_SALIDA_RESPETAN_RESERVAS, TIPOS_MOVIMIENTO_ENTRADA_LOTE, TIPOS_MOVIMIENTO_SALIDA_LOTE,
+    TAMANO_LOTE_MOVIMIENTOS, ERROR_CANTIDAD_CERO, ERROR_CANTIDAD_NEGATIVA, ERROR_COSTO_NEGATIVO,
+    ERROR_PRODUCTO_NO_PERTENECE_EMPRESA, ERROR_ALMACEN_NO_PERTENECE_EMPRESA,
+    ERROR_LOTE_NO_PERTENECE_EMPRESA, ERROR_LOTE_NO_CORRESPONDE_PRODUCTO,
+    PERIODICIDAD_SALDOS_MENSUAL, PERIODICIDAD_SALDOS_SEMANAL, PERIODICIDAD_SALDOS_DIARIA,
+    TAMANO_LOTE_SALDOS, ERROR_PERIODICIDAD_SALDOS,
+    TIPO_ALERTA_STOCK_BAJO, TIPO_ALERTA_STOCK_AGOTADO, TIPO_ALERTA_STOCK_EXCESIVO,
+    TIPO_ALERTA_VENCIMIENTO_PROXIMO, TIPO_ALERTA_VENCIMIENTO_VENCIDO,
+    PRIORIDAD_MEDIA, PRIORIDAD_ALTA, PRIORIDAD_CRITICA, TAMANO_LOTE_ALERTAS,
+    DIAS_ANTES_VENCIMIENTO_ALERTA, DIAS_CRITICO_VENCIMIENTO, DIAS_ALTA_PRIORIDAD_VENCIMIENTO,
+    ESTADO_RESERVA_PENDIENTE, ESTADO_RESERVA_VENCIDA, ESTADOS_RESERVA_ACTIVOS,
 )
-from .constants import TIPOS_MOVIMIENTO_ENTRADA, TIPOS_MOVIMIENTO_SALIDA
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +64,7 @@ class ServicioInventario:
             return True, None
         
         # Validar stock para salidas
-        if tipo_movimiento in ['SALIDA_VENTA', 'SALIDA_AJUSTE', 'TRANSFERENCIA_SALIDA']:
+        if tipo_movimiento in TIPOS_SALIDA_RESPETAN_RESERVAS:
             try:
                 # Usar select_for_update para evitar condiciones de carrera
                 inventario = InventarioProducto.objects.select_for_update().get(
@@ -100,20 +125,7 @@ class ServicioInventario:
             usuario_modificacion=usuario
         )
         
-        # Actualizar inventario según tipo de movimiento
-        if tipo_movimiento in ['ENTRADA_COMPRA', 'ENTRADA_AJUSTE', 'TRANSFERENCIA_ENTRADA', 'DEVOLUCION_CLIENTE']:
-            # Entrada: aumentar stock y actualizar costo promedio
-            inventario.cantidad_disponible += cantidad
-            if tipo_movimiento == 'ENTRADA_COMPRA':
-                inventario.actualizar_costo_promedio(cantidad, costo_unitario)
-            else:
-                # Para otros tipos, mantener el costo promedio actual
-                pass
-        
-        elif tipo_movimiento in ['SALIDA_VENTA', 'SALIDA_AJUSTE', 'TRANSFERENCIA_SALIDA', 'DEVOLUCION_PROVEEDOR']:
-            # Salida: disminuir stock
-            inventario.cantidad_disponible -= cantidad
-        
+        ServicioInventario._aplicar_movimiento(inventario, lote, tipo_movimiento, cantidad, costo_unitario)
         inventario.save()
 
         logger.info(
@@ -121,22 +133,206 @@ class ServicioInventario:
             f"(movimiento_id={movimiento.id}, producto={producto.id}, almacen={almacen.id})"
         )
 
-        # Actualizar lote si existe
         if lote:
-            if tipo_movimiento in ['ENTRADA_COMPRA', 'ENTRADA_AJUSTE']:
+            lote.save()
+        
+        return movimiento
+
+    @staticmethod
+    def _aplicar_movimiento(inventario, lote, tipo_movimiento, cantidad, costo_unitario):
+        """Aplica un movimiento a la existencia, el costo y el lote en memoria (sin guardar)."""
+        if tipo_movimiento in TIPOS_MOVIMIENTO_ENTRADA:
+            # Entrada: el costo promedio se pondera con la existencia previa
+            if tipo_movimiento == TIPO_ENTRADA_COMPRA:
+                inventario.calcular_costo_promedio(cantidad, costo_unitario)
+            inventario.cantidad_disponible += cantidad
+        elif tipo_movimiento in TIPOS_MOVIMIENTO_SALIDA:
+            inventario.cantidad_disponible -= cantidad
+
+        if lote:
+            if tipo_movimiento in TIPOS_MOVIMIENTO_ENTRADA_LOTE:
                 lote.cantidad_disponible += cantidad
-            elif tipo_movimiento in ['SALIDA_VENTA', 'SALIDA_AJUSTE']:
+            elif tipo_movimiento in TIPOS_MOVIMIENTO_SALIDA_LOTE:
                 lote.cantidad_disponible -= cantidad
-            
-            # Actualizar estado del lote
+
             if lote.cantidad_disponible == 0:
                 lote.estado = 'AGOTADO'
             elif lote.cantidad_disponible > 0 and lote.estado == 'AGOTADO':
                 lote.estado = 'DISPONIBLE'
-            
-            lote.save()
-        
-        return movimiento
+
+    @staticmethod
+    def _validar_linea(linea, empresa):
+        """
+        Validaciones de una línea de registrar_movimientos_lote que no
+        dependen de la existencia (las de MovimientoInventario.clean).
+
+        Returns:
+            str con el error, o None
+        """
+        producto, almacen, lote = linea['producto'], linea['almacen'], linea.get('lote')
+        if producto.tipo_producto == 'SERVICIO':
+            return "Los servicios no tienen inventario"
+        if linea['cantidad'] is None or linea['cantidad'] <= 0:
+            return f"{producto.nombre}: {ERROR_CANTIDAD_CERO}"
+        if linea['costo_unitario'] is None or linea['costo_unitario'] < 0:
+            return f"{producto.nombre}: {ERROR_COSTO_NEGATIVO}"
+        if empresa is not None:
+            if getattr(producto, 'empresa_id', None) not in (None, empresa.id):
+                return f"{producto.nombre}: {ERROR_PRODUCTO_NO_PERTENECE_EMPRESA}"
+            if almacen.empresa_id not in (None, empresa.id):
+                return f"{almacen.nombre}: {ERROR_ALMACEN_NO_PERTENECE_EMPRESA}"
+        if lote:
+            if empresa is not None and lote.empresa_id not in (None, empresa.id):
+                return f"Lote {lote.codigo_lote}: {ERROR_LOTE_NO_PERTENECE_EMPRESA}"
+            if lote.producto_id != producto.id:
+                return f"Lote {lote.codigo_lote}: {ERROR_LOTE_NO_CORRESPONDE_PRODUCTO}"
+        return None
+
+    @staticmethod
+    @transaction.atomic
+    def registrar_movimientos_lote(lineas, usuario, empresa, referencia=None, notas=None):
+        """
+        Registra varios movimientos de inventario en una sola transacción.
+
+        Equivale a llamar registrar_movimiento por cada línea, en orden, con
+        una cantidad de consultas que no crece con las líneas: los
+        InventarioProducto afectados y sus lotes se bloquean con un único
+        SELECT ... FOR UPDATE ordenado por id (todas las llamadas toman los
+        bloqueos en el mismo orden y no se interbloquean entre sí), los
+        movimientos se insertan con bulk_create y la existencia, el costo y
+        los lotes se escriben con bulk_update.
+
+        bulk_create no emite post_save: se envía la señal
+        movimientos_registrados con todos los movimientos creados.
+
+        Args:
+            lineas: Iterable de dict con producto, almacen, tipo_movimiento,
+                cantidad, costo_unitario y, opcionalmente, lote, referencia,
+                notas, tipo_documento_origen y documento_origen_id
+            usuario: Usuario que registra los movimientos
+            empresa: Empresa de los movimientos
+            referencia: Referencia de las líneas que no traen una
+            notas: Notas de las líneas que no traen unas
+
+        Returns:
+            list de MovimientoInventario, en el orden de las líneas
+
+        Raises:
+            ValidationError: Si una línea no es válida o no hay stock
+                suficiente; en ese caso no se registra ninguna
+        """
+        from .signals import movimientos_registrados
+
+        lineas = list(lineas)
+        if not lineas:
+            return []
+
+        for linea in lineas:
+            error = ServicioInventario._validar_linea(linea, empresa)
+            if error:
+                logger.warning(f"Movimientos en lote rechazados: {error}")
+                raise ValidationError(error)
+
+        claves = Q()
+        for producto_id, almacen_id in {(l['producto'].id, l['almacen'].id) for l in lineas}:
+            claves |= Q(producto_id=producto_id, almacen_id=almacen_id)
+
+        # Inventarios faltantes (como el get_or_create de registrar_movimiento);
+        # una salida sobre un inventario inexistente se rechaza más abajo
+        existentes = set(InventarioProducto.objects.filter(claves).values_list('producto_id', 'almacen_id'))
+        nuevos = {}
+        for linea in lineas:
+            clave = (linea['producto'].id, linea['almacen'].id)
+            if clave not in existentes and clave not in nuevos and linea['tipo_movimiento'] not in TIPOS_MOVIMIENTO_SALIDA:
+                nuevos[clave] = InventarioProducto(
+                    empresa=empresa,
+                    producto=linea['producto'],
+                    almacen=linea['almacen'],
+                    costo_promedio=linea['costo_unitario']
+                )
+        if nuevos:
+            InventarioProducto.objects.bulk_create(nuevos.values(), ignore_conflicts=True)
+
+        inventarios = {
+            (inventario.producto_id, inventario.almacen_id): inventario
+            for inventario in InventarioProducto.objects.select_for_update().filter(claves).order_by('id')
+        }
+        lote_ids = {linea['lote'].id for linea in lineas if linea.get('lote')}
+        lotes = {
+            lote.id: lote
+            for lote in Lote.objects.select_for_update().filter(id__in=lote_ids).order_by('id')
+        }
+
+        movimientos = []
+        for linea in lineas:
+            producto, almacen = linea['producto'], linea['almacen']
+            tipo_movimiento, cantidad = linea['tipo_movimiento'], linea['cantidad']
+            inventario = inventarios.get((producto.id, almacen.id))
+
+            if tipo_movimiento in TIPOS_MOVIMIENTO_SALIDA:
+                if inventario is None:
+                    raise ValidationError(f"No existe inventario para {producto.nombre} en {almacen.nombre}")
+                disponible = inventario.cantidad_disponible
+                if producto.controlar_stock and tipo_movimiento in TIPOS_SALIDA_RESPETAN_RESERVAS:
+                    disponible -= inventario.cantidad_reservada
+                if disponible < cantidad:
+                    logger.warning(
+                        f"Movimientos en lote rechazados: stock insuficiente "
+                        f"(producto={producto.id}, almacen={almacen.id})"
+                    )
+                    raise ValidationError(
+                        f"Stock insuficiente para {producto.nombre}. "
+                        f"Disponible: {disponible}, Solicitado: {cantidad}"
+                    )
+
+            lote = lotes.get(linea['lote'].id) if linea.get('lote') else None
+            movimientos.append(MovimientoInventario(
+                empresa=empresa,
+                producto=producto,
+                almacen=almacen,
+                tipo_movimiento=tipo_movimiento,
+                cantidad=cantidad,
+                costo_unitario=linea['costo_unitario'],
+                referencia=linea.get('referencia', referencia),
+                lote=lote,
+                usuario=usuario,
+                notas=linea.get('notas', notas),
+                tipo_documento_origen=linea.get(
+                    'tipo_documento_origen', 'AJUSTE' if 'AJUSTE' in tipo_movimiento else None
+                ),
+                documento_origen_id=linea.get('documento_origen_id'),
+                usuario_creacion=usuario,
+                usuario_modificacion=usuario
+            ))
+            ServicioInventario._aplicar_movimiento(
+                inventario, lote, tipo_movimiento, cantidad, linea['costo_unitario']
+            )
+            if lote and lote.cantidad_disponible < 0:
+                raise ValidationError(f"Lote {lote.codigo_lote}: {ERROR_CANTIDAD_NEGATIVA}")
+
+        ahora = timezone.now()
+        MovimientoInventario.objects.bulk_create(movimientos, batch_size=TAMANO_LOTE_MOVIMIENTOS)
+        for inventario in inventarios.values():
+            inventario.fecha_actualizacion = ahora
+        InventarioProducto.objects.bulk_update(
+            inventarios.values(),
+            ['cantidad_disponible', 'costo_promedio', 'costo_unitario_actual', 'fecha_actualizacion'],
+            batch_size=TAMANO_LOTE_MOVIMIENTOS
+        )
+        if lotes:
+            for lote in lotes.values():
+                lote.fecha_actualizacion = ahora
+            Lote.objects.bulk_update(
+                lotes.values(), ['cantidad_disponible', 'estado', 'fecha_actualizacion'],
+                batch_size=TAMANO_LOTE_MOVIMIENTOS
+            )
+
+        movimientos_registrados.send(sender=MovimientoInventario, movimientos=movimientos)
+        logger.info(
+            f"Movimientos registrados en lote: {len(movimientos)} "
+            f"({len(inventarios)} inventarios, {len(lotes)} lotes)"
+        )
+        return movimientos
     
     @staticmethod
     @transaction.atomic
@@ -187,201 +383,406 @@ class ServicioInventario:
         logger.info(f"Reserva cancelada: id={reserva.id}")
         return reserva
 
+    @staticmethod
+    def ajustar_cantidad_reservada(inventario_id, diferencia):
+        """
+        Suma `diferencia` al contador cantidad_reservada con un UPDATE atómico.
+
+        Lo llaman las señales de ReservaStock; el incremento se resuelve en
+        la base de datos (F()), por lo que no se pierden actualizaciones
+        concurrentes.
+        """
+        if inventario_id is None or not diferencia:
+            return
+        InventarioProducto.objects.filter(pk=inventario_id).update(
+            cantidad_reservada=F('cantidad_reservada') + diferencia
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def vencer_reservas(ahora=None):
+        """
+        Marca como VENCIDA las reservas pendientes con fecha_vencimiento pasada
+        y descuenta sus cantidades de cantidad_reservada.
+
+        Returns:
+            int: Reservas vencidas
+        """
+        ahora = ahora or timezone.now()
+        vencidas = ReservaStock.objects.select_for_update().filter(
+            estado=ESTADO_RESERVA_PENDIENTE,
+            fecha_vencimiento__lt=ahora
+        )
+        ids = list(vencidas.values_list('id', flat=True))
+        if not ids:
+            return 0
+
+        totales = (
+            ReservaStock.objects.filter(id__in=ids)
+            .values('inventario_id').annotate(total=Sum('cantidad_reservada'))
+            .order_by('inventario_id')
+        )
+        # update() no emite señales: el contador se ajusta aquí
+        for fila in totales:
+            ServicioInventario.ajustar_cantidad_reservada(fila['inventario_id'], -fila['total'])
+        ReservaStock.objects.filter(id__in=ids).update(
+            estado=ESTADO_RESERVA_VENCIDA, fecha_actualizacion=ahora
+        )
+
+        logger.info(f"Reservas vencidas: {len(ids)}")
+        return len(ids)
+
+    @staticmethod
+    def _reservado_segun_reservas():
+        """Subquery con la suma de reservas activas del inventario externo."""
+        return Coalesce(
+            Subquery(
+                ReservaStock.objects.filter(
+                    inventario=OuterRef('pk'),
+                    estado__in=ESTADOS_RESERVA_ACTIVOS
+                ).values('inventario').annotate(total=Sum('cantidad_reservada')).values('total')
+            ),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+
+    @staticmethod
+    def reconciliar_reservas(empresa_id=None, corregir=False):
+        """
+        Compara cantidad_reservada con la suma de reservas activas.
+
+        Args:
+            empresa_id: Limita la verificación a una empresa
+            corregir: Si True, reemplaza los contadores con diferencias por
+                el valor calculado
+
+        Returns:
+            list de dict (inventario_id, producto_id, almacen_id, registrado,
+            calculado) con los inventarios cuyo contador no coincide
+        """
+        inventarios = InventarioProducto.objects.all()
+        if empresa_id:
+            inventarios = inventarios.filter(empresa_id=empresa_id)
+
+        with transaction.atomic():
+            diferencias = list(
+                inventarios.annotate(calculado=ServicioInventario._reservado_segun_reservas())
+                .exclude(cantidad_reservada=F('calculado'))
+                .order_by('id')
+                .values('id', 'producto_id', 'almacen_id', 'cantidad_reservada', 'calculado')
+            )
+            if corregir and diferencias:
+                InventarioProducto.objects.filter(
+                    id__in=[fila['id'] for fila in diferencias]
+                ).update(cantidad_reservada=ServicioInventario._reservado_segun_reservas())
+
+        if diferencias:
+            logger.warning(
+                f"Contadores de stock reservado con diferencias: {len(diferencias)}"
+                f"{' (corregidos)' if corregir else ''}"
+            )
+        return [
+            {
+                'inventario_id': fila['id'],
+                'producto_id': fila['producto_id'],
+                'almacen_id': fila['almacen_id'],
+                'registrado': fila['cantidad_reservada'],
+                'calculado': fila['calculado'],
+            }
+            for fila in diferencias
+        ]
+
 
 class ServicioAlertasInventario:
-    """Servicio para generar y gestionar alertas de inventario"""
-    
+    """
+    Servicio para generar y gestionar alertas de inventario.
+
+    Cada tipo de alerta se sincroniza por conjuntos (ver _sincronizar): la
+    condición del tipo es un QuerySet sobre InventarioProducto o Lote, las
+    alertas abiertas cuya condición ya no se cumple se resuelven con un solo
+    UPDATE y los candidatos sin alerta abierta se obtienen con un anti-join
+    (NOT EXISTS) en la base de datos y se insertan con un solo bulk_create.
+
+    bulk_create y update() no emiten post_save: al terminar se envía la señal
+    alertas_sincronizadas con las empresas cuyas alertas cambiaron.
+    """
+
     @staticmethod
-    def verificar_stock_bajo():
-        """Genera alertas para productos bajo mínimo"""
+    def _condicion_stock_bajo(empresa_id=None):
+        """Inventarios bajo mínimo que no están en cero (STOCK_BAJO)"""
         inventarios = InventarioProducto.objects.filter(
             cantidad_disponible__lte=F('stock_minimo'),
             producto__activo=True
-        ).select_related('producto', 'almacen', 'empresa')
-        
-        alertas_creadas = 0
-        for inventario in inventarios:
-            if inventario.cantidad_disponible == 0:
-                tipo = 'STOCK_AGOTADO'
-                prioridad = 'CRITICA'
-            else:
-                tipo = 'STOCK_BAJO'
-                prioridad = 'ALTA' if inventario.cantidad_disponible < inventario.punto_reorden else 'MEDIA'
-            
-            # Verificar si ya existe una alerta activa
-            existe_alerta = AlertaInventario.objects.filter(
-                inventario=inventario,
-                tipo=tipo,
-                resuelta=False
-            ).exists()
-            
-            if not existe_alerta:
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                # Usar el primer usuario del sistema o None si no hay usuarios
-                usuario_creacion = User.objects.filter(is_active=True).first()
-                AlertaInventario.objects.create(
-                    empresa=inventario.empresa,
-                    inventario=inventario,
-                    tipo=tipo,
-                    prioridad=prioridad,
-                    mensaje=(
-                        f"Stock bajo mínimo para {inventario.producto.nombre} en {inventario.almacen.nombre}. "
-                        f"Disponible: {inventario.cantidad_disponible}, "
-                        f"Mínimo: {inventario.stock_minimo}"
-                    ),
-                    usuario_creacion=usuario_creacion,
-                    usuario_modificacion=usuario_creacion
-                )
-                alertas_creadas += 1
-        
-        return alertas_creadas
-    
+        ).exclude(cantidad_disponible=0)
+        return inventarios.filter(empresa_id=empresa_id) if empresa_id else inventarios
+
     @staticmethod
-    def verificar_vencimientos(dias_antes=30):
-        """Genera alertas para lotes próximos a vencer"""
-        fecha_limite = timezone.now().date() + timedelta(days=dias_antes)
-        fecha_hoy = timezone.now().date()
-        
-        # Lotes próximos a vencer
+    def _condicion_stock_agotado(empresa_id=None):
+        """Inventarios sin existencias con mínimo no negativo (STOCK_AGOTADO)"""
+        inventarios = InventarioProducto.objects.filter(
+            cantidad_disponible=0,
+            stock_minimo__gte=0,
+            producto__activo=True
+        )
+        return inventarios.filter(empresa_id=empresa_id) if empresa_id else inventarios
+
+    @staticmethod
+    def _condicion_stock_excesivo(empresa_id=None):
+        """Inventarios sobre el máximo (STOCK_EXCESIVO)"""
+        inventarios = InventarioProducto.objects.filter(
+            cantidad_disponible__gte=F('stock_maximo'),
+            stock_maximo__gt=0,
+            producto__activo=True
+        )
+        return inventarios.filter(empresa_id=empresa_id) if empresa_id else inventarios
+
+    @staticmethod
+    def _condicion_vencimiento_proximo(fecha_hoy, dias_antes, empresa_id=None):
+        """Lotes disponibles que vencen dentro de dias_antes (VENCIMIENTO_PROXIMO)"""
         lotes = Lote.objects.filter(
-            fecha_vencimiento__lte=fecha_limite,
+            fecha_vencimiento__lte=fecha_hoy + timedelta(days=dias_antes),
             fecha_vencimiento__gte=fecha_hoy,
             estado='DISPONIBLE',
             cantidad_disponible__gt=0
-        ).select_related('producto', 'almacen', 'empresa')
-        
-        alertas_creadas = 0
-        for lote in lotes:
-            dias_restantes = (lote.fecha_vencimiento - fecha_hoy).days
-            tipo = 'VENCIMIENTO_PROXIMO'
-            
-            if dias_restantes <= 7:
-                prioridad = 'CRITICA'
-            elif dias_restantes <= 15:
-                prioridad = 'ALTA'
-            else:
-                prioridad = 'MEDIA'
-            
-            # Verificar si ya existe una alerta activa
-            existe_alerta = AlertaInventario.objects.filter(
-                lote=lote,
-                tipo=tipo,
-                resuelta=False
-            ).exists()
-            
-            if not existe_alerta:
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                usuario_creacion = User.objects.filter(is_active=True).first()
-                AlertaInventario.objects.create(
-                    empresa=lote.empresa,
-                    lote=lote,
-                    tipo=tipo,
-                    prioridad=prioridad,
-                    mensaje=(
-                        f"Lote {lote.codigo_lote} de {lote.producto.nombre} vence en {dias_restantes} días "
-                        f"({lote.fecha_vencimiento.strftime('%d/%m/%Y')})"
-                    ),
-                    usuario_creacion=usuario_creacion,
-                    usuario_modificacion=usuario_creacion
-                )
-                alertas_creadas += 1
-        
-        # Lotes vencidos
-        lotes_vencidos = Lote.objects.filter(
+        )
+        return lotes.filter(empresa_id=empresa_id) if empresa_id else lotes
+
+    @staticmethod
+    def _condicion_vencimiento_vencido(fecha_hoy, empresa_id=None):
+        """Lotes disponibles con fecha de vencimiento pasada (VENCIMIENTO_VENCIDO)"""
+        lotes = Lote.objects.filter(
             fecha_vencimiento__lt=fecha_hoy,
             estado='DISPONIBLE',
             cantidad_disponible__gt=0
-        ).select_related('producto', 'almacen', 'empresa')
-        
-        for lote in lotes_vencidos:
-            tipo = 'VENCIMIENTO_VENCIDO'
-            prioridad = 'CRITICA'
-            
-            existe_alerta = AlertaInventario.objects.filter(
-                lote=lote,
-                tipo=tipo,
-                resuelta=False
-            ).exists()
-            
-            if not existe_alerta:
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                usuario_creacion = User.objects.filter(is_active=True).first()
-                dias_vencido = (fecha_hoy - lote.fecha_vencimiento).days
-                AlertaInventario.objects.create(
-                    empresa=lote.empresa,
-                    lote=lote,
-                    tipo=tipo,
-                    prioridad=prioridad,
-                    mensaje=(
-                        f"Lote {lote.codigo_lote} de {lote.producto.nombre} está vencido "
-                        f"desde hace {dias_vencido} días ({lote.fecha_vencimiento.strftime('%d/%m/%Y')})"
-                    ),
-                    usuario_creacion=usuario_creacion,
-                    usuario_modificacion=usuario_creacion
-                )
-                alertas_creadas += 1
-        
-        return alertas_creadas
-    
+        )
+        return lotes.filter(empresa_id=empresa_id) if empresa_id else lotes
+
     @staticmethod
-    def verificar_stock_excesivo():
-        """Genera alertas para productos con stock excesivo"""
-        inventarios = InventarioProducto.objects.filter(
-            cantidad_disponible__gte=F('stock_maximo'),
-            stock_maximo__gt=0,
-            producto__activo=True
-        ).select_related('producto', 'almacen', 'empresa')
-        
-        alertas_creadas = 0
-        for inventario in inventarios:
-            tipo = 'STOCK_EXCESIVO'
-            prioridad = 'MEDIA'
-            
-            existe_alerta = AlertaInventario.objects.filter(
-                inventario=inventario,
+    def _usuarios_creacion(empresa_ids):
+        """
+        Usuario de auditoría de las alertas de cada empresa: el primer
+        usuario activo de la empresa, o el primero del sistema si no tiene.
+
+        Returns:
+            dict {empresa_id: usuario_id}
+        """
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+
+        activos = User.objects.filter(is_active=True)
+        usuarios = dict(
+            activos.filter(empresa_id__in=[e for e in empresa_ids if e is not None])
+            .values('empresa_id').annotate(primero=Min('id')).values_list('empresa_id', 'primero')
+        )
+        if set(empresa_ids) - set(usuarios):
+            respaldo = activos.order_by('id').values_list('id', flat=True).first()
+            usuarios = {empresa_id: usuarios.get(empresa_id, respaldo) for empresa_id in empresa_ids}
+        return usuarios
+
+    @staticmethod
+    def _sincronizar(tipo, candidatos, campo, campos, construir, empresas, empresa_id=None):
+        """
+        Sincroniza las alertas abiertas de un tipo con su condición.
+
+        Args:
+            tipo: Tipo de AlertaInventario
+            candidatos: QuerySet de InventarioProducto o Lote que cumplen la condición
+            campo: 'inventario' o 'lote', según el modelo de candidatos
+            campos: Columnas que necesita construir()
+            construir: Función fila -> (prioridad, mensaje)
+            empresas: set al que se agregan las empresas con alertas creadas o resueltas
+            empresa_id: Limita la sincronización a una empresa
+
+        Returns:
+            tuple (alertas creadas, alertas resueltas)
+        """
+        ahora = timezone.now()
+        abiertas = AlertaInventario.objects.filter(tipo=tipo, resuelta=False, **{f'{campo}__isnull': False})
+        if empresa_id:
+            abiertas = abiertas.filter(empresa_id=empresa_id)
+
+        # La condición dejó de cumplirse: se resuelven en un solo UPDATE
+        obsoletas = abiertas.filter(~Exists(candidatos.filter(pk=OuterRef(f'{campo}_id'))))
+        empresas_obsoletas = set(obsoletas.values_list('empresa_id', flat=True).distinct())
+        resueltas = obsoletas.update(resuelta=True, fecha_resuelta=ahora, fecha_actualizacion=ahora)
+        if resueltas:
+            empresas |= empresas_obsoletas
+
+        # Anti-join: candidatos sin alerta abierta del tipo
+        filas = list(
+            candidatos.filter(
+                ~Exists(AlertaInventario.objects.filter(tipo=tipo, resuelta=False, **{campo: OuterRef('pk')}))
+            ).values('id', 'empresa_id', *campos)
+        )
+        if not filas:
+            return 0, resueltas
+
+        usuarios = ServicioAlertasInventario._usuarios_creacion({fila['empresa_id'] for fila in filas})
+        alertas = []
+        for fila in filas:
+            prioridad, mensaje = construir(fila)
+            usuario_id = usuarios.get(fila['empresa_id'])
+            alertas.append(AlertaInventario(
+                empresa_id=fila['empresa_id'],
                 tipo=tipo,
-                resuelta=False
-            ).exists()
-            
-            if not existe_alerta:
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                usuario_creacion = User.objects.filter(is_active=True).first()
-                AlertaInventario.objects.create(
-                    empresa=inventario.empresa,
-                    inventario=inventario,
-                    tipo=tipo,
-                    prioridad=prioridad,
-                    mensaje=(
-                        f"Stock excesivo para {inventario.producto.nombre} en {inventario.almacen.nombre}. "
-                        f"Disponible: {inventario.cantidad_disponible}, "
-                        f"Máximo: {inventario.stock_maximo}"
-                    ),
-                    usuario_creacion=usuario_creacion,
-                    usuario_modificacion=usuario_creacion
-                )
-                alertas_creadas += 1
-        
-        return alertas_creadas
-    
+                prioridad=prioridad,
+                mensaje=mensaje,
+                usuario_creacion_id=usuario_id,
+                usuario_modificacion_id=usuario_id,
+                **{f'{campo}_id': fila['id']}
+            ))
+        AlertaInventario.objects.bulk_create(alertas, batch_size=TAMANO_LOTE_ALERTAS)
+        empresas.update(fila['empresa_id'] for fila in filas)
+        return len(alertas), resueltas
+
+    @staticmethod
+    def _notificar(empresas):
+        """Envía alertas_sincronizadas si alguna empresa tuvo alertas creadas o resueltas"""
+        from .signals import alertas_sincronizadas
+
+        empresas.discard(None)
+        if empresas:
+            alertas_sincronizadas.send(sender=AlertaInventario, empresa_ids=sorted(empresas))
+
+    @staticmethod
+    def _stock_bajo(empresas, empresa_id=None):
+        """Sincroniza STOCK_BAJO y STOCK_AGOTADO. Returns: (creadas, resueltas)"""
+        campos = ('producto__nombre', 'almacen__nombre', 'cantidad_disponible', 'stock_minimo', 'punto_reorden')
+
+        def mensaje(fila):
+            return (
+                f"Stock bajo mínimo para {fila['producto__nombre']} en {fila['almacen__nombre']}. "
+                f"Disponible: {fila['cantidad_disponible']}, "
+                f"Mínimo: {fila['stock_minimo']}"
+            )
+
+        def bajo(fila):
+            prioridad = PRIORIDAD_ALTA if fila['cantidad_disponible'] < fila['punto_reorden'] else PRIORIDAD_MEDIA
+            return prioridad, mensaje(fila)
+
+        creadas_bajo, resueltas_bajo = ServicioAlertasInventario._sincronizar(
+            TIPO_ALERTA_STOCK_BAJO, ServicioAlertasInventario._condicion_stock_bajo(empresa_id),
+            'inventario', campos, bajo, empresas, empresa_id
+        )
+        creadas_agotado, resueltas_agotado = ServicioAlertasInventario._sincronizar(
+            TIPO_ALERTA_STOCK_AGOTADO, ServicioAlertasInventario._condicion_stock_agotado(empresa_id),
+            'inventario', campos, lambda fila: (PRIORIDAD_CRITICA, mensaje(fila)), empresas, empresa_id
+        )
+        return creadas_bajo + creadas_agotado, resueltas_bajo + resueltas_agotado
+
     @staticmethod
-    def generar_todas_las_alertas():
-        """Genera todas las alertas de inventario"""
-        stock_bajo = ServicioAlertasInventario.verificar_stock_bajo()
-        vencimientos = ServicioAlertasInventario.verificar_vencimientos()
-        stock_excesivo = ServicioAlertasInventario.verificar_stock_excesivo()
+    def _vencimientos(empresas, dias_antes=DIAS_ANTES_VENCIMIENTO_ALERTA, empresa_id=None):
+        """Sincroniza VENCIMIENTO_PROXIMO y VENCIMIENTO_VENCIDO. Returns: (creadas, resueltas)"""
+        fecha_hoy = timezone.localdate()
+        campos = ('codigo_lote', 'producto__nombre', 'fecha_vencimiento')
+
+        def proximo(fila):
+            dias_restantes = (fila['fecha_vencimiento'] - fecha_hoy).days
+            if dias_restantes <= DIAS_CRITICO_VENCIMIENTO:
+                prioridad = PRIORIDAD_CRITICA
+            elif dias_restantes <= DIAS_ALTA_PRIORIDAD_VENCIMIENTO:
+                prioridad = PRIORIDAD_ALTA
+            else:
+                prioridad = PRIORIDAD_MEDIA
+            return prioridad, (
+                f"Lote {fila['codigo_lote']} de {fila['producto__nombre']} vence en {dias_restantes} días "
+                f"({fila['fecha_vencimiento'].strftime('%d/%m/%Y')})"
+            )
+
+        def vencido(fila):
+            dias_vencido = (fecha_hoy - fila['fecha_vencimiento']).days
+            return PRIORIDAD_CRITICA, (
+                f"Lote {fila['codigo_lote']} de {fila['producto__nombre']} está vencido "
+                f"desde hace {dias_vencido} días ({fila['fecha_vencimiento'].strftime('%d/%m/%Y')})"
+            )
+
+        creadas_proximo, resueltas_proximo = ServicioAlertasInventario._sincronizar(
+            TIPO_ALERTA_VENCIMIENTO_PROXIMO,
+            ServicioAlertasInventario._condicion_vencimiento_proximo(fecha_hoy, dias_antes, empresa_id),
+            'lote', campos, proximo, empresas, empresa_id
+        )
+        creadas_vencido, resueltas_vencido = ServicioAlertasInventario._sincronizar(
+            TIPO_ALERTA_VENCIMIENTO_VENCIDO,
+            ServicioAlertasInventario._condicion_vencimiento_vencido(fecha_hoy, empresa_id),
+            'lote', campos, vencido, empresas, empresa_id
+        )
+        return creadas_proximo + creadas_vencido, resueltas_proximo + resueltas_vencido
+
+    @staticmethod
+    def _stock_excesivo(empresas, empresa_id=None):
+        """Sincroniza STOCK_EXCESIVO. Returns: (creadas, resueltas)"""
+        def excesivo(fila):
+            return PRIORIDAD_MEDIA, (
+                f"Stock excesivo para {fila['producto__nombre']} en {fila['almacen__nombre']}. "
+                f"Disponible: {fila['cantidad_disponible']}, "
+                f"Máximo: {fila['stock_maximo']}"
+            )
+
+        return ServicioAlertasInventario._sincronizar(
+            TIPO_ALERTA_STOCK_EXCESIVO, ServicioAlertasInventario._condicion_stock_excesivo(empresa_id),
+            'inventario', ('producto__nombre', 'almacen__nombre', 'cantidad_disponible', 'stock_maximo'),
+            excesivo, empresas, empresa_id
+        )
+
+    @staticmethod
+    def verificar_stock_bajo(empresa_id=None):
+        """Genera alertas para productos bajo mínimo. Returns: alertas creadas"""
+        empresas = set()
+        creadas = ServicioAlertasInventario._stock_bajo(empresas, empresa_id)[0]
+        ServicioAlertasInventario._notificar(empresas)
+        return creadas
+
+    @staticmethod
+    def verificar_vencimientos(dias_antes=DIAS_ANTES_VENCIMIENTO_ALERTA, empresa_id=None):
+        """Genera alertas para lotes próximos a vencer o vencidos. Returns: alertas creadas"""
+        empresas = set()
+        creadas = ServicioAlertasInventario._vencimientos(empresas, dias_antes, empresa_id)[0]
+        ServicioAlertasInventario._notificar(empresas)
+        return creadas
+
+    @staticmethod
+    def verificar_stock_excesivo(empresa_id=None):
+        """Genera alertas para productos con stock excesivo. Returns: alertas creadas"""
+        empresas = set()
+        creadas = ServicioAlertasInventario._stock_excesivo(empresas, empresa_id)[0]
+        ServicioAlertasInventario._notificar(empresas)
+        return creadas
+
+    @staticmethod
+    def generar_todas_las_alertas(empresa_id=None, dias_antes=DIAS_ANTES_VENCIMIENTO_ALERTA):
+        """
+        Genera todas las alertas de inventario y resuelve las que ya no aplican.
+
+        Args:
+            empresa_id: Limita la generación a una empresa (por defecto, todas)
+            dias_antes: Días antes del vencimiento para alertar
+
+        Returns:
+            dict con las alertas creadas por grupo (stock_bajo, vencimientos,
+            stock_excesivo), total y resueltas
+        """
+        empresas = set()
+        with transaction.atomic():
+            stock_bajo, resueltas_stock = ServicioAlertasInventario._stock_bajo(empresas, empresa_id)
+            vencimientos, resueltas_vencimiento = ServicioAlertasInventario._vencimientos(
+                empresas, dias_antes, empresa_id
+            )
+            stock_excesivo, resueltas_excesivo = ServicioAlertasInventario._stock_excesivo(empresas, empresa_id)
+            ServicioAlertasInventario._notificar(empresas)
 
         total = stock_bajo + vencimientos + stock_excesivo
-        logger.info(f"Alertas generadas: {total} (stock_bajo={stock_bajo}, vencimientos={vencimientos}, stock_excesivo={stock_excesivo})")
+        resueltas = resueltas_stock + resueltas_vencimiento + resueltas_excesivo
+        logger.info(
+            f"Alertas generadas: {total} (stock_bajo={stock_bajo}, vencimientos={vencimientos}, "
+            f"stock_excesivo={stock_excesivo}), resueltas: {resueltas}, empresa={empresa_id or 'todas'}"
+        )
 
         return {
             'stock_bajo': stock_bajo,
             'vencimientos': vencimientos,
             'stock_excesivo': stock_excesivo,
-            'total': total
+            'total': total,
+            'resueltas': resueltas,
         }
 
 
@@ -391,105 +792,268 @@ class ServicioKardex:
 
     El Kardex es un registro detallado de movimientos de inventario
     que muestra el saldo acumulado después de cada operación.
+
+    Los saldos acumulados (cantidad y valor) se calculan en la base de datos
+    con SUM(...) OVER (ORDER BY fecha, id); los saldos inicial y final y el
+    total de movimientos salen de un único aggregate. Las entradas suman,
+    las salidas restan y los demás tipos (AJUSTE_*) no alteran el saldo,
+    igual que en registrar_movimiento.
+
+    Paginación por keyset: cada página termina en un cursor (fecha, id) y la
+    siguiente empieza después de él, sin OFFSET.
     """
 
+    ORDEN = ('fecha', 'id')
+
+    @staticmethod
+    def _signo(expresion, output_field):
+        """expresion con signo según el tipo de movimiento (0 si no afecta el saldo)"""
+        return Case(
+            When(tipo_movimiento__in=TIPOS_MOVIMIENTO_ENTRADA, then=expresion),
+            When(tipo_movimiento__in=TIPOS_MOVIMIENTO_SALIDA, then=-expresion),
+            default=Value(0),
+            output_field=output_field,
+        )
+
+    @staticmethod
+    def _cantidad_con_signo():
+        return ServicioKardex._signo(F('cantidad'), DecimalField(max_digits=14, decimal_places=2))
+
     @staticmethod
-    def obtener_kardex(producto_id, almacen_id=None, fecha_desde=None, fecha_hasta=None, empresa=None):
+    def _valor_con_signo():
+        return ServicioKardex._signo(
+            F('cantidad') * F('costo_unitario'), DecimalField(max_digits=26, decimal_places=4)
+        )
+
+    @staticmethod
+    def _filtros(producto_id, almacen_id=None, empresa=None):
+        filtros = Q(producto_id=producto_id)
+        if almacen_id:
+            filtros &= Q(almacen_id=almacen_id)
+        if empresa:
+            filtros &= Q(empresa=empresa)
+        return filtros
+
+    @staticmethod
+    def formatear_cursor(fecha, movimiento_id):
+        """Cursor '<fecha ISO UTC>,<id>' de un movimiento"""
+        fecha = fecha.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        return f'{fecha},{movimiento_id}'
+
+    @staticmethod
+    def interpretar_cursor(texto):
+        """
+        Interpreta un cursor de formatear_cursor().
+
+        Returns:
+            tuple (fecha aware, id)
+
+        Raises:
+            ValueError: Si el cursor no tiene el formato esperado
+        """
+        fecha, _, movimiento_id = (texto or '').strip().rpartition(',')
+        fecha = datetime.fromisoformat(fecha.replace(' ', '+'))
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha, dt_timezone.utc)
+        return fecha, int(movimiento_id)
+
+    @staticmethod
+    def _saldos(filtros, inicio, fin, despues_de):
+        """
+        Saldos inicial, de apertura de la página y final, y total de
+        movimientos del período, en una sola consulta sobre los movimientos
+        posteriores al último corte de SaldoInventario anterior al período.
+        """
+        corte = ServicioSaldosInventario.ultimo_corte(filtros, inicio) if inicio else None
+        movimientos = MovimientoInventario.objects.filter(filtros)
+        if corte:
+            movimientos = movimientos.filter(fecha__gte=corte['fecha_corte'])
+        cero = Decimal('0')
+        base_cantidad = corte['cantidad'] if corte else cero
+        base_valor = corte['valor'] if corte else cero
+
+        cantidad = ServicioKardex._cantidad_con_signo()
+        valor = ServicioKardex._valor_con_signo()
+        antes_periodo = Q(fecha__lt=inicio) if inicio else None
+        hasta_fin = Q(fecha__lt=fin) if fin else None
+        periodo = Q(**filtro_rango('fecha', inicio, fin))
+
+        agregados = {
+            'final_cantidad': Sum(cantidad, filter=hasta_fin),
+            'final_valor': Sum(valor, filter=hasta_fin),
+            'total_movimientos': Count('id', filter=periodo or None),
+        }
+        if antes_periodo is not None:
+            agregados['inicial_cantidad'] = Sum(cantidad, filter=antes_periodo)
+            agregados['inicial_valor'] = Sum(valor, filter=antes_periodo)
+        if despues_de:
+            fecha, movimiento_id = despues_de
+            antes_pagina = Q(fecha__lt=fecha) | Q(fecha=fecha, id__lte=movimiento_id)
+            if antes_periodo is not None:
+                antes_pagina |= antes_periodo
+            agregados['apertura_cantidad'] = Sum(cantidad, filter=antes_pagina)
+            agregados['apertura_valor'] = Sum(valor, filter=antes_pagina)
+
+        totales = movimientos.aggregate(**agregados)
+        saldo_inicial = {
+            'cantidad': base_cantidad + (totales.get('inicial_cantidad') or cero),
+            'valor': base_valor + (totales.get('inicial_valor') or cero),
+        }
+        apertura = saldo_inicial
+        if despues_de:
+            apertura = {
+                'cantidad': base_cantidad + (totales['apertura_cantidad'] or cero),
+                'valor': base_valor + (totales['apertura_valor'] or cero),
+            }
+        saldo_final = {
+            'cantidad': base_cantidad + (totales['final_cantidad'] or cero),
+            'valor': base_valor + (totales['final_valor'] or cero),
+            'total_movimientos': totales['total_movimientos'],
+        }
+        return saldo_inicial, apertura, saldo_final
+
+    @staticmethod
+    def _movimientos(filtros, inicio, fin, despues_de=None):
+        """
+        Movimientos del período (después del cursor) con los saldos acumulados
+        desde el primero de ellos (saldo_parcial, saldo_valor_parcial).
+        """
+        queryset = MovimientoInventario.objects.filter(filtros, **filtro_rango('fecha', inicio, fin))
+        if despues_de:
+            fecha, movimiento_id = despues_de
+            queryset = queryset.filter(Q(fecha__gt=fecha) | Q(fecha=fecha, id__gt=movimiento_id))
+
+        orden = [F(campo).asc() for campo in ServicioKardex.ORDEN]
+        return queryset.annotate(
+            cantidad_signo=ServicioKardex._cantidad_con_signo(),
+            saldo_parcial=Window(Sum(ServicioKardex._cantidad_con_signo()), order_by=orden),
+            saldo_valor_parcial=Window(Sum(ServicioKardex._valor_con_signo()), order_by=orden),
+            usuario_nombre=F('usuario__username'),
+            lote_codigo=F('lote__codigo_lote'),
+        ).order_by(*ServicioKardex.ORDEN).values(
+            'id', 'fecha', 'tipo_movimiento', 'referencia', 'cantidad', 'costo_unitario',
+            'cantidad_signo', 'saldo_parcial', 'saldo_valor_parcial', 'numero_serie',
+            'numero_lote_proveedor', 'lote_codigo', 'usuario_nombre', 'notas',
+        )
+
+    @staticmethod
+    def _fila(movimiento, apertura, tipos):
+        """Fila del Kardex (ver COLUMNAS_KARDEX) a partir de _movimientos()"""
+        cero = Decimal('0')
+        centavos = Decimal('0.01')
+        cantidad = movimiento['cantidad']
+        signo = movimiento['cantidad_signo'] or cero
+        saldo = apertura['cantidad'] + (movimiento['saldo_parcial'] or cero)
+        saldo_valor = apertura['valor'] + (movimiento['saldo_valor_parcial'] or cero)
+        return {
+            'id': movimiento['id'],
+            'fecha': movimiento['fecha'],
+            'tipo_movimiento': movimiento['tipo_movimiento'],
+            'tipo_movimiento_display': tipos.get(movimiento['tipo_movimiento'], movimiento['tipo_movimiento']),
+            'referencia': movimiento['referencia'],
+            'entrada': (cantidad if signo > 0 else cero).quantize(centavos),
+            'salida': (cantidad if signo < 0 else cero).quantize(centavos),
+            'costo_unitario': movimiento['costo_unitario'],
+            'valor_movimiento': (cantidad * movimiento['costo_unitario']).quantize(centavos),
+            'saldo': saldo.quantize(centavos),
+            'saldo_valor': saldo_valor.quantize(centavos),
+            'numero_serie': movimiento['numero_serie'],
+            'numero_lote_proveedor': movimiento['numero_lote_proveedor'],
+            'lote_codigo': movimiento['lote_codigo'],
+            'usuario': movimiento['usuario_nombre'],
+            'notas': movimiento['notas'],
+        }
+
+    @staticmethod
+    def obtener_kardex(
+        producto_id, almacen_id=None, fecha_desde=None, fecha_hasta=None, empresa=None,
+        despues_de=None, limite=None
+    ):
         """
         Genera el Kardex de un producto.
 
         Args:
             producto_id: ID del producto
             almacen_id: ID del almacén (opcional)
-            fecha_desde: Fecha inicial (opcional)
-            fecha_hasta: Fecha final (opcional)
+            fecha_desde: Primer día, date (opcional)
+            fecha_hasta: Último día incluido, date (opcional)
             empresa: Empresa para filtrar (opcional)
+            despues_de: Cursor (fecha, id) del último movimiento ya recibido (opcional)
+            limite: Máximo de movimientos a devolver (opcional, sin límite por defecto)
 
         Returns:
             dict con:
             - saldo_inicial: Cantidad y valor al inicio del período
             - movimientos: Lista de movimientos con saldo acumulado
-            - saldo_final: Cantidad y valor al final del período
+            - saldo_final: Cantidad, valor y total de movimientos del período
+            - siguiente: Cursor de la página siguiente, o None si no hay más
         """
-        from django.db.models import Sum, Q
-        from decimal import Decimal
+        filtros = ServicioKardex._filtros(producto_id, almacen_id, empresa)
+        inicio, fin = rango_dias(fecha_desde, fecha_hasta)
+        saldo_inicial, apertura, saldo_final = ServicioKardex._saldos(filtros, inicio, fin, despues_de)
 
-        # Construir filtros base
-        filtros = Q(producto_id=producto_id)
-        if almacen_id:
-            filtros &= Q(almacen_id=almacen_id)
-        if empresa:
-            filtros &= Q(empresa=empresa)
+        queryset = ServicioKardex._movimientos(filtros, inicio, fin, despues_de)
+        if limite:
+            queryset = queryset[:limite + 1]
+        movimientos = list(queryset)
 
-        # Calcular saldo inicial (movimientos antes de fecha_desde)
-        saldo_inicial = {'cantidad': Decimal('0'), 'valor': Decimal('0')}
-        if fecha_desde:
-            movimientos_anteriores = MovimientoInventario.objects.filter(
-                filtros,
-                fecha__lt=fecha_desde
-            ).aggregate(
-                total_entradas=Sum('cantidad', filter=Q(tipo_movimiento__in=TIPOS_MOVIMIENTO_ENTRADA)),
-                total_salidas=Sum('cantidad', filter=Q(tipo_movimiento__in=TIPOS_MOVIMIENTO_SALIDA))
-            )
-            entradas = movimientos_anteriores['total_entradas'] or Decimal('0')
-            salidas = movimientos_anteriores['total_salidas'] or Decimal('0')
-            saldo_inicial['cantidad'] = entradas - salidas
-
-        # Obtener movimientos del período
-        filtros_periodo = filtros
-        if fecha_desde:
-            filtros_periodo &= Q(fecha__gte=fecha_desde)
-        if fecha_hasta:
-            filtros_periodo &= Q(fecha__lte=fecha_hasta)
-
-        movimientos = MovimientoInventario.objects.filter(
-            filtros_periodo
-        ).select_related(
-            'producto', 'almacen', 'usuario_creacion'
-        ).order_by('fecha', 'id')
-
-        # Calcular saldo acumulado para cada movimiento
-        saldo_acumulado = saldo_inicial['cantidad']
-        resultado_movimientos = []
-
-        for mov in movimientos:
-            es_entrada = mov.tipo_movimiento in TIPOS_MOVIMIENTO_ENTRADA
-            if es_entrada:
-                entrada = mov.cantidad
-                salida = Decimal('0')
-                saldo_acumulado += mov.cantidad
-            else:
-                entrada = Decimal('0')
-                salida = mov.cantidad
-                saldo_acumulado -= mov.cantidad
-
-            resultado_movimientos.append({
-                'id': mov.id,
-                'fecha': mov.fecha,
-                'tipo': mov.tipo_movimiento,
-                'referencia': mov.referencia,
-                'entrada': entrada,
-                'salida': salida,
-                'costo_unitario': mov.costo_unitario,
-                'saldo': saldo_acumulado,
-                'valor_movimiento': abs(mov.cantidad) * (mov.costo_unitario or Decimal('0')),
-                'usuario': mov.usuario_creacion.username if mov.usuario_creacion else None,
-                'notas': mov.notas
-            })
+        siguiente = None
+        if limite and len(movimientos) > limite:
+            movimientos = movimientos[:limite]
+            siguiente = ServicioKardex.formatear_cursor(movimientos[-1]['fecha'], movimientos[-1]['id'])
 
+        tipos = dict(MovimientoInventario.TIPO_MOVIMIENTO_CHOICES)
         return {
             'producto_id': producto_id,
             'almacen_id': almacen_id,
             'fecha_desde': fecha_desde,
             'fecha_hasta': fecha_hasta,
             'saldo_inicial': saldo_inicial,
-            'movimientos': resultado_movimientos,
-            'saldo_final': {
-                'cantidad': saldo_acumulado,
-                'total_movimientos': len(resultado_movimientos)
-            }
+            'movimientos': [ServicioKardex._fila(m, apertura, tipos) for m in movimientos],
+            'saldo_final': saldo_final,
+            'siguiente': siguiente,
         }
 
+    @staticmethod
+    def iterar_kardex(producto_id, almacen_id=None, fecha_desde=None, fecha_hasta=None, empresa=None):
+        """
+        Recorre todas las filas del Kardex del período con memoria constante
+        (cursor de servidor, TAMANO_BLOQUE_KARDEX filas por lectura).
+
+        Yields:
+            dict con las columnas de COLUMNAS_KARDEX
+        """
+        filtros = ServicioKardex._filtros(producto_id, almacen_id, empresa)
+        inicio, fin = rango_dias(fecha_desde, fecha_hasta)
+        saldo_inicial, _, _ = ServicioKardex._saldos(filtros, inicio, fin, None)
+
+        tipos = dict(MovimientoInventario.TIPO_MOVIMIENTO_CHOICES)
+        movimientos = ServicioKardex._movimientos(filtros, inicio, fin)
+        for movimiento in movimientos.iterator(chunk_size=TAMANO_BLOQUE_KARDEX):
+            yield ServicioKardex._fila(movimiento, saldo_inicial, tipos)
+
+    @staticmethod
+    def exportar(formato, producto_id, almacen_id=None, fecha_desde=None, fecha_hasta=None, empresa=None):
+        """
+        Líneas del Kardex completo del período en CSV (con encabezado) o en
+        JSON lines, generadas a medida que se leen (apto para
+        StreamingHttpResponse).
+
+        Args:
+            formato: FORMATO_KARDEX_CSV o FORMATO_KARDEX_JSONL
+        """
+        filas = ServicioKardex.iterar_kardex(producto_id, almacen_id, fecha_desde, fecha_hasta, empresa)
+        if formato == FORMATO_KARDEX_CSV:
+            writer = csv.writer(Eco())
+            yield writer.writerow(COLUMNAS_KARDEX)
+            for fila in filas:
+                fila['fecha'] = timezone.localtime(fila['fecha']).isoformat()
+                yield writer.writerow([fila[columna] for columna in COLUMNAS_KARDEX])
+        else:
+            for fila in filas:
+                fila['fecha'] = timezone.localtime(fila['fecha'])
+                yield json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
     @staticmethod
     def obtener_resumen_rotacion(producto_id, almacen_id=None, dias=30, empresa=None):
         """
@@ -504,28 +1068,23 @@ class ServicioKardex:
         Returns:
             dict con índice de rotación y días de inventario
         """
-        from django.db.models import Sum, Q, Avg
-        from datetime import timedelta
-
-        fecha_desde = timezone.now().date() - timedelta(days=dias)
+        fecha_desde = inicio_del_dia(timezone.localdate() - timedelta(days=dias))
 
         # Filtros
-        filtros = Q(producto_id=producto_id, fecha__gte=fecha_desde)
-        if almacen_id:
-            filtros &= Q(almacen_id=almacen_id)
-        if empresa:
-            filtros &= Q(empresa=empresa)
+        filtros = ServicioKardex._filtros(producto_id, almacen_id, empresa)
 
         # Ventas/salidas del período
         salidas = MovimientoInventario.objects.filter(
             filtros,
+            fecha__gte=fecha_desde,
             tipo_movimiento__in=['SALIDA_VENTA', 'SALIDA_AJUSTE']
         ).aggregate(
             total=Sum('cantidad')
         )
         total_salidas = abs(salidas['total'] or 0)
 
-        # Inventario promedio
+        # Inventario promedio: saldo al inicio del período (último corte de
+        # SaldoInventario + movimientos desde él) y existencia actual
         inventario_actual = InventarioProducto.objects.filter(
             producto_id=producto_id
         )
@@ -534,9 +1093,9 @@ class ServicioKardex:
         if empresa:
             inventario_actual = inventario_actual.filter(empresa=empresa)
 
-        inv_promedio = inventario_actual.aggregate(
-            promedio=Avg('cantidad_disponible')
-        )['promedio'] or 1
+        existencia = inventario_actual.aggregate(total=Sum('cantidad_disponible'))['total'] or 0
+        saldo_inicial = ServicioSaldosInventario.saldo_al(fecha_desde, producto_id, almacen_id, empresa)
+        inv_promedio = (saldo_inicial['cantidad'] + existencia) / 2 or 1
 
         # Calcular rotación
         rotacion = float(total_salidas) / float(inv_promedio) if inv_promedio > 0 else 0
@@ -551,3 +1110,263 @@ class ServicioKardex:
             'dias_inventario': round(dias_inventario, 1)
         }
 
+
+class ServicioSaldosInventario:
+    """
+    Saldos de inventario por fecha de corte (SaldoInventario).
+
+    Cada corte guarda cantidad, valor y costo promedio por producto, almacén
+    y lote de todos los movimientos anteriores a fecha_corte. Un corte nuevo
+    se calcula desde el anterior más los movimientos entre ambos, y el saldo
+    a cualquier fecha es el último corte vigente más los movimientos desde
+    él: ninguna de las dos operaciones recorre el historial completo.
+
+    Los cortes con filas pendientes (un movimiento anterior al corte se
+    modificó o eliminó, ver signals.py) no se usan hasta que
+    recalcular_pendientes() los vuelve a calcular. Las actualizaciones
+    masivas de MovimientoInventario y los movimientos insertados con fecha
+    anterior a un corte existente no emiten señales que lo detecten: quien
+    los haga debe llamar a marcar_pendientes().
+    """
+
+    @staticmethod
+    def periodicidad():
+        return getattr(settings, 'INVENTARIO_PERIODICIDAD_SALDOS', PERIODICIDAD_SALDOS_MENSUAL)
+
+    @staticmethod
+    def siguiente_corte(fecha, periodicidad=None):
+        """
+        Primer corte posterior a una fecha.
+
+        Args:
+            fecha: datetime aware
+            periodicidad: mensual, semanal o diaria (default: settings)
+
+        Returns:
+            datetime aware: 00:00 local del primer día del período siguiente
+
+        Raises:
+            ValueError: Si la periodicidad no es válida
+        """
+        periodicidad = periodicidad or ServicioSaldosInventario.periodicidad()
+        dia = timezone.localtime(fecha).date()
+        if periodicidad == PERIODICIDAD_SALDOS_MENSUAL:
+            siguiente = date(dia.year + 1, 1, 1) if dia.month == 12 else date(dia.year, dia.month + 1, 1)
+        elif periodicidad == PERIODICIDAD_SALDOS_SEMANAL:
+            siguiente = dia + timedelta(days=7 - dia.weekday())
+        elif periodicidad == PERIODICIDAD_SALDOS_DIARIA:
+            siguiente = dia + timedelta(days=1)
+        else:
+            raise ValueError(ERROR_PERIODICIDAD_SALDOS.format(periodicidad=periodicidad))
+        return inicio_del_dia(siguiente)
+
+    @staticmethod
+    def cortes(desde, hasta, periodicidad=None):
+        """Cortes c con desde < c <= hasta, en orden."""
+        cortes = []
+        corte = ServicioSaldosInventario.siguiente_corte(desde, periodicidad)
+        while corte <= hasta:
+            cortes.append(corte)
+            corte = ServicioSaldosInventario.siguiente_corte(corte, periodicidad)
+        return cortes
+
+    @staticmethod
+    def _cortes_vigentes(alcance, antes_de, inclusive=True):
+        """Cortes del alcance sin filas pendientes, del más reciente al más antiguo."""
+        limite = {'fecha_corte__lte' if inclusive else 'fecha_corte__lt': antes_de}
+        return SaldoInventario.objects.filter(alcance, **limite).values('fecha_corte').annotate(
+            total_cantidad=Sum('cantidad'),
+            total_valor=Sum('valor'),
+            pendientes=Count('id', filter=Q(pendiente=True)),
+        ).filter(pendientes=0).order_by('-fecha_corte')
+
+    @staticmethod
+    def ultimo_corte(alcance, antes_de):
+        """
+        Último corte vigente en o antes de una fecha.
+
+        Args:
+            alcance: Q sobre producto_id, almacen_id, lote_id y/o empresa
+            antes_de: datetime aware
+
+        Returns:
+            dict (fecha_corte, cantidad, valor) sumado sobre el alcance, o None
+        """
+        corte = ServicioSaldosInventario._cortes_vigentes(alcance, antes_de).first()
+        if corte is None:
+            return None
+        return {
+            'fecha_corte': corte['fecha_corte'],
+            'cantidad': corte['total_cantidad'] or Decimal('0'),
+            'valor': corte['total_valor'] or Decimal('0'),
+        }
+
+    @staticmethod
+    def saldo_al(fecha, producto_id, almacen_id=None, empresa=None):
+        """
+        Saldo (cantidad y valor) de los movimientos anteriores a una fecha.
+
+        Returns:
+            dict con cantidad y valor
+        """
+        filtros = ServicioKardex._filtros(producto_id, almacen_id, empresa)
+        corte = ServicioSaldosInventario.ultimo_corte(filtros, fecha)
+        movimientos = MovimientoInventario.objects.filter(filtros, fecha__lt=fecha)
+        if corte:
+            movimientos = movimientos.filter(fecha__gte=corte['fecha_corte'])
+        totales = movimientos.aggregate(
+            total_cantidad=Sum(ServicioKardex._cantidad_con_signo()),
+            total_valor=Sum(ServicioKardex._valor_con_signo()),
+        )
+        cero = Decimal('0')
+        return {
+            'cantidad': (corte['cantidad'] if corte else cero) + (totales['total_cantidad'] or cero),
+            'valor': (corte['valor'] if corte else cero) + (totales['total_valor'] or cero),
+        }
+
+    @staticmethod
+    def _calcular(fecha_corte, alcance=Q()):
+        """
+        Saldos de un corte: corte vigente anterior + movimientos desde él.
+
+        Returns:
+            dict {(producto_id, almacen_id, lote_id): [empresa_id, cantidad, valor]}
+        """
+        cero = Decimal('0')
+        saldos = {}
+        previo = ServicioSaldosInventario._cortes_vigentes(alcance, fecha_corte, inclusive=False).first()
+        movimientos = MovimientoInventario.objects.filter(alcance, fecha__lt=fecha_corte)
+        if previo:
+            movimientos = movimientos.filter(fecha__gte=previo['fecha_corte'])
+            filas = SaldoInventario.objects.filter(alcance, fecha_corte=previo['fecha_corte']).values_list(
+                'producto_id', 'almacen_id', 'lote_id', 'empresa_id', 'cantidad', 'valor'
+            )
+            for producto_id, almacen_id, lote_id, empresa_id, cantidad, valor in filas:
+                saldos[(producto_id, almacen_id, lote_id)] = [empresa_id, cantidad, valor]
+
+        deltas = movimientos.values('producto_id', 'almacen_id', 'lote_id').annotate(
+            empresa_ref=Max('empresa_id'),
+            cantidad_total=Sum(ServicioKardex._cantidad_con_signo()),
+            valor_total=Sum(ServicioKardex._valor_con_signo()),
+        ).order_by()
+        for delta in deltas:
+            clave = (delta['producto_id'], delta['almacen_id'], delta['lote_id'])
+            saldo = saldos.setdefault(clave, [delta['empresa_ref'], cero, cero])
+            saldo[0] = saldo[0] or delta['empresa_ref']
+            saldo[1] += delta['cantidad_total'] or cero
+            saldo[2] += delta['valor_total'] or cero
+        return saldos
+
+    @staticmethod
+    def _escribir(fecha_corte, saldos, alcance=Q()):
+        """Reemplaza las filas del corte dentro del alcance. Returns: filas escritas"""
+        filas = []
+        for (producto_id, almacen_id, lote_id), (empresa_id, cantidad, valor) in saldos.items():
+            costo = (valor / cantidad).quantize(Decimal('0.0001')) if cantidad else Decimal('0')
+            filas.append(SaldoInventario(
+                empresa_id=empresa_id,
+                producto_id=producto_id,
+                almacen_id=almacen_id,
+                lote_id=lote_id,
+                fecha_corte=fecha_corte,
+                cantidad=cantidad,
+                valor=valor,
+                costo_promedio=costo,
+            ))
+        with transaction.atomic():
+            SaldoInventario.objects.filter(alcance, fecha_corte=fecha_corte).delete()
+            SaldoInventario.objects.bulk_create(filas, batch_size=TAMANO_LOTE_SALDOS)
+        return len(filas)
+
+    @staticmethod
+    def generar_corte(fecha_corte):
+        """
+        Genera (o regenera) todos los saldos de un corte.
+
+        Returns:
+            int: filas escritas
+        """
+        saldos = ServicioSaldosInventario._calcular(fecha_corte)
+        filas = ServicioSaldosInventario._escribir(fecha_corte, saldos)
+        logger.info(f"Saldos de inventario al {fecha_corte.isoformat()}: {filas} filas")
+        return filas
+
+    @staticmethod
+    def marcar_pendientes(producto_id, almacen_id, desde, empresa_id=None):
+        """
+        Marca como pendientes los cortes posteriores a `desde` de un producto
+        y almacén (un movimiento con esa fecha cambió).
+
+        En los cortes donde el producto y almacén aún no tienen filas se crea
+        una fila pendiente vacía, para que el corte no se tome como vigente
+        (ni como saldo cero) antes de recalcularlo.
+
+        Returns:
+            int: filas marcadas o creadas
+        """
+        marcadas = SaldoInventario.objects.filter(
+            producto_id=producto_id, almacen_id=almacen_id, fecha_corte__gt=desde, pendiente=False
+        ).update(pendiente=True)
+        cortes = SaldoInventario.objects.filter(fecha_corte__gt=desde).values_list(
+            'fecha_corte', flat=True
+        ).distinct().order_by()
+        creadas = SaldoInventario.objects.bulk_create(
+            [
+                SaldoInventario(
+                    empresa_id=empresa_id, producto_id=producto_id, almacen_id=almacen_id,
+                    fecha_corte=fecha_corte, pendiente=True,
+                )
+                for fecha_corte in cortes
+            ],
+            batch_size=TAMANO_LOTE_SALDOS,
+            ignore_conflicts=True,
+        )
+        return marcadas + len(creadas)
+
+    @staticmethod
+    def recalcular_pendientes():
+        """
+        Recalcula los cortes pendientes por producto y almacén, del más
+        antiguo al más reciente (cada uno parte del anterior ya recalculado).
+
+        Returns:
+            int: grupos (corte, producto, almacén) recalculados
+        """
+        grupos = list(
+            SaldoInventario.objects.filter(pendiente=True).values_list(
+                'fecha_corte', 'producto_id', 'almacen_id'
+            ).distinct().order_by('fecha_corte')
+        )
+        for fecha_corte, producto_id, almacen_id in grupos:
+            alcance = Q(producto_id=producto_id, almacen_id=almacen_id)
+            saldos = ServicioSaldosInventario._calcular(fecha_corte, alcance)
+            ServicioSaldosInventario._escribir(fecha_corte, saldos, alcance)
+        return len(grupos)
+
+    @staticmethod
+    def generar_pendientes(hasta=None, periodicidad=None):
+        """
+        Recalcula los cortes pendientes y genera los cortes vencidos desde
+        el último existente (o desde el primer movimiento) hasta `hasta`.
+
+        Args:
+            hasta: datetime aware (default: ahora)
+            periodicidad: mensual, semanal o diaria (default: settings)
+
+        Returns:
+            dict con recalculados, cortes (fechas ISO) y filas
+        """
+        hasta = hasta or timezone.now()
+        recalculados = ServicioSaldosInventario.recalcular_pendientes()
+
+        desde = SaldoInventario.objects.aggregate(ultimo=Max('fecha_corte'))['ultimo']
+        if desde is None:
+            desde = MovimientoInventario.objects.aggregate(primero=Min('fecha'))['primero']
+
+        cortes = ServicioSaldosInventario.cortes(desde, hasta, periodicidad) if desde else []
+        filas = sum(ServicioSaldosInventario.generar_corte(corte) for corte in cortes)
+        return {
+            'recalculados': recalculados,
+            'cortes': [corte.isoformat() for corte in cortes],
+            'filas': filas,
+        }
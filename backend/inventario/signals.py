@@ -0,0 +1,155 @@
+"""
+Señales para el módulo de Inventario
+
+- Mantiene InventarioProducto.cantidad_reservada al crear, modificar o
+  eliminar una ReservaStock (ServicioInventario.ajustar_cantidad_reservada).
+  Los cambios masivos de reservas deben ajustar el contador por su cuenta,
+  como ServicioInventario.vencer_reservas; el comando
+  reconciliar_stock_reservado detecta y corrige diferencias.
+- Define movimientos_registrados, que ServicioInventario.registrar_movimientos_lote
+  envía en lugar del post_save de cada movimiento (bulk_create no lo emite).
+- Define alertas_sincronizadas, que ServicioAlertasInventario envía tras crear
+  (bulk_create) o resolver (QuerySet.update) alertas, sin post_save por alerta.
+- Marca como pendientes los saldos por fecha de corte (SaldoInventario)
+posteriores a un movimiento que se modifica o elimina, o a un lote que se
+elimina; la tarea generar_saldos_inventario los recalcula.
+
+Un movimiento registrado por la aplicación no afecta cortes existentes:
+su fecha es la de creación (auto_now_add) y los cortes nunca son
+posteriores al momento en que se generan. Quien inserte movimientos con
+fecha pasada (p. ej. generar_datos_sinteticos, que desactiva
+auto_now_add) o use actualizaciones masivas (QuerySet.update, que no
+emiten señales) debe llamar a ServicioSaldosInventario.marcar_pendientes.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .constants import ESTADOS_RESERVA_ACTIVOS
+from .models import Lote, MovimientoInventario, ReservaStock
+from .services import ServicioInventario, ServicioSaldosInventario
+
+# Enviada con sender=MovimientoInventario y movimientos=[MovimientoInventario, ...]
+# al registrar movimientos con bulk_create
+movimientos_registrados = Signal()
+
+# Enviada con sender=AlertaInventario y empresa_ids=[id, ...] al sincronizar
+# alertas con bulk_create y update()
+alertas_sincronizadas = Signal()
+
+# Campos que determinan el saldo de un corte
+CAMPOS_SALDO = {'producto', 'almacen', 'lote', 'tipo_movimiento', 'cantidad', 'costo_unitario', 'fecha', 'empresa'}
+
+
+@receiver(pre_save, sender=MovimientoInventario)
+def movimiento_capturar_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Pre-save para MovimientoInventario.
+    Guarda producto, almacén y fecha previos del movimiento modificado.
+    """
+    instance._saldo_anterior = None
+    if raw or not instance.pk:
+        return
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & CAMPOS_SALDO:
+        return
+
+    instance._saldo_anterior = sender.objects.filter(pk=instance.pk).values_list(
+        'producto_id', 'almacen_id', 'fecha', 'empresa_id'
+    ).first()
+
+
+@receiver(post_save, sender=MovimientoInventario)
+def movimiento_marcar_saldos(sender, instance, created, raw=False, **kwargs):
+    """
+    Post-save para MovimientoInventario.
+    Marca los cortes posteriores a la fecha anterior y a la nueva.
+    """
+    anterior = getattr(instance, '_saldo_anterior', None)
+    if raw or created or anterior is None:
+        return
+
+    producto_id, almacen_id, fecha, empresa_id = anterior
+    ServicioSaldosInventario.marcar_pendientes(producto_id, almacen_id, fecha, empresa_id)
+    if (producto_id, almacen_id, fecha) != (instance.producto_id, instance.almacen_id, instance.fecha):
+        ServicioSaldosInventario.marcar_pendientes(
+            instance.producto_id, instance.almacen_id, instance.fecha, instance.empresa_id
+        )
+
+
+@receiver(post_delete, sender=MovimientoInventario)
+def movimiento_eliminado_marcar_saldos(sender, instance, **kwargs):
+    """
+    Post-delete para MovimientoInventario.
+    Marca los cortes posteriores al movimiento eliminado.
+    """
+    ServicioSaldosInventario.marcar_pendientes(
+        instance.producto_id, instance.almacen_id, instance.fecha, instance.empresa_id
+    )
+
+
+@receiver(post_delete, sender=Lote)
+def lote_eliminado_marcar_saldos(sender, instance, **kwargs):
+    """
+    Post-delete para Lote.
+    Sus movimientos quedaron sin lote y sus saldos se eliminaron en
+    cascada: los cortes del producto y almacén deben recalcularse.
+    """
+    ServicioSaldosInventario.marcar_pendientes(
+        instance.producto_id, instance.almacen_id, instance.fecha_ingreso, instance.empresa_id
+    )
+
+
+def _reservado(inventario_id, cantidad, estado):
+    """Aporte de una reserva al contador: (inventario_id, cantidad si está activa)"""
+    return inventario_id, (cantidad or 0) if estado in ESTADOS_RESERVA_ACTIVOS else 0
+
+
+@receiver(pre_save, sender=ReservaStock)
+def reserva_capturar_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Pre-save para ReservaStock.
+    Guarda el aporte previo de la reserva al stock reservado.
+    """
+    instance._reservado_anterior = None
+    if raw or not instance.pk:
+        return
+
+    anterior = sender.objects.filter(pk=instance.pk).values_list(
+        'inventario_id', 'cantidad_reservada', 'estado'
+    ).first()
+    if anterior is not None:
+        instance._reservado_anterior = _reservado(*anterior)
+
+
+@receiver(post_save, sender=ReservaStock)
+def reserva_actualizar_reservado(sender, instance, raw=False, **kwargs):
+    """
+    Post-save para ReservaStock.
+    Aplica al contador la diferencia entre el aporte anterior y el nuevo.
+    """
+    if raw:
+        return
+
+    inventario_id, cantidad = _reservado(instance.inventario_id, instance.cantidad_reservada, instance.estado)
+    anterior = getattr(instance, '_reservado_anterior', None)
+    if anterior is None:
+        ServicioInventario.ajustar_cantidad_reservada(inventario_id, cantidad)
+        return
+
+    inventario_anterior, cantidad_anterior = anterior
+    if inventario_anterior == inventario_id:
+        ServicioInventario.ajustar_cantidad_reservada(inventario_id, cantidad - cantidad_anterior)
+    else:
+        ServicioInventario.ajustar_cantidad_reservada(inventario_anterior, -cantidad_anterior)
+        ServicioInventario.ajustar_cantidad_reservada(inventario_id, cantidad)
+
+
+@receiver(post_delete, sender=ReservaStock)
+def reserva_eliminada_actualizar_reservado(sender, instance, **kwargs):
+    """
+    Post-delete para ReservaStock.
+    Descuenta la reserva eliminada si estaba activa.
+    """
+    inventario_id, cantidad = _reservado(instance.inventario_id, instance.cantidad_reservada, instance.estado)
+    ServicioInventario.ajustar_cantidad_reservada(inventario_id, -cantidad)
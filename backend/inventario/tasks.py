@@ -29,22 +29,23 @@ def generar_alertas_inventario(empresa_id: int = None) -> dict:
     """
     from .services import ServicioAlertasInventario
 
-    logger.info(f"Iniciando generación de alertas de inventario")
+    logger.info(f"Iniciando generación de alertas de inventario (empresa={empresa_id or 'todas'})")
 
     try:
-        resultado = ServicioAlertasInventario.generar_todas_las_alertas()
+        resultado = ServicioAlertasInventario.generar_todas_las_alertas(empresa_id=empresa_id)
 
         logger.info(
             f"Alertas de inventario generadas: {resultado['total']} "
             f"(bajo: {resultado['stock_bajo']}, "
             f"vencimiento: {resultado['vencimientos']}, "
-            f"excesivo: {resultado['stock_excesivo']})"
+            f"excesivo: {resultado['stock_excesivo']}), resueltas: {resultado['resueltas']}"
         )
 
         return {
             'status': 'completed',
             'alertas_creadas': resultado,
-            'total': resultado['total']
+            'total': resultado['total'],
+            'resueltas': resultado['resueltas']
         }
 
     except Exception as e:
@@ -117,3 +118,64 @@ def recalcular_costos_promedio(empresa_id: int, producto_id: int = None) -> dict
             'status': 'error',
             'error': str(e)
         }
+
+
+@task
+def generar_saldos_inventario(periodicidad: str = None) -> dict:
+    """
+    Genera los saldos por fecha de corte (SaldoInventario) vencidos y
+    recalcula los pendientes.
+
+    Programarla al inicio de cada período (por defecto, el día 1 de cada
+    mes; ver settings.INVENTARIO_PERIODICIDAD_SALDOS). Es idempotente:
+    sin cortes vencidos ni pendientes no escribe nada.
+
+    Args:
+        periodicidad: mensual, semanal o diaria (opcional, default: settings)
+
+    Returns:
+        dict con recalculados, cortes generados y filas escritas
+    """
+    from .services import ServicioSaldosInventario
+
+    logger.info("Iniciando generación de saldos de inventario")
+
+    try:
+        resultado = ServicioSaldosInventario.generar_pendientes(periodicidad=periodicidad)
+
+        logger.info(
+            f"Saldos de inventario: {len(resultado['cortes'])} cortes generados, "
+            f"{resultado['recalculados']} grupos recalculados, {resultado['filas']} filas"
+        )
+
+        return {'status': 'completed', **resultado}
+
+    except Exception as e:
+        logger.error(f"Error generando saldos de inventario: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+
+@task
+def vencer_reservas_stock() -> dict:
+    """
+    Marca como vencidas las reservas pendientes cuya fecha_vencimiento pasó
+    y libera su cantidad del stock reservado.
+
+    Returns:
+        dict con la cantidad de reservas vencidas
+    """
+    from .services import ServicioInventario
+
+    try:
+        vencidas = ServicioInventario.vencer_reservas()
+        return {'status': 'completed', 'vencidas': vencidas}
+
+    except Exception as e:
+        logger.error(f"Error venciendo reservas de stock: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
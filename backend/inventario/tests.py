@@ -619,6 +619,40 @@ class InventarioAPITest(APITestCase):
         self.assertIn('movimientos', response.data)
         self.assertIn('saldo_final', response.data)
 
+    def test_kardex_paginado_y_streaming(self):
+        """Test: Kardex por páginas con cursor y exportación CSV"""
+        for cantidad in ('10', '20', '30'):
+            MovimientoInventario.objects.create(
+                producto=self.producto,
+                almacen=self.almacen,
+                empresa=self.empresa,
+                tipo_movimiento='ENTRADA_COMPRA',
+                cantidad=Decimal(cantidad),
+                costo_unitario=Decimal('80.00'),
+                usuario=self.user
+            )
+
+        self.client.force_authenticate(user=self.user)
+        url = '/api/v1/inventario/movimientos/kardex/'
+        parametros = {'producto_id': self.producto.id, 'almacen_id': self.almacen.id}
+        response = self.client.get(url, {**parametros, 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['movimientos']), 2)
+        self.assertEqual(response.data['total_movimientos'], 3)
+
+        response = self.client.get(url, {**parametros, 'after': response.data['siguiente']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['movimientos'][0]['saldo'], Decimal('60'))
+        self.assertIsNone(response.data['siguiente'])
+
+        response = self.client.get(url, {**parametros, 'formato': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lineas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lineas), 4)
+
+        response = self.client.get(url, {**parametros, 'after': 'no-es-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_kardex_sin_parametros(self):
         """Test: Kardex sin parametros requeridos"""
         self.client.force_authenticate(user=self.user)
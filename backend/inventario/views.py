@@ -9,12 +9,15 @@ Implementa ViewSets con:
 - Optimización de queries
 """
 import logging
+from datetime import date
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Q, F
+from django.db.models import Q, F
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.db import transaction
 from .models import (
@@ -37,15 +40,20 @@ from .serializers import (
     ConteoFisicoSerializer, ConteoFisicoListSerializer,
     DetalleConteoFisicoSerializer
 )
-from .services import ServicioInventario, ServicioAlertasInventario
+from .services import ServicioInventario, ServicioAlertasInventario, ServicioKardex
 from .permissions import (
     CanGestionarAlmacen, CanGestionarInventario, CanGestionarMovimientos,
     CanGestionarReservas, CanGestionarLotes, CanGestionarAlertas,
     CanGestionarTransferencias, CanGestionarAjustes, CanAprobarAjustes,
     CanGestionarConteos, CanVerKardex
 )
-from .constants import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from .constants import (
+    PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, KARDEX_PAGE_SIZE_DEFAULT, KARDEX_PAGE_SIZE_MAX,
+    FORMATO_KARDEX_CSV, FORMATO_KARDEX_JSON, FORMATOS_KARDEX,
+    ERROR_KARDEX_PARAMETROS_REQUERIDOS, ERROR_KARDEX_FECHA, ERROR_KARDEX_CURSOR, ERROR_KARDEX_FORMATO,
+)
 from core.mixins import IdempotencyMixin, EmpresaFilterMixin, EmpresaAuditMixin
+from productos.models import Producto
 from usuarios.permissions import ActionBasedPermission
 
 logger = logging.getLogger(__name__)
@@ -213,134 +221,86 @@ class MovimientoInventarioViewSet(EmpresaFilterMixin, EmpresaAuditMixin, Idempot
     def kardex(self, request):
         """
         Endpoint de Kardex según especificaciones.
-        Devuelve el historial de movimientos por producto y almacén, con saldo acumulado.
+        Devuelve el historial de movimientos por producto y almacén, con saldo acumulado
+        (ver ServicioKardex).
 
         Parámetros de consulta:
         - producto_id: ID del producto (requerido)
         - almacen_id: ID del almacén (requerido)
         - fecha_desde: Fecha inicial (opcional, formato YYYY-MM-DD)
-        - fecha_hasta: Fecha final (opcional, formato YYYY-MM-DD)
+        - fecha_hasta: Fecha final, incluida (opcional, formato YYYY-MM-DD)
+        - after: Cursor <fecha,id> devuelto en 'siguiente' (opcional)
+        - page_size: Movimientos por página (opcional, máximo KARDEX_PAGE_SIZE_MAX)
+        - formato: json (default, paginado), csv o jsonl (todo el período en streaming)
         """
         producto_id = request.query_params.get('producto_id')
         almacen_id = request.query_params.get('almacen_id')
-        fecha_desde = request.query_params.get('fecha_desde')
-        fecha_hasta = request.query_params.get('fecha_hasta')
+        formato = request.query_params.get('formato', FORMATO_KARDEX_JSON)
 
         if not producto_id or not almacen_id:
-            return Response(
-                {'error': 'Los parámetros producto_id y almacen_id son requeridos'},
-                status=400
-            )
+            return Response({'error': ERROR_KARDEX_PARAMETROS_REQUERIDOS}, status=400)
+        if formato not in FORMATOS_KARDEX:
+            return Response({'error': ERROR_KARDEX_FORMATO}, status=400)
+
+        fechas = {}
+        for campo in ('fecha_desde', 'fecha_hasta'):
+            valor = request.query_params.get(campo)
+            try:
+                fechas[campo] = date.fromisoformat(valor) if valor else None
+            except ValueError:
+                return Response({'error': ERROR_KARDEX_FECHA.format(campo=campo)}, status=400)
 
         logger.info(f"Kardex consultado: producto={producto_id}, almacen={almacen_id}, usuario={request.user.id}")
 
-        # Filtrar movimientos por empresa también
         user = request.user
-        queryset = MovimientoInventario.objects.filter(
-            producto_id=producto_id,
-            almacen_id=almacen_id
-        )
-        if user.is_authenticated and hasattr(user, 'empresa') and user.empresa:
-            queryset = queryset.filter(empresa=user.empresa)
-        queryset = queryset.select_related('producto', 'almacen', 'usuario', 'lote').order_by('fecha')
-
-        # Filtros opcionales de fecha
-        if fecha_desde:
-            queryset = queryset.filter(fecha__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(fecha__lte=fecha_hasta)
-
-        # Calcular saldo inicial
-        if fecha_desde:
-            movimientos_anteriores = MovimientoInventario.objects.filter(
-                producto_id=producto_id,
-                almacen_id=almacen_id,
-                fecha__lt=fecha_desde
+        empresa = user.empresa if user.is_authenticated and getattr(user, 'empresa', None) else None
+        parametros = dict(producto_id=producto_id, almacen_id=almacen_id, empresa=empresa, **fechas)
+
+        if formato != FORMATO_KARDEX_JSON:
+            return self._kardex_streaming(formato, parametros)
+
+        try:
+            despues_de = (
+                ServicioKardex.interpretar_cursor(request.query_params['after'])
+                if request.query_params.get('after') else None
             )
-            if user.is_authenticated and hasattr(user, 'empresa') and user.empresa:
-                movimientos_anteriores = movimientos_anteriores.filter(empresa=user.empresa)
-
-            entradas = movimientos_anteriores.filter(
-                tipo_movimiento__in=[
-                    'ENTRADA_COMPRA', 'ENTRADA_AJUSTE', 'TRANSFERENCIA_ENTRADA',
-                    'DEVOLUCION_CLIENTE'
-                ]
-            ).aggregate(total=Sum('cantidad'))['total'] or 0
-
-            salidas = movimientos_anteriores.filter(
-                tipo_movimiento__in=[
-                    'SALIDA_VENTA', 'SALIDA_AJUSTE', 'TRANSFERENCIA_SALIDA',
-                    'DEVOLUCION_PROVEEDOR'
-                ]
-            ).aggregate(total=Sum('cantidad'))['total'] or 0
-
-            saldo_inicial = entradas - salidas
-        else:
-            saldo_inicial = 0
-
-        saldo_acumulado = saldo_inicial
-
-        # Construir respuesta con saldo acumulado
-        movimientos = []
-        for movimiento in queryset:
-            if movimiento.tipo_movimiento in [
-                'ENTRADA_COMPRA', 'ENTRADA_AJUSTE', 'TRANSFERENCIA_ENTRADA',
-                'DEVOLUCION_CLIENTE'
-            ]:
-                saldo_acumulado += movimiento.cantidad
-            elif movimiento.tipo_movimiento in [
-                'SALIDA_VENTA', 'SALIDA_AJUSTE', 'TRANSFERENCIA_SALIDA',
-                'DEVOLUCION_PROVEEDOR'
-            ]:
-                saldo_acumulado -= movimiento.cantidad
-
-            movimientos.append({
-                'id': movimiento.id,
-                'fecha': movimiento.fecha,
-                'tipo_movimiento': movimiento.tipo_movimiento,
-                'tipo_movimiento_display': movimiento.get_tipo_movimiento_display(),
-                'cantidad': float(movimiento.cantidad),
-                'costo_unitario': float(movimiento.costo_unitario),
-                'valor_total': float(movimiento.cantidad * movimiento.costo_unitario),
-                'saldo_acumulado': float(saldo_acumulado),
-                'referencia': movimiento.referencia,
-                'numero_serie': movimiento.numero_serie,
-                'numero_lote_proveedor': movimiento.numero_lote_proveedor,
-                'lote_codigo': movimiento.lote.codigo_lote if movimiento.lote else None,
-                'usuario': movimiento.usuario.username,
-                'notas': movimiento.notas,
-                'producto': {
-                    'id': movimiento.producto.id,
-                    'nombre': movimiento.producto.nombre,
-                    'codigo_sku': movimiento.producto.codigo_sku,
-                },
-                'almacen': {
-                    'id': movimiento.almacen.id,
-                    'nombre': movimiento.almacen.nombre,
-                },
-            })
+        except ValueError:
+            return Response({'error': ERROR_KARDEX_CURSOR}, status=400)
+        try:
+            limite = int(request.query_params.get('page_size', KARDEX_PAGE_SIZE_DEFAULT))
+        except ValueError:
+            limite = KARDEX_PAGE_SIZE_DEFAULT
+        limite = min(max(limite, 1), KARDEX_PAGE_SIZE_MAX)
 
-        producto = queryset.first().producto if queryset.exists() else None
-        almacen = queryset.first().almacen if queryset.exists() else None
+        kardex = ServicioKardex.obtener_kardex(despues_de=despues_de, limite=limite, **parametros)
+
+        producto = Producto.objects.filter(pk=producto_id).values('id', 'nombre', 'codigo_sku').first()
+        almacen = Almacen.objects.filter(pk=almacen_id).values('id', 'nombre').first()
+        siguiente = kardex['siguiente']
 
         return Response({
-            'producto': {
-                'id': producto.id if producto else producto_id,
-                'nombre': producto.nombre if producto else None,
-                'codigo_sku': producto.codigo_sku if producto else None,
-            },
-            'almacen': {
-                'id': almacen.id if almacen else almacen_id,
-                'nombre': almacen.nombre if almacen else None,
-            },
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-            'saldo_inicial': float(saldo_inicial),
-            'saldo_final': float(saldo_acumulado),
-            'total_movimientos': len(movimientos),
-            'movimientos': movimientos,
+            'producto': producto or {'id': producto_id, 'nombre': None, 'codigo_sku': None},
+            'almacen': almacen or {'id': almacen_id, 'nombre': None},
+            'fecha_desde': fechas['fecha_desde'],
+            'fecha_hasta': fechas['fecha_hasta'],
+            'saldo_inicial': kardex['saldo_inicial'],
+            'saldo_final': kardex['saldo_final'],
+            'total_movimientos': kardex['saldo_final']['total_movimientos'],
+            'movimientos': kardex['movimientos'],
+            'siguiente': siguiente,
+            'siguiente_url': (
+                replace_query_param(request.build_absolute_uri(), 'after', siguiente) if siguiente else None
+            ),
         })
 
+    def _kardex_streaming(self, formato, parametros):
+        """Exporta todo el Kardex del período como CSV o JSON lines, fila por fila."""
+        content_type = 'text/csv; charset=utf-8' if formato == FORMATO_KARDEX_CSV else 'application/x-ndjson'
+        response = StreamingHttpResponse(ServicioKardex.exportar(formato, **parametros), content_type=content_type)
+        nombre = f"kardex_{parametros['producto_id']}_{parametros['almacen_id']}.{formato}"
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        return response
+
 
 # =============================================================================
 # VIEWSET DE RESERVAS
@@ -535,9 +495,10 @@ class AlertaInventarioViewSet(EmpresaFilterMixin, EmpresaAuditMixin, Idempotency
 
     @action(detail=False, methods=['post'])
     def generar_alertas(self, request):
-        """Genera todas las alertas de inventario."""
+        """Genera las alertas de inventario de la empresa del usuario."""
         try:
-            resultado = ServicioAlertasInventario.generar_todas_las_alertas()
+            empresa_id = getattr(request.user, 'empresa_id', None)
+            resultado = ServicioAlertasInventario.generar_todas_las_alertas(empresa_id=empresa_id)
             logger.info(f"Alertas generadas: {resultado['total']} (usuario={request.user.id})")
             return Response({
                 'mensaje': 'Alertas generadas exitosamente',
@@ -651,6 +612,7 @@ class TransferenciaInventarioViewSet(EmpresaFilterMixin, EmpresaAuditMixin, Idem
         logger.info(f"Transferencia actualizada: {instance.numero_transferencia} (usuario={self.request.user.id})")
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def enviar(self, request, pk=None):
         """Marca la transferencia como enviada."""
         transferencia = self.get_object()
@@ -665,26 +627,30 @@ class TransferenciaInventarioViewSet(EmpresaFilterMixin, EmpresaAuditMixin, Idem
         transferencia.save()
 
         # Registrar movimientos de salida para cada detalle
-        detalles = transferencia.detalles.all()
-        for detalle in detalles:
-            if detalle.cantidad_enviada > 0:
-                ServicioInventario.registrar_movimiento(
-                    producto=detalle.producto,
-                    almacen=transferencia.almacen_origen,
-                    tipo_movimiento='TRANSFERENCIA_SALIDA',
-                    cantidad=detalle.cantidad_enviada,
-                    costo_unitario=detalle.costo_unitario,
-                    usuario=request.user,
-                    empresa=transferencia.empresa,
-                    referencia=f"TRF-{transferencia.numero_transferencia}",
-                    lote=detalle.lote
-                )
+        detalles = transferencia.detalles.select_related('producto', 'lote')
+        ServicioInventario.registrar_movimientos_lote(
+            [
+                {
+                    'producto': detalle.producto,
+                    'almacen': transferencia.almacen_origen,
+                    'tipo_movimiento': 'TRANSFERENCIA_SALIDA',
+                    'cantidad': detalle.cantidad_enviada,
+                    'costo_unitario': detalle.costo_unitario,
+                    'lote': detalle.lote,
+                }
+                for detalle in detalles if detalle.cantidad_enviada > 0
+            ],
+            usuario=request.user,
+            empresa=transferencia.empresa,
+            referencia=f"TRF-{transferencia.numero_transferencia}"
+        )
 
         logger.info(f"Transferencia enviada: {transferencia.numero_transferencia} (usuario={request.user.id})")
         serializer = self.get_serializer(transferencia)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def recibir(self, request, pk=None):
         """Marca la transferencia como recibida."""
         transferencia = self.get_object()
@@ -700,20 +666,23 @@ class TransferenciaInventarioViewSet(EmpresaFilterMixin, EmpresaAuditMixin, Idem
         transferencia.save()
 
         # Registrar movimientos de entrada para cada detalle recibido
-        detalles = transferencia.detalles.all()
-        for detalle in detalles:
-            if detalle.cantidad_recibida > 0:
-                ServicioInventario.registrar_movimiento(
-                    producto=detalle.producto,
-                    almacen=transferencia.almacen_destino,
-                    tipo_movimiento='TRANSFERENCIA_ENTRADA',
-                    cantidad=detalle.cantidad_recibida,
-                    costo_unitario=detalle.costo_unitario,
-                    usuario=request.user,
-                    empresa=transferencia.empresa,
-                    referencia=f"TRF-{transferencia.numero_transferencia}",
-                    lote=detalle.lote
-                )
+        detalles = transferencia.detalles.select_related('producto', 'lote')
+        ServicioInventario.registrar_movimientos_lote(
+            [
+                {
+                    'producto': detalle.producto,
+                    'almacen': transferencia.almacen_destino,
+                    'tipo_movimiento': 'TRANSFERENCIA_ENTRADA',
+                    'cantidad': detalle.cantidad_recibida,
+                    'costo_unitario': detalle.costo_unitario,
+                    'lote': detalle.lote,
+                }
+                for detalle in detalles if detalle.cantidad_recibida > 0
+            ],
+            usuario=request.user,
+            empresa=transferencia.empresa,
+            referencia=f"TRF-{transferencia.numero_transferencia}"
+        )
 
         logger.info(f"Transferencia recibida: {transferencia.numero_transferencia} (usuario={request.user.id})")
         serializer = self.get_serializer(transferencia)
@@ -872,23 +841,24 @@ class AjusteInventarioViewSet(EmpresaFilterMixin, EmpresaAuditMixin, Idempotency
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Aplicar cada detalle del ajuste
-        for detalle in ajuste.detalles.all():
-            if detalle.diferencia != 0:
-                tipo_movimiento = 'ENTRADA_AJUSTE' if detalle.diferencia > 0 else 'SALIDA_AJUSTE'
-
-                ServicioInventario.registrar_movimiento(
-                    producto=detalle.producto,
-                    almacen=ajuste.almacen,
-                    tipo_movimiento=tipo_movimiento,
-                    cantidad=abs(detalle.diferencia),
-                    costo_unitario=detalle.costo_unitario,
-                    usuario=request.user,
-                    empresa=ajuste.empresa,
-                    referencia=f"AJUSTE-{ajuste.id}",
-                    lote=detalle.lote,
-                    notas=f"Ajuste: {ajuste.motivo}"
-                )
+        # Aplicar todos los detalles del ajuste en un solo lote
+        ServicioInventario.registrar_movimientos_lote(
+            [
+                {
+                    'producto': detalle.producto,
+                    'almacen': ajuste.almacen,
+                    'tipo_movimiento': 'ENTRADA_AJUSTE' if detalle.diferencia > 0 else 'SALIDA_AJUSTE',
+                    'cantidad': abs(detalle.diferencia),
+                    'costo_unitario': detalle.costo_unitario,
+                    'lote': detalle.lote,
+                }
+                for detalle in ajuste.detalles.select_related('producto', 'lote') if detalle.diferencia != 0
+            ],
+            usuario=request.user,
+            empresa=ajuste.empresa,
+            referencia=f"AJUSTE-{ajuste.id}",
+            notas=f"Ajuste: {ajuste.motivo}"
+        )
 
         ajuste.estado = 'PROCESADO'
         ajuste.save()
@@ -1058,7 +1028,8 @@ class ConteoFisicoViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
         )
 
         # Crear detalles del ajuste
-        for detalle_conteo in conteo.detalles.all():
+        detalles = list(conteo.detalles.select_related('producto', 'lote'))
+        for detalle_conteo in detalles:
             if detalle_conteo.diferencia != 0:
                 DetalleAjusteInventario.objects.create(
                     ajuste=ajuste,
@@ -1070,22 +1041,23 @@ class ConteoFisicoViewSet(EmpresaFilterMixin, EmpresaAuditMixin, IdempotencyMixi
                 )
 
         # Procesar el ajuste automáticamente
-        for detalle_conteo in conteo.detalles.all():
-            if detalle_conteo.diferencia != 0:
-                tipo_movimiento = 'ENTRADA_AJUSTE' if detalle_conteo.diferencia > 0 else 'SALIDA_AJUSTE'
-
-                ServicioInventario.registrar_movimiento(
-                    producto=detalle_conteo.producto,
-                    almacen=conteo.almacen,
-                    tipo_movimiento=tipo_movimiento,
-                    cantidad=abs(detalle_conteo.diferencia),
-                    costo_unitario=detalle_conteo.producto.precio_venta_base,
-                    usuario=request.user,
-                    empresa=conteo.empresa,
-                    referencia=f"CONTEO-{conteo.numero_conteo}",
-                    lote=detalle_conteo.lote,
-                    notas=f"Ajuste por conteo físico {conteo.numero_conteo}"
-                )
+        ServicioInventario.registrar_movimientos_lote(
+            [
+                {
+                    'producto': detalle_conteo.producto,
+                    'almacen': conteo.almacen,
+                    'tipo_movimiento': 'ENTRADA_AJUSTE' if detalle_conteo.diferencia > 0 else 'SALIDA_AJUSTE',
+                    'cantidad': abs(detalle_conteo.diferencia),
+                    'costo_unitario': detalle_conteo.producto.precio_venta_base,
+                    'lote': detalle_conteo.lote,
+                }
+                for detalle_conteo in detalles if detalle_conteo.diferencia != 0
+            ],
+            usuario=request.user,
+            empresa=conteo.empresa,
+            referencia=f"CONTEO-{conteo.numero_conteo}",
+            notas=f"Ajuste por conteo físico {conteo.numero_conteo}"
+        )
 
         conteo.estado = 'AJUSTADO'
         conteo.save()
@@ -10,6 +10,8 @@ from decimal import Decimal
 from datetime import date
 from django.db.models import Sum, Q
 
+from core.fechas import filtro_rango, rango_dias
+
 from .models import Vendedor
 from .constants import (
     ESTADOS_FACTURA_PARA_COMISION,
@@ -188,10 +190,7 @@ class ServicioVendedor:
             estado__in=ESTADOS_FACTURA_PARA_COMISION
         )
 
-        if fecha_inicio:
-            facturas = facturas.filter(fecha__date__gte=fecha_inicio)
-        if fecha_fin:
-            facturas = facturas.filter(fecha__date__lte=fecha_fin)
+        facturas = facturas.filter(**filtro_rango('fecha', *rango_dias(fecha_inicio, fecha_fin)))
 
         monto_total_ventas = facturas.aggregate(total=Sum('total'))['total'] or Decimal('0')
         monto_comisiones = (monto_total_ventas * vendedor.comision_porcentaje) / Decimal('100')